@@ -0,0 +1,59 @@
+"""Time the chat picker's type-to-filter keystrokes on a large chat list.
+
+Usage:
+    uv run python scripts/bench_chat_picker.py [chat_count] [repeats]
+
+Builds synthetic chat records, types a query one character at a time (then
+deletes and retypes the end of it) into a ``ChatFilter``, and prints the
+best-of-N time of the slowest keystroke and of the whole sequence.
+"""
+
+import sys
+import time
+
+from polychat.ui.chat_ui import ChatFilter
+
+KEYSTROKES = (
+    "t", "to", "top", "topi", "topic", "topic ", "topic 4", "topic 42", "topic 4"
+)
+
+
+def build_chats(chat_count: int) -> list[dict]:
+    return [
+        {
+            "filename": f"chat-{index:05d}.json",
+            "path": f"/chats/chat-{index:05d}.json",
+            "title": f"Topic {index % 97} notes",
+        }
+        for index in range(chat_count)
+    ]
+
+
+def type_query(chats: list[dict]) -> tuple[float, float]:
+    chat_filter = ChatFilter()
+    chat_filter.add(chats)
+    slowest = 0.0
+    started = time.perf_counter()
+    for query in KEYSTROKES:
+        keystroke = time.perf_counter()
+        chat_filter.set_query(query)
+        slowest = max(slowest, time.perf_counter() - keystroke)
+    return slowest, time.perf_counter() - started
+
+
+def main() -> None:
+    chat_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    chats = build_chats(chat_count)
+    runs = [type_query(chats) for _ in range(repeats)]
+    slowest = min(run[0] for run in runs)
+    total = min(run[1] for run in runs)
+    print(
+        f"{chat_count} chats, {len(KEYSTROKES)} keystrokes: "
+        f"slowest {slowest * 1000:.1f} ms, all {total * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark chat serialization across the available JSON codecs.
+
+Usage:
+    uv run python scripts/bench_json_codec.py [message_count] [repeats]
+
+Builds a synthetic long chat, checks that every codec produces byte-identical
+output, and prints the best-of-N dump and load times per codec.
+"""
+
+import sys
+import time
+
+from polychat.json_codec import available_codecs
+
+
+def build_chat(message_count: int) -> dict:
+    messages = []
+    for index in range(message_count):
+        role = "user" if index % 2 == 0 else "assistant"
+        message = {
+            "timestamp": "2026-01-01T00:00:00+00:00",
+            "role": role,
+            "content": [
+                f"Paragraph {index} with some ünïcode text ✓ and a 日本語 phrase.",
+                "",
+                "A longer line of research notes that mentions costs, sources, and "
+                "follow-up questions so the line length resembles real chats.",
+            ] * 4,
+        }
+        if role == "assistant":
+            message["model"] = "claude-haiku-4-5"
+            message["citations"] = [
+                {"title": f"Source {n}", "url": f"https://example.com/{index}/{n}"}
+                for n in range(3)
+            ]
+        messages.append(message)
+
+    return {
+        "metadata": {
+            "title": "Benchmark chat",
+            "summary": None,
+            "system_prompt": None,
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "updated_at": "2026-01-01T00:00:00+00:00",
+        },
+        "messages": messages,
+    }
+
+
+def best_of(repeats: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    chat = build_chat(message_count)
+    codecs = available_codecs()
+    reference = codecs["json"].dumps_pretty_bytes(chat)
+    print(f"{message_count} messages, {len(reference) / 1_000_000:.1f} MB on disk")
+
+    baseline = None
+    for name, codec in codecs.items():
+        encoded = codec.dumps_pretty_bytes(chat)
+        if encoded != reference:
+            raise SystemExit(f"{name}: output differs from stdlib json")
+
+        dump_time = best_of(repeats, lambda: codec.dumps_pretty_bytes(chat))
+        load_time = best_of(repeats, lambda: codec.loads(reference))
+        if baseline is None:
+            baseline = (dump_time, load_time)
+        print(
+            f"{name:>8}: dump {dump_time * 1000:8.1f} ms "
+            f"({baseline[0] / dump_time:5.1f}x)  "
+            f"load {load_time * 1000:8.1f} ms "
+            f"({baseline[1] / load_time:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare memory held by a loaded chat as plain dicts vs compact messages.
+
+Usage:
+    uv run python scripts/bench_message_memory.py [message_count]
+
+Writes a synthetic chat (short and long lines, blank lines, alternating
+user/assistant turns) to a temporary file, then measures with tracemalloc
+how much memory its messages keep allocated when read with ``json.load``
+(plain dicts with line lists) and with ``chat.load_chat`` (``Message``).
+"""
+
+import json
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from polychat.chat import load_chat
+
+
+def build_chat(message_count: int) -> dict:
+    rng = random.Random(1)
+    messages = []
+    for index in range(message_count):
+        role = "user" if index % 2 == 0 else "assistant"
+        lines = []
+        for line_number in range(rng.randint(3, 40)):
+            roll = rng.random()
+            if roll < 0.25:
+                lines.append("")
+            elif roll < 0.6:
+                lines.append(f"- bullet item {line_number} with a few words")
+            else:
+                lines.append(
+                    f"A longer line of prose that explains point {line_number} "
+                    "about the topic at hand."
+                )
+        message = {
+            "timestamp": f"2026-01-01T00:{index % 60:02d}:00+00:00",
+            "role": role,
+            "content": lines,
+        }
+        if role == "assistant":
+            message["model"] = "claude-haiku-4-5"
+        messages.append(message)
+
+    return {
+        "metadata": {
+            "title": "Benchmark chat",
+            "summary": None,
+            "system_prompt": None,
+            "created_at": None,
+            "updated_at": None,
+        },
+        "messages": messages,
+    }
+
+
+def retained_bytes(load) -> int:
+    tracemalloc.start()
+    messages = load()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return current
+
+
+def main() -> None:
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "chat.json"
+        path.write_text(
+            json.dumps(build_chat(message_count), indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+        as_dicts = retained_bytes(
+            lambda: json.loads(path.read_text(encoding="utf-8"))["messages"]
+        )
+        as_messages = retained_bytes(lambda: load_chat(str(path))["messages"])
+
+    print(f"{message_count} messages")
+    print(f"    dict: {as_dicts / 1_000_000:8.2f} MB")
+    print(f" Message: {as_messages / 1_000_000:8.2f} MB ({as_dicts / as_messages:.2f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
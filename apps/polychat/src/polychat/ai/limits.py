@@ -3,9 +3,14 @@
 Resolved precedence order:
 1. ``ai_limits.default``
 2. ``ai_limits.providers.<provider>``
-3. ``ai_limits.helper`` (helper invocations only)
+3. ``ai_limits.models.<model>``
+4. ``ai_limits.helper`` (helper invocations only)
 
 All fields are optional; ``None`` means "omit this parameter from provider calls".
+
+The same blocks hold the context budget (``max_context_tokens``,
+``context_strategy`` and ``retrieval_turns``) applied to assistant requests
+by ``context_budget``.
 """
 
 from __future__ import annotations
@@ -15,6 +20,11 @@ from typing import Any, Mapping, TypedDict
 
 DEFAULT_CLAUDE_MAX_OUTPUT_TOKENS = 4096
 
+# How an over-budget history is trimmed (see ``context_budget``):
+# "tail" keeps the newest turns, "first_and_tail" also keeps the first turn.
+CONTEXT_STRATEGIES = ("tail", "first_and_tail")
+DEFAULT_CONTEXT_STRATEGY = "tail"
+
 
 class AIRequestLimits(TypedDict, total=False):
     """Resolved per-request limits consumed by providers.
@@ -26,6 +36,14 @@ class AIRequestLimits(TypedDict, total=False):
     search_max_output_tokens: int | None
 
 
+class ContextLimits(TypedDict, total=False):
+    """Resolved context budget for assistant requests."""
+
+    max_context_tokens: int | None
+    context_strategy: str
+    retrieval_turns: int | None
+
+
 def _normalize_optional_limit(raw_value: Any) -> int | None:
     """Normalize a configured limit value to positive int or None."""
     if raw_value is None:
@@ -51,11 +69,38 @@ def _read_limit_block(config: Mapping[str, Any] | None) -> AIRequestLimits:
     return limits
 
 
+def _iter_limit_blocks(
+    profile: Mapping[str, Any] | None,
+    provider: str,
+    model: str | None,
+    helper: bool,
+) -> list[Mapping[str, Any]]:
+    """Return the configured limit blocks in precedence order (last wins)."""
+    if not isinstance(profile, Mapping):
+        return []
+
+    raw_limits = profile.get("ai_limits")
+    if not isinstance(raw_limits, Mapping):
+        return []
+
+    blocks = [raw_limits.get("default")]
+    providers = raw_limits.get("providers")
+    if isinstance(providers, Mapping):
+        blocks.append(providers.get(provider))
+    models = raw_limits.get("models")
+    if model is not None and isinstance(models, Mapping):
+        blocks.append(models.get(model))
+    if helper:
+        blocks.append(raw_limits.get("helper"))
+    return [block for block in blocks if isinstance(block, Mapping)]
+
+
 def resolve_profile_limits(
     profile: Mapping[str, Any] | None,
     provider: str,
     *,
     helper: bool = False,
+    model: str | None = None,
 ) -> AIRequestLimits:
     """Resolve effective limits from profile-level configuration.
 
@@ -65,28 +110,44 @@ def resolve_profile_limits(
       "ai_limits": {
         "default": {...},
         "providers": {"claude": {...}},
+        "models": {"claude-haiku-4-5": {...}},
         "helper": {...}
       }
     }
     """
-    if not isinstance(profile, Mapping):
-        return {}
-
-    raw_limits = profile.get("ai_limits")
-    if not isinstance(raw_limits, Mapping):
-        return {}
-
     resolved: AIRequestLimits = {}
-    resolved.update(_read_limit_block(raw_limits.get("default")))
-
-    providers = raw_limits.get("providers")
-    if isinstance(providers, Mapping):
-        resolved.update(_read_limit_block(providers.get(provider)))
+    for block in _iter_limit_blocks(profile, provider, model, helper):
+        resolved.update(_read_limit_block(block))
+    return resolved
 
-    if helper:
-        resolved.update(_read_limit_block(raw_limits.get("helper")))
 
-    return resolved
+def resolve_context_limits(
+    profile: Mapping[str, Any] | None,
+    provider: str,
+    model: str | None = None,
+) -> ContextLimits:
+    """Resolve the context budget for an assistant request.
+
+    ``max_context_tokens`` is None when no budget is configured (the whole
+    history is sent). Invalid strategies fall back to the default.
+    ``retrieval_turns`` is how many relevant left-out turns to bring back
+    (None for none; see ``chat_retrieval``).
+    """
+    max_context_tokens: int | None = None
+    strategy = DEFAULT_CONTEXT_STRATEGY
+    retrieval_turns: int | None = None
+    for block in _iter_limit_blocks(profile, provider, model, helper=False):
+        if "max_context_tokens" in block:
+            max_context_tokens = _normalize_optional_limit(block.get("max_context_tokens"))
+        if block.get("context_strategy") in CONTEXT_STRATEGIES:
+            strategy = block["context_strategy"]
+        if "retrieval_turns" in block:
+            retrieval_turns = _normalize_optional_limit(block.get("retrieval_turns"))
+    return {
+        "max_context_tokens": max_context_tokens,
+        "context_strategy": strategy,
+        "retrieval_turns": retrieval_turns,
+    }
 
 
 def select_max_output_tokens(limits: Mapping[str, Any], *, search: bool) -> int | None:
@@ -123,13 +184,14 @@ def resolve_request_limits(
     *,
     helper: bool = False,
     search: bool = False,
+    model: str | None = None,
 ) -> AIRequestLimits:
     """Resolve request-level limits for one provider invocation.
 
     This applies profile precedence rules, mode-specific selection, and any
     provider-required fallback defaults.
     """
-    profile_limits = resolve_profile_limits(profile, provider, helper=helper)
+    profile_limits = resolve_profile_limits(profile, provider, helper=helper, model=model)
     max_output_tokens = select_max_output_tokens(profile_limits, search=search)
     if max_output_tokens is None:
         max_output_tokens = default_max_output_tokens_for_provider(provider)
@@ -5,6 +5,7 @@ import time
 from typing import AsyncIterator, Optional
 
 from .app_state import SessionState
+from .attachments import expand_attachments_async
 from .keys.loader import load_api_key, validate_api_key
 from .logging_utils import (
     extract_http_error_context,
@@ -22,6 +23,7 @@ from .ai.deepseek_provider import DeepSeekProvider
 from .ai.limits import resolve_request_limits
 from .ai.types import AIResponseMetadata
 from .timeouts import resolve_ai_read_timeout, resolve_profile_timeout
+from .tokens import estimate_tokens
 
 ProviderInstance = (
     OpenAIProvider
@@ -128,8 +130,12 @@ async def send_message_to_ai(
         limit_provider,
         helper=False,
         search=search,
+        model=model,
     )
     max_output_tokens = resolved_limits.get("max_output_tokens")
+    # Inline /attach blobs; the chat keeps only their hash references.
+    messages = await expand_attachments_async(messages, (profile or {}).get("chats_dir"))
+    input_estimate = estimate_tokens(messages, limit_provider, system_prompt)
     log_event(
         "ai_request",
         level=logging.INFO,
@@ -139,6 +145,8 @@ async def send_message_to_ai(
         chat_file=chat_path,
         message_count=len(messages),
         input_chars=estimate_message_chars(messages),
+        input_tokens_est=input_estimate.tokens,
+        token_estimator=input_estimate.estimator,
         has_system_prompt=bool(system_prompt),
         max_output_tokens=max_output_tokens,
     )
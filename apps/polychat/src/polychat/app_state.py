@@ -5,6 +5,8 @@ from dataclasses import dataclass, field
 from typing import Any, Optional
 
 from . import hex_id
+from .chat_storage import resolve_storage_options
+from .chat_window import WindowedMessages, iter_loaded_messages
 from .constants import EMOJI_WARNING
 
 
@@ -31,7 +33,11 @@ class SessionState:
     secret_mode: bool = False
     secret_base_messages: list = field(default_factory=list)
     search_mode: bool = False
+    pending_attachments: list[dict[str, Any]] = field(default_factory=list)
     hex_id_set: set[str] = field(default_factory=set)
+    # Message hex ID -> index in chat["messages"]; index -> hex ID is the
+    # message's own "hex_id" key.
+    hex_index: dict[str, int] = field(default_factory=dict)
     _provider_cache: dict[tuple[str, str, int | float | None], Any] = field(
         default_factory=dict
     )
@@ -91,23 +97,71 @@ class SessionState:
         self._provider_cache.clear()
 
 
+def uses_stable_hex_ids(session: SessionState) -> bool:
+    """Whether message hex IDs are derived from content (chat_storage.stable_hex_ids)."""
+    return resolve_storage_options(session.profile).stable_hex_ids
+
+
 def initialize_message_hex_ids(session: SessionState) -> None:
-    """Initialize hex IDs for all messages in the current chat."""
+    """Initialize hex IDs for all loaded messages in the current chat.
+
+    For a lazily loaded chat, older messages get their hex IDs when they are
+    paged in. With ``chat_storage.stable_hex_ids`` nothing is assigned here:
+    IDs are derived from message content when first needed (see
+    ``SessionManager.get_message_hex_id``).
+    """
     session.hex_id_set.clear()
+    session.hex_index.clear()
+
+    if uses_stable_hex_ids(session):
+        return
 
     if session.chat and "messages" in session.chat:
-        for message in session.chat["messages"]:
+        chat_data = session.chat
+        messages = chat_data["messages"]
+        for index, message in iter_loaded_messages(messages):
             message["hex_id"] = hex_id.generate_hex_id(session.hex_id_set)
-
-
-def assign_new_message_hex_id(session: SessionState, message_index: int) -> str:
-    """Assign hex ID to a newly added message."""
+            session.hex_index[message["hex_id"]] = index
+
+        if isinstance(messages, WindowedMessages):
+            def _assign_paged_in(older: list[dict[str, Any]]) -> None:
+                if session.chat is not chat_data:
+                    return
+                # Paged-in messages take the indices before the window, so
+                # the indices already in hex_index stay valid.
+                for index, message in enumerate(older):
+                    message["hex_id"] = hex_id.generate_hex_id(session.hex_id_set)
+                    session.hex_index[message["hex_id"]] = index
+
+            messages.on_materialize = _assign_paged_in
+
+
+def assign_new_message_hex_id(
+    session: SessionState,
+    message_index: int,
+    reserved_hex_id: Optional[str] = None,
+) -> str:
+    """Assign hex ID to a newly added message.
+
+    Args:
+        session: Session state
+        message_index: Index of the message in chat["messages"]
+        reserved_hex_id: Hex ID reserved earlier (e.g. shown while the
+            response was streaming) to use instead of generating one
+    """
     messages = session.chat.get("messages", []) if isinstance(session.chat, dict) else []
     if message_index < 0 or message_index >= len(messages):
         raise IndexError(f"Message index {message_index} out of range")
 
-    new_hex_id = hex_id.generate_hex_id(session.hex_id_set)
+    if reserved_hex_id is not None:
+        new_hex_id = reserved_hex_id
+        session.hex_id_set.add(new_hex_id)
+    elif uses_stable_hex_ids(session):
+        new_hex_id = hex_id.derive_hex_id(messages[message_index], session.hex_id_set)
+    else:
+        new_hex_id = hex_id.generate_hex_id(session.hex_id_set)
     messages[message_index]["hex_id"] = new_hex_id
+    session.hex_index[new_hex_id] = message_index
     return new_hex_id
 
 
@@ -0,0 +1,162 @@
+"""Content-addressed attachment store.
+
+``/attach <path>`` copies a text file into ``<chats_dir>/.attachments/`` under
+the SHA-256 of its bytes and the next user message records only a reference:
+
+    "attachments": [{"name": "notes.md", "sha256": "<hex>", "size": 1234}]
+
+Identical files share one blob across all chats, and chat JSON (and its git
+diffs) stay small. ``expand_attachments`` inlines the referenced text right
+before messages are handed to a provider; the saved chat never contains it.
+The async send path uses ``expand_attachments_async``, which reads the blobs
+in a worker thread so a large attachment does not block the event loop.
+Blobs are not deleted when chats are, since other chats may reference them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import secrets
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .constants import ATTACHMENT_CHUNK_SIZE, ATTACHMENT_MAX_BYTES, ATTACHMENTS_DIR_NAME
+
+
+def attachments_dir(chats_dir: str | Path) -> Path:
+    """Return the blob store directory for a chats directory."""
+    return Path(chats_dir) / ATTACHMENTS_DIR_NAME
+
+
+def blob_path(chats_dir: str | Path, sha256: str) -> Path:
+    """Return where the blob with this hash is stored."""
+    return attachments_dir(chats_dir) / sha256[:2] / sha256
+
+
+def store_attachment(chats_dir: str | Path, source: str | Path) -> dict[str, Any]:
+    """Stream a text file into the blob store.
+
+    The file is hashed while it is copied, so it is read once and never held
+    in memory whole. An existing blob with the same hash is reused.
+
+    Args:
+        chats_dir: Chats directory that owns the store
+        source: File to attach
+
+    Returns:
+        Attachment reference: {"name", "sha256", "size"}
+
+    Raises:
+        FileNotFoundError: If the source doesn't exist
+        ValueError: If the source is not a file, too large, or not UTF-8 text
+    """
+    source = Path(source)
+    if not source.is_file():
+        if not source.exists():
+            raise FileNotFoundError(f"File not found: {source}")
+        raise ValueError(f"Not a file: {source}")
+    if source.stat().st_size > ATTACHMENT_MAX_BYTES:
+        raise ValueError(
+            f"File is too large to attach (limit {ATTACHMENT_MAX_BYTES // (1024 * 1024)} MB): "
+            f"{source.name}"
+        )
+
+    store = attachments_dir(chats_dir)
+    store.mkdir(parents=True, exist_ok=True)
+    temp_path = store / f".{secrets.token_hex(8)}.tmp"
+
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    size = 0
+    try:
+        with open(source, "rb") as src, open(temp_path, "xb") as dst:
+            while chunk := src.read(ATTACHMENT_CHUNK_SIZE):
+                size += len(chunk)
+                if size > ATTACHMENT_MAX_BYTES:
+                    raise ValueError(f"File is too large to attach: {source.name}")
+                decoder.decode(chunk)
+                digest.update(chunk)
+                dst.write(chunk)
+            decoder.decode(b"", final=True)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        sha256 = digest.hexdigest()
+        target = blob_path(chats_dir, sha256)
+        if target.exists():
+            temp_path.unlink()
+        else:
+            target.parent.mkdir(exist_ok=True)
+            os.replace(temp_path, target)
+    except UnicodeDecodeError:
+        temp_path.unlink(missing_ok=True)
+        raise ValueError(f"Only UTF-8 text files can be attached: {source.name}") from None
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return {"name": source.name, "sha256": sha256, "size": size}
+
+
+def read_attachment(chats_dir: str | Path, reference: dict[str, Any]) -> Optional[str]:
+    """Return attachment text, or None when the blob is missing or unreadable."""
+    sha256 = reference.get("sha256")
+    if not isinstance(sha256, str) or not sha256:
+        return None
+    try:
+        return blob_path(chats_dir, sha256).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        logging.warning("Attachment %s unavailable: %s", sha256, e)
+        return None
+
+
+def format_attachment(reference: dict[str, Any], text: Optional[str]) -> list[str]:
+    """Render one attachment as content lines for the AI."""
+    name = reference.get("name") or reference.get("sha256")
+    if text is None:
+        return [f"[Attachment unavailable: {name}]"]
+    return [f"[Attachment: {name}]", *text.split("\n"), f"[End of attachment: {name}]"]
+
+
+def expand_attachments(
+    messages: Iterable[dict[str, Any]], chats_dir: Optional[str | Path]
+) -> list[dict[str, Any]]:
+    """Inline attachment text into the messages about to be sent.
+
+    Messages without attachments are passed through unchanged; the others
+    are replaced by plain dicts whose content ends with the attachment text.
+    The chat itself is not modified.
+    """
+    expanded = []
+    for message in messages:
+        references = message.get("attachments")
+        if not references or chats_dir is None:
+            expanded.append(message)
+            continue
+
+        content = list(message.get("content", []))
+        for reference in references:
+            if content:
+                content.append("")
+            content.extend(format_attachment(reference, read_attachment(chats_dir, reference)))
+
+        expanded_message = {k: v for k, v in message.items() if k != "attachments"}
+        expanded_message["content"] = content
+        expanded.append(expanded_message)
+    return expanded
+
+
+async def expand_attachments_async(
+    messages: list[dict[str, Any]], chats_dir: Optional[str | Path]
+) -> list[dict[str, Any]]:
+    """``expand_attachments`` with blob reads in a worker thread.
+
+    Messages without any attachment are returned without a thread hop.
+    """
+    if chats_dir is None or not any(message.get("attachments") for message in messages):
+        return list(messages)
+    return await asyncio.to_thread(expand_attachments, messages, chats_dir)
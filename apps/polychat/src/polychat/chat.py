@@ -4,13 +4,29 @@ This module handles loading, saving, and manipulating chat history data,
 including messages and metadata.
 """
 
-import json
-from copy import deepcopy
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Mapping
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Any
-import aiofiles
-
+from typing import Any, Optional
+
+from . import (
+    chat_archive,
+    chat_compact,
+    chat_index,
+    chat_journal,
+    chat_search,
+    chat_segments,
+    chat_stream,
+)
+from .chat_message import Message
+from .chat_storage import ChatStorageOptions
+from .chat_window import WindowedMessages
+from .constants import CHAT_JOURNAL_COMPACT_THRESHOLD
+from .file_io import write_bytes_atomic
+from .json_codec import get_codec
 from .text_formatting import text_to_lines
 
 
@@ -43,31 +59,306 @@ def _normalize_content(raw_content: Any) -> list[str]:
     raise ValueError("Invalid message content: expected string or list")
 
 
-def _normalize_messages(raw_messages: Any) -> list[dict[str, Any]]:
-    """Validate message list and normalize content shape."""
+def _normalize_messages(raw_messages: Any, start: int = 0) -> list[dict[str, Any]]:
+    """Validate message list and normalize content shape.
+
+    Args:
+        raw_messages: Raw message list
+        start: Chat index of the first message (for error messages)
+    """
     if not isinstance(raw_messages, list):
         raise ValueError("Invalid chat messages: expected list")
 
-    normalized: list[dict[str, Any]] = []
-    for index, raw_message in enumerate(raw_messages):
-        if not isinstance(raw_message, dict):
-            raise ValueError(f"Invalid chat message at index {index}: expected object")
-        if "content" not in raw_message:
-            raise ValueError(f"Invalid chat message at index {index}: missing content")
+    return [
+        _normalize_message(raw_message, index)
+        for index, raw_message in enumerate(raw_messages, start)
+    ]
+
+
+def _normalize_message(raw_message: Any, index: int) -> Message:
+    """Validate one message and normalize it into a compact ``Message``."""
+    if not isinstance(raw_message, Mapping):
+        raise ValueError(f"Invalid chat message at index {index}: expected object")
+    if "content" not in raw_message:
+        raise ValueError(f"Invalid chat message at index {index}: missing content")
 
-        message = dict(raw_message)
+    message = Message(raw_message)
+    if message.content_text is None:
+        # Not already a list of strings.
         message["content"] = _normalize_content(raw_message.get("content"))
-        message.pop("hex_id", None)
-        normalized.append(message)
+    message.pop("hex_id", None)
+    return message
+
+
+def _read_segmented_chat(chat_path: Path, normalize: bool) -> Optional[dict[str, Any]]:
+    """Read a segmented chat's manifest and every segment (see ``chat_segments``).
+
+    Returns:
+        Chat data, or None when the chat keeps its messages inline.
+    """
+    if not chat_segments.is_segmented(chat_path):
+        return None
+    manifest = chat_segments.read_manifest(chat_path)
+    if manifest is None:
+        return None
+
+    messages = chat_segments.read_messages(chat_path, manifest["segments"])
+    if normalize:
+        messages = _normalize_messages(messages)
+    return {"metadata": manifest["metadata"], "messages": messages}
+
+
+def _read_chat_file(chat_path: Path, normalize: bool = False) -> tuple[dict[str, Any], int]:
+    """Stream chat JSON and replay any pending journal records.
+
+    Messages are decoded one at a time (see ``chat_stream``), so the file
+    text is never held in memory as a whole. A segmented chat is read from
+    its segment files instead.
+
+    Args:
+        chat_path: Chat file path
+        normalize: Normalize messages as they are decoded instead of keeping
+            the raw message tree
+
+    Returns:
+        Tuple of (chat data, number of replayed journal records)
+    """
+    data = _read_segmented_chat(chat_path, normalize)
+    if data is None:
+        data = {}
+        for key, value in chat_stream.iter_chat_items(chat_path):
+            if key == "messages" and isinstance(value, chat_stream.MessageStream):
+                if normalize:
+                    value = [
+                        _normalize_message(raw_message, index)
+                        for index, raw_message in enumerate(value)
+                    ]
+                else:
+                    value = list(value)
+            data[key] = value
+
+    if "metadata" not in data or "messages" not in data:
+        raise ValueError("Invalid chat history file structure")
+
+    records = chat_journal.read_records(chat_path)
+    if records:
+        chat_journal.apply_records(data, records)
+        if normalize:
+            data["messages"] = _normalize_messages(data["messages"])
+
+    return data, len(records)
+
+
+def _stream_older_messages(chat_path: Path, count: int) -> list[dict[str, Any]]:
+    """Read and normalize the first count messages, stopping there."""
+    for key, value in chat_stream.iter_chat_items(chat_path):
+        if key == "messages" and isinstance(value, chat_stream.MessageStream):
+            return [
+                _normalize_message(raw_message, index)
+                for index, raw_message in zip(range(count), value)
+            ]
+    raise ValueError("Invalid chat history file structure")
+
+
+def _stream_windowed_chat(chat_path: Path, window: int) -> Optional[dict[str, Any]]:
+    """Stream a chat keeping only the newest messages in memory.
+
+    Returns:
+        Chat dictionary, or None when a pending journal needs the full chat.
+    """
+    if chat_journal.journal_path(chat_path).exists():
+        return None
+
+    raw_metadata: Any = None
+    has_metadata = False
+    raw_tail: Optional[deque[Any]] = None
+    total = 0
+    for key, value in chat_stream.iter_chat_items(chat_path):
+        if key == "metadata":
+            raw_metadata, has_metadata = value, True
+        elif key == "messages":
+            if not isinstance(value, chat_stream.MessageStream):
+                raise ValueError("Invalid chat messages: expected list")
+            raw_tail = deque(maxlen=window)
+            for raw_message in value:
+                raw_tail.append(raw_message)
+                total += 1
+
+    if not has_metadata or raw_tail is None:
+        raise ValueError("Invalid chat history file structure")
+
+    metadata = _normalize_metadata(raw_metadata)
+    older_count = total - len(raw_tail)
+    tail = _normalize_messages(list(raw_tail), start=older_count)
+    if older_count == 0:
+        return {"metadata": metadata, "messages": tail}
+
+    def _load_older() -> list[dict[str, Any]]:
+        return _stream_older_messages(chat_path, older_count)
+
+    return {
+        "metadata": metadata,
+        "messages": WindowedMessages(tail, older_count, _load_older),
+    }
+
+
+def _windowed_messages(raw_messages: Any, window: int) -> Any:
+    """Normalize only the newest messages; page older ones in on demand."""
+    if not isinstance(raw_messages, list) or len(raw_messages) <= window:
+        return _normalize_messages(raw_messages)
+
+    older_count = len(raw_messages) - window
+    tail = _normalize_messages(raw_messages[older_count:], start=older_count)
+    older = raw_messages[:older_count]
 
-    return normalized
+    def _load_older() -> list[dict[str, Any]]:
+        return _normalize_messages(older)
 
+    return WindowedMessages(tail, older_count, _load_older)
 
-def load_chat(path: str) -> dict[str, Any]:
+
+def _load_indexed_window(chat_path: Path, window: int) -> Optional[dict[str, Any]]:
+    """Load metadata plus the newest messages straight from the chat index.
+
+    Returns:
+        Chat dictionary, or None when the index cannot serve this load (no
+        valid index, a pending journal, or a chat within the window).
+    """
+    if chat_journal.journal_path(chat_path).exists():
+        return None
+    index = chat_index.load_index(chat_path)
+    if index is None or index.message_count <= window:
+        return None
+
+    total = index.message_count
+    older_count = total - window
+    metadata = _normalize_metadata(chat_index.read_metadata(chat_path, index))
+    tail = _normalize_messages(
+        chat_index.read_messages(chat_path, index, older_count, total),
+        start=older_count,
+    )
+
+    def _load_older() -> list[dict[str, Any]]:
+        current_index = chat_index.load_index(chat_path)
+        if current_index is not None and current_index.message_count >= older_count:
+            raw_older = chat_index.read_messages(chat_path, current_index, 0, older_count)
+        else:
+            raw_older = _read_chat_file(chat_path)[0]["messages"][:older_count]
+        return _normalize_messages(raw_older)
+
+    return {
+        "metadata": metadata,
+        "messages": WindowedMessages(tail, older_count, _load_older),
+    }
+
+
+def _load_segmented_chat(
+    chat_path: Path, window: Optional[int]
+) -> Optional[tuple[dict[str, Any], dict[str, Any]]]:
+    """Load a segmented chat, reading only the newest segments a window needs.
+
+    Returns:
+        Tuple of (chat dictionary, manifest), or None when the chat is not
+        segmented or a pending journal needs the full chat.
+    """
+    if chat_journal.journal_path(chat_path).exists():
+        return None
+    manifest = chat_segments.read_manifest(chat_path)
+    if manifest is None:
+        return None
+
+    metadata = _normalize_metadata(manifest["metadata"])
+    entries = manifest["segments"]
+    split = chat_segments.window_start(entries, window) if window else 0
+    older_entries = entries[:split]
+    older_count = sum(entry["count"] for entry in older_entries)
+    tail = _normalize_messages(
+        chat_segments.read_messages(chat_path, entries[split:]), start=older_count
+    )
+    if older_count == 0:
+        return {"metadata": metadata, "messages": tail}, manifest
+
+    def _load_older() -> list[dict[str, Any]]:
+        # Segments before the window are never rewritten while they are
+        # paged out (see chat_segments.plan_save).
+        return _normalize_messages(chat_segments.read_messages(chat_path, older_entries))
+
+    messages = WindowedMessages(tail, older_count, _load_older)
+    return {"metadata": metadata, "messages": messages}, manifest
+
+
+def _persistable_chat(data: dict[str, Any]) -> dict[str, Any]:
+    """Snapshot chat data for serialization, without runtime-only message keys.
+
+    Only the containers PolyChat mutates in place (the chat dict, metadata,
+    the message list and each message) are copied; content lines and other
+    nested values are shared. Taking the snapshot on the event loop is cheap,
+    and the snapshot can then be encoded in a worker thread while the session
+    keeps appending messages.
+    """
+    persistable_data = dict(data)
+    metadata = data.get("metadata")
+    if isinstance(metadata, dict):
+        persistable_data["metadata"] = dict(metadata)
+    persistable_data["messages"] = [
+        chat_journal.persistable_message(message) if isinstance(message, Mapping) else message
+        for message in data.get("messages", [])
+    ]
+    return persistable_data
+
+
+def _write_snapshot_locked(chat_path: Path, snapshot: dict[str, Any], indexed: bool) -> None:
+    """Encode and atomically write a chat snapshot.
+
+    Caller must hold ``chat_journal.journal_lock(chat_path)``. With indexed
+    set the index sidecar is rewritten, otherwise a now-stale one is removed.
+    Archived chats (see ``chat_archive``) are recompressed and never indexed.
+    Any journal is folded into the snapshot and deleted, and so are the
+    segments of a chat that was segmented (see ``chat_segments``).
+    """
+    if indexed and not chat_archive.is_archived(chat_path):
+        payload, metadata_span, message_spans = chat_index.dump_indexed(snapshot)
+        write_bytes_atomic(chat_path, payload)
+        chat_index.write_index(chat_path, metadata_span, message_spans)
+    else:
+        payload = get_codec().dumps_pretty_bytes(snapshot)
+        write_bytes_atomic(chat_path, chat_archive.encode_for_path(chat_path, payload))
+        chat_index.remove_index(chat_path)
+    chat_journal.remove_journal(chat_path)
+    chat_segments.remove_segments(chat_path)
+
+
+def _write_snapshot(chat_path: Path, snapshot: dict[str, Any], indexed: bool) -> None:
+    """Worker-thread entry point for full chat writes."""
+    with chat_journal.journal_lock(chat_path):
+        _write_snapshot_locked(chat_path, snapshot, indexed)
+
+
+def _write_segments(chat_path: Path, plan: chat_segments.SavePlan) -> None:
+    """Worker-thread entry point for segmented chat writes."""
+    with chat_journal.journal_lock(chat_path):
+        chat_segments.write_plan(chat_path, plan)
+        chat_index.remove_index(chat_path)
+        chat_journal.remove_journal(chat_path)
+
+
+def load_chat(path: str, options: Optional[ChatStorageOptions] = None) -> dict[str, Any]:
     """Load chat history from JSON file.
 
+    Pending journal records (see ``chat_journal``) are replayed on top of the
+    snapshot, so callers always see the latest saved state.
+
+    With ``options.lazy_window`` set, only the newest messages are normalized
+    up front and ``messages`` is a ``WindowedMessages`` that pages older
+    messages in when they are first accessed. When the chat has a valid
+    index sidecar (see ``chat_index``), only those bytes are read at all.
+    A segmented chat (see ``chat_segments``) reads its manifest and only the
+    newest segments covering the window.
+
     Args:
         path: Path to chat history file (already mapped)
+        options: Optional storage options (journal and segments modes track
+            the loaded chat)
 
     Returns:
         Chat dictionary (empty structure if file doesn't exist)
@@ -90,33 +381,75 @@ def load_chat(path: str) -> dict[str, Any]:
             "messages": [],
         }
 
-    try:
-        with open(chat_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if not isinstance(data, dict):
-            raise ValueError("Invalid chat history file structure")
-        if "metadata" not in data or "messages" not in data:
-            raise ValueError("Invalid chat history file structure")
+    chat_data = None
+    manifest = None
+    replayed_count = 0
+    window = options.lazy_window if options is not None else None
+    if chat_segments.is_segmented(chat_path):
+        loaded = _load_segmented_chat(chat_path, window)
+        if loaded is not None:
+            chat_data, manifest = loaded
 
-        metadata = _normalize_metadata(data.get("metadata"))
-        messages = _normalize_messages(data.get("messages"))
+    if chat_data is None and options is not None and options.lazy_window:
+        chat_data = _load_indexed_window(chat_path, options.lazy_window)
+        if chat_data is None:
+            chat_data = _stream_windowed_chat(chat_path, options.lazy_window)
 
-        return {"metadata": metadata, "messages": messages}
+    if chat_data is None:
+        data, replayed_count = _read_chat_file(chat_path, normalize=True)
 
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in chat history file: {e}")
-
-
-async def save_chat(path: str, data: dict[str, Any]) -> None:
+        metadata = _normalize_metadata(data.get("metadata"))
+        messages = data["messages"]
+        if not isinstance(messages, list):
+            raise ValueError("Invalid chat messages: expected list")
+        if options is not None and options.lazy_window:
+            messages = _windowed_messages(messages, options.lazy_window)
+
+        chat_data = {"metadata": metadata, "messages": messages}
+    if options is not None and options.segments:
+        if manifest is not None and manifest["layout"] is not None:
+            chat_segments.register(
+                chat_path, chat_data, manifest["layout"], manifest["segments"]
+            )
+    elif options is not None and (options.journal or options.lazy_window):
+        chat_journal.register(chat_path, chat_data, record_count=replayed_count)
+    return chat_data
+
+
+async def save_chat(
+    path: str,
+    data: dict[str, Any],
+    options: Optional[ChatStorageOptions] = None,
+) -> None:
     """Save chat history to JSON file (async).
 
     Args:
         path: Path to chat history file
         data: Chat dictionary
-
-    Updates metadata.updated_at before saving.
+        options: Optional storage options. In journal mode, changes since the
+            previous save are appended to the chat journal instead of
+            rewriting the whole file. With ``index`` set, full writes also
+            write the byte-offset index sidecar. With ``segments`` set, the
+            chat is written as a manifest plus segment files and only the
+            segments that changed are rewritten (journal and index are not
+            used; archived chats are always written whole).
+
+    Updates metadata.updated_at before saving. Encoding and writing run in a
+    worker thread, and full writes replace the file atomically (temp file +
+    rename), so a crash mid-save never leaves a truncated chat. With only
+    ``lazy_window`` set, a chat with no changes since it was loaded or last
+    saved is not written at all, since the snapshot would page it in.
     """
+    journal = options is not None and options.journal
+    if (
+        options is not None
+        and options.lazy_window
+        and not (journal or options.segments)
+    ):
+        state = chat_journal.get_state(path, data)
+        if state is not None and state.pending_records() == []:
+            return
+
     # Update timestamp
     now = datetime.now(timezone.utc).isoformat()
     data["metadata"]["updated_at"] = now
@@ -129,34 +462,169 @@ async def save_chat(path: str, data: dict[str, Any]) -> None:
     chat_path = Path(path)
     chat_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write async
-    async with aiofiles.open(chat_path, "w", encoding="utf-8") as f:
-        persistable_data = deepcopy(data)
-        for message in persistable_data.get("messages", []):
-            if isinstance(message, dict):
-                message.pop("hex_id", None)
+    if (
+        options is not None
+        and options.segments
+        and not chat_archive.is_archived(chat_path)
+    ):
+        # Planning pages in a lazily loaded chat only when segments before
+        # its window changed; encoding and writing run off the loop.
+        plan = chat_segments.plan_save(chat_path, data, options.segments)
+        await asyncio.to_thread(_write_segments, chat_path, plan)
+        chat_segments.commit(chat_path, data, plan)
+        return
+
+    if journal and await _append_to_journal(chat_path, data):
+        return
+
+    # Snapshot on the loop (this also pages in a lazily loaded chat, which
+    # reads the current file); encode and write off the loop.
+    snapshot = _persistable_chat(data)
+    indexed = options is not None and options.index
+    await asyncio.to_thread(_write_snapshot, chat_path, snapshot, indexed)
+
+    if journal or (options is not None and options.lazy_window):
+        chat_journal.register(chat_path, data)
+
+
+async def _append_to_journal(chat_path: Path, data: dict[str, Any]) -> bool:
+    """Append pending changes to the chat journal.
+
+    Returns:
+        True when the save was journaled, False when a snapshot write is needed.
+    """
+    if not chat_path.exists():
+        return False
+
+    state = chat_journal.get_state(chat_path, data)
+    if state is None:
+        return False
+
+    records = state.pending_records()
+    if records is None:
+        return False
+
+    if records:
+        def _append() -> None:
+            with chat_journal.journal_lock(chat_path):
+                chat_journal.append_records(chat_path, records)
+                state.record_count += len(records)
+
+        await asyncio.to_thread(_append)
+    state.commit()
+
+    compaction_idle = state.compaction is None or state.compaction.done()
+    if state.record_count >= CHAT_JOURNAL_COMPACT_THRESHOLD and compaction_idle:
+        loop = asyncio.get_running_loop()
+        state.compaction = loop.run_in_executor(
+            None, _compact_in_background, str(chat_path), state
+        )
+    return True
+
+
+def compact_chat_journal(path: str) -> bool:
+    """Fold the chat journal back into the canonical chat JSON file.
+
+    Args:
+        path: Path to chat history file
+
+    Returns:
+        True when a journal was compacted, False when there was none.
+    """
+    chat_path = Path(path)
+    with chat_journal.journal_lock(chat_path):
+        if not chat_journal.journal_path(chat_path).exists():
+            return False
+
+        data, _replayed_count = _read_chat_file(chat_path)
+        snapshot = _persistable_chat(
+            {"metadata": data["metadata"], "messages": data["messages"]}
+        )
+        _write_snapshot_locked(
+            chat_path, snapshot, indexed=chat_index.index_path(chat_path).exists()
+        )
+    return True
 
-        # Use json.dumps first (it's not async), then write
-        json_str = json.dumps(persistable_data, indent=2, ensure_ascii=False)
-        await f.write(json_str)
 
+def unsegment_chat(path: str) -> bool:
+    """Fold a segmented chat back into one canonical chat JSON file.
 
-def add_user_message(data: dict[str, Any], content: str) -> None:
+    Args:
+        path: Path to chat history file
+
+    Returns:
+        True when the chat was segmented, False otherwise.
+    """
+    chat_path = Path(path)
+    with chat_journal.journal_lock(chat_path):
+        data = _read_segmented_chat(chat_path, normalize=False)
+        if data is None:
+            return False
+        _write_snapshot_locked(chat_path, _persistable_chat(data), indexed=False)
+    return True
+
+
+def _compact_in_background(path: str, state: chat_journal.JournalState) -> None:
+    """Worker-thread entry point for journal compaction."""
+    try:
+        with chat_journal.journal_lock(path):
+            compacted_count = state.record_count
+        compact_chat_journal(path)
+        with chat_journal.journal_lock(path):
+            state.record_count = max(0, state.record_count - compacted_count)
+    except Exception as e:
+        logging.error("Chat journal compaction failed (%s): %s", path, e, exc_info=True)
+
+
+def track_chat(path: str, data: dict[str, Any], options: ChatStorageOptions) -> None:
+    """Track an in-memory chat whose file has not changed since it was read.
+
+    ``load_chat`` tracks what it loads itself; this is for chats reopened
+    from memory (see ``chat_cache``), so journal and segments modes keep
+    writing only what changed.
+    """
+    chat_path = Path(path)
+    if options.segments:
+        if not chat_segments.is_segmented(chat_path) or chat_journal.journal_path(chat_path).exists():
+            return
+        manifest = chat_segments.read_manifest(chat_path)
+        if manifest is not None and manifest["layout"] is not None:
+            chat_segments.register(chat_path, data, manifest["layout"], manifest["segments"])
+    elif options.journal or options.lazy_window:
+        chat_journal.register(chat_path, data)
+
+
+def release_chat(path: Optional[str]) -> None:
+    """Stop tracking a chat that is no longer open."""
+    if path:
+        chat_journal.forget(path)
+        chat_segments.forget(path)
+        chat_search.forget(path)
+
+
+def add_user_message(
+    data: dict[str, Any],
+    content: str,
+    attachments: list[dict[str, Any]] | None = None,
+) -> None:
     """Add user message to chat.
 
     Args:
         data: Chat dictionary
         content: Message text (multiline string)
+        attachments: Optional attachment references (see ``attachments``)
 
     Formats content as line array with trimming.
     """
     lines = text_to_lines(content)
 
-    message = {
+    message = Message({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "role": "user",
         "content": lines,
-    }
+    })
+    if attachments:
+        message["attachments"] = attachments
 
     data["messages"].append(message)
 
@@ -177,12 +645,12 @@ def add_assistant_message(
     """
     lines = text_to_lines(content)
 
-    message = {
+    message = Message({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "role": "assistant",
         "model": model,
         "content": lines,
-    }
+    })
     if citations:
         message["citations"] = citations
 
@@ -201,11 +669,11 @@ def add_error_message(
     """
     lines = text_to_lines(content)
 
-    message = {
+    message = Message({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "role": "error",
         "content": lines,
-    }
+    })
 
     if details:
         message["details"] = details
@@ -232,7 +700,7 @@ def delete_message_and_following(data: dict[str, Any], index: int) -> int:
         raise IndexError(f"Message index {index} out of range")
 
     deleted_count = len(messages) - index
-    data["messages"] = messages[:index]
+    del messages[index:]
 
     return deleted_count
 
@@ -259,6 +727,9 @@ def get_messages_for_ai(
 ) -> list[dict[str, Any]]:
     """Get messages formatted for AI (excluding error messages).
 
+    Messages covered by a ``/compact`` checkpoint are replaced by its summary
+    (see ``chat_compact``).
+
     Args:
         data: Chat dictionary
         max_messages: Maximum number of messages to return (from end)
@@ -266,8 +737,15 @@ def get_messages_for_ai(
     Returns:
         List of messages (user and assistant only)
     """
+    checkpoint = chat_compact.get_checkpoint(data)
+    source = data["messages"]
+    if checkpoint is not None:
+        source = source[checkpoint["through"]:]
+
     # Filter out error messages
-    messages = [msg for msg in data["messages"] if msg["role"] in ("user", "assistant")]
+    messages = [msg for msg in source if msg["role"] in ("user", "assistant")]
+    if checkpoint is not None:
+        messages[:0] = chat_compact.checkpoint_messages(checkpoint)
 
     # Limit if specified
     if max_messages is not None:
@@ -283,6 +761,9 @@ def get_retry_context_for_last_interaction(data: dict[str, Any]) -> list[dict[st
     - If the last chat message is assistant, drop the trailing user+assistant pair.
     - If the last chat message is error, drop the trailing user (failed turn).
     - Otherwise, return current AI-visible messages unchanged.
+
+    The exchange standing in for a ``/compact`` checkpoint is never dropped,
+    even when the checkpoint covers the interaction being retried.
     """
     ai_messages = get_messages_for_ai(data)
     all_messages = data.get("messages", []) if isinstance(data, dict) else []
@@ -290,20 +771,27 @@ def get_retry_context_for_last_interaction(data: dict[str, Any]) -> list[dict[st
     if not all_messages or not ai_messages:
         return ai_messages
 
+    checkpoint = chat_compact.get_checkpoint(data)
+    fixed = len(chat_compact.checkpoint_messages(checkpoint)) if checkpoint else 0
+    droppable = len(ai_messages) - fixed
     last_role = all_messages[-1].get("role")
 
     if last_role == "assistant":
         if (
-            len(ai_messages) >= 2
+            droppable >= 2
             and ai_messages[-1].get("role") == "assistant"
             and ai_messages[-2].get("role") == "user"
         ):
             return ai_messages[:-2]
-        if ai_messages[-1].get("role") == "assistant":
+        if droppable >= 1 and ai_messages[-1].get("role") == "assistant":
             return ai_messages[:-1]
         return ai_messages
 
-    if last_role == "error" and ai_messages[-1].get("role") == "user":
+    if (
+        last_role == "error"
+        and droppable >= 1
+        and ai_messages[-1].get("role") == "user"
+    ):
         return ai_messages[:-1]
 
     return ai_messages
@@ -0,0 +1,110 @@
+"""Compressed chat archives.
+
+A chat file can be stored compressed as ``<name>.json.gz`` (stdlib gzip) or
+``<name>.json.zst`` (requires the optional ``zstandard`` package). Archived
+chats are read transparently by ``chat.load_chat`` and chat listings, and
+saving one writes it back compressed in the same format. Byte-offset index
+sidecars are never written for archives, since offsets into compressed data
+are meaningless.
+
+``chat_manager.archive_stale_chats`` (the ``/archive`` command) compresses
+chats that have not been updated in a while.
+"""
+
+from __future__ import annotations
+
+import gzip
+import zlib
+from pathlib import Path
+from typing import Optional, TextIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .constants import (
+    CHAT_ARCHIVE_GZIP_LEVEL,
+    CHAT_ARCHIVE_GZIP_SUFFIX,
+    CHAT_ARCHIVE_ZSTD_LEVEL,
+    CHAT_ARCHIVE_ZSTD_SUFFIX,
+    CHAT_FILE_EXTENSION,
+)
+
+# Archive format name -> suffix appended to the chat file name.
+ARCHIVE_FORMATS = {
+    "gz": CHAT_ARCHIVE_GZIP_SUFFIX,
+    "zst": CHAT_ARCHIVE_ZSTD_SUFFIX,
+}
+
+# Errors raised while reading a truncated or corrupt archive.
+CORRUPT_ARCHIVE_ERRORS: tuple[type[BaseException], ...] = (
+    EOFError,
+    gzip.BadGzipFile,
+    zlib.error,
+)
+if zstandard is not None:
+    CORRUPT_ARCHIVE_ERRORS += (zstandard.ZstdError,)
+
+
+def archive_format(path: str | Path) -> Optional[str]:
+    """Return the archive format of a chat file name ("gz"/"zst"), or None."""
+    name = Path(path).name
+    for fmt, suffix in ARCHIVE_FORMATS.items():
+        if name.endswith(CHAT_FILE_EXTENSION + suffix):
+            return fmt
+    return None
+
+
+def is_archived(path: str | Path) -> bool:
+    """Whether a chat file name denotes a compressed archive."""
+    return archive_format(path) is not None
+
+
+def available_formats() -> list[str]:
+    """Return archive formats that can be written here, preferred last."""
+    formats = ["gz"]
+    if zstandard is not None:
+        formats.append("zst")
+    return formats
+
+
+def default_format() -> str:
+    """Return the preferred available archive format."""
+    return available_formats()[-1]
+
+
+def archive_path(chat_path: str | Path, fmt: str) -> Path:
+    """Return the archive path for a plain chat file in the given format."""
+    chat_path = Path(chat_path)
+    return chat_path.with_name(chat_path.name + ARCHIVE_FORMATS[fmt])
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ValueError(
+            "Reading or writing .json.zst chats requires the 'zstandard' package"
+        )
+
+
+def open_chat_text(path: str | Path) -> TextIO:
+    """Open a chat file (plain or archived) for reading as UTF-8 text."""
+    fmt = archive_format(path)
+    if fmt == "gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if fmt == "zst":
+        _require_zstandard()
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def encode_for_path(path: str | Path, data: bytes) -> bytes:
+    """Compress serialized chat bytes as the file name requires."""
+    fmt = archive_format(path)
+    if fmt == "gz":
+        # mtime=0 keeps the output deterministic for unchanged chats.
+        return gzip.compress(data, compresslevel=CHAT_ARCHIVE_GZIP_LEVEL, mtime=0)
+    if fmt == "zst":
+        _require_zstandard()
+        return zstandard.ZstdCompressor(level=CHAT_ARCHIVE_ZSTD_LEVEL).compress(data)
+    return data
@@ -0,0 +1,209 @@
+"""In-memory cache of recently used chats.
+
+``SessionManager`` keeps the chats it switches away from here, so flipping
+between a few active chats does not re-parse them. Every entry is pinned to
+the chat file's stamp (size and mtime, see ``chat_catalog.file_stamp``) taken
+when the in-memory state matched the file: a chat changed on disk since then
+(a save from another process, an edit, a rename or delete) is simply read
+again.
+
+Loads that miss the cache run ``chat.load_chat`` in a worker thread so the
+event loop keeps running while a large chat is parsed. ``prefetch`` loads the
+most recently updated chats in the background, one at a time, so the first
+``/open`` of one of them is instant too.
+
+Cached chats are not tracked by journal or segments mode (see
+``chat.release_chat``); ``load`` resumes tracking when it hands one out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from . import chat
+from .chat_catalog import file_stamp
+from .chat_storage import ChatStorageOptions
+from .chat_window import WindowedMessages
+from .constants import CHAT_CACHE_MAX_CHATS
+
+
+@dataclass(slots=True)
+class _Entry:
+    data: dict[str, Any]
+    stamp: list[int]
+    lazy_window: Optional[int]
+
+
+def _cache_key(path: str | Path) -> str:
+    return str(Path(path).resolve())
+
+
+def _current_stamp(path: str | Path) -> Optional[list[int]]:
+    try:
+        return file_stamp(Path(path))
+    except OSError:
+        return None
+
+
+class ChatCache:
+    """LRU of chats not currently open, validated by file stamp."""
+
+    def __init__(self, max_chats: int = CHAT_CACHE_MAX_CHATS):
+        self._max_chats = max_chats
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[None]] = {}
+        self._prefetch_task: Optional[asyncio.Task[None]] = None
+
+    def __contains__(self, path: str) -> bool:
+        return _cache_key(path) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, path: str, data: dict[str, Any], lazy_window: Optional[int]) -> None:
+        """Keep a chat whose in-memory state matches its file.
+
+        Call only once pending saves are written. A chat whose file is gone
+        (e.g. deleted) is not kept.
+        """
+        stamp = _current_stamp(path)
+        if stamp is None:
+            return
+        self._store(_cache_key(path), _Entry(data, stamp, lazy_window))
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        messages = entry.data.get("messages")
+        if isinstance(messages, WindowedMessages):
+            # Hooks belong to the session the chat was open in.
+            messages.on_materialize = None
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_chats:
+            self._entries.popitem(last=False)
+
+    def _take(self, key: str, lazy_window: Optional[int]) -> Optional[dict[str, Any]]:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.lazy_window != lazy_window:
+            return None
+        if entry.stamp != _current_stamp(key):
+            return None
+        return entry.data
+
+    def _peek(self, key: str, lazy_window: Optional[int]) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry.lazy_window == lazy_window and entry.stamp == _current_stamp(key):
+            self._entries.move_to_end(key)
+            return True
+        del self._entries[key]
+        return False
+
+    def discard(self, path: str) -> None:
+        """Drop a chat from the cache."""
+        self._entries.pop(_cache_key(path), None)
+
+    async def _wait_inflight(self, key: str) -> None:
+        future = self._inflight.get(key)
+        if future is not None:
+            await asyncio.shield(future)
+
+    async def load(self, path: str, options: ChatStorageOptions) -> dict[str, Any]:
+        """Return the chat at path for opening, from the cache when current.
+
+        A cached chat leaves the cache (it comes back when it is closed or
+        switched away from) and is tracked again like ``chat.load_chat``
+        tracks a fresh load.
+
+        Raises:
+            ValueError: If the chat file is invalid
+        """
+        key = _cache_key(path)
+        await self._wait_inflight(key)
+        data = self._take(key, options.lazy_window)
+        if data is not None:
+            chat.track_chat(path, data, options)
+            return data
+        return await asyncio.to_thread(chat.load_chat, path, options)
+
+    async def preload(self, path: str, lazy_window: Optional[int]) -> None:
+        """Read a chat into the cache unless a current copy is already there.
+
+        A missing file is not an error: like ``chat.load_chat``, opening it
+        starts an empty chat.
+
+        Raises:
+            ValueError: If the chat file is invalid
+        """
+        key = _cache_key(path)
+        await self._wait_inflight(key)
+        if self._peek(key, lazy_window):
+            return
+        await self._read_into_cache(key, path, lazy_window)
+
+    async def _read_into_cache(self, key: str, path: str, lazy_window: Optional[int]) -> None:
+        # The stamp is taken first: a change while the file is being read
+        # leaves an entry that never validates.
+        stamp = _current_stamp(path)
+        if stamp is None:
+            return
+        data = await asyncio.to_thread(
+            chat.load_chat, path, ChatStorageOptions(lazy_window=lazy_window)
+        )
+        self._store(key, _Entry(data, stamp, lazy_window))
+
+    def prefetch(self, list_paths: Callable[[], Iterable[str]], lazy_window: Optional[int]) -> None:
+        """Load chats into the cache in the background, most wanted first.
+
+        Args:
+            list_paths: Returns the chats to load; runs in a worker thread
+                since listing a chats directory touches the filesystem
+            lazy_window: Lazy window the chats will be opened with
+
+        Replaces any prefetch still running. Must be called from a running
+        event loop.
+        """
+        self.cancel_prefetch()
+        self._prefetch_task = asyncio.get_running_loop().create_task(
+            self._prefetch(list_paths, lazy_window)
+        )
+
+    async def _prefetch(
+        self, list_paths: Callable[[], Iterable[str]], lazy_window: Optional[int]
+    ) -> None:
+        try:
+            paths = await asyncio.to_thread(lambda: list(list_paths()))
+        except Exception as e:
+            logging.debug("Could not list chats to prefetch: %s", e)
+            return
+
+        loop = asyncio.get_running_loop()
+        for path in paths:
+            if len(self._entries) >= self._max_chats:
+                # Never evict chats the user actually had open.
+                break
+            key = _cache_key(path)
+            if key in self._inflight or self._peek(key, lazy_window):
+                continue
+            future: asyncio.Future[None] = loop.create_future()
+            self._inflight[key] = future
+            try:
+                await self._read_into_cache(key, path, lazy_window)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.debug("Could not prefetch chat %s: %s", path, e)
+            finally:
+                del self._inflight[key]
+                future.set_result(None)
+
+    def cancel_prefetch(self) -> None:
+        """Stop a background prefetch (chats it already loaded stay cached)."""
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
@@ -0,0 +1,189 @@
+"""Persistent catalog of chat listings.
+
+``<chats_dir>/.polychat-catalog`` caches what ``chat_manager.list_chats``
+shows for each chat file (title, timestamps, message count). Entries are keyed
+by path relative to the chats directory (just the file name for chats kept
+directly in it, ``YYYY/MM/<name>`` for sharded ones) and pinned to a stamp: the file's size and mtime, plus its
+journal's while one is pending. A listing stats every chat file but re-reads
+only the ones whose stamp changed, in a thread pool; entries for files that
+are gone are dropped. Files that fail to parse are remembered as invalid, so
+they are not re-read until they change either.
+
+The catalog is only a cache. It is rewritten atomically when something
+changed, and a missing, corrupt, or unwritable catalog costs a full rescan.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .constants import (
+    CHAT_CATALOG_FILE_NAME,
+    CHAT_CATALOG_RACY_WINDOW_SEC,
+    CHAT_JOURNAL_SUFFIX,
+    CHAT_SCAN_MAX_WORKERS,
+)
+from .file_io import write_bytes_atomic
+from .json_codec import get_codec
+
+
+CatalogEntry = dict[str, Any]
+SummaryReader = Callable[[Path], tuple[dict[str, Any], int]]
+
+_VERSION = 1
+
+
+def catalog_path(chats_dir: str | Path) -> Path:
+    """Return the catalog path for a chats directory."""
+    return Path(chats_dir) / CHAT_CATALOG_FILE_NAME
+
+
+def load_catalog(chats_dir: str | Path) -> dict[str, CatalogEntry]:
+    """Return cached entries by relative path ({} when there is no usable catalog)."""
+    try:
+        raw = catalog_path(chats_dir).read_bytes()
+    except OSError:
+        return {}
+    try:
+        data = get_codec().loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        logging.debug("Ignoring unreadable chat catalog in %s: %s", chats_dir, e)
+        return {}
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != _VERSION
+        or not isinstance(data.get("chats"), dict)
+    ):
+        return {}
+    return data["chats"]
+
+
+def save_catalog(chats_dir: str | Path, entries: dict[str, CatalogEntry]) -> None:
+    """Write the catalog; failures are logged and otherwise ignored."""
+    payload = get_codec().dumps_compact({"version": _VERSION, "chats": entries})
+    try:
+        write_bytes_atomic(catalog_path(chats_dir), payload.encode("utf-8"))
+    except OSError as e:
+        logging.debug("Could not write chat catalog in %s: %s", chats_dir, e)
+
+
+def file_stamp(file_path: Path) -> list[int]:
+    """Return the values a catalog entry is pinned to.
+
+    Raises:
+        FileNotFoundError: If the chat file is gone
+    """
+    stat = file_path.stat()
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    try:
+        journal = file_path.with_name(file_path.name + CHAT_JOURNAL_SUFFIX).stat()
+    except FileNotFoundError:
+        return stamp
+    return stamp + [journal.st_size, journal.st_mtime_ns]
+
+
+def catalog_key(chats_dir: str | Path, file_path: Path) -> str:
+    """Return the catalog key of a chat file inside chats_dir."""
+    return file_path.relative_to(chats_dir).as_posix()
+
+
+def _is_racy(stamp: list[int], now_ns: int) -> bool:
+    """Whether a file changed too recently for its stamp to be trusted."""
+    window_ns = CHAT_CATALOG_RACY_WINDOW_SEC * 1_000_000_000
+    return any(now_ns - mtime_ns < window_ns for mtime_ns in stamp[1::2])
+
+
+def read_entry(file_path: Path, read_summary: SummaryReader) -> Optional[CatalogEntry]:
+    """Read one chat file into a catalog entry, or None if it vanished."""
+    try:
+        stamp = file_stamp(file_path)
+    except FileNotFoundError:
+        return None
+    # A racy entry is stored without a stamp, so the next listing re-reads it.
+    entry: CatalogEntry = {
+        "stamp": None if _is_racy(stamp, time.time_ns()) else stamp
+    }
+    try:
+        metadata, message_count = read_summary(file_path)
+        entry.update({
+            "title": metadata.get("title"),
+            "created_at": metadata.get("created_at"),
+            "updated_at": metadata.get("updated_at"),
+            "message_count": message_count,
+        })
+    except Exception as e:
+        logging.debug(f"Skipping invalid chat file {file_path}: {e}")
+        entry["invalid"] = True
+    return entry
+
+
+def iter_catalog(
+    chats_dir: str | Path,
+    chat_files: Iterable[Path],
+    read_summary: SummaryReader,
+) -> Iterator[list[tuple[str, CatalogEntry]]]:
+    """Bring the catalog up to date, yielding entries as they become available.
+
+    The first batch holds every entry that is still current. Changed files are
+    then read in a thread pool and yielded one per batch as each finishes. The
+    catalog is written once the last batch has been consumed.
+
+    Args:
+        chats_dir: Directory that owns the catalog
+        chat_files: Every chat file currently in the directory (or its shards)
+        read_summary: Returns (metadata, message count) for a changed file
+
+    Yields:
+        Lists of (relative path, entry), including entries marked ``"invalid"``
+    """
+    cached = load_catalog(chats_dir)
+    entries: dict[str, CatalogEntry] = {}
+    changed: list[tuple[str, Path]] = []
+
+    for file_path in chat_files:
+        key = catalog_key(chats_dir, file_path)
+        entry = cached.get(key)
+        try:
+            if entry is not None and entry.get("stamp") == file_stamp(file_path):
+                entries[key] = entry
+            else:
+                changed.append((key, file_path))
+        except FileNotFoundError:
+            continue
+
+    yield list(entries.items())
+
+    if changed:
+        workers = min(CHAT_SCAN_MAX_WORKERS, len(changed), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(read_entry, file_path, read_summary): key
+                for key, file_path in changed
+            }
+            for future in as_completed(futures):
+                entry = future.result()
+                if entry is None:
+                    continue
+                entries[futures[future]] = entry
+                yield [(futures[future], entry)]
+
+    if changed or entries.keys() != cached.keys():
+        save_catalog(chats_dir, entries)
+
+
+def refresh_catalog(
+    chats_dir: str | Path,
+    chat_files: Iterable[Path],
+    read_summary: SummaryReader,
+) -> dict[str, CatalogEntry]:
+    """Bring the catalog up to date and return all entries by relative path."""
+    return {
+        filename: entry
+        for batch in iter_catalog(chats_dir, chat_files, read_summary)
+        for filename, entry in batch
+    }
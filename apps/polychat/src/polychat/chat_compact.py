@@ -0,0 +1,136 @@
+"""Rolling summary checkpoints for ``/compact``.
+
+``/compact [keep N]`` asks the helper AI for one running summary of
+everything before the newest N turns (a turn is a user message and the
+replies that follow it) and stores it in chat metadata:
+
+{
+  "metadata": {
+    "checkpoint": {
+      "summary": "...",
+      "through": 120,
+      "through_timestamp": "2026-03-01T10:00:00+00:00",
+      "model": "claude-haiku-4-5",
+      "created_at": "2026-03-02T09:00:00+00:00"
+    }
+  }
+}
+
+``through`` is the number of chat messages the summary covers. From then on
+``chat.get_messages_for_ai`` sends the summary, as one user/assistant
+exchange so providers that require alternating roles accept it, followed by
+the messages after ``through``. The chat file still holds every message, so
+``/history`` and ``/show`` are unchanged, and with ``lazy_window`` the
+covered messages are no longer paged in to build a request.
+
+Compacting again folds only the messages between the old and the new
+boundary into the existing summary, so the helper never re-reads what the
+checkpoint already covers. Long stretches are folded in chunks of about
+``COMPACT_CHUNK_CHARS`` characters and the checkpoint is saved after each,
+so an interrupted ``/compact`` keeps its progress.
+
+A checkpoint only applies while the message at its boundary is unchanged
+(``through_timestamp``). Rewinding or purging covered messages invalidates
+it, and requests fall back to the full history until the next ``/compact``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .text_formatting import text_to_lines
+from .tokens import message_text
+
+CHECKPOINT_KEY = "checkpoint"
+
+# The checkpoint is sent as this exchange ahead of the messages it does not cover.
+CHECKPOINT_INTRO = "Summary of our conversation so far:"
+CHECKPOINT_ACK = "Understood. I will continue from this summary."
+
+
+def get_checkpoint(data: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Return the chat's checkpoint if it still matches the messages."""
+    metadata = data.get("metadata")
+    checkpoint = metadata.get(CHECKPOINT_KEY) if isinstance(metadata, dict) else None
+    if not isinstance(checkpoint, dict):
+        return None
+
+    summary = checkpoint.get("summary")
+    through = checkpoint.get("through")
+    messages = data.get("messages", [])
+    if (
+        not isinstance(summary, str)
+        or not summary
+        or isinstance(through, bool)
+        or not isinstance(through, int)
+        or not 0 < through <= len(messages)
+    ):
+        return None
+    if messages[through - 1].get("timestamp") != checkpoint.get("through_timestamp"):
+        return None
+    return checkpoint
+
+
+def checkpoint_messages(checkpoint: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return the exchange that stands in for the covered messages."""
+    return [
+        {"role": "user", "content": text_to_lines(f"{CHECKPOINT_INTRO}\n\n{checkpoint['summary']}")},
+        {"role": "assistant", "content": [CHECKPOINT_ACK]},
+    ]
+
+
+def set_checkpoint(data: dict[str, Any], summary: str, through: int, model: str) -> None:
+    """Store a checkpoint covering the first ``through`` messages."""
+    data["metadata"][CHECKPOINT_KEY] = {
+        "summary": summary,
+        "through": through,
+        "through_timestamp": data["messages"][through - 1].get("timestamp"),
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def clear_checkpoint(data: dict[str, Any]) -> bool:
+    """Remove the checkpoint; return True if there was one."""
+    metadata = data.get("metadata")
+    if not isinstance(metadata, dict):
+        return False
+    return metadata.pop(CHECKPOINT_KEY, None) is not None
+
+
+def compact_boundary(messages: Any, keep_turns: int) -> int:
+    """Return the index of the first message of the newest ``keep_turns`` turns.
+
+    Returns 0 when the chat has no more than ``keep_turns`` turns.
+    """
+    if keep_turns == 0:
+        return len(messages)
+    seen = 0
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].get("role") == "user":
+            seen += 1
+            if seen == keep_turns:
+                return index
+    return 0
+
+
+def plan_chunks(messages: Any, start: int, stop: int, max_chars: int) -> list[range]:
+    """Split messages[start:stop] into runs of about ``max_chars`` characters.
+
+    Each run holds at least one message; error messages are not counted.
+    """
+    chunks = []
+    chunk_start, size = start, 0
+    for index in range(start, stop):
+        message = messages[index]
+        if message.get("role") not in ("user", "assistant"):
+            continue
+        length = len(message_text(message))
+        if size and size + length > max_chars:
+            chunks.append(range(chunk_start, index))
+            chunk_start, size = index, 0
+        size += length
+    if chunk_start < stop:
+        chunks.append(range(chunk_start, stop))
+    return chunks
@@ -0,0 +1,312 @@
+"""Binary byte-offset index for chat files.
+
+The index sidecar (``<chat>.json.idx``) records where the metadata object and
+each message object live inside the chat JSON, so readers can seek straight to
+the bytes they need instead of parsing the whole file. It is pinned to the
+chat file's size and mtime; an index that does not match is stale and is
+rebuilt by scanning the chat file once.
+
+Layout (little-endian):
+- header: magic ``b"PCIX"``, version (u16), chat size (u64), chat mtime_ns
+  (i64), message count (u32)
+- one ``(offset u64, length u64)`` span for metadata, then one per message
+
+The index only describes the chat snapshot; callers must fall back to a full
+load while a chat journal is pending.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from .constants import CHAT_INDEX_SUFFIX
+from .json_codec import JsonCodec, get_codec
+
+
+Span = tuple[int, int]
+
+_MAGIC = b"PCIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHQqI")
+_SPAN = struct.Struct("<QQ")
+
+
+def index_path(chat_path: str | Path) -> Path:
+    """Return the index path for a chat file."""
+    chat_path = Path(chat_path)
+    return chat_path.with_name(chat_path.name + CHAT_INDEX_SUFFIX)
+
+
+@dataclass(slots=True, frozen=True)
+class ChatIndex:
+    """Validated index for one chat file snapshot."""
+
+    size: int
+    mtime_ns: int
+    message_count: int
+    spans: bytes
+
+    @property
+    def metadata_span(self) -> Span:
+        """Byte span of the metadata object."""
+        return _SPAN.unpack_from(self.spans, 0)
+
+    def message_span(self, index: int) -> Span:
+        """Byte span of the message at index."""
+        if index < 0 or index >= self.message_count:
+            raise IndexError(f"Message index {index} out of range")
+        return _SPAN.unpack_from(self.spans, (index + 1) * _SPAN.size)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def _fragment(codec: JsonCodec, value: Any, prefix: bytes) -> bytes:
+    """Encode a nested value exactly as ``json.dumps(indent=2)`` would."""
+    return codec.dumps_pretty_bytes(value).replace(b"\n", b"\n" + prefix)
+
+
+def dump_indexed(data: Mapping[str, Any]) -> tuple[bytes, Span, list[Span]]:
+    """Serialize chat data and record byte spans while doing so.
+
+    The output is byte-identical to
+    ``json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")``.
+
+    Returns:
+        Tuple of (encoded chat JSON, metadata span, message spans)
+    """
+    codec = get_codec()
+    chunks: list[bytes] = []
+    position = 0
+    metadata_span: Span = (0, 0)
+    message_spans: list[Span] = []
+
+    def emit(chunk: bytes) -> None:
+        nonlocal position
+        chunks.append(chunk)
+        position += len(chunk)
+
+    emit(b"{")
+    for item_number, (key, value) in enumerate(data.items()):
+        emit(b",\n  " if item_number else b"\n  ")
+        emit(json.dumps(key, ensure_ascii=False).encode("utf-8") + b": ")
+        if key == "messages" and isinstance(value, list) and value:
+            emit(b"[")
+            for message_number, message in enumerate(value):
+                emit(b",\n    " if message_number else b"\n    ")
+                fragment = _fragment(codec, message, b"    ")
+                message_spans.append((position, len(fragment)))
+                emit(fragment)
+            emit(b"\n  ]")
+            continue
+
+        fragment = _fragment(codec, value, b"  ")
+        if key == "metadata":
+            metadata_span = (position, len(fragment))
+        emit(fragment)
+    emit(b"\n}" if data else b"}")
+
+    return b"".join(chunks), metadata_span, message_spans
+
+
+def write_index(
+    chat_path: str | Path,
+    metadata_span: Span,
+    message_spans: list[Span],
+    stat: Optional[os.stat_result] = None,
+) -> ChatIndex:
+    """Write the index for the chat file.
+
+    Args:
+        chat_path: Chat file the spans refer to
+        metadata_span: Byte span of the metadata object
+        message_spans: Byte spans of each message object
+        stat: Chat file stat taken before its bytes were read (defaults to
+            the file as it currently exists on disk)
+    """
+    chat_path = Path(chat_path)
+    if stat is None:
+        stat = chat_path.stat()
+    spans = b"".join(_SPAN.pack(*span) for span in [metadata_span, *message_spans])
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, stat.st_size, stat.st_mtime_ns, len(message_spans)
+    )
+    with open(index_path(chat_path), "wb") as f:
+        f.write(header + spans)
+    return ChatIndex(stat.st_size, stat.st_mtime_ns, len(message_spans), spans)
+
+
+def remove_index(chat_path: str | Path) -> None:
+    """Delete the index for chat_path, if any."""
+    index_path(chat_path).unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def load_index(chat_path: str | Path) -> Optional[ChatIndex]:
+    """Load the index for chat_path.
+
+    Returns:
+        The index, or None when it is missing, corrupt, or stale.
+    """
+    chat_path = Path(chat_path)
+    try:
+        raw = index_path(chat_path).read_bytes()
+        stat = chat_path.stat()
+    except FileNotFoundError:
+        return None
+
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, message_count = _HEADER.unpack_from(raw, 0)
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    spans = raw[_HEADER.size:]
+    if len(spans) != (message_count + 1) * _SPAN.size:
+        return None
+    if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return None
+    return ChatIndex(size, mtime_ns, message_count, spans)
+
+
+def read_metadata(chat_path: str | Path, index: ChatIndex) -> Any:
+    """Read only the metadata object of an indexed chat file."""
+    offset, length = index.metadata_span
+    with open(chat_path, "rb") as f:
+        f.seek(offset)
+        return get_codec().loads(f.read(length))
+
+
+def read_messages(chat_path: str | Path, index: ChatIndex, start: int, stop: int) -> list[Any]:
+    """Read raw messages [start, stop) of an indexed chat file with one seek."""
+    if start >= stop:
+        return []
+
+    spans = [index.message_span(i) for i in range(start, stop)]
+    first_offset = spans[0][0]
+    last_offset, last_length = spans[-1]
+    with open(chat_path, "rb") as f:
+        f.seek(first_offset)
+        blob = f.read(last_offset + last_length - first_offset)
+
+    codec = get_codec()
+    return [
+        codec.loads(blob[offset - first_offset : offset - first_offset + length])
+        for offset, length in spans
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Rebuilding
+# ---------------------------------------------------------------------------
+
+
+_WHITESPACE = " \t\n\r"
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position] in _WHITESPACE:
+        position += 1
+    return position
+
+
+def _expect(text: str, position: int, char: str) -> int:
+    if position >= len(text) or text[position] != char:
+        raise ValueError(f"Invalid chat file structure at offset {position}")
+    return position + 1
+
+
+def scan_spans(raw: bytes) -> tuple[Span, list[Span]]:
+    """Locate metadata and message spans in any valid chat JSON document.
+
+    Works on hand-edited or differently formatted files, not only the
+    canonical ``indent=2`` layout.
+    """
+    text = raw.decode("utf-8")
+    decoder = json.JSONDecoder()
+    ascii_only = text.isascii()
+    last_char = 0
+    last_byte = 0
+
+    def byte_offset(char_position: int) -> int:
+        nonlocal last_char, last_byte
+        if ascii_only:
+            return char_position
+        last_byte += len(text[last_char:char_position].encode("utf-8"))
+        last_char = char_position
+        return last_byte
+
+    def span(start: int, end: int) -> Span:
+        start_byte = byte_offset(start)
+        return start_byte, byte_offset(end) - start_byte
+
+    metadata_span: Optional[Span] = None
+    message_spans: Optional[list[Span]] = None
+
+    position = _expect(text, _skip_whitespace(text, 0), "{")
+    position = _skip_whitespace(text, position)
+    if position < len(text) and text[position] == "}":
+        raise ValueError("Invalid chat file structure: missing metadata or messages")
+
+    while True:
+        key, position = decoder.raw_decode(text, _skip_whitespace(text, position))
+        position = _expect(text, _skip_whitespace(text, position), ":")
+        position = _skip_whitespace(text, position)
+
+        if key == "messages":
+            message_spans = []
+            position = _skip_whitespace(text, _expect(text, position, "["))
+            if position < len(text) and text[position] == "]":
+                position += 1
+            else:
+                while True:
+                    _value, end = decoder.raw_decode(text, position)
+                    message_spans.append(span(position, end))
+                    position = _skip_whitespace(text, end)
+                    if position < len(text) and text[position] == ",":
+                        position = _skip_whitespace(text, position + 1)
+                        continue
+                    position = _expect(text, position, "]")
+                    break
+        else:
+            _value, end = decoder.raw_decode(text, position)
+            if key == "metadata":
+                metadata_span = span(position, end)
+            position = end
+
+        position = _skip_whitespace(text, position)
+        if position < len(text) and text[position] == ",":
+            position += 1
+            continue
+        _expect(text, position, "}")
+        break
+
+    if metadata_span is None or message_spans is None:
+        raise ValueError("Invalid chat file structure: missing metadata or messages")
+    return metadata_span, message_spans
+
+
+def build_index(chat_path: str | Path) -> ChatIndex:
+    """Scan a chat file and (re)write its index.
+
+    Raises:
+        ValueError: If the chat file is not a valid chat JSON document
+    """
+    chat_path = Path(chat_path)
+    stat = chat_path.stat()
+    raw = chat_path.read_bytes()
+    try:
+        metadata_span, message_spans = scan_spans(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid JSON in chat history file: {e}")
+    return write_index(chat_path, metadata_span, message_spans, stat=stat)
@@ -0,0 +1,325 @@
+"""Append-only journal for chat files.
+
+In journal mode a save appends the changes made since the previous save as
+JSONL records to ``<chat>.json.journal`` instead of rewriting the whole chat
+file. ``chat.load_chat`` replays snapshot + journal, and a compaction folds the
+journal back into the canonical (git-friendly) chat JSON.
+
+The first record of every journal pins the snapshot it applies to, so a
+journal left behind by an interrupted compaction is detected and discarded.
+
+Record kinds:
+- ``{"op": "base", "size": int, "mtime_ns": int}`` (first line only)
+- ``{"op": "metadata", "metadata": {...}}`` replaces chat metadata
+- ``{"op": "append", "message": {...}}`` appends one message
+- ``{"op": "replace", "index": int, "message": {...}}`` replaces one message
+- ``{"op": "truncate", "count": int}`` keeps only the first ``count`` messages
+- ``{"op": "purge", "indices": [int, ...]}`` deletes messages at those indices
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from .chat_message import Message
+from .chat_window import loaded_start, older_edits
+from .constants import CHAT_JOURNAL_SUFFIX
+from .json_codec import get_codec
+
+
+MessageSignature = tuple[tuple[str, Any], ...]
+
+# Runtime-only message keys that never reach disk.
+_RUNTIME_MESSAGE_KEYS = ("hex_id",)
+
+# Above this many rewritten messages a full snapshot is cheaper than a journal.
+_MIN_SNAPSHOT_REWRITE = 8
+
+_states: dict[str, "JournalState"] = {}
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def journal_path(chat_path: str | Path) -> Path:
+    """Return the journal path for a chat file."""
+    chat_path = Path(chat_path)
+    return chat_path.with_name(chat_path.name + CHAT_JOURNAL_SUFFIX)
+
+
+def _registry_key(chat_path: str | Path) -> str:
+    return str(Path(chat_path).resolve())
+
+
+def journal_lock(chat_path: str | Path) -> threading.Lock:
+    """Return the lock serializing snapshot/journal writes for one chat file."""
+    key = _registry_key(chat_path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _locks[key] = lock
+        return lock
+
+
+def persistable_message(message: dict[str, Any]) -> dict[str, Any]:
+    """Return a shallow copy of a message without runtime-only keys."""
+    if isinstance(message, Message):
+        return message.to_dict(exclude=_RUNTIME_MESSAGE_KEYS)
+    return {k: v for k, v in message.items() if k not in _RUNTIME_MESSAGE_KEYS}
+
+
+def message_signature(message: dict[str, Any]) -> MessageSignature:
+    """Capture message key/value identities (values are held, not copied)."""
+    if isinstance(message, Message):
+        return message.identity_items(exclude=_RUNTIME_MESSAGE_KEYS)
+    return tuple(
+        (key, value)
+        for key, value in message.items()
+        if key not in _RUNTIME_MESSAGE_KEYS
+    )
+
+
+def same_signature(current: MessageSignature, persisted: MessageSignature) -> bool:
+    """Whether two signatures hold the same keys with identical values."""
+    if len(current) != len(persisted):
+        return False
+    for (key, value), (old_key, old_value) in zip(current, persisted):
+        if key != old_key or value is not old_value:
+            return False
+    return True
+
+
+def _snapshot_stamp(chat_path: Path) -> Optional[dict[str, int]]:
+    try:
+        stat = chat_path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class JournalState:
+    """Persisted view of one in-memory chat, used to diff the next save.
+
+    The state keeps references to the persisted message objects and their
+    key/value identities, so detecting what changed costs pointer comparisons
+    rather than re-serializing the chat.
+
+    For a lazily loaded chat only the loaded window is tracked; messages
+    before it are known to be unchanged unless the window reports an edit
+    there, in which case the next save rewrites the snapshot.
+    """
+
+    def __init__(self, data: dict[str, Any], record_count: int = 0):
+        self.data = data
+        self.record_count = record_count
+        self.compaction: Any = None
+        self._source: Any = None
+        self._base = 0
+        self._older_edits = 0
+        self._messages: list[dict[str, Any]] = []
+        self._signatures: list[MessageSignature] = []
+        self._metadata: dict[str, Any] = {}
+        self.commit()
+
+    def commit(self) -> None:
+        """Mark the current in-memory chat as persisted."""
+        messages = self.data.get("messages", [])
+        self._source = messages
+        self._base = loaded_start(messages)
+        self._older_edits = older_edits(messages)
+        self._messages = list(messages[self._base:])
+        self._signatures = [message_signature(message) for message in self._messages]
+        self._metadata = dict(self.data.get("metadata") or {})
+
+    def pending_records(self) -> Optional[list[dict[str, Any]]]:
+        """Build journal records for changes since the last commit.
+
+        Returns:
+            Records to append (possibly empty), or None when the change is
+            large enough that rewriting the snapshot is cheaper.
+        """
+        records: list[dict[str, Any]] = []
+
+        metadata = self.data.get("metadata") or {}
+        if metadata != self._metadata:
+            records.append({"op": "metadata", "metadata": dict(metadata)})
+
+        messages = self.data.get("messages", [])
+        base = self._base
+        if base and (
+            messages is not self._source or older_edits(messages) != self._older_edits
+        ):
+            return None
+
+        current = messages[base:]
+        persisted = self._messages
+        signatures = self._signatures
+
+        prefix = 0
+        limit = min(len(current), len(persisted))
+        while (
+            prefix < limit
+            and current[prefix] is persisted[prefix]
+            and same_signature(message_signature(current[prefix]), signatures[prefix])
+        ):
+            prefix += 1
+
+        removed: list[int] = []
+        replaced: list[int] = []
+        old_index, new_index = prefix, prefix
+        while old_index < len(persisted) and new_index < len(current):
+            if current[new_index] is persisted[old_index]:
+                if not same_signature(
+                    message_signature(current[new_index]), signatures[old_index]
+                ):
+                    replaced.append(new_index)
+                new_index += 1
+            else:
+                removed.append(old_index)
+            old_index += 1
+        removed.extend(range(old_index, len(persisted)))
+        appended = current[new_index:]
+
+        rewritten = len(replaced) + len(appended)
+        if rewritten > max(len(messages) // 2, _MIN_SNAPSHOT_REWRITE):
+            return None
+
+        if removed:
+            kept = len(persisted) - len(removed)
+            if removed == list(range(kept, len(persisted))):
+                records.append({"op": "truncate", "count": base + kept})
+            else:
+                records.append({"op": "purge", "indices": [base + i for i in removed]})
+        for index in replaced:
+            records.append({
+                "op": "replace",
+                "index": base + index,
+                "message": persistable_message(current[index]),
+            })
+        for message in appended:
+            records.append({"op": "append", "message": persistable_message(message)})
+
+        return records
+
+
+def register(chat_path: str | Path, data: dict[str, Any], record_count: int = 0) -> JournalState:
+    """Track an in-memory chat as the persisted state of chat_path."""
+    state = JournalState(data, record_count=record_count)
+    _states[_registry_key(chat_path)] = state
+    return state
+
+
+def get_state(chat_path: str | Path, data: dict[str, Any]) -> Optional[JournalState]:
+    """Return the tracked state for chat_path when it belongs to data."""
+    state = _states.get(_registry_key(chat_path))
+    if state is None or state.data is not data:
+        return None
+    return state
+
+
+def forget(chat_path: str | Path) -> None:
+    """Stop tracking chat_path (e.g. when the chat is closed)."""
+    _states.pop(_registry_key(chat_path), None)
+
+
+def read_records(chat_path: str | Path) -> list[dict[str, Any]]:
+    """Read journal records that apply to the current snapshot.
+
+    A journal whose base record does not match the snapshot on disk is stale
+    (its changes were already folded in, or the snapshot was replaced) and is
+    removed. A truncated trailing line from an interrupted append is ignored.
+    """
+    chat_path = Path(chat_path)
+    path = journal_path(chat_path)
+    if not path.exists():
+        return []
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    codec = get_codec()
+    records: list[dict[str, Any]] = []
+    for line_number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = codec.loads(line)
+        except json.JSONDecodeError:
+            if line_number == len(lines) - 1:
+                logging.warning("Ignoring truncated chat journal record in %s", path)
+                break
+            raise ValueError(f"Invalid JSON in chat journal {path} (line {line_number + 1})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Invalid chat journal record in {path} (line {line_number + 1})")
+        records.append(record)
+
+    if not records:
+        return []
+
+    base = records[0]
+    stamp = _snapshot_stamp(chat_path)
+    if (
+        base.get("op") != "base"
+        or stamp is None
+        or base.get("size") != stamp["size"]
+        or base.get("mtime_ns") != stamp["mtime_ns"]
+    ):
+        logging.warning("Discarding stale chat journal: %s", path)
+        path.unlink(missing_ok=True)
+        return []
+
+    return records[1:]
+
+
+def apply_records(data: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    """Replay journal records onto raw chat data in place."""
+    messages = data.get("messages")
+    if not isinstance(messages, list):
+        raise ValueError("Invalid chat messages: expected list")
+
+    for record in records:
+        op = record.get("op")
+        if op == "metadata":
+            data["metadata"] = record["metadata"]
+        elif op == "append":
+            messages.append(record["message"])
+        elif op == "replace":
+            messages[record["index"]] = record["message"]
+        elif op == "truncate":
+            del messages[record["count"]:]
+        elif op == "purge":
+            removed = set(record["indices"])
+            messages[:] = [m for i, m in enumerate(messages) if i not in removed]
+        else:
+            raise ValueError(f"Unknown chat journal record: {op}")
+
+
+def append_records(chat_path: str | Path, records: list[dict[str, Any]]) -> None:
+    """Append records to the journal, starting it with a base record if new.
+
+    Caller must hold ``journal_lock(chat_path)``.
+    """
+    chat_path = Path(chat_path)
+    path = journal_path(chat_path)
+
+    codec = get_codec()
+    lines = []
+    if not path.exists():
+        stamp = _snapshot_stamp(chat_path)
+        if stamp is None:
+            raise FileNotFoundError(f"Chat file not found: {chat_path}")
+        lines.append(json.dumps({"op": "base", **stamp}))
+    for record in records:
+        lines.append(codec.dumps_compact(record))
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def remove_journal(chat_path: str | Path) -> None:
+    """Delete the journal for chat_path, if any."""
+    journal_path(chat_path).unlink(missing_ok=True)
@@ -3,13 +3,33 @@
 This module handles listing, selecting, creating, renaming, and deleting chat files.
 """
 
-import json
 import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path, PureWindowsPath
-from datetime import datetime
-from typing import Optional, Any
-
-from .constants import APP_NAME, CHAT_FILE_EXTENSION, DATETIME_FORMAT_FILENAME
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional, Any
+
+from . import (
+    chat_archive,
+    chat_catalog,
+    chat_index,
+    chat_segments,
+    chat_shards,
+    chat_stream,
+)
+from .constants import (
+    APP_NAME,
+    CHAT_ARCHIVE_MAX_WORKERS,
+    CHAT_FILE_EXTENSION,
+    CHAT_JOURNAL_SUFFIX,
+    CHAT_SHARD_MIGRATION_MAX_WORKERS,
+    CHAT_SIDECAR_SUFFIXES,
+    CHAT_SUMMARIES_SUFFIX,
+    DATETIME_FORMAT_FILENAME,
+)
+from .file_io import write_bytes_atomic
 from .path_utils import has_app_path_prefix, has_home_path_prefix, map_path
 
 
@@ -18,73 +38,154 @@ def _is_windows_absolute_path(path: str) -> bool:
     return PureWindowsPath(path).is_absolute()
 
 
-def list_chats(chats_dir: str) -> list[dict[str, Any]]:
-    """List all chat files in the directory with metadata.
+def _sidecar_paths(chat_file: Path) -> list[Path]:
+    """Return existing sidecars (journal, segments, ...) that belong to a chat file."""
+    sidecars = []
+    for suffix in CHAT_SIDECAR_SUFFIXES:
+        sidecar = chat_file.with_name(chat_file.name + suffix)
+        if sidecar.exists():
+            sidecars.append(sidecar)
+    return sidecars
 
-    Args:
-        chats_dir: Absolute path to chats directory
+
+def _read_chat_for_listing(file_path: Path) -> tuple[dict[str, Any], int]:
+    """Read chat metadata and message count for listing.
+
+    A pending journal is replayed. A segmented chat is summarized from its
+    manifest alone. Otherwise an index sidecar lets listing read only the
+    metadata bytes (a stale index is rebuilt on the way), and without one the
+    file is scanned from a bounded prefix (see
+    ``chat_stream.scan_chat_summary``).
 
     Returns:
-        List of dicts with keys: filename, path, title, created_at, updated_at, message_count
-        Sorted by updated_at (most recent first)
+        Tuple of (metadata, message count)
     """
-    chats_path = Path(chats_dir)
+    if file_path.with_name(file_path.name + CHAT_JOURNAL_SUFFIX).exists():
+        from .chat import load_chat
 
-    if not chats_path.exists():
-        return []
+        data = load_chat(str(file_path))
+        return data["metadata"], len(data["messages"])
 
-    chat_files = []
+    if chat_segments.is_segmented(file_path):
+        return chat_segments.read_summary(file_path)
 
-    for file_path in chats_path.glob(f"*{CHAT_FILE_EXTENSION}"):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            metadata = data.get("metadata", {})
-            messages = data.get("messages", [])
-
-            chat_files.append({
-                "filename": file_path.name,
-                "path": str(file_path),
-                "title": metadata.get("title"),
-                "created_at": metadata.get("created_at"),
-                "updated_at": metadata.get("updated_at"),
-                "message_count": len(messages),
-            })
-        except Exception as e:
-            # Skip invalid files but log the issue
-            logging.debug(f"Skipping invalid chat file {file_path}: {e}")
-            continue
+    index = chat_index.load_index(file_path)
+    if index is None and chat_index.index_path(file_path).exists():
+        index = chat_index.build_index(file_path)
+    if index is not None:
+        return chat_index.read_metadata(file_path, index), index.message_count
+
+    return chat_stream.scan_chat_summary(file_path)
 
-    # Sort by updated_at (most recent first), then by filename
+
+def _iter_chat_files(chats_path: Path) -> Iterable[Path]:
+    """Yield plain and archived chat files in chats_path and its month shards."""
+    patterns = [f"*{CHAT_FILE_EXTENSION}"] + [
+        f"*{CHAT_FILE_EXTENSION}{suffix}" for suffix in chat_archive.ARCHIVE_FORMATS.values()
+    ]
+    for pattern in patterns:
+        yield from chats_path.glob(pattern)
+        yield from chat_shards.iter_sharded_files(chats_path, pattern)
+
+
+def _listing_entry(chats_path: Path, filename: str, entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "filename": filename,
+        "path": str(chats_path / filename),
+        "title": entry.get("title"),
+        "created_at": entry.get("created_at"),
+        "updated_at": entry.get("updated_at"),
+        "message_count": entry.get("message_count", 0),
+    }
+
+
+def sort_chats(chat_files: list[dict[str, Any]]) -> None:
+    """Sort chat records in ``list_chats`` order, in place.
+
+    Most recently updated first, then by filename.
+    """
     chat_files.sort(
         key=lambda x: (x["updated_at"] or "", x["filename"]),
         reverse=True
     )
 
+
+def iter_chat_batches(chats_dir: str) -> Iterator[list[dict[str, Any]]]:
+    """Yield ``list_chats`` entries in batches as they become available.
+
+    The first batch holds every chat whose catalog entry is still current,
+    most recent first. Chats that changed since the last listing are read in
+    worker threads and follow one per batch as each finishes, so a picker can
+    show progress before the whole directory has been read. Only each batch
+    is sorted; use ``sort_chats`` on the combined list for ``list_chats``
+    order.
+
+    Args:
+        chats_dir: Absolute path to chats directory
+    """
+    chats_path = Path(chats_dir)
+
+    if not chats_path.exists():
+        return
+
+    for batch in chat_catalog.iter_catalog(
+        chats_path, _iter_chat_files(chats_path), _read_chat_for_listing
+    ):
+        chat_files = [
+            _listing_entry(chats_path, filename, entry)
+            for filename, entry in batch
+            if not entry.get("invalid")
+        ]
+        sort_chats(chat_files)
+        yield chat_files
+
+
+def list_chats(chats_dir: str) -> list[dict[str, Any]]:
+    """List all chat files in the directory with metadata.
+
+    Args:
+        chats_dir: Absolute path to chats directory
+
+    Returns:
+        List of dicts with keys: filename, path, title, created_at, updated_at, message_count
+        Sorted by updated_at (most recent first). Archived chats
+        (``.json.gz``/``.json.zst``) and chats in ``YYYY/MM/`` shards are
+        included; ``filename`` is the path relative to chats_dir. Entries
+        come from the chat catalog; only files changed since the last listing
+        are read.
+    """
+    chat_files = [chat for batch in iter_chat_batches(chats_dir) for chat in batch]
+    sort_chats(chat_files)
     return chat_files
 
 
-def generate_chat_filename(chats_dir: str, name: Optional[str] = None) -> str:
+def generate_chat_filename(
+    chats_dir: str, name: Optional[str] = None, sharded: bool = False
+) -> str:
     """Generate a new chat filename.
 
     Args:
         chats_dir: Absolute path to chats directory
         name: Optional base name (will be sanitized)
+        sharded: Place the chat in the current month's ``YYYY/MM/`` shard
+            (see ``chat_shards``)
 
     Returns:
         Absolute path to new chat file (guaranteed not to exist)
     """
+    now = datetime.now()
+    directory = chat_shards.shard_dir(chats_dir, now) if sharded else Path(chats_dir)
+
     if name:
         # Sanitize name
         safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
         base = f"{safe_name}{CHAT_FILE_EXTENSION}"
     else:
         # Use timestamp: polychat_YYYY-MM-DD_HH-MM-SS.json
-        timestamp = datetime.now().strftime(DATETIME_FORMAT_FILENAME)
+        timestamp = now.strftime(DATETIME_FORMAT_FILENAME)
         base = f"{APP_NAME}_{timestamp}{CHAT_FILE_EXTENSION}"
 
-    candidate = Path(chats_dir) / base
+    candidate = directory / base
 
     # If exists, add counter (rare case)
     if candidate.exists():
@@ -92,20 +193,38 @@ def generate_chat_filename(chats_dir: str, name: Optional[str] = None) -> str:
         stem = candidate.stem
         while candidate.exists():
             if name:
-                candidate = Path(chats_dir) / f"{stem}_{counter}{CHAT_FILE_EXTENSION}"
+                candidate = directory / f"{stem}_{counter}{CHAT_FILE_EXTENSION}"
             else:
-                candidate = Path(chats_dir) / f"{APP_NAME}_{timestamp}_{counter}{CHAT_FILE_EXTENSION}"
+                candidate = directory / f"{APP_NAME}_{timestamp}_{counter}{CHAT_FILE_EXTENSION}"
             counter += 1
 
     return str(candidate)
 
 
+def find_sharded_chat(chats_dir: str, filename: str) -> Optional[Path]:
+    """Find a chat (or its archive) by file name in the ``YYYY/MM/`` shards.
+
+    Returns:
+        Path of the newest match, or None
+    """
+    names = [filename] + [
+        chat_archive.archive_path(filename, fmt).name for fmt in chat_archive.ARCHIVE_FORMATS
+    ]
+    for name in names:
+        found = chat_shards.find_in_shards(chats_dir, name)
+        if found is not None:
+            return found
+    return None
+
+
 def rename_chat(old_path: str, new_name: str, chats_dir: str) -> str:
     """Rename a chat file.
 
     Args:
         old_path: Absolute path to existing chat file
-        new_name: New filename (can be just basename or full path)
+        new_name: New filename (can be just basename or full path). A bare
+            name keeps a chat inside chats_dir in its current directory, so
+            a sharded chat stays in its ``YYYY/MM/`` shard.
         chats_dir: Absolute path to chats directory
 
     Returns:
@@ -160,10 +279,15 @@ def rename_chat(old_path: str, new_name: str, chats_dir: str) -> str:
             except ValueError:
                 raise ValueError(f"Invalid path: {new_name} (outside chats directory)")
     else:
-        # Just filename - put in chats_dir
+        # Just filename - keep the chat's directory inside chats_dir
         if not new_name.endswith(CHAT_FILE_EXTENSION):
             new_name = f"{new_name}{CHAT_FILE_EXTENSION}"
-        new_file = (Path(chats_dir) / new_name).resolve()
+        target_dir = old_file.resolve().parent
+        try:
+            target_dir.relative_to(chats_dir_resolved)
+        except ValueError:
+            target_dir = Path(chats_dir)
+        new_file = (target_dir / new_name).resolve()
 
         # Security check: Ensure resolved path is within chats_dir
         try:
@@ -171,11 +295,20 @@ def rename_chat(old_path: str, new_name: str, chats_dir: str) -> str:
         except ValueError:
             raise ValueError(f"Invalid filename: {new_name} (outside chats directory)")
 
+    # An archived chat stays archived (its bytes are compressed).
+    old_format = chat_archive.archive_format(old_file)
+    if old_format and chat_archive.archive_format(new_file) != old_format:
+        new_file = chat_archive.archive_path(new_file, old_format)
+
     if new_file.exists():
         raise FileExistsError(f"Chat file already exists: {new_file}")
 
-    # Rename
+    # Rename (sidecar files follow the chat file)
+    sidecars = _sidecar_paths(old_file)
     old_file.rename(new_file)
+    for sidecar in sidecars:
+        suffix = sidecar.name[len(old_file.name):]
+        sidecar.rename(new_file.with_name(new_file.name + suffix))
 
     return str(new_file)
 
@@ -196,4 +329,284 @@ def delete_chat(path: str) -> None:
     if not chat_file.exists():
         raise FileNotFoundError(f"Chat file not found: {path}")
 
+    sidecars = _sidecar_paths(chat_file)
     chat_file.unlink()
+    for sidecar in sidecars:
+        if sidecar.is_dir():
+            shutil.rmtree(sidecar, ignore_errors=True)
+        else:
+            sidecar.unlink(missing_ok=True)
+
+
+def archive_chat(path: str, fmt: Optional[str] = None) -> dict[str, Any]:
+    """Compress a chat file into a ``.json.gz``/``.json.zst`` archive.
+
+    A pending journal is folded into the chat first, as are the segments of
+    a segmented chat; the index sidecar is dropped and Smart Context
+    summaries follow the archive. The archive keeps the chat file's
+    modification time.
+
+    Args:
+        path: Absolute path to a plain chat file
+        fmt: Archive format ("gz" or "zst"); defaults to the best available
+
+    Returns:
+        Dict with keys: path, archive_path, size, archived_size
+
+    Raises:
+        FileNotFoundError: If the chat file doesn't exist
+        FileExistsError: If the archive already exists
+        ValueError: If the chat is already archived or the format is unavailable
+    """
+    from . import chat_journal
+    from .chat import compact_chat_journal, unsegment_chat
+
+    fmt = _resolve_archive_format(fmt)
+    chat_file = Path(path)
+    if chat_archive.is_archived(chat_file):
+        raise ValueError(f"Chat is already archived: {path}")
+    if not chat_file.exists():
+        raise FileNotFoundError(f"Chat file not found: {path}")
+
+    target = chat_archive.archive_path(chat_file, fmt)
+    if target.exists():
+        raise FileExistsError(f"Archive already exists: {target}")
+
+    compact_chat_journal(str(chat_file))
+    unsegment_chat(str(chat_file))
+    with chat_journal.journal_lock(chat_file):
+        stat = chat_file.stat()
+        raw = chat_file.read_bytes()
+        write_bytes_atomic(target, chat_archive.encode_for_path(target, raw))
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        chat_file.unlink()
+        chat_index.remove_index(chat_file)
+        summaries = chat_file.with_name(chat_file.name + CHAT_SUMMARIES_SUFFIX)
+        if summaries.exists():
+            summaries.replace(target.with_name(target.name + CHAT_SUMMARIES_SUFFIX))
+
+    return {
+        "path": str(chat_file),
+        "archive_path": str(target),
+        "size": len(raw),
+        "archived_size": target.stat().st_size,
+    }
+
+
+def _resolve_archive_format(fmt: Optional[str]) -> str:
+    available = chat_archive.available_formats()
+    if fmt is None:
+        return available[-1]
+    if fmt not in available:
+        raise ValueError(
+            f"Archive format '{fmt}' is not available. Available: {', '.join(available)}"
+        )
+    return fmt
+
+
+def _last_updated(chat_info: dict[str, Any]) -> datetime:
+    """Return when a listed chat was last updated (file mtime as fallback)."""
+    try:
+        updated = datetime.fromisoformat(chat_info["updated_at"].replace("Z", "+00:00"))
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        return updated
+    except (AttributeError, TypeError, ValueError):
+        mtime = Path(chat_info["path"]).stat().st_mtime
+        return datetime.fromtimestamp(mtime, timezone.utc)
+
+
+def find_stale_chats(
+    chats_dir: str,
+    days: int,
+    exclude: Iterable[Optional[str]] = (),
+) -> list[dict[str, Any]]:
+    """List plain chats not updated in the last ``days`` days.
+
+    Args:
+        chats_dir: Absolute path to chats directory
+        days: Age threshold in days
+        exclude: Chat paths to leave alone (e.g. the open chat)
+
+    Returns:
+        ``list_chats`` entries, most recently updated first
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    excluded = {Path(path).resolve() for path in exclude if path}
+    stale = []
+    for chat_info in list_chats(chats_dir):
+        chat_file = Path(chat_info["path"])
+        if chat_archive.is_archived(chat_file) or chat_file.resolve() in excluded:
+            continue
+        if _last_updated(chat_info) < cutoff:
+            stale.append(chat_info)
+    return stale
+
+
+def archive_stale_chats(
+    chats_dir: str,
+    days: int,
+    fmt: Optional[str] = None,
+    exclude: Iterable[Optional[str]] = (),
+) -> tuple[list[dict[str, Any]], list[tuple[str, str]]]:
+    """Compress every chat not updated in ``days`` days, in a thread pool.
+
+    Args:
+        chats_dir: Absolute path to chats directory
+        days: Age threshold in days
+        fmt: Archive format ("gz" or "zst"); defaults to the best available
+        exclude: Chat paths to leave alone (e.g. the open chat)
+
+    Returns:
+        Tuple of (``archive_chat`` results, [(path, error message)])
+
+    Raises:
+        ValueError: If the format is unavailable
+    """
+    fmt = _resolve_archive_format(fmt)
+    stale = find_stale_chats(chats_dir, days, exclude)
+    archived: list[dict[str, Any]] = []
+    failed: list[tuple[str, str]] = []
+    if not stale:
+        return archived, failed
+
+    workers = min(CHAT_ARCHIVE_MAX_WORKERS, len(stale), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (chat_info["path"], pool.submit(archive_chat, chat_info["path"], fmt))
+            for chat_info in stale
+        ]
+        for path, future in futures:
+            try:
+                archived.append(future.result())
+            except Exception as e:
+                logging.warning("Failed to archive chat %s: %s", path, e)
+                failed.append((path, str(e)))
+    return archived, failed
+
+
+def _unique_shard_target(directory: Path, filename: str, taken: set[Path]) -> Path:
+    """Return directory/filename, adding a counter when it is already used."""
+    stem, suffix = filename.rsplit(CHAT_FILE_EXTENSION, 1)
+    candidate = directory / filename
+    counter = 1
+    while candidate in taken or candidate.exists():
+        candidate = directory / f"{stem}_{counter}{CHAT_FILE_EXTENSION}{suffix}"
+        counter += 1
+    taken.add(candidate)
+    return candidate
+
+
+def plan_shard_migration(
+    chats_dir: str, exclude: Iterable[Optional[str]] = ()
+) -> list[tuple[str, str]]:
+    """Plan moving every chat kept directly in chats_dir into its month shard.
+
+    A chat goes to the shard of its ``created_at`` (local time), or of its
+    file modification time when that is missing. Name clashes in a shard get
+    a counter, like ``generate_chat_filename``.
+
+    Returns:
+        List of (source, destination) paths relative to chats_dir
+    """
+    chats_path = Path(chats_dir)
+    excluded = {Path(path).resolve() for path in exclude if path}
+    entries = chat_catalog.refresh_catalog(
+        chats_path, _iter_chat_files(chats_path), _read_chat_for_listing
+    )
+
+    taken: set[Path] = set()
+    moves = []
+    for filename, entry in sorted(entries.items()):
+        file_path = chats_path / filename
+        if "/" in filename or file_path.resolve() in excluded:
+            continue
+        try:
+            when = chat_shards.chat_month(entry.get("created_at"), file_path)
+        except FileNotFoundError:
+            continue
+        target = _unique_shard_target(
+            chat_shards.shard_dir(chats_path, when), filename, taken
+        )
+        moves.append((filename, target.relative_to(chats_path).as_posix()))
+    return moves
+
+
+def _move_to_shard(chats_path: Path, src: str, dst: str) -> str:
+    """Move one chat and its sidecars; repeating an interrupted move finishes it."""
+    from . import chat_journal
+
+    src_file = chats_path / src
+    dst_file = chats_path / dst
+    dst_file.parent.mkdir(parents=True, exist_ok=True)
+    with chat_journal.journal_lock(src_file):
+        sidecars = _sidecar_paths(src_file)
+        if src_file.exists():
+            if dst_file.exists():
+                raise FileExistsError(f"Chat file already exists: {dst_file}")
+            src_file.rename(dst_file)
+        elif not dst_file.exists():
+            raise FileNotFoundError(f"Chat file not found: {src_file}")
+        for sidecar in sidecars:
+            suffix = sidecar.name[len(src_file.name):]
+            sidecar.rename(dst_file.with_name(dst_file.name + suffix))
+    return str(dst_file)
+
+
+def migrate_chats_to_shards(
+    chats_dir: str, exclude: Iterable[Optional[str]] = ()
+) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """Move chats kept directly in chats_dir into ``YYYY/MM/`` shards, in parallel.
+
+    The plan is written to a progress log first and every finished move is
+    appended to it (see ``chat_shards``). When a previous migration was
+    interrupted, its remaining moves are made instead of planning anew;
+    moves of excluded chats stay pending in the log for a later migration.
+
+    Args:
+        chats_dir: Absolute path to chats directory
+        exclude: Chat paths to leave alone (e.g. the open chat)
+
+    Returns:
+        Tuple of ([(old path, new path)], [(path, error message)])
+    """
+    chats_path = Path(chats_dir)
+    excluded = {Path(path).resolve() for path in exclude if path}
+    moves = chat_shards.read_pending_moves(chats_path)
+    held_back = 0
+    if moves is not None:
+        pending = moves
+        moves = [
+            (src, dst) for src, dst in pending
+            if (chats_path / src).resolve() not in excluded
+        ]
+        held_back = len(pending) - len(moves)
+    log = chat_shards.ProgressLog(chats_path)
+    moved: list[tuple[str, str]] = []
+    failed: list[tuple[str, str]] = []
+    try:
+        if moves is None:
+            moves = plan_shard_migration(chats_dir, excluded)
+            log.write_plan(moves)
+        if not moves:
+            return moved, failed
+
+        workers = min(CHAT_SHARD_MIGRATION_MAX_WORKERS, len(moves), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_move_to_shard, chats_path, src, dst): src
+                for src, dst in moves
+            }
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    new_path = future.result()
+                except Exception as e:
+                    logging.warning("Failed to move chat %s into its shard: %s", src, e)
+                    failed.append((str(chats_path / src), str(e)))
+                    continue
+                log.mark_done(src)
+                moved.append((str(chats_path / src), new_path))
+    finally:
+        log.close(finished=not failed and not held_back)
+    return moved, failed
@@ -0,0 +1,173 @@
+"""Compact in-memory chat message.
+
+On disk a message's ``content`` is a list of lines. Keeping that list in
+memory costs one ``str`` object per line plus the list and a per-message
+dict, which adds up to hundreds of thousands of small objects for a long
+chat. ``Message`` stores the same data as:
+
+- one string holding the lines joined with ``"\\n"``
+- an ``array`` of line end offsets into that string (so lines that themselves
+  contain ``"\\n"``, and ``[]`` vs ``[""]``, round-trip exactly)
+- an interned tuple of keys (insertion order, shared by all messages with the
+  same keys) and a list of values; ``role`` and ``model`` strings are
+  interned too, since every decoded message would otherwise carry its own copy
+
+``Message`` is a ``MutableMapping``: ``msg["content"]`` builds a fresh line
+list on each access and everything else behaves like the dict it replaces.
+Because that list is a copy, change content by assigning
+``msg["content"] = lines`` rather than mutating the returned list. Content
+that is not a list of strings is stored as-is. ``to_dict()`` turns a message
+back into the plain dict that gets serialized.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Iterator, Mapping, MutableMapping
+from itertools import accumulate
+from typing import Any, Iterable, Optional
+
+_CONTENT = "content"
+
+# Keys whose string values repeat across messages.
+_INTERNED_VALUE_KEYS = frozenset({"role", "model"})
+
+# Key tuples shared by every message with the same keys in the same order.
+_key_orders: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+def _intern_keys(keys: tuple[str, ...]) -> tuple[str, ...]:
+    return _key_orders.setdefault(keys, keys)
+
+
+def _join_line_ends(left: int, right: int) -> int:
+    # accumulate() step: previous line end + separator + next line length.
+    return left + 1 + right
+
+
+class Message(MutableMapping):
+    """Chat message with its content lines packed into one string."""
+
+    __slots__ = ("_keys", "_values", "_text", "_ends")
+
+    def __init__(self, fields: Mapping[str, Any] | Iterable[tuple[str, Any]] = ()):
+        self._text: Optional[str] = None
+        self._ends: Optional[array] = None
+        items = fields.items() if isinstance(fields, Mapping) else fields
+        keys: list[str] = []
+        values: list[Any] = []
+        for key, value in items:
+            if key in _INTERNED_VALUE_KEYS and type(value) is str:
+                value = sys.intern(value)
+            if key in keys:
+                values[keys.index(key)] = value
+            else:
+                keys.append(key)
+                values.append(value)
+        self._keys = _intern_keys(tuple(keys))
+        self._values = values
+        if _CONTENT in self._keys:
+            index = self._keys.index(_CONTENT)
+            if self._pack_content(values[index]):
+                values[index] = None
+
+    def _pack_content(self, value: Any) -> bool:
+        """Pack a list of strings into text + offsets; False if not packable."""
+        if type(value) is list and all(type(line) is str for line in value):
+            self._text = "\n".join(value)
+            self._ends = array("I", accumulate(map(len, value), _join_line_ends))
+            return True
+        self._text = None
+        self._ends = None
+        return False
+
+    def _content_lines(self) -> list[str]:
+        text = self._text
+        ends = self._ends
+        if len(ends) == text.count("\n") + 1:
+            return text.split("\n")
+        lines = []
+        start = 0
+        for end in ends:
+            lines.append(text[start:end])
+            start = end + 1
+        return lines
+
+    @property
+    def content_text(self) -> Optional[str]:
+        """Content lines joined with newlines, without building the list.
+
+        None when content is missing or not a list of strings.
+        """
+        return self._text
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+        if key == _CONTENT and self._text is not None:
+            return self._content_lines()
+        return self._values[index]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            index = len(self._keys)
+            self._keys = _intern_keys(self._keys + (key,))
+            self._values.append(None)
+        if key == _CONTENT and self._pack_content(value):
+            value = None
+        elif key in _INTERNED_VALUE_KEYS and type(value) is str:
+            value = sys.intern(value)
+        self._values[index] = value
+
+    def __delitem__(self, key: str) -> None:
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+        self._keys = _intern_keys(self._keys[:index] + self._keys[index + 1 :])
+        del self._values[index]
+        if key == _CONTENT:
+            self._text = None
+            self._ends = None
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"Message({self.to_dict()!r})"
+
+    def copy(self) -> Message:
+        """Shallow copy (packed content is immutable and shared)."""
+        clone = Message.__new__(Message)
+        clone._keys = self._keys
+        clone._values = list(self._values)
+        clone._text = self._text
+        clone._ends = self._ends
+        return clone
+
+    def to_dict(self, exclude: tuple[str, ...] = ()) -> dict[str, Any]:
+        """Return a plain dict (content as a line list), minus excluded keys."""
+        return {key: self[key] for key in self._keys if key not in exclude}
+
+    def identity_items(self, exclude: tuple[str, ...] = ()) -> tuple[tuple[str, Any], ...]:
+        """Key/value pairs whose values keep their identity until reassigned.
+
+        Packed content is represented by its text, so comparing items with
+        ``is`` detects changed values without building line lists.
+        """
+        return tuple(
+            (key, self._text if key == _CONTENT and self._text is not None else value)
+            for key, value in zip(self._keys, self._values)
+            if key not in exclude
+        )
@@ -0,0 +1,313 @@
+"""Related-chat discovery with hashed TF-IDF vectors.
+
+Each chat is reduced to a bag of words over its title, summary, and
+user/assistant messages. Words are hashed into a fixed number of buckets
+(CRC-32, so buckets are stable across runs) and only the most frequent
+buckets are kept, which bounds every chat's vector regardless of its length.
+
+Vectors are cached in ``<chats_dir>/.polychat-related`` and pinned to each
+chat file's stamp (see ``chat_catalog.file_stamp``), so only chats that
+changed since the last ``/related`` are re-read. Scoring is cosine similarity
+over sublinear TF times smoothed IDF; with NumPy installed the whole corpus
+is scored in a few vectorized passes, otherwise a pure-Python loop is used.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .chat_catalog import file_stamp
+from .chat_search import chat_key
+from .chat_window import iter_loaded_messages
+from .constants import (
+    CHAT_RELATED_FILE_NAME,
+    CHAT_RELATED_HASH_BUCKETS,
+    CHAT_RELATED_MAX_TERMS,
+    CHAT_SCAN_MAX_WORKERS,
+)
+from .file_io import write_bytes_atomic
+from .json_codec import get_codec
+
+
+# Sorted bucket ids and their counts.
+Vector = tuple[list[int], list[int]]
+
+_VERSION = 1
+_WORD = re.compile(r"\w{2,}")
+
+
+def cache_path(chats_dir: str | Path) -> Path:
+    """Return the vector cache path for a chats directory."""
+    return Path(chats_dir) / CHAT_RELATED_FILE_NAME
+
+
+def term_vector(texts: Iterable[str]) -> Vector:
+    """Hash words into buckets and keep the most frequent ones."""
+    counts: Counter[int] = Counter()
+    for text in texts:
+        counts.update(
+            zlib.crc32(word.encode("utf-8")) % CHAT_RELATED_HASH_BUCKETS
+            for word in _WORD.findall(text.lower())
+        )
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:CHAT_RELATED_MAX_TERMS]
+    top.sort()
+    return [bucket for bucket, _count in top], [count for _bucket, count in top]
+
+
+def _message_texts(messages: Iterable[Any]) -> Iterable[str]:
+    for message in messages:
+        if message.get("role") not in ("user", "assistant"):
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            yield from (line for line in content if isinstance(line, str))
+        elif isinstance(content, str):
+            yield content
+
+
+def _metadata_texts(metadata: Any) -> list[str]:
+    if not isinstance(metadata, dict):
+        return []
+    return [
+        metadata[field]
+        for field in ("title", "summary")
+        if isinstance(metadata.get(field), str)
+    ]
+
+
+def chat_vector(data: dict[str, Any]) -> Vector:
+    """Return the term vector of in-memory chat data.
+
+    A lazily loaded chat contributes only its loaded messages.
+    """
+    messages = (message for _index, message in iter_loaded_messages(data.get("messages", [])))
+    return term_vector(chain(_metadata_texts(data.get("metadata")), _message_texts(messages)))
+
+
+def _read_vector(chat_path: Path) -> tuple[list[int], Vector]:
+    from .chat import load_chat
+
+    stamp = file_stamp(chat_path)
+    return stamp, chat_vector(load_chat(str(chat_path)))
+
+
+# Parsed cache by path, with the cache file's stamp when it was read or written.
+_loaded: dict[str, tuple[list[int], dict[str, tuple[list[int], Vector]]]] = {}
+_loaded_lock = threading.Lock()
+
+
+def _load_cache(chats_dir: str | Path) -> dict[str, tuple[list[int], Vector]]:
+    """Return cached (stamp, vector) by chat key, parsing the file only if it changed."""
+    path = cache_path(chats_dir)
+    try:
+        stamp = file_stamp(path)
+    except FileNotFoundError:
+        return {}
+    with _loaded_lock:
+        loaded = _loaded.get(str(path))
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    try:
+        data = get_codec().loads(path.read_bytes())
+    except (OSError, ValueError, UnicodeDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _VERSION:
+        return {}
+    chats = data.get("chats")
+    if not isinstance(chats, dict):
+        return {}
+    entries = {
+        name: (entry["stamp"], (entry["buckets"], entry["counts"]))
+        for name, entry in chats.items()
+    }
+    with _loaded_lock:
+        _loaded[str(path)] = (stamp, entries)
+    return entries
+
+
+def _save_cache(chats_dir: str | Path, entries: dict[str, tuple[list[int], Vector]]) -> None:
+    path = cache_path(chats_dir)
+    chats = {
+        name: {"stamp": stamp, "buckets": buckets, "counts": counts}
+        for name, (stamp, (buckets, counts)) in entries.items()
+    }
+    payload = get_codec().dumps_compact({"version": _VERSION, "chats": chats})
+    try:
+        write_bytes_atomic(path, payload.encode("utf-8"))
+        stamp = file_stamp(path)
+    except OSError as e:
+        logging.debug("Could not write related-chat cache in %s: %s", chats_dir, e)
+        return
+    with _loaded_lock:
+        _loaded[str(path)] = (stamp, entries)
+
+
+def refresh_vectors(chats_dir: str) -> dict[str, Vector]:
+    """Bring the vector cache up to date.
+
+    Returns:
+        Vectors keyed like the search index (``chat_search.chat_key``)
+    """
+    from .chat_manager import list_chats
+
+    cached = _load_cache(chats_dir)
+    entries: dict[str, tuple[list[int], Vector]] = {}
+    changed: list[tuple[str, Path]] = []
+    for chat_info in list_chats(chats_dir):
+        chat_path = Path(chat_info["path"])
+        name = chat_key(chats_dir, chat_path)
+        if name is None:
+            continue
+        entry = cached.get(name)
+        try:
+            if entry is not None and entry[0] == file_stamp(chat_path):
+                entries[name] = entry
+            else:
+                changed.append((name, chat_path))
+        except FileNotFoundError:
+            continue
+
+    if changed:
+        workers = min(CHAT_SCAN_MAX_WORKERS, len(changed))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(name, pool.submit(_read_vector, path)) for name, path in changed]
+            for name, future in futures:
+                try:
+                    entries[name] = future.result()
+                except Exception as e:
+                    logging.debug("Not vectorizing chat %s: %s", name, e)
+
+    if changed or entries.keys() != cached.keys():
+        _save_cache(chats_dir, entries)
+
+    return {name: vector for name, (_stamp, vector) in entries.items()}
+
+
+def _tf(count: float) -> float:
+    return 1.0 + math.log(count)
+
+
+def _rank_python(
+    names: list[str], vectors: list[Vector], query: Vector
+) -> list[tuple[str, float]]:
+    doc_count = len(vectors)
+    df = Counter(chain.from_iterable(buckets for buckets, _counts in vectors))
+
+    def idf(bucket: int) -> float:
+        return math.log((1 + doc_count) / (1 + df.get(bucket, 0))) + 1.0
+
+    query_weights = {
+        bucket: _tf(count) * idf(bucket) for bucket, count in zip(*query)
+    }
+    query_norm = math.sqrt(sum(weight * weight for weight in query_weights.values()))
+
+    scores = []
+    for name, (buckets, counts) in zip(names, vectors):
+        dot = 0.0
+        norm = 0.0
+        for bucket, count in zip(buckets, counts):
+            weight = _tf(count) * idf(bucket)
+            norm += weight * weight
+            dot += weight * query_weights.get(bucket, 0.0)
+        if dot > 0:
+            scores.append((name, dot / (math.sqrt(norm) * query_norm)))
+    return scores
+
+
+class _NumpyCorpus:
+    """Corpus flattened into arrays once, then scored per query."""
+
+    def __init__(self, vectors: list[Vector]):
+        # Holding the vectors keeps their ids unique while this is cached.
+        self.vectors = vectors
+        doc_count = len(vectors)
+        lengths = numpy.fromiter((len(buckets) for buckets, _ in vectors), dtype=numpy.int64)
+        total = int(lengths.sum())
+        self.buckets = numpy.fromiter(
+            chain.from_iterable(b for b, _ in vectors), dtype=numpy.int64, count=total
+        )
+        counts = numpy.fromiter(
+            chain.from_iterable(c for _, c in vectors), dtype=numpy.float64, count=total
+        )
+        self.docs = numpy.repeat(numpy.arange(doc_count), lengths)
+
+        df = numpy.bincount(self.buckets, minlength=CHAT_RELATED_HASH_BUCKETS)
+        self.idf = numpy.log((1 + doc_count) / (1 + df)) + 1.0
+        self.weights = (1.0 + numpy.log(counts)) * self.idf[self.buckets]
+        self.norms = numpy.sqrt(
+            numpy.bincount(self.docs, weights=self.weights * self.weights, minlength=doc_count)
+        )
+
+    def scores(self, query: Vector) -> list[tuple[int, float]]:
+        """Return (document index, cosine similarity) for documents sharing a term."""
+        dense_query = numpy.zeros(CHAT_RELATED_HASH_BUCKETS)
+        query_buckets = numpy.asarray(query[0], dtype=numpy.int64)
+        dense_query[query_buckets] = (
+            1.0 + numpy.log(numpy.asarray(query[1], dtype=numpy.float64))
+        ) * self.idf[query_buckets]
+        query_norm = numpy.sqrt(numpy.dot(dense_query, dense_query))
+
+        dots = numpy.bincount(
+            self.docs,
+            weights=self.weights * dense_query[self.buckets],
+            minlength=len(self.vectors),
+        )
+        matched = numpy.nonzero(dots > 0)[0]
+        scores = dots[matched] / (self.norms[matched] * query_norm)
+        return [(int(i), float(score)) for i, score in zip(matched, scores)]
+
+
+_numpy_corpus: Optional[tuple[tuple[int, ...], _NumpyCorpus]] = None
+
+
+def _rank_numpy(
+    names: list[str], vectors: list[Vector], query: Vector
+) -> list[tuple[str, float]]:
+    global _numpy_corpus
+    key = tuple(map(id, vectors))
+    if _numpy_corpus is None or _numpy_corpus[0] != key:
+        _numpy_corpus = (key, _NumpyCorpus(vectors))
+    return [(names[i], score) for i, score in _numpy_corpus[1].scores(query)]
+
+
+def rank_related(
+    vectors: dict[str, Vector],
+    query: Vector,
+    count: int,
+    exclude: Optional[str] = None,
+) -> list[tuple[str, float]]:
+    """Return up to ``count`` (chat key, cosine similarity), most similar first.
+
+    Args:
+        vectors: Corpus vectors by chat key (also used for IDF). With NumPy,
+            the flattened corpus is reused while the same vector objects
+            are passed in, which ``refresh_vectors`` does until one changes.
+        query: Vector to compare against
+        count: Number of results
+        exclude: Chat key to leave out (e.g. the chat the query came from)
+    """
+    if not query[0] or not vectors:
+        return []
+    rank = _rank_numpy if numpy is not None else _rank_python
+    scores = [
+        (name, score)
+        for name, score in rank(list(vectors), list(vectors.values()), query)
+        if name != exclude
+    ]
+    scores.sort(key=lambda item: (-item[1], item[0]))
+    return scores[:count]
@@ -0,0 +1,132 @@
+"""BM25 retrieval of relevant older messages within the open chat.
+
+When ``max_context_tokens`` leaves old turns out of a request (see
+``context_budget``), the turns that matter for the new message are often far
+back. With ``retrieval_turns`` set in ``ai_limits``, the dropped turns whose
+messages score highest against the message being sent are put back into
+the request, in chat order, as long as they fit the budget.
+
+Scoring is Okapi BM25 over the AI-visible messages of the chat, with words
+(``\\w{2,}``, lowercased) as terms. ``MessageIndex`` is an inverted index
+(term -> {message position: term count}) that ``SessionManager`` keeps for
+the open chat. Each send syncs it with the messages about to be sent:
+the longest run of positions that still hold the same text is kept, the
+positions after it (a retry, a rewind, a purge) are removed, and only the
+messages from there on are tokenized. A changed first message (a new
+``/compact`` checkpoint) rebuilds the index. A query touches just the
+postings of its own terms.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Any
+
+from .constants import RETRIEVAL_BM25_B, RETRIEVAL_BM25_K1
+from .tokens import message_text
+
+_WORD = re.compile(r"\w{2,}")
+
+
+def text_terms(text: str) -> Counter[str]:
+    """Return the term counts of a text."""
+    return Counter(_WORD.findall(text.lower()))
+
+
+class MessageIndex:
+    """Incremental BM25 index over one chat's messages, by position."""
+
+    def __init__(self) -> None:
+        self._texts: list[str] = []
+        self._terms: list[Counter[str]] = []
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def clear(self) -> None:
+        """Forget every indexed message."""
+        self._texts.clear()
+        self._terms.clear()
+        self._lengths.clear()
+        self._total_length = 0
+        self._postings.clear()
+
+    def sync(self, messages: list[Any]) -> int:
+        """Index messages in order, reusing positions that are unchanged.
+
+        Returns:
+            Number of messages that had to be tokenized
+        """
+        common = min(len(self._texts), len(messages))
+        if common and message_text(messages[0]) != self._texts[0]:
+            self.clear()
+            common = 0
+        # Changes are at the end (a retry, a rewind) or shift everything
+        # after them (a purge), so the kept prefix ends at the last match.
+        while common and message_text(messages[common - 1]) != self._texts[common - 1]:
+            common -= 1
+
+        while len(self._texts) > common:
+            self._pop()
+        for position in range(common, len(messages)):
+            self._add(message_text(messages[position]))
+        return len(messages) - common
+
+    def _add(self, text: str) -> None:
+        position = len(self._texts)
+        terms = text_terms(text)
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[position] = count
+        length = sum(terms.values())
+        self._texts.append(text)
+        self._terms.append(terms)
+        self._lengths.append(length)
+        self._total_length += length
+
+    def _pop(self) -> None:
+        position = len(self._texts) - 1
+        for term in self._terms[position]:
+            postings = self._postings[term]
+            del postings[position]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths[position]
+        self._texts.pop()
+        self._terms.pop()
+        self._lengths.pop()
+
+    def score(self, query: str) -> dict[int, float]:
+        """Return the BM25 score of every message sharing a term with query."""
+        count = len(self._texts)
+        if not count or not self._total_length:
+            return {}
+        average_length = self._total_length / count
+
+        scores: dict[int, float] = {}
+        for term in text_terms(query):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            frequency = len(postings)
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for position, term_count in postings.items():
+                norm = RETRIEVAL_BM25_K1 * (
+                    1 - RETRIEVAL_BM25_B
+                    + RETRIEVAL_BM25_B * self._lengths[position] / average_length
+                )
+                scores[position] = scores.get(position, 0.0) + idf * (
+                    term_count * (RETRIEVAL_BM25_K1 + 1) / (term_count + norm)
+                )
+        return scores
+
+    def rank(self, query: str, *, before: int) -> list[int]:
+        """Return positions before ``before`` matching query, best first."""
+        scores = self.score(query)
+        ranked = [position for position in scores if position < before]
+        ranked.sort(key=lambda position: (-scores[position], -position))
+        return ranked
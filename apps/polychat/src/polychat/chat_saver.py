@@ -0,0 +1,107 @@
+"""Write-behind chat saving.
+
+With ``chat_storage.write_behind`` enabled, ``SessionManager.save_current_chat``
+only marks the chat dirty. ``ChatSaver`` writes it once the chat has been
+quiet for ``CHAT_SAVE_DEBOUNCE_SEC``, so the several saves one turn triggers
+(user message, assistant response, metadata updates) become a single write.
+
+The saver keeps a reference to the live chat dict, not a copy: whatever state
+the chat is in when the write happens is what lands on disk.
+
+``flush()`` is the synchronization point. It cancels pending timers, writes
+every dirty chat, waits for writes already in progress, and raises if a write
+fails (the chat stays dirty so the next flush retries). Callers flush before
+anything that reads, moves, or deletes chat files: switching or closing a
+chat, ``/rename``, ``/delete``, and leaving the REPL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from .constants import CHAT_SAVE_DEBOUNCE_SEC
+
+SaveFunc = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+class ChatSaver:
+    """Coalesce chat saves per path and write them after a debounce."""
+
+    def __init__(self, save: SaveFunc, debounce: float = CHAT_SAVE_DEBOUNCE_SEC):
+        self._save = save
+        self._debounce = debounce
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._timers: dict[str, asyncio.Task[None]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def is_dirty(self, path: Optional[str] = None) -> bool:
+        """Whether a chat (or any chat, when path is None) awaits a write."""
+        if path is None:
+            return bool(self._pending)
+        return path in self._pending
+
+    def request(self, path: str, data: dict[str, Any]) -> None:
+        """Mark a chat dirty and (re)start its debounce timer.
+
+        Must be called from a running event loop.
+        """
+        self._pending[path] = data
+        timer = self._timers.pop(path, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[path] = asyncio.get_running_loop().create_task(
+            self._write_later(path)
+        )
+
+    async def flush(self, path: Optional[str] = None) -> None:
+        """Write pending saves now and wait for writes in progress.
+
+        Args:
+            path: Flush only this chat; None flushes every chat.
+
+        Raises:
+            Exception: The first write error; the failed chat stays dirty.
+        """
+        if path is None:
+            paths = list(dict.fromkeys([*self._pending, *self._locks]))
+        else:
+            paths = [path]
+
+        first_error: Optional[BaseException] = None
+        for chat_path in paths:
+            timer = self._timers.pop(chat_path, None)
+            if timer is not None:
+                timer.cancel()
+            try:
+                await self._write(chat_path)
+            except Exception as e:
+                if first_error is None:
+                    first_error = e
+        if first_error is not None:
+            raise first_error
+
+    async def _write_later(self, path: str) -> None:
+        await asyncio.sleep(self._debounce)
+        # From here on the write must not be cancelled by a newer request;
+        # that request restarts a timer of its own.
+        if self._timers.get(path) is asyncio.current_task():
+            del self._timers[path]
+        try:
+            await self._write(path)
+        except Exception as e:
+            logging.error("Write-behind chat save failed (%s): %s", path, e, exc_info=True)
+
+    async def _write(self, path: str) -> None:
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            data = self._pending.pop(path, None)
+            if data is None:
+                return
+            try:
+                await self._save(path, data)
+            except BaseException:
+                # Keep newer requests; otherwise retry this state next flush.
+                self._pending.setdefault(path, data)
+                raise
@@ -0,0 +1,419 @@
+"""Full-text search across the chats directory.
+
+``<chats_dir>/.polychat-search.sqlite3`` is an SQLite FTS5 index over every
+chat's title, summary, and message text. Rows are keyed by the chat's path
+relative to the chats directory and by message position; each chat is pinned
+to its file stamp (see ``chat_catalog.file_stamp``).
+
+The index is kept current from two directions:
+
+- Saves made by this process update it in place (``index_saved_chat``). The
+  saved messages are compared with the ones indexed last time by object
+  identity, so only rows from the first changed message on are rewritten.
+  A chat opened from a file the index is current for starts out compared
+  with the messages loaded from it (``track_loaded_chat``).
+- Before a search, ``sync_index`` re-reads chat files whose stamp no longer
+  matches (new, edited elsewhere, renamed, archived) and drops chats that are
+  gone. Chats saved by this process are already current and are skipped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .chat_catalog import file_stamp
+from .chat_message import Message
+from .chat_window import iter_loaded_messages, loaded_start, older_edits
+from .constants import CHAT_SCAN_MAX_WORKERS, CHAT_SEARCH_INDEX_FILE_NAME
+
+
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE chats (
+    chat TEXT PRIMARY KEY,
+    stamp TEXT,
+    title TEXT
+);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    chat TEXT NOT NULL,
+    position INTEGER,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX entries_by_chat ON entries(chat, position);
+CREATE VIRTUAL TABLE entries_fts USING fts5(
+    text,
+    content='entries',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER entries_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+PRAGMA user_version = {version};
+""".format(version=_SCHEMA_VERSION)
+
+# (position, role, text); metadata rows (title/summary) have no position.
+Row = tuple[Optional[int], str, str]
+
+
+@dataclass(slots=True, frozen=True)
+class SearchHit:
+    """One matching message, title, or summary."""
+
+    chat: str
+    title: Optional[str]
+    position: Optional[int]
+    role: str
+    snippet: str
+
+
+@dataclass(slots=True)
+class _Indexed:
+    """In-memory messages whose rows are in the index, for diffing saves."""
+
+    source: Any
+    base: int
+    older_edits: int
+    messages: list[Any]
+    contents: list[Any]
+
+
+_indexed: dict[str, _Indexed] = {}
+_indexed_lock = threading.Lock()
+
+
+def index_path(chats_dir: str | Path) -> Path:
+    """Return the search index path for a chats directory."""
+    return Path(chats_dir) / CHAT_SEARCH_INDEX_FILE_NAME
+
+
+def chat_key(chats_dir: str | Path, chat_path: str | Path) -> Optional[str]:
+    """Return the index key for a chat file, or None if it is outside chats_dir."""
+    try:
+        relative = Path(chat_path).resolve().relative_to(Path(chats_dir).resolve())
+    except ValueError:
+        return None
+    return relative.as_posix()
+
+
+def _connect(chats_dir: str | Path) -> sqlite3.Connection:
+    """Open the index, (re)creating it when missing or from an older schema."""
+    conn = sqlite3.connect(index_path(chats_dir), timeout=10)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+        with conn:
+            for table in ("entries_fts", "entries", "chats"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(_SCHEMA)
+    return conn
+
+
+def _message_text(message: Any) -> Optional[str]:
+    """Return searchable text for a message (None when it has none)."""
+    if isinstance(message, Message):
+        return message.content_text
+    content = message.get("content") if isinstance(message, dict) else None
+    if isinstance(content, list) and all(isinstance(line, str) for line in content):
+        return "\n".join(content)
+    if isinstance(content, str):
+        return content
+    return None
+
+
+def _content_identity(message: Any) -> Any:
+    """Return the object that changes whenever a message's text does."""
+    if isinstance(message, Message):
+        return message.content_text
+    return message.get("content") if isinstance(message, dict) else None
+
+
+def _metadata_rows(metadata: Any) -> list[Row]:
+    rows: list[Row] = []
+    if isinstance(metadata, dict):
+        for field in ("title", "summary"):
+            value = metadata.get(field)
+            if isinstance(value, str) and value:
+                rows.append((None, field, value))
+    return rows
+
+
+def _message_rows(messages: Iterator[tuple[int, Any]]) -> list[Row]:
+    rows: list[Row] = []
+    for position, message in messages:
+        text = _message_text(message)
+        if text:
+            rows.append((position, str(message.get("role") or ""), text))
+    return rows
+
+
+def _replace_rows(
+    conn: sqlite3.Connection,
+    chat: str,
+    stamp: Optional[list[int]],
+    metadata: Any,
+    start: int,
+    rows: list[Row],
+) -> None:
+    """Rewrite a chat's metadata rows and its message rows from ``start`` on."""
+    title = metadata.get("title") if isinstance(metadata, dict) else None
+    conn.execute(
+        "INSERT INTO chats(chat, stamp, title) VALUES (?, ?, ?) "
+        "ON CONFLICT(chat) DO UPDATE SET stamp = excluded.stamp, title = excluded.title",
+        (chat, json.dumps(stamp) if stamp is not None else None, title),
+    )
+    conn.execute("DELETE FROM entries WHERE chat = ? AND position IS NULL", (chat,))
+    conn.execute("DELETE FROM entries WHERE chat = ? AND position >= ?", (chat, start))
+    conn.executemany(
+        "INSERT INTO entries(chat, position, role, text) VALUES (?, ?, ?, ?)",
+        [(chat, position, role, text) for position, role, text in _metadata_rows(metadata) + rows],
+    )
+
+
+def _remove_chat(conn: sqlite3.Connection, chat: str) -> None:
+    conn.execute("DELETE FROM entries WHERE chat = ?", (chat,))
+    conn.execute("DELETE FROM chats WHERE chat = ?", (chat,))
+
+
+# ---------------------------------------------------------------------------
+# Save path
+# ---------------------------------------------------------------------------
+
+
+def _plan_update(chat_path: str, data: dict[str, Any]) -> Optional[tuple[int, list[Row]]]:
+    """Diff a saved chat against what was indexed for it last time.
+
+    Returns:
+        (first changed position, rows from there on), or None when the change
+        reaches messages that are not loaded and the chat must be re-read
+    """
+    messages = data.get("messages", [])
+    key = str(Path(chat_path).resolve())
+    base = loaded_start(messages)
+    edits = older_edits(messages)
+    loaded = list(iter_loaded_messages(messages))
+
+    with _indexed_lock:
+        previous = _indexed.get(key)
+    if (
+        previous is None
+        or previous.source is not messages
+        or previous.base < base
+        or previous.older_edits != edits
+    ):
+        start = 0 if base == 0 else None
+    else:
+        # Messages before the remembered window are untouched even if they
+        # have been paged in since, so their rows stay as they are.
+        start = previous.base
+        for (_position, message), old_message, old_content in zip(
+            loaded[previous.base - base:], previous.messages, previous.contents
+        ):
+            if message is not old_message or _content_identity(message) is not old_content:
+                break
+            start += 1
+    if start is None:
+        with _indexed_lock:
+            _indexed.pop(key, None)
+        return None
+
+    _remember(key, messages, loaded)
+    return start, _message_rows(iter(loaded[start - base:]))
+
+
+def _remember(key: str, messages: Any, loaded: list[tuple[int, Any]]) -> None:
+    """Record the loaded messages as the ones the index holds rows for."""
+    with _indexed_lock:
+        _indexed[key] = _Indexed(
+            source=messages,
+            base=loaded_start(messages),
+            older_edits=older_edits(messages),
+            messages=[message for _position, message in loaded],
+            contents=[_content_identity(message) for _position, message in loaded],
+        )
+
+
+def _apply_update(
+    chats_dir: str,
+    chat: str,
+    chat_path: Path,
+    metadata: dict[str, Any],
+    update: Optional[tuple[int, list[Row]]],
+) -> None:
+    try:
+        stamp = file_stamp(chat_path)
+    except FileNotFoundError:
+        return
+    with closing(_connect(chats_dir)) as conn, conn:
+        if update is None:
+            # Leave it stale; the next search re-reads the file.
+            _remove_chat(conn, chat)
+            _replace_rows(conn, chat, None, metadata, 0, [])
+        else:
+            start, rows = update
+            _replace_rows(conn, chat, stamp, metadata, start, rows)
+
+
+async def index_saved_chat(chats_dir: Optional[str], chat_path: str, data: dict[str, Any]) -> None:
+    """Update the search index after a chat was saved.
+
+    Errors are logged, never raised: a failed index update only means the
+    next search re-reads the chat.
+    """
+    if not chats_dir:
+        return
+    chat = chat_key(chats_dir, chat_path)
+    if chat is None or not Path(chats_dir).is_dir():
+        return
+    try:
+        update = _plan_update(chat_path, data)
+        metadata = dict(data.get("metadata") or {})
+        await asyncio.to_thread(
+            _apply_update, chats_dir, chat, Path(chat_path), metadata, update
+        )
+    except (sqlite3.Error, OSError) as e:
+        logging.warning("Search index update failed for %s: %s", chat_path, e)
+        forget(chat_path)
+
+
+def track_loaded_chat(
+    chats_dir: Optional[str], chat_path: str, data: dict[str, Any]
+) -> None:
+    """Start diffing saves of a chat whose index rows match its file.
+
+    When the index holds the chat at its current file stamp, its rows are
+    those of the messages just loaded, so the first save rewrites only the
+    rows from the first changed message on. Reads the index; call it off
+    the event loop.
+    """
+    if not chats_dir or not index_path(chats_dir).exists():
+        return
+    chat = chat_key(chats_dir, chat_path)
+    if chat is None:
+        return
+    try:
+        disk_stamp = json.dumps(file_stamp(Path(chat_path)))
+        with closing(_connect(chats_dir)) as conn:
+            row = conn.execute(
+                "SELECT stamp FROM chats WHERE chat = ?", (chat,)
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        logging.debug("Not tracking search rows of %s: %s", chat_path, e)
+        return
+    if row is None or row[0] != disk_stamp:
+        return
+    messages = data.get("messages", [])
+    _remember(
+        str(Path(chat_path).resolve()), messages, list(iter_loaded_messages(messages))
+    )
+
+
+def forget(chat_path: Optional[str]) -> None:
+    """Stop diffing saves of a chat that is no longer open."""
+    if chat_path:
+        with _indexed_lock:
+            _indexed.pop(str(Path(chat_path).resolve()), None)
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+
+def _read_chat_rows(chat_path: Path) -> tuple[list[int], dict[str, Any], list[Row]]:
+    from .chat import load_chat
+
+    stamp = file_stamp(chat_path)
+    data = load_chat(str(chat_path))
+    return stamp, data["metadata"], _message_rows(enumerate(data["messages"]))
+
+
+def sync_index(chats_dir: str) -> int:
+    """Re-index chat files that changed on disk and drop vanished ones.
+
+    Returns:
+        Number of chats (re)indexed
+    """
+    from .chat_manager import list_chats
+
+    chats_path = Path(chats_dir)
+    current = {}
+    for chat_info in list_chats(chats_dir):
+        chat = chat_key(chats_path, chat_info["path"])
+        if chat is not None:
+            current[chat] = Path(chat_info["path"])
+
+    with closing(_connect(chats_dir)) as conn:
+        indexed = dict(conn.execute("SELECT chat, stamp FROM chats"))
+        stale = []
+        for chat, chat_path in current.items():
+            try:
+                disk_stamp = json.dumps(file_stamp(chat_path))
+            except FileNotFoundError:
+                continue
+            if indexed.get(chat) != disk_stamp:
+                stale.append(chat)
+
+        with conn:
+            for vanished in indexed.keys() - current.keys():
+                _remove_chat(conn, vanished)
+
+        if not stale:
+            return 0
+        workers = min(CHAT_SCAN_MAX_WORKERS, len(stale))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(chat, pool.submit(_read_chat_rows, current[chat])) for chat in stale]
+            for chat, future in futures:
+                try:
+                    stamp, metadata, rows = future.result()
+                except Exception as e:
+                    logging.debug("Not indexing chat %s: %s", chat, e)
+                    continue
+                forget(str(current[chat]))
+                with conn:
+                    _remove_chat(conn, chat)
+                    _replace_rows(conn, chat, stamp, metadata, 0, rows)
+    return len(stale)
+
+
+def _match_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching all words."""
+    terms = query.split()
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search(chats_dir: str, query: str, limit: int) -> list[SearchHit]:
+    """Return the best-matching messages, titles, and summaries.
+
+    Raises:
+        ValueError: If the query has no words
+    """
+    match = _match_query(query)
+    with closing(_connect(chats_dir)) as conn:
+        cursor = conn.execute(
+            "SELECT e.chat, c.title, e.position, e.role, "
+            "snippet(entries_fts, 0, '', '', '...', 16) "
+            "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            "LEFT JOIN chats c ON c.chat = e.chat "
+            "WHERE entries_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        )
+        return [
+            SearchHit(chat, title, position, role, " ".join(snippet.split()))
+            for chat, title, position, role, snippet in cursor
+        ]
@@ -0,0 +1,447 @@
+"""Segmented chat layout.
+
+With ``chat_storage.segments`` set, a chat file is a small manifest and the
+messages live in segment files under ``<chat>.json.segments/``:
+
+{
+  "metadata": {...},
+  "layout": 500,
+  "segments": [
+    {"file": "000000.json", "count": 500},
+    {"file": "000001.json", "count": 12}
+  ]
+}
+
+``layout`` is either a fixed number of messages per segment (files numbered
+``000000.json``, ``000001.json``, ...) or ``"month"``, one segment per
+calendar month of the message timestamps (``2026-09.json``, ...). Each
+segment file is ``{"messages": [...]}`` in the canonical JSON format.
+
+A save rewrites the manifest and only the segments whose messages changed
+since the chat was loaded or last saved, which for a growing chat is just the
+tail segment. A ``lazy_window`` load reads the manifest and the newest
+segments covering the window; older segments are read when first needed.
+"""
+
+from __future__ import annotations
+
+import re
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .chat_journal import (
+    MessageSignature,
+    message_signature,
+    persistable_message,
+    same_signature,
+)
+from .chat_window import WindowedMessages, loaded_start, older_edits
+from .constants import CHAT_FILE_EXTENSION, CHAT_SEGMENTS_SUFFIX
+from .file_io import write_bytes_atomic
+from .json_codec import get_codec
+
+
+# Messages per segment, or MONTHLY.
+Layout = Union[int, str]
+
+MONTHLY = "month"
+
+# Segment key for messages before the first one with a usable timestamp.
+_UNDATED_MONTH = "0000-00"
+
+_MONTH_PREFIX = re.compile(r"\d{4}-\d{2}")
+
+_states: dict[str, "SegmentState"] = {}
+
+
+def segments_dir(chat_path: str | Path) -> Path:
+    """Return the segment directory for a chat file."""
+    chat_path = Path(chat_path)
+    return chat_path.with_name(chat_path.name + CHAT_SEGMENTS_SUFFIX)
+
+
+def is_segmented(chat_path: str | Path) -> bool:
+    """Whether a chat file has a segment directory next to it."""
+    return segments_dir(chat_path).is_dir()
+
+
+def is_layout(value: Any) -> bool:
+    """Whether value is a valid segment layout."""
+    if value == MONTHLY:
+        return True
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def remove_segments(chat_path: str | Path) -> None:
+    """Delete the segment directory for chat_path, if any."""
+    shutil.rmtree(segments_dir(chat_path), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def read_manifest(chat_path: str | Path) -> Optional[dict[str, Any]]:
+    """Read a chat manifest.
+
+    Returns:
+        Dict with keys metadata, layout and segments, or None when the chat
+        file holds its messages inline.
+
+    Raises:
+        ValueError: If the file is not valid JSON or the manifest is malformed
+    """
+    try:
+        data = get_codec().loads(Path(chat_path).read_bytes())
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON in chat history file: {e}")
+    if not isinstance(data, dict) or "segments" not in data or "messages" in data:
+        return None
+
+    entries = data["segments"]
+    if not isinstance(entries, list) or not all(
+        isinstance(entry, dict)
+        and isinstance(entry.get("file"), str)
+        and entry["file"].endswith(CHAT_FILE_EXTENSION)
+        and "/" not in entry["file"]
+        and "\\" not in entry["file"]
+        and isinstance(entry.get("count"), int)
+        and entry["count"] >= 0
+        for entry in entries
+    ):
+        raise ValueError("Invalid chat segment list")
+    if "metadata" not in data:
+        raise ValueError("Invalid chat history file structure")
+
+    return {
+        "metadata": data["metadata"],
+        "layout": data.get("layout") if is_layout(data.get("layout")) else None,
+        "segments": entries,
+    }
+
+
+def read_summary(chat_path: str | Path) -> tuple[Any, int]:
+    """Read manifest metadata and the total message count for a listing."""
+    manifest = read_manifest(chat_path)
+    if manifest is None:
+        raise ValueError("Invalid chat history file structure")
+    return manifest["metadata"], sum(entry["count"] for entry in manifest["segments"])
+
+
+def read_segment(chat_path: str | Path, entry: dict[str, Any]) -> list[Any]:
+    """Read the raw messages of one segment, checked against its manifest count."""
+    path = segments_dir(chat_path) / entry["file"]
+    try:
+        data = get_codec().loads(path.read_bytes())
+    except FileNotFoundError:
+        raise ValueError(f"Chat segment not found: {path}")
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON in chat segment {path}: {e}")
+
+    messages = data.get("messages") if isinstance(data, dict) else None
+    if not isinstance(messages, list):
+        raise ValueError(f"Invalid chat segment {path}: expected messages list")
+    if len(messages) != entry["count"]:
+        raise ValueError(
+            f"Chat segment {path} does not match its manifest "
+            f"(expected {entry['count']} messages, got {len(messages)})"
+        )
+    return messages
+
+
+def read_messages(chat_path: str | Path, entries: list[dict[str, Any]]) -> list[Any]:
+    """Read and concatenate the raw messages of several segments."""
+    messages: list[Any] = []
+    for entry in entries:
+        messages.extend(read_segment(chat_path, entry))
+    return messages
+
+
+def window_start(entries: list[dict[str, Any]], window: int) -> int:
+    """Return how many segments precede the newest ones covering window messages."""
+    covered = 0
+    position = len(entries)
+    while position > 0 and covered < window:
+        position -= 1
+        covered += entries[position]["count"]
+    return position
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def _month_key(message: Any, previous: Optional[str]) -> str:
+    """Segment key of a message: its timestamp month, never before previous."""
+    timestamp = message.get("timestamp") if hasattr(message, "get") else None
+    if isinstance(timestamp, str) and _MONTH_PREFIX.match(timestamp):
+        month = timestamp[:7]
+        if previous is None or month > previous:
+            return month
+    return previous or _UNDATED_MONTH
+
+
+def plan_segments(
+    messages: Any,
+    layout: Layout,
+    start: int,
+    prefix: list[dict[str, Any]],
+) -> list[tuple[str, int, int]]:
+    """Split messages[start:] into segments following the prefix entries.
+
+    Returns:
+        List of (file name, start index, end index)
+    """
+    if isinstance(layout, int):
+        return _plan_fixed_segments(len(messages), layout, start, len(prefix))
+    previous = prefix[-1]["file"][: -len(CHAT_FILE_EXTENSION)] if prefix else None
+    return _plan_monthly_segments(messages, start, previous)
+
+
+def _plan_fixed_segments(
+    total: int, size: int, start: int, number: int
+) -> list[tuple[str, int, int]]:
+    planned: list[tuple[str, int, int]] = []
+    for segment_start in range(start, total, size):
+        segment_end = min(segment_start + size, total)
+        planned.append((f"{number:06d}{CHAT_FILE_EXTENSION}", segment_start, segment_end))
+        number += 1
+    return planned
+
+
+def _plan_monthly_segments(
+    messages: Any, start: int, previous: Optional[str]
+) -> list[tuple[str, int, int]]:
+    total = len(messages)
+    planned: list[tuple[str, int, int]] = []
+    segment_start = start
+    for index in range(start, total):
+        key = _month_key(messages[index], previous)
+        if key != previous and index > segment_start:
+            planned.append((f"{previous}{CHAT_FILE_EXTENSION}", segment_start, index))
+            segment_start = index
+        previous = key
+    if segment_start < total:
+        planned.append((f"{previous}{CHAT_FILE_EXTENSION}", segment_start, total))
+    return planned
+
+
+@dataclass(slots=True)
+class _PersistedView:
+    """Persisted messages (from ``base`` on) and the manifest entries they form."""
+
+    source: Any = None
+    base: int = 0
+    older_edits: int = 0
+    messages: list[Any] = field(default_factory=list)
+    signatures: list[MessageSignature] = field(default_factory=list)
+    entries: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _capture_view(messages: Any, entries: list[dict[str, Any]]) -> _PersistedView:
+    base = loaded_start(messages)
+    loaded = list(messages[base:])
+    return _PersistedView(
+        source=messages,
+        base=base,
+        older_edits=older_edits(messages),
+        messages=loaded,
+        signatures=[message_signature(message) for message in loaded],
+        entries=entries,
+    )
+
+
+@dataclass(slots=True)
+class SavePlan:
+    """Manifest and changed segments for one save, snapshotted on the loop."""
+
+    manifest: dict[str, Any]
+    writes: list[tuple[str, list[dict[str, Any]]]]
+    view: _PersistedView
+
+
+class SegmentState:
+    """Persisted view of one in-memory segmented chat, used to diff the next save.
+
+    Like ``chat_journal.JournalState`` it keeps references to the persisted
+    message objects and their key/value identities, so finding the segments
+    that changed costs pointer comparisons. For a lazily loaded chat the
+    segments before the loaded window are known to be unchanged unless the
+    window reports an edit there.
+    """
+
+    def __init__(self, data: dict[str, Any], layout: Layout, view: _PersistedView):
+        self.data = data
+        self.layout = layout
+        self._view = view
+
+    def install(self, plan: SavePlan) -> None:
+        """Mark a written plan as the persisted state."""
+        self.layout = plan.manifest["layout"]
+        self._view = plan.view
+
+    def reusable_prefix(self, messages: Any) -> Optional[list[dict[str, Any]]]:
+        """Entries before the loaded window when they are still current, else None."""
+        view = self._view
+        if not view.base or messages is not view.source:
+            return None
+        if older_edits(messages) != view.older_edits:
+            return None
+        prefix: list[dict[str, Any]] = []
+        covered = 0
+        for entry in view.entries:
+            if covered >= view.base:
+                break
+            prefix.append(entry)
+            covered += entry["count"]
+        return prefix if covered == view.base else None
+
+    def unchanged_segments(
+        self, messages: Any, planned: list[tuple[str, int, int]]
+    ) -> set[str]:
+        """Names of planned segments holding exactly the persisted messages."""
+        view = self._view
+        persisted: dict[str, tuple[int, int]] = {}
+        offset = 0
+        for entry in view.entries:
+            persisted[entry["file"]] = (offset, entry["count"])
+            offset += entry["count"]
+
+        unchanged = set()
+        for name, start, end in planned:
+            offset, count = persisted.get(name, (-1, -1))
+            if count != end - start or offset < view.base:
+                continue
+            first = offset - view.base
+            if all(
+                messages[start + position] is view.messages[first + position]
+                and same_signature(
+                    message_signature(messages[start + position]),
+                    view.signatures[first + position],
+                )
+                for position in range(count)
+            ):
+                unchanged.add(name)
+        return unchanged
+
+
+def plan_save(
+    chat_path: str | Path, data: dict[str, Any], layout: Layout
+) -> SavePlan:
+    """Work out the manifest and the segments a save has to write.
+
+    Runs on the event loop: messages of rewritten segments are snapshotted
+    (shallow copies without runtime-only keys), unchanged segments are not
+    touched, and a lazily loaded chat is only paged in when segments before
+    its window changed.
+    """
+    state = get_state(chat_path, data)
+    if state is not None and state.layout != layout:
+        state = None
+
+    messages = data.get("messages", [])
+    prefix = state.reusable_prefix(messages) if state is not None else None
+    planned: list[tuple[str, int, int]] = []
+    if prefix is not None:
+        start = sum(entry["count"] for entry in prefix)
+        planned = plan_segments(messages, layout, start, prefix)
+        prefix_names = {entry["file"] for entry in prefix}
+        if any(name in prefix_names for name, _start, _end in planned):
+            # The tail would reuse a paged-out segment's name (e.g. an undated
+            # message after a month boundary); lay out the whole chat again.
+            prefix = None
+    if prefix is None:
+        prefix = []
+        if isinstance(messages, WindowedMessages):
+            messages.materialize()
+        planned = plan_segments(messages, layout, 0, prefix)
+
+    unchanged = state.unchanged_segments(messages, planned) if state is not None else set()
+    entries = list(prefix)
+    writes: list[tuple[str, list[dict[str, Any]]]] = []
+    for name, start, end in planned:
+        entries.append({"file": name, "count": end - start})
+        if name not in unchanged:
+            writes.append((
+                name,
+                [persistable_message(messages[index]) for index in range(start, end)],
+            ))
+
+    manifest = {
+        "metadata": dict(data.get("metadata") or {}),
+        "layout": layout,
+        "segments": entries,
+    }
+    return SavePlan(manifest=manifest, writes=writes, view=_capture_view(messages, entries))
+
+
+def write_plan(chat_path: str | Path, plan: SavePlan) -> None:
+    """Write changed segments, then the manifest, then drop orphaned segments.
+
+    Caller must hold ``chat_journal.journal_lock(chat_path)``.
+    """
+    chat_path = Path(chat_path)
+    directory = segments_dir(chat_path)
+    directory.mkdir(exist_ok=True)
+
+    codec = get_codec()
+    for name, messages in plan.writes:
+        write_bytes_atomic(directory / name, codec.dumps_pretty_bytes({"messages": messages}))
+    write_bytes_atomic(chat_path, codec.dumps_pretty_bytes(plan.manifest))
+
+    current = {entry["file"] for entry in plan.manifest["segments"]}
+    for path in directory.glob(f"*{CHAT_FILE_EXTENSION}"):
+        if path.name not in current:
+            path.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+
+def _registry_key(chat_path: str | Path) -> str:
+    return str(Path(chat_path).resolve())
+
+
+def register(
+    chat_path: str | Path,
+    data: dict[str, Any],
+    layout: Layout,
+    entries: list[dict[str, Any]],
+) -> SegmentState:
+    """Track a loaded chat as the persisted segments of chat_path."""
+    view = _capture_view(data.get("messages", []), list(entries))
+    state = SegmentState(data, layout, view)
+    _states[_registry_key(chat_path)] = state
+    return state
+
+
+def commit(chat_path: str | Path, data: dict[str, Any], plan: SavePlan) -> None:
+    """Record a written plan as the persisted segments of chat_path.
+
+    The plan's view was taken when the save was planned, so messages added
+    while it was being written are still pending for the next save.
+    """
+    state = get_state(chat_path, data)
+    if state is None:
+        state = SegmentState(data, plan.manifest["layout"], plan.view)
+        _states[_registry_key(chat_path)] = state
+    state.install(plan)
+
+
+def get_state(chat_path: str | Path, data: dict[str, Any]) -> Optional[SegmentState]:
+    """Return the tracked state for chat_path when it belongs to data."""
+    state = _states.get(_registry_key(chat_path))
+    if state is None or state.data is not data:
+        return None
+    return state
+
+
+def forget(chat_path: str | Path) -> None:
+    """Stop tracking chat_path (e.g. when the chat is closed)."""
+    _states.pop(_registry_key(chat_path), None)
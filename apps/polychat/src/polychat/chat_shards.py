@@ -0,0 +1,146 @@
+"""Month-sharded chat directories.
+
+With ``chat_storage.shard_dirs`` set, new chats are created in
+``<chats_dir>/YYYY/MM/`` instead of directly in the chats directory, so no
+single directory grows to hundreds of thousands of entries. Listings, path
+resolution and renames always understand both layouts, so a store can hold
+flat and sharded chats side by side.
+
+``chat_manager.migrate_chats_to_shards`` (the ``/shard`` command) moves flat
+chats into the shard of their ``created_at`` month. The move plan is written
+to a progress log in the chats directory before anything moves, and every
+finished move is appended to it, so an interrupted migration resumes where it
+stopped. The log is deleted once every planned move is done.
+
+Log records (JSONL):
+- ``{"op": "move", "src": "chat.json", "dst": "2026/09/chat.json"}``
+- ``{"op": "planned"}`` once every move record is written
+- ``{"op": "done", "src": "chat.json"}`` after a chat and its sidecars moved
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .constants import CHAT_SHARD_MIGRATION_FILE_NAME
+from .json_codec import get_codec
+
+
+# Shard directories: four-digit year, then two-digit month.
+SHARD_GLOB = "[0-9][0-9][0-9][0-9]/[0-9][0-9]"
+
+
+def shard_dir(chats_dir: str | Path, when: datetime) -> Path:
+    """Return the shard directory for a (local) point in time."""
+    return Path(chats_dir) / f"{when.year:04d}" / f"{when.month:02d}"
+
+
+def iter_sharded_files(chats_dir: str | Path, pattern: str) -> Iterator[Path]:
+    """Yield files matching pattern inside every shard directory."""
+    yield from Path(chats_dir).glob(f"{SHARD_GLOB}/{pattern}")
+
+
+def find_in_shards(chats_dir: str | Path, name: str) -> Optional[Path]:
+    """Return the newest sharded file with this name, or None."""
+    matches = sorted(iter_sharded_files(chats_dir, name), reverse=True)
+    return matches[0] if matches else None
+
+
+def chat_month(created_at: Any, file_path: Path) -> datetime:
+    """Return the local time a chat belongs to: created_at, else the file mtime."""
+    if isinstance(created_at, str):
+        try:
+            created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+        else:
+            return created.astimezone() if created.tzinfo else created
+    return datetime.fromtimestamp(file_path.stat().st_mtime)
+
+
+# ---------------------------------------------------------------------------
+# Migration progress log
+# ---------------------------------------------------------------------------
+
+
+def progress_path(chats_dir: str | Path) -> Path:
+    """Return the migration progress log path for a chats directory."""
+    return Path(chats_dir) / CHAT_SHARD_MIGRATION_FILE_NAME
+
+
+def read_pending_moves(chats_dir: str | Path) -> Optional[list[tuple[str, str]]]:
+    """Return the moves an interrupted migration still has to make.
+
+    Returns:
+        List of (source, destination) paths relative to chats_dir, or None
+        when there is no complete plan to resume (a log cut off while the
+        plan was being written is discarded).
+    """
+    path = progress_path(chats_dir)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return None
+
+    codec = get_codec()
+    moves: dict[str, str] = {}
+    planned = False
+    for line in lines:
+        try:
+            record = codec.loads(line)
+        except json.JSONDecodeError:
+            # Only the last line can be cut off by a crash.
+            continue
+        if not isinstance(record, dict):
+            continue
+        op = record.get("op")
+        if op == "move" and not planned:
+            moves[record["src"]] = record["dst"]
+        elif op == "planned":
+            planned = True
+        elif op == "done":
+            moves.pop(record.get("src"), None)
+
+    if not planned:
+        logging.warning("Discarding incomplete chat shard migration plan: %s", path)
+        path.unlink(missing_ok=True)
+        return None
+    return list(moves.items())
+
+
+class ProgressLog:
+    """Append-only writer for the migration progress log."""
+
+    def __init__(self, chats_dir: str | Path):
+        self.path = progress_path(chats_dir)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._file.write(get_codec().dumps_compact(record) + "\n")
+
+    def write_plan(self, moves: list[tuple[str, str]]) -> None:
+        """Record every planned move, then mark the plan complete."""
+        for src, dst in moves:
+            self._write({"op": "move", "src": src, "dst": dst})
+        self._write({"op": "planned"})
+        self._sync()
+
+    def mark_done(self, src: str) -> None:
+        """Record that a chat and its sidecars reached their shard."""
+        self._write({"op": "done", "src": src})
+        self._file.flush()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, finished: bool) -> None:
+        """Close the log, deleting it when every planned move is done."""
+        self._file.close()
+        if finished:
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,90 @@
+"""Optional chat persistence settings.
+
+Resolved from the optional ``chat_storage`` profile block:
+
+{
+  "chat_storage": {
+    "journal": false,
+    "index": false,
+    "lazy_window": 200,
+    "write_behind": false,
+    "stable_hex_ids": false,
+    "segments": 500,
+    "shard_dirs": false,
+    "prefetch": 3
+  }
+}
+
+Every key is optional. Missing keys (or a missing block) keep the canonical
+behavior: one pretty-printed JSON file per chat, rewritten on every save.
+
+- ``journal``: append changes to ``<chat>.json.journal`` (see ``chat_journal``)
+- ``index``: write a byte-offset index next to each chat (see ``chat_index``)
+- ``lazy_window``: load only the newest N messages when a chat is opened;
+  older messages are paged in when first needed (see ``chat_window``)
+- ``write_behind``: coalesce saves and write them after a short debounce
+  (see ``chat_saver``)
+- ``stable_hex_ids``: derive message hex IDs from message content when they
+  are first needed instead of assigning random ones on load (see ``hex_id``)
+- ``segments``: store messages in segment files of N messages, or one per
+  month with ``"month"``, next to a small manifest (see ``chat_segments``)
+- ``shard_dirs``: create new chats in ``YYYY/MM/`` subdirectories of the
+  chats directory (see ``chat_shards``)
+- ``prefetch``: load the N most recently updated chats into memory in the
+  background at startup, so opening them is instant (see ``chat_cache``)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Union
+
+
+@dataclass(slots=True, frozen=True)
+class ChatStorageOptions:
+    """Resolved chat persistence options."""
+
+    journal: bool = False
+    index: bool = False
+    lazy_window: Optional[int] = None
+    write_behind: bool = False
+    stable_hex_ids: bool = False
+    segments: Optional[Union[int, str]] = None
+    shard_dirs: bool = False
+    prefetch: Optional[int] = None
+
+
+DEFAULT_STORAGE_OPTIONS = ChatStorageOptions()
+
+
+def resolve_storage_options(profile: Mapping[str, Any] | None) -> ChatStorageOptions:
+    """Resolve chat storage options from profile configuration."""
+    if not isinstance(profile, Mapping):
+        return DEFAULT_STORAGE_OPTIONS
+
+    block = profile.get("chat_storage")
+    if not isinstance(block, Mapping):
+        return DEFAULT_STORAGE_OPTIONS
+
+    return ChatStorageOptions(
+        journal=block.get("journal") is True,
+        index=block.get("index") is True,
+        lazy_window=_positive_int(block.get("lazy_window")),
+        write_behind=block.get("write_behind") is True,
+        stable_hex_ids=block.get("stable_hex_ids") is True,
+        segments=_segment_layout(block.get("segments")),
+        shard_dirs=block.get("shard_dirs") is True,
+        prefetch=_positive_int(block.get("prefetch")),
+    )
+
+
+def _positive_int(value: Any) -> Optional[int]:
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return None
+
+
+def _segment_layout(value: Any) -> Optional[Union[int, str]]:
+    if value == "month":
+        return value
+    return _positive_int(value)
@@ -0,0 +1,292 @@
+"""Incremental reader for chat JSON files.
+
+``iter_chat_items`` walks the top level of a chat file chunk by chunk and
+decodes one value at a time, so neither the full file text nor the full raw
+object tree has to be held in memory. The ``messages`` array is yielded as a
+``MessageStream`` that decodes one message per step; consumers can stop early
+(e.g. after metadata, or after the first N messages) and the file is closed
+as soon as the iterator is abandoned.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, TextIO
+
+from .chat_archive import CORRUPT_ARCHIVE_ERRORS, is_archived, open_chat_text
+from .constants import CHAT_SCAN_PREFIX_BYTES, CHAT_STREAM_CHUNK_SIZE
+
+
+_DECODER = json.JSONDecoder()
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+
+# Layout of chat files written by PolyChat (json.dumps(indent=2), metadata
+# first). Raw newlines only appear as formatting there, so every message
+# object starts a line at exactly four spaces of indentation.
+_CANONICAL_HEAD = b'{\n  "metadata": '
+_CANONICAL_MESSAGES = ',\n  "messages": ['
+_MESSAGE_START = b"\n    {"
+_MESSAGES_END = b"\n  ]\n}"
+_EMPTY_MESSAGES_END = b"]\n}"
+
+
+class _ChunkedText:
+    """Sliding text buffer over a file with JSON value decoding."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self._file = f
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self, min_size: int = 0) -> bool:
+        """Read more text, discarding the consumed prefix first."""
+        if self.eof:
+            return False
+        if self.position:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        chunks = []
+        read = 0
+        while True:
+            try:
+                chunk = self._file.read(self._chunk_size)
+            except CORRUPT_ARCHIVE_ERRORS as e:
+                raise ValueError(f"Invalid compressed chat file: {e}") from e
+            if not chunk:
+                self.eof = True
+                break
+            chunks.append(chunk)
+            read += len(chunk)
+            if read >= min_size:
+                break
+        if not chunks:
+            return False
+        self.buffer += "".join(chunks)
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.position)
+            if match:
+                self.position = match.start()
+                return self.buffer[self.position]
+            self.position = len(self.buffer)
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError("Invalid chat history file structure")
+        self.position += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more text until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                # Usually the value continues in the next chunk; grow the
+                # buffer geometrically so huge messages decode in O(n).
+                pending = len(self.buffer) - self.position
+                if not self._fill(min_size=max(pending, self._chunk_size)):
+                    raise ValueError(f"Invalid JSON in chat history file: {e}")
+                continue
+            if end == len(self.buffer) and not self.eof:
+                # A number or literal may continue past the buffer end.
+                if self._fill():
+                    continue
+            self.position = end
+            return value
+
+
+class MessageStream(Iterator[Any]):
+    """Iterator over the raw messages of a chat file, decoded one at a time."""
+
+    def __init__(self, text: _ChunkedText):
+        self._text = text
+        self._started = False
+        self._done = False
+
+    def __iter__(self) -> "MessageStream":
+        return self
+
+    def __next__(self) -> Any:
+        if self._done:
+            raise StopIteration
+
+        text = self._text
+        if not self._started:
+            self._started = True
+            if text.peek() == "]":
+                text.position += 1
+                self._done = True
+                raise StopIteration
+        else:
+            if text.peek() == ",":
+                text.position += 1
+            else:
+                text.expect("]")
+                self._done = True
+                raise StopIteration
+        return text.value()
+
+    def drain(self) -> None:
+        """Skip any messages the consumer did not read."""
+        for _message in self:
+            pass
+
+
+def iter_chat_items(
+    path: str | Path, chunk_size: int = CHAT_STREAM_CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """Yield top-level (key, value) pairs of a chat file in file order.
+
+    An array under ``messages`` is yielded as a ``MessageStream``; it must be
+    consumed (or abandoned) before the next pair is requested, like
+    ``itertools.groupby`` groups. Archived chats (``.json.gz``/``.json.zst``)
+    are decompressed on the fly.
+
+    Raises:
+        ValueError: If the file is not valid JSON or not a JSON object
+    """
+    with open_chat_text(path) as f:
+        text = _ChunkedText(f, chunk_size)
+        text.expect("{")
+        if text.peek() == "}":
+            text.position += 1
+        else:
+            while True:
+                key = text.value()
+                if not isinstance(key, str):
+                    raise ValueError("Invalid chat history file structure")
+                text.expect(":")
+
+                if key == "messages" and text.peek() == "[":
+                    text.position += 1
+                    stream = MessageStream(text)
+                    yield key, stream
+                    stream.drain()
+                else:
+                    yield key, text.value()
+
+                if text.peek() == ",":
+                    text.position += 1
+                    continue
+                text.expect("}")
+                break
+
+        if text.peek() != "":
+            raise ValueError("Invalid JSON in chat history file: extra data")
+
+
+def read_chat_metadata(path: str | Path) -> Any:
+    """Read only the metadata of a chat file, stopping as soon as it is decoded.
+
+    Raises:
+        ValueError: If the file is invalid or has no metadata
+    """
+    for key, value in iter_chat_items(path):
+        if key == "metadata":
+            return value
+    raise ValueError("Invalid chat history file structure")
+
+
+def read_chat_summary(path: str | Path) -> tuple[Any, int]:
+    """Read chat metadata and count messages without keeping them in memory.
+
+    Missing metadata or messages read as empty, matching chat listings.
+
+    Returns:
+        Tuple of (metadata, message count)
+
+    Raises:
+        ValueError: If the file is not a valid JSON object
+    """
+    metadata: Any = {}
+    message_count = 0
+    for key, value in iter_chat_items(path):
+        if key == "metadata":
+            metadata = value
+        elif key == "messages":
+            if isinstance(value, MessageStream):
+                message_count = sum(1 for _message in value)
+            elif isinstance(value, list):
+                message_count = len(value)
+            else:
+                raise ValueError("Invalid chat messages: expected list")
+    return metadata, message_count
+
+
+def _count_message_starts(f: BinaryIO) -> tuple[int, bytes]:
+    """Count message line starts in the rest of a file.
+
+    Returns:
+        Tuple of (count, last bytes of the file)
+    """
+    count = 0
+    carry = b""
+    tail = b""
+    while chunk := f.read(CHAT_STREAM_CHUNK_SIZE):
+        window = carry + chunk
+        count += window.count(_MESSAGE_START)
+        # Too short to hold a whole match, so nothing is counted twice.
+        carry = window[-(len(_MESSAGE_START) - 1):]
+        tail = (tail + chunk)[-len(_MESSAGES_END):]
+    return count, tail
+
+
+def _scan_canonical_summary(path: Path, prefix_size: int) -> Optional[tuple[Any, int]]:
+    """Scan a chat file in PolyChat's own layout, or return None."""
+    with open(path, "rb") as f:
+        head = f.read(prefix_size)
+        if not head.startswith(_CANONICAL_HEAD):
+            return None
+        try:
+            # Incremental decoding tolerates a character cut off at the end.
+            text = codecs.getincrementaldecoder("utf-8")().decode(head)
+            metadata, end = _DECODER.raw_decode(text, len(_CANONICAL_HEAD))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        if not isinstance(metadata, dict) or not text.startswith(_CANONICAL_MESSAGES, end):
+            return None
+
+        f.seek(len(text[:end + len(_CANONICAL_MESSAGES)].encode("utf-8")))
+        message_count, tail = _count_message_starts(f)
+
+    if message_count and tail == _MESSAGES_END:
+        return metadata, message_count
+    if not message_count and tail == _EMPTY_MESSAGES_END:
+        return metadata, 0
+    return None
+
+
+def scan_chat_summary(
+    path: str | Path, prefix_size: int = CHAT_SCAN_PREFIX_BYTES
+) -> tuple[Any, int]:
+    """Read chat metadata and message count for a listing, as cheaply as possible.
+
+    For files in PolyChat's own layout the metadata object is decoded from the
+    first ``prefix_size`` bytes and messages are counted by their line starts
+    without being decoded. Archives, other layouts, and metadata longer than
+    the prefix fall back to ``read_chat_summary``. The fast path checks the
+    layout, not the JSON validity of every message; opening the chat does that.
+
+    Returns:
+        Tuple of (metadata, message count)
+
+    Raises:
+        ValueError: If the file is not a valid JSON object
+    """
+    if not is_archived(path):
+        summary = _scan_canonical_summary(Path(path), prefix_size)
+        if summary is not None:
+            return summary
+    return read_chat_summary(path)
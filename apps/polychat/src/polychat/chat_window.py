@@ -0,0 +1,207 @@
+"""Windowed message list for lazily loaded chats.
+
+``WindowedMessages`` behaves like the ``chat["messages"]`` list but only keeps
+the newest messages loaded. Older messages are paged in (all at once) the
+first time anything reads or mutates an index before the loaded window, e.g.
+``/history all``, context building, or iterating from the start.
+
+Code that only needs loaded messages (hex ID maps, tail lookups) should use
+``iter_loaded_messages`` so it never triggers a page-in.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableSequence
+from typing import Any, Callable, Iterator, Optional
+
+
+MaterializeHook = Callable[[list[dict[str, Any]]], None]
+
+
+class WindowedMessages(MutableSequence):
+    """Message sequence holding only a tail window until older messages are needed.
+
+    Messages before the window never change while they are paged out, so
+    ``load_older`` may read them from any later snapshot of the chat (e.g. one
+    rewritten by journal compaction), which still starts with them.
+    """
+
+    def __init__(
+        self,
+        tail: list[dict[str, Any]],
+        older_count: int,
+        load_older: Callable[[], list[dict[str, Any]]],
+    ):
+        """Initialize windowed message list.
+
+        Args:
+            tail: Newest messages (already normalized)
+            older_count: Number of messages before the tail
+            load_older: Callable returning the older messages, oldest first
+        """
+        self._items = list(tail)
+        self._offset = older_count
+        self._window_start = older_count
+        self._load_older: Optional[Callable[[], list[dict[str, Any]]]] = load_older
+        self.on_materialize: Optional[MaterializeHook] = None
+        self.older_edits = 0
+
+    # ------------------------------------------------------------------
+    # Window state
+    # ------------------------------------------------------------------
+
+    @property
+    def loaded_start(self) -> int:
+        """Index of the first message currently held in memory."""
+        return self._offset
+
+    @property
+    def is_materialized(self) -> bool:
+        """Whether every message has been loaded."""
+        return self._offset == 0
+
+    def materialize(self) -> None:
+        """Page in all older messages."""
+        if self._offset == 0 or self._load_older is None:
+            return
+
+        older = self._load_older()
+        if len(older) != self._offset:
+            raise ValueError(
+                f"Chat changed while loading older messages "
+                f"(expected {self._offset}, got {len(older)})"
+            )
+        self._items[:0] = older
+        self._offset = 0
+        self._load_older = None
+        if self.on_materialize is not None:
+            self.on_materialize(older)
+
+    def iter_loaded(self) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield (index, message) for loaded messages without paging in."""
+        for position, message in enumerate(self._items):
+            yield self._offset + position, message
+
+    # ------------------------------------------------------------------
+    # Index helpers
+    # ------------------------------------------------------------------
+
+    def _require(self, index: int) -> int:
+        """Return list position for absolute index, paging in when needed."""
+        if index < self._offset:
+            self.materialize()
+        return index - self._offset
+
+    def _note_edit(self, lowest_index: int) -> None:
+        if lowest_index < self._window_start:
+            self.older_edits += 1
+
+    def _normalize_index(self, index: int) -> int:
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("list index out of range")
+        return index
+
+    # ------------------------------------------------------------------
+    # MutableSequence protocol
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._offset + len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            if indices and min(indices) < self._offset:
+                self.materialize()
+            return [self._items[i - self._offset] for i in indices]
+        return self._items[self._require(self._normalize_index(index))]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                self.materialize()
+                self._note_edit(min(range(start, stop, step), default=start))
+                self._items[index] = value
+                return
+            stop = max(start, stop)
+            self._note_edit(start)
+            position = self._require(start)
+            self._items[position : position + (stop - start)] = value
+            return
+        index = self._normalize_index(index)
+        self._note_edit(index)
+        self._items[self._require(index)] = value
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                self.materialize()
+                self._note_edit(min(range(start, stop, step), default=start))
+                del self._items[index]
+                return
+            if stop <= start:
+                return
+            self._note_edit(start)
+            position = self._require(start)
+            del self._items[position : position + (stop - start)]
+            return
+        index = self._normalize_index(index)
+        self._note_edit(index)
+        del self._items[self._require(index)]
+
+    def insert(self, index: int, value: dict[str, Any]) -> None:
+        length = len(self)
+        if index < 0:
+            index = max(0, index + length)
+        index = min(index, length)
+        self._note_edit(index)
+        self._items.insert(self._require(index), value)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        self.materialize()
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[dict[str, Any]]:
+        for position in range(len(self) - 1, -1, -1):
+            yield self[position]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, WindowedMessages)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return (
+            f"WindowedMessages(loaded={len(self._items)}, "
+            f"total={len(self)})"
+        )
+
+
+def iter_loaded_messages(messages: Any) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield (index, message) pairs currently in memory.
+
+    Plain lists are fully loaded; windowed lists only yield their loaded tail.
+    """
+    if isinstance(messages, WindowedMessages):
+        yield from messages.iter_loaded()
+    else:
+        yield from enumerate(messages)
+
+
+def loaded_start(messages: Any) -> int:
+    """Index of the first in-memory message (0 for plain lists)."""
+    if isinstance(messages, WindowedMessages):
+        return messages.loaded_start
+    return 0
+
+
+def older_edits(messages: Any) -> int:
+    """Number of edits that touched messages before the original window."""
+    if isinstance(messages, WindowedMessages):
+        return messages.older_edits
+    return 0
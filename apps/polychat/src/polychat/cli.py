@@ -6,7 +6,8 @@ import logging
 import sys
 import time
 
-from . import chat, profile, setup
+from . import chat, chat_search, profile, setup
+from .chat_storage import resolve_storage_options
 from .constants import DISPLAY_UNKNOWN
 from .logging_utils import (
     build_run_log_path,
@@ -143,7 +144,10 @@ def main() -> None:
 
         if mapped_chat_path:
             chat_path = mapped_chat_path
-            chat_data = chat.load_chat(chat_path)
+            chat_data = chat.load_chat(chat_path, resolve_storage_options(profile_data))
+            chat_search.track_loaded_chat(
+                profile_data.get("chats_dir"), chat_path, chat_data
+            )
 
         system_prompt, system_prompt_path, system_prompt_warning = SessionManager.load_system_prompt(
             profile_data,
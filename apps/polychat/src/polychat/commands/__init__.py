@@ -51,6 +51,7 @@ class CommandHandler(
             "cancel": self.cancel_retry,
             "secret": self.secret_mode_command,
             "search": self.search_mode_command,
+            "attach": self.attach_file,
             "rewind": self.rewind_messages,
             "purge": self.purge_messages,
             "history": self.show_history,
@@ -59,12 +60,18 @@ class CommandHandler(
             "title": self.set_title,
             "summary": self.set_summary,
             "safe": self.check_safety,
+            "smart": self.smart_context_command,
+            "compact": self.compact_chat,
             "new": self.new_chat,
             "open": self.open_chat,
             "switch": self.switch_chat,
             "close": self.close_chat,
             "rename": self.rename_chat_file,
             "delete": self.delete_chat_command,
+            "archive": self.archive_chats,
+            "shard": self.shard_chats,
+            "find": self.find_in_chats,
+            "related": self.related_chats,
             "help": self.show_help,
             "exit": self.exit_app,
             "quit": self.exit_app,
@@ -5,6 +5,8 @@ from pathlib import Path
 from typing import Any, Optional, TYPE_CHECKING
 
 from .. import models
+from ..chat_archive import ARCHIVE_FORMATS, archive_path
+from ..chat_manager import find_sharded_chat
 from ..constants import CHAT_FILE_EXTENSION, DISPLAY_UNKNOWN
 from ..path_utils import has_app_path_prefix, has_home_path_prefix, map_path
 from ..chat import update_metadata
@@ -160,6 +162,7 @@ class CommandHandlerBaseMixin:
         Supports:
         - mapped paths (`~/...`, `@/...`, absolute), resolved via path_utils
         - bare names/relative paths resolved under chats_dir (with traversal protection)
+        - bare names of chats in ``YYYY/MM/`` shards of chats_dir
         """
         path = raw_path.strip()
         chats_dir_resolved = Path(chats_dir).resolve()
@@ -195,6 +198,20 @@ class CommandHandlerBaseMixin:
             except ValueError:
                 raise ValueError(f"Invalid path: {path} (outside chats directory)")
 
+        if not candidate.exists() and candidate.name.endswith(CHAT_FILE_EXTENSION):
+            # Fall back to an archived copy (name.json.gz / name.json.zst).
+            for fmt in ARCHIVE_FORMATS:
+                archived = archive_path(candidate, fmt)
+                if archived.exists():
+                    candidate = archived
+                    break
+
+        if not candidate.exists() and "/" not in path and "\\" not in path:
+            # A bare name may live in a YYYY/MM/ shard.
+            sharded = find_sharded_chat(chats_dir, candidate.name)
+            if sharded is not None:
+                candidate = sharded
+
         if candidate.exists():
             return str(candidate)
 
@@ -1,13 +1,26 @@
 """Chat file management command mixin."""
 
+import asyncio
+import sqlite3
 from pathlib import Path
 
 from ..chat import load_chat, save_chat
+from ..chat_archive import ARCHIVE_FORMATS
+from ..chat_related import chat_vector, rank_related, refresh_vectors, term_vector
+from ..chat_search import chat_key, search as search_chats, sync_index
 from ..chat_manager import (
+    archive_stale_chats,
     delete_chat as delete_chat_file,
     generate_chat_filename,
+    list_chats,
+    migrate_chats_to_shards,
     rename_chat,
 )
+from ..constants import (
+    CHAT_ARCHIVE_DEFAULT_DAYS,
+    CHAT_RELATED_DEFAULT_COUNT,
+    CHAT_SEARCH_MAX_HITS,
+)
 from ..logging_utils import sanitize_error_message
 from .types import CommandResult, CommandSignal
 
@@ -34,7 +47,9 @@ class ChatFileCommandsMixin:
 
         # Generate filename
         name = args.strip() if args else None
-        new_path = generate_chat_filename(chats_dir, name)
+        new_path = generate_chat_filename(
+            chats_dir, name, sharded=self.manager.storage_options.shard_dirs
+        )
 
         if not self.manager.chat_path:
             answer = await self._prompt_text(
@@ -78,9 +93,9 @@ class ChatFileCommandsMixin:
         if not selected_path:
             return "Chat open cancelled"
 
-        # Verify file exists and is valid
+        # Verify the file is valid; the parsed chat is kept for the switch
         try:
-            load_chat(selected_path)
+            await self.manager.preload_chat(selected_path)
         except Exception as e:
             return f"Error loading chat: {sanitize_error_message(str(e))}"
 
@@ -141,8 +156,10 @@ class ChatFileCommandsMixin:
             if not new_name:
                 return "Rename cancelled"
 
-            # Perform rename
+            # Perform rename (pending write-behind saves first, so they
+            # don't recreate the old file afterwards)
             try:
+                await self.manager.flush_chat_saves()
                 new_path = rename_chat(selected_path, new_name, chats_dir)
 
                 # Check if this was the current chat
@@ -175,6 +192,7 @@ class ChatFileCommandsMixin:
                 return str(e)
 
         try:
+            await self.manager.flush_chat_saves()
             new_path = rename_chat(str(old_path), new_name, chats_dir)
 
             # Check if this was the current chat
@@ -231,8 +249,9 @@ class ChatFileCommandsMixin:
         if not await self._confirm_yes("Type 'yes' to confirm deletion: "):
             return "Deletion cancelled"
 
-        # Perform deletion
+        # Perform deletion (after pending write-behind saves land)
         try:
+            await self.manager.flush_chat_saves()
             delete_chat_file(selected_path)
 
             if is_current:
@@ -246,3 +265,179 @@ class ChatFileCommandsMixin:
 
         except Exception as e:
             return f"Error deleting chat: {sanitize_error_message(str(e))}"
+
+    async def archive_chats(self, args: str) -> CommandResult:
+        """Compress chats that have not been updated in a while.
+
+        Args:
+            args: Optional "[days] [gz|zst]" (defaults: 90 days, best format)
+
+        Returns:
+            Command text summarizing archived chats
+        """
+        chats_dir = self.manager.profile["chats_dir"]
+        usage = "Usage: /archive [days] [gz|zst]"
+
+        days = CHAT_ARCHIVE_DEFAULT_DAYS
+        fmt = None
+        for part in args.split():
+            if part.isdigit() and int(part) > 0:
+                days = int(part)
+            elif part in ARCHIVE_FORMATS:
+                fmt = part
+            else:
+                return usage
+
+        await self.manager.flush_chat_saves()
+        try:
+            archived, failed = await asyncio.to_thread(
+                archive_stale_chats,
+                chats_dir,
+                days,
+                fmt,
+                exclude=[self.manager.chat_path],
+            )
+        except ValueError as e:
+            return str(e)
+
+        if not archived and not failed:
+            return f"No chats older than {days} days to archive"
+
+        lines = []
+        if archived:
+            size = sum(result["size"] for result in archived)
+            archived_size = sum(result["archived_size"] for result in archived)
+            lines.append(
+                f"Archived {len(archived)} chat(s) not updated in {days} days: "
+                f"{_format_size(size)} → {_format_size(archived_size)}"
+            )
+            lines.extend(f"  {Path(result['archive_path']).name}" for result in archived)
+        for path, error in failed:
+            lines.append(
+                f"Error archiving {Path(path).name}: {sanitize_error_message(error)}"
+            )
+        return "\n".join(lines)
+
+    async def shard_chats(self, args: str) -> CommandResult:
+        """Move chats kept directly in the chats directory into YYYY/MM/ shards.
+
+        Args:
+            args: Not used
+
+        Returns:
+            Command text summarizing moved chats
+        """
+        if args.strip():
+            return "Usage: /shard"
+        chats_dir = self.manager.profile["chats_dir"]
+
+        await self.manager.flush_chat_saves()
+        moved, failed = await asyncio.to_thread(
+            migrate_chats_to_shards,
+            chats_dir,
+            exclude=[self.manager.chat_path],
+        )
+
+        if not moved and not failed:
+            return "No chats to move into month shards"
+
+        lines = []
+        if moved:
+            lines.append(f"Moved {len(moved)} chat(s) into month shards")
+        for path, error in failed:
+            lines.append(f"Error moving {Path(path).name}: {sanitize_error_message(error)}")
+        if failed:
+            lines.append("Run /shard again to retry the remaining moves")
+        return "\n".join(lines)
+
+    async def find_in_chats(self, args: str) -> CommandResult:
+        """Search every chat in the chats directory.
+
+        Args:
+            args: Words that must all appear (in a message, title, or summary)
+
+        Returns:
+            Command text listing the best matches
+        """
+        query = args.strip()
+        if not query:
+            return "Usage: /find <words>"
+        chats_dir = self.manager.profile["chats_dir"]
+
+        def _find() -> list:
+            sync_index(chats_dir)
+            return search_chats(chats_dir, query, CHAT_SEARCH_MAX_HITS)
+
+        await self.manager.flush_chat_saves()
+        try:
+            hits = await asyncio.to_thread(_find)
+        except sqlite3.Error as e:
+            return f"Error searching chats: {sanitize_error_message(str(e))}"
+
+        if not hits:
+            return f"No matches for: {query}"
+
+        current = chat_key(chats_dir, self.manager.chat_path) if self.manager.chat_path else None
+        lines = [f"Matches for: {query}"]
+        for hit in hits:
+            if hit.position is None:
+                where = f"({hit.role})"
+            elif hit.chat == current and self.manager.get_message_hex_id(hit.position):
+                where = f"[{self.manager.get_message_hex_id(hit.position)}] {hit.role}"
+            else:
+                where = f"#{hit.position + 1} {hit.role}"
+            lines.append(f"  {hit.chat} {where}: {hit.snippet}")
+        return "\n".join(lines)
+
+    async def related_chats(self, args: str) -> CommandResult:
+        """List chats most similar to the current chat or to given words.
+
+        Args:
+            args: Optional words to compare against instead of the current chat
+
+        Returns:
+            Command text listing related chats
+        """
+        chats_dir = self.manager.profile["chats_dir"]
+        query_text = args.strip()
+        chat_path = self.manager.chat_path
+        if not query_text and not chat_path:
+            return "No chat is open. Use /related <words> to search by topic"
+
+        def _load() -> tuple[dict, dict]:
+            titles = {
+                chat_key(chats_dir, chat["path"]): chat.get("title")
+                for chat in list_chats(chats_dir)
+            }
+            return refresh_vectors(chats_dir), titles
+
+        await self.manager.flush_chat_saves()
+        vectors, titles = await asyncio.to_thread(_load)
+
+        current = chat_key(chats_dir, chat_path) if chat_path else None
+        if query_text:
+            query = term_vector([query_text])
+            subject = query_text
+        else:
+            query = vectors.get(current) or chat_vector(self.manager.chat)
+            subject = Path(chat_path).name
+        related = rank_related(vectors, query, CHAT_RELATED_DEFAULT_COUNT, exclude=current)
+
+        if not related:
+            return f"No related chats for: {subject}"
+
+        lines = [f"Related to: {subject}"]
+        for chat, score in related:
+            title = titles.get(chat)
+            suffix = f" - {title}" if title else ""
+            lines.append(f"  {chat} ({score:.2f}){suffix}")
+        return "\n".join(lines)
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for display."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
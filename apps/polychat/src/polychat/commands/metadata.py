@@ -2,9 +2,19 @@
 
 import logging
 
-from .. import hex_id
+from ..attachments import expand_attachments_async
 from ..chat import get_messages_for_ai
+from ..chat_compact import (
+    clear_checkpoint,
+    compact_boundary,
+    get_checkpoint,
+    plan_chunks,
+    set_checkpoint,
+)
 from ..constants import (
+    BUILTIN_PROMPT_COMPACT,
+    COMPACT_CHUNK_CHARS,
+    COMPACT_KEEP_TURNS,
     DATETIME_FORMAT_FULL,
     DATETIME_FORMAT_SHORT,
     DISPLAY_NONE,
@@ -23,12 +33,16 @@ from ..text_formatting import (
     minify_text,
     truncate_text,
 )
+from ..path_utils import map_path
 from ..prompts import (
+    build_compact_prompt,
     build_safety_check_prompt,
     build_summary_generation_prompt,
     build_title_generation_prompt,
 )
+from ..smart_context import count_summarizable
 from ..timeouts import resolve_profile_timeout
+from ..tokens import estimate_tokens
 
 class MetadataCommandsMixin:
     async def _invoke_helper_ai(
@@ -239,8 +253,7 @@ class MetadataCommandsMixin:
         # Determine what to check
         if args.strip():
             # Check specific message by hex ID
-            hex_map = self.manager.message_hex_ids
-            msg_index = hex_id.get_message_index(args.strip(), hex_map)
+            msg_index = self.manager.get_message_index(args.strip())
 
             if msg_index is None:
                 return f"Invalid hex ID: {args.strip()}"
@@ -294,6 +307,153 @@ class MetadataCommandsMixin:
             )
             return f"Error performing safety check: {e}"
 
+    async def compact_chat(self, args: str) -> str:
+        """Fold old turns into the chat's rolling summary checkpoint.
+
+        Args:
+            args: Empty, "keep <n>" (newest turns sent in full), or "--" to
+                remove the checkpoint
+
+        Returns:
+            Result message
+        """
+        chat_data = self._require_open_chat(need_messages=True, need_metadata=True)
+        if chat_data is None:
+            return "No chat is currently open"
+
+        parts = args.split()
+        if parts == ["--"]:
+            if clear_checkpoint(chat_data):
+                return "Checkpoint removed; the full history is sent again"
+            return "No checkpoint to remove"
+        keep_turns = COMPACT_KEEP_TURNS
+        if parts:
+            if len(parts) != 2 or parts[0] != "keep" or not parts[1].isdigit():
+                return "Usage: /compact [keep <n>] or /compact --"
+            keep_turns = int(parts[1])
+
+        messages = chat_data["messages"]
+        boundary = compact_boundary(messages, keep_turns)
+        checkpoint = get_checkpoint(chat_data)
+        start = checkpoint["through"] if checkpoint else 0
+        summary = checkpoint["summary"] if checkpoint else None
+        chunks = plan_chunks(messages, start, boundary, COMPACT_CHUNK_CHARS)
+        if boundary <= start or not chunks:
+            return f"Nothing to compact (keeping the last {keep_turns} turn(s) in full)"
+
+        prompt_path = self.manager.profile.get("compact_prompt") or map_path(
+            BUILTIN_PROMPT_COMPACT
+        )
+        for chunk in chunks:
+            context_text = format_for_ai_context(
+                [
+                    messages[index]
+                    for index in chunk
+                    if messages[index].get("role") in ("user", "assistant")
+                ]
+            )
+            prompt_messages = [{
+                "role": "user",
+                "content": build_compact_prompt(summary, context_text, prompt_path),
+            }]
+            try:
+                summary = (
+                    await self._invoke_helper_ai(
+                        self.manager.helper_ai,
+                        self.manager.helper_model,
+                        self.manager.profile,
+                        prompt_messages,
+                        None,
+                        task="compact",
+                    )
+                ).strip()
+            except Exception as e:
+                logging.error(
+                    "Helper AI compaction failed (provider=%s, model=%s): %s",
+                    self.manager.helper_ai,
+                    self.manager.helper_model,
+                    e,
+                    exc_info=True,
+                )
+                return f"Error compacting chat{self._compact_progress(start, chunk)}: {e}"
+            if not summary:
+                return (
+                    "Error compacting chat"
+                    f"{self._compact_progress(start, chunk)}: the helper AI returned no summary"
+                )
+
+            # Keep the progress of each chunk in case a later one fails.
+            set_checkpoint(chat_data, summary, chunk.stop, self.manager.helper_model)
+            await self.manager.save_current_chat()
+
+        return (
+            f"Compacted {boundary - start} message(s); the checkpoint now covers "
+            f"messages 1-{boundary} and the last {keep_turns} turn(s) are sent in full"
+        )
+
+    @staticmethod
+    def _compact_progress(start: int, failed_chunk: range) -> str:
+        """Describe messages folded in before a failed /compact chunk."""
+        folded = failed_chunk.start - start
+        return f" ({folded} message(s) were folded in)" if folded else ""
+
+    async def smart_context_command(self, args: str) -> str:
+        """Show or control Smart Context message summaries.
+
+        Args:
+            args: Empty for status, or "run", "stop", "clear"
+
+        Returns:
+            Status or result message
+        """
+        action = args.strip().lower()
+        if action not in ("", "run", "stop", "clear"):
+            return "Usage: /smart [run|stop|clear]"
+
+        chat_data = self._require_open_chat(need_messages=True)
+        if chat_data is None:
+            return "No chat is currently open"
+
+        summarizer = self.manager.message_summarizer
+        if summarizer is None:
+            return 'Smart Context is off (add a "smart_context" block to your profile)'
+
+        if action == "run":
+            if summarizer.running:
+                return "Already summarizing in the background"
+            queued = self.manager.start_message_summaries()
+            if not queued:
+                return "All older messages are summarized"
+            return f"Summarizing {queued} message(s) in the background"
+
+        if action == "stop":
+            if not summarizer.running:
+                return "Not summarizing"
+            self.manager.stop_message_summaries()
+            return f"Stopped summarizing ({summarizer.done} new summaries kept)"
+
+        if action == "clear":
+            self.manager.stop_message_summaries()
+            cleared = summarizer.store.clear()
+            return f"Cleared {cleared} message summaries"
+
+        options = self.manager.smart_context_options
+        messages, start = self.manager.summarizable_messages()
+        total = count_summarizable(messages, options, start=start)
+        pending = len(self.manager.pending_message_summaries())
+        lines = [
+            f"Smart Context: {total - pending} of {total} older messages summarized",
+            f"Sent in full: newest {options.recent_messages} messages",
+        ]
+        if summarizer.running:
+            lines.append(
+                f"Summarizing in the background ({summarizer.done} done, "
+                f"{summarizer.remaining} left)"
+            )
+        elif summarizer.error:
+            lines.append(f"Last run stopped: {summarizer.error}")
+        return "\n".join(lines)
+
     async def show_history(self, args: str) -> str:
         """Show chat history.
 
@@ -338,8 +498,9 @@ class MetadataCommandsMixin:
             display_messages = list(enumerate(messages))
             total_count = len(messages)
         else:
-            # Show last N messages
-            display_messages = list(enumerate(messages))[-limit:]
+            # Show last N messages (index-based so lazy chats stay paged out)
+            start = max(0, len(messages) - limit)
+            display_messages = [(i, messages[i]) for i in range(start, len(messages))]
             total_count = len(messages)
 
         if not display_messages:
@@ -347,6 +508,10 @@ class MetadataCommandsMixin:
                 return "No error messages found"
             return "No messages to display"
 
+        # Stable hex IDs are derived when a message is first shown
+        for index, _msg in display_messages:
+            self.manager.get_message_hex_id(index)
+
         # Format output
         output = []
 
@@ -392,7 +557,7 @@ class MetadataCommandsMixin:
             return "No chat is currently open"
         messages = chat_data["messages"]
         # Look up message by hex ID
-        msg_index = hex_id.get_message_index(args.strip(), messages)
+        msg_index = self.manager.get_message_index(args.strip())
 
         if msg_index is None:
             return f"Invalid hex ID: {args.strip()}"
@@ -468,6 +633,16 @@ class MetadataCommandsMixin:
         summary_prompt = profile_data.get("summary_prompt", DISPLAY_NONE)
         safety_prompt = profile_data.get("safety_prompt", DISPLAY_NONE)
 
+        # What the next request would send, before the new message
+        context_messages = get_messages_for_ai(chat_data) if messages else []
+        context_messages, _ = self.manager.apply_message_summaries(context_messages)
+        context_messages = await expand_attachments_async(
+            context_messages, profile_data.get("chats_dir")
+        )
+        context_estimate = estimate_tokens(
+            context_messages, self.manager.current_ai, self.manager.system_prompt
+        )
+
         updated_local = DISPLAY_UNKNOWN
         updated_at = metadata.get("updated_at")
         if updated_at:
@@ -489,6 +664,7 @@ class MetadataCommandsMixin:
             f"Title:     {chat_title}",
             f"Summary:   {chat_summary}",
             f"Messages:  {len(messages)}",
+            f"Context:   {context_estimate.format()} tokens ({context_estimate.estimator})",
             f"Updated:   {updated_local}",
             "",
             "Providers",
@@ -60,6 +60,13 @@ Chat File Management:
                       Rename a specific chat by name/path
   /delete current     Delete the current chat (with confirmation)
   /delete [name]      Delete a chat file (shows list if no name)
+  /archive [days]     Compress chats not updated in N days (default 90)
+  /archive <days> gz|zst
+                      Choose the archive format (zst needs 'zstandard')
+  /shard              Move chats into YYYY/MM/ subdirectories (resumable)
+  /find <words>       Search all chats (messages, titles, summaries)
+  /related            List chats on topics similar to the current chat
+  /related <words>    List chats on topics similar to the given words
 
 Chat Control:
   /retry              Retry the last interaction (collect candidate responses)
@@ -72,6 +79,9 @@ Chat Control:
   /secret on/off      Enable/disable secret mode explicitly
   /search             Show current search mode state
   /search on/off      Enable/disable web search
+  /attach <path>      Send a text file with the next message (stored once, by hash)
+  /attach             Show files staged for the next message
+  /attach --          Clear staged files
   /rewind             Delete the last full interaction (user+assistant/user+error), or trailing error
   /rewind last        Delete the last full interaction (user+assistant/user+error), or trailing error
   /rewind <hex_id>    Delete that message and all following messages
@@ -93,6 +103,13 @@ Metadata:
   /summary            Generate summary using AI
   /summary --         Clear summary
   /summary <text>     Set chat summary
+  /compact            Fold all but the last 4 turns into a summary checkpoint
+  /compact keep <n>   Fold all but the last n turns into the checkpoint
+  /compact --         Remove the checkpoint (send the full history again)
+  /smart              Show Smart Context summary progress
+  /smart run          Summarize older messages now (in the background)
+  /smart stop         Stop summarizing (finished summaries are kept)
+  /smart clear        Delete this chat's message summaries
 
 Safety:
   /safe               Check entire chat for unsafe content
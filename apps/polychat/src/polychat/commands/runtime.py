@@ -499,6 +499,51 @@ class RuntimeCommandsMixin:
 
         raise ValueError("Invalid argument. Use /search on or /search off")
 
+    async def attach_file(self, args: str) -> str:
+        """Stage a text file to send with the next message.
+
+        Args:
+            args: Empty to list staged files, '--' to clear them, or a file path
+
+        Returns:
+            Status message
+        """
+        import asyncio
+
+        from ..attachments import store_attachment
+        from ..path_utils import map_path
+
+        chat_data = self.manager.chat
+        if not chat_data or "messages" not in chat_data:
+            return "No chat is currently open"
+
+        raw_path = args.strip()
+        staged = self.manager.pending_attachments
+        if not raw_path:
+            if not staged:
+                return "No attachments staged"
+            names = "\n".join(f"  {ref['name']} ({ref['size']} bytes)" for ref in staged)
+            return f"Attachments for the next message:\n{names}"
+
+        if raw_path == "--":
+            count = len(self.manager.take_pending_attachments())
+            return f"Cleared {count} staged attachment(s)"
+
+        try:
+            reference = await asyncio.to_thread(
+                store_attachment,
+                self.manager.profile["chats_dir"],
+                map_path(raw_path),
+            )
+        except (OSError, ValueError) as e:
+            return f"Error attaching file: {e}"
+
+        self.manager.stage_attachment(reference)
+        return (
+            f"Attached {reference['name']} ({reference['size']} bytes); "
+            "it will be sent with your next message"
+        )
+
     async def rewind_messages(self, args: str) -> str:
         """Rewind chat history by deleting a target message and all following.
 
@@ -544,7 +589,7 @@ class RuntimeCommandsMixin:
                     )
                 index = len(messages) - 2
         elif hex_id.is_hex_id(target):
-            index = hex_id.get_message_index(target, messages)
+            index = self.manager.get_message_index(target)
             if index is None:
                 raise ValueError(f"Hex ID '{target}' not found")
         else:
@@ -552,7 +597,7 @@ class RuntimeCommandsMixin:
 
         try:
             # Get hex ID for display (if available)
-            hex_display = hex_id.get_hex_id(index, messages)
+            hex_display = self.manager.get_message_hex_id(index)
             if hex_display:
                 target_label = f"[{hex_display}]"
             elif target == "last":
@@ -605,29 +650,21 @@ class RuntimeCommandsMixin:
         indices_to_delete = []
 
         for hid in hex_ids_to_purge:
-            msg_index = hex_id.get_message_index(hid, messages)
+            msg_index = self.manager.get_message_index(hid)
             if msg_index is None:
                 return f"Invalid hex ID: {hid}"
             indices_to_delete.append((msg_index, hid))
 
-        # Sort by index descending so we delete from end to start
-        # (avoids index shifting issues)
-        indices_to_delete.sort(reverse=True)
-
         # Confirm destructive operation
         ids_for_prompt = ", ".join(f"[{hid}]" for _, hid in sorted(indices_to_delete))
         print(f"WARNING: Purging message(s) breaks conversation context: {ids_for_prompt}")
         if not await self._confirm_yes("Type 'yes' to confirm purge: "):
             return "Purge cancelled"
 
-        # Delete messages
-        deleted_count = 0
-        for msg_index, _hid in indices_to_delete:
-            # Clean up hex ID before deleting
-            self.manager.remove_message_hex_id(msg_index)
-            del messages[msg_index]
-
-            deleted_count += 1
+        # Delete messages (one rebuild of the list, hex IDs remapped)
+        deleted_count = self.manager.delete_messages(
+            msg_index for msg_index, _hid in indices_to_delete
+        )
 
         # Build confirmation message
         deleted_ids = ", ".join(f"[{hid}]" for _, hid in sorted(indices_to_delete))
@@ -19,6 +19,44 @@ PROFILE_FILE_EXTENSION = ".json"
 LOG_FILE_EXTENSION = ".log"
 PROMPT_FILE_EXTENSION = ".txt"
 
+# Append-only change log kept next to a chat file (chat.json -> chat.json.journal)
+CHAT_JOURNAL_SUFFIX = ".journal"
+
+# Binary byte-offset index kept next to a chat file (chat.json -> chat.json.idx)
+CHAT_INDEX_SUFFIX = ".idx"
+
+# Directory holding the message segments of a segmented chat
+# (chat.json -> chat.json.segments/000000.json, ...)
+CHAT_SEGMENTS_SUFFIX = ".segments"
+
+# Smart Context message summaries kept next to a chat file
+# (chat.json -> chat.json.summaries)
+CHAT_SUMMARIES_SUFFIX = ".summaries"
+
+# Sidecar files (and directories) that travel with a chat file on rename/delete
+CHAT_SIDECAR_SUFFIXES = (
+    CHAT_JOURNAL_SUFFIX,
+    CHAT_INDEX_SUFFIX,
+    CHAT_SEGMENTS_SUFFIX,
+    CHAT_SUMMARIES_SUFFIX,
+)
+
+# Compressed archive suffixes appended to a chat file (chat.json -> chat.json.gz)
+CHAT_ARCHIVE_GZIP_SUFFIX = ".gz"
+CHAT_ARCHIVE_ZSTD_SUFFIX = ".zst"
+
+# Listing cache kept in the chats directory (title, timestamps, message count)
+CHAT_CATALOG_FILE_NAME = ".polychat-catalog"
+
+# SQLite full-text index over all chats, kept in the chats directory (/find)
+CHAT_SEARCH_INDEX_FILE_NAME = ".polychat-search.sqlite3"
+
+# Cached per-chat term vectors for /related, kept in the chats directory
+CHAT_RELATED_FILE_NAME = ".polychat-related"
+
+# Progress log of an unfinished /shard migration, kept in the chats directory
+CHAT_SHARD_MIGRATION_FILE_NAME = ".polychat-shard-migration"
+
 # ============================================================================
 # Default directories and paths
 # ============================================================================
@@ -38,6 +76,8 @@ BUILTIN_PROMPT_SYSTEM_DEFAULT = "@/prompts/system/default.txt"
 BUILTIN_PROMPT_TITLE = "@/prompts/title.txt"
 BUILTIN_PROMPT_SUMMARY = "@/prompts/summary.txt"
 BUILTIN_PROMPT_SAFETY = "@/prompts/safety.txt"
+BUILTIN_PROMPT_MESSAGE_SUMMARY = "@/prompts/message_summary.txt"
+BUILTIN_PROMPT_COMPACT = "@/prompts/compact.txt"
 
 # ============================================================================
 # Display formatting
@@ -65,6 +105,123 @@ HISTORY_DEFAULT_LIMIT = 10
 # Default preview length for one-line truncated text displays
 MESSAGE_PREVIEW_LENGTH = 100
 
+# ============================================================================
+# Chat storage
+# ============================================================================
+
+# Journal records accumulated before a background compaction folds them
+# back into the canonical chat JSON
+CHAT_JOURNAL_COMPACT_THRESHOLD = 200
+
+# Characters read per chunk by the streaming chat file reader
+CHAT_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Leading bytes read when scanning a chat file for its listing metadata
+CHAT_SCAN_PREFIX_BYTES = 64 * 1024
+
+# Upper bound on worker threads reading changed chat files for a listing
+CHAT_SCAN_MAX_WORKERS = 8
+
+# Chats shown per page by the interactive chat picker
+CHAT_PICKER_PAGE_SIZE = 20
+
+# Quiet period before a write-behind chat save is written (seconds)
+CHAT_SAVE_DEBOUNCE_SEC = 0.5
+
+# Chat files modified this recently are re-read on the next listing instead of
+# trusted from the catalog, since a same-size rewrite within the filesystem's
+# timestamp granularity would otherwise go unnoticed (seconds)
+CHAT_CATALOG_RACY_WINDOW_SEC = 2
+
+# /archive compresses chats not updated in this many days unless told otherwise
+CHAT_ARCHIVE_DEFAULT_DAYS = 90
+
+# Most hits /find shows
+CHAT_SEARCH_MAX_HITS = 20
+
+# Hashed bag-of-words size for /related, and the most frequent buckets kept
+# per chat (bounds the cache no matter how long a chat is)
+CHAT_RELATED_HASH_BUCKETS = 1 << 18
+CHAT_RELATED_MAX_TERMS = 256
+
+# Chats /related lists unless told otherwise
+CHAT_RELATED_DEFAULT_COUNT = 10
+
+# Compression levels for archived chats (written once, read rarely)
+CHAT_ARCHIVE_GZIP_LEVEL = 9
+CHAT_ARCHIVE_ZSTD_LEVEL = 15
+
+# Upper bound on worker threads compressing chats in parallel
+CHAT_ARCHIVE_MAX_WORKERS = 4
+
+# Upper bound on worker threads moving chats into month shards (/shard)
+CHAT_SHARD_MIGRATION_MAX_WORKERS = 8
+
+# Recently closed or prefetched chats kept in memory for instant reopening
+CHAT_CACHE_MAX_CHATS = 8
+
+# ============================================================================
+# Attachments
+# ============================================================================
+
+# Content-addressed blob store for /attach, inside the chats directory
+ATTACHMENTS_DIR_NAME = ".attachments"
+
+# Largest file /attach accepts (bytes)
+ATTACHMENT_MAX_BYTES = 10 * 1024 * 1024
+
+# Bytes read per chunk while hashing and copying an attachment
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+
+# ============================================================================
+# Token estimates
+# ============================================================================
+
+# Tokens a provider adds per message for role and turn framing, on top of
+# the message text
+TOKEN_MESSAGE_OVERHEAD = 4
+
+# Distinct message texts whose token counts are kept per estimator; the
+# oldest half is dropped when the cache fills up
+TOKEN_CACHE_MAX_ENTRIES = 50_000
+
+# ============================================================================
+# Context retrieval (ai_limits.retrieval_turns)
+# ============================================================================
+
+# Okapi BM25 term-frequency saturation and length normalization
+RETRIEVAL_BM25_K1 = 1.2
+RETRIEVAL_BM25_B = 0.75
+
+# ============================================================================
+# Smart Context
+# ============================================================================
+
+# Newest messages always sent in full; older ones are sent as their summary
+SMART_CONTEXT_RECENT_MESSAGES = 20
+
+# Messages shorter than this (characters) are never summarized
+SMART_CONTEXT_MIN_CHARS = 600
+
+# Helper AI requests in flight while summarizing
+SMART_CONTEXT_CONCURRENCY = 4
+
+# Characters of each neighboring message shown to the summarizer
+SMART_CONTEXT_NEIGHBOR_CHARS = 2000
+
+# Version of the summary prompt; stored summaries of other versions are ignored
+SMART_CONTEXT_SUMMARY_VERSION = 1
+
+# ============================================================================
+# Compaction (/compact)
+# ============================================================================
+
+# Newest turns /compact leaves out of the checkpoint by default
+COMPACT_KEEP_TURNS = 4
+
+# Characters of conversation folded into the checkpoint per helper request
+COMPACT_CHUNK_CHARS = 60_000
+
 # ============================================================================
 # Date/time formats
 # ============================================================================
@@ -83,6 +240,11 @@ HEX_ID_MIN_DIGITS = 3
 # Maximum attempts to generate unique hex ID before giving up
 HEX_ID_MAX_ATTEMPTS = 3
 
+# Minimum number of hex digits for IDs derived from message content
+# (chat_storage.stable_hex_ids); wider than random IDs so collisions, which
+# lengthen an ID, stay rare in long chats
+STABLE_HEX_ID_MIN_DIGITS = 4
+
 # ============================================================================
 # Display Emojis
 # ============================================================================
@@ -0,0 +1,179 @@
+"""Fit chat history into a token budget before it is sent.
+
+Without a budget every request carries the whole user/assistant history, so
+cost and latency grow with the chat forever. With ``max_context_tokens`` set
+in ``ai_limits`` (see ``ai.limits``), older turns are left out of the request
+until the rest, plus the system prompt, fits. The chat itself is unchanged.
+
+A turn is a user message and the replies that follow it. Turns are only ever
+dropped whole, and the newest turn (the message being sent) is always kept.
+Strategies:
+
+- ``tail``: keep the newest turns that fit.
+- ``first_and_tail``: keep the first turn, which usually sets up the task,
+  then the newest turns that fit in the rest of the budget.
+
+Turns are measured newest first with the cached per-message counts from
+``tokens``, so fitting stops at the first turn that no longer fits instead of
+measuring the whole chat.
+
+With ``retrieval_turns`` set, up to that many left-out turns holding the
+messages most relevant to the new one (ranked by ``chat_retrieval``) are put
+back, in chat order, while they still fit the budget.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from .tokens import TokenEstimator, count_message_tokens, count_text_tokens
+
+
+@dataclass(slots=True, frozen=True)
+class ContextFit:
+    """Messages that fit a budget, and what was left out."""
+
+    messages: list[Any]
+    tokens: int
+    budget: int
+    dropped_turns: range
+    dropped_messages: int
+    # Turns within dropped_turns that were brought back as relevant
+    retrieved_turns: tuple[int, ...] = ()
+
+    def describe_dropped(self) -> str:
+        """Describe the left-out turns for display (1-based turn numbers)."""
+        first, last = self.dropped_turns.start, self.dropped_turns.stop - 1
+        turns = f"turn {first}" if first == last else f"turns {first}-{last}"
+        text = (
+            f"Context: left out {turns} ({self.dropped_messages} messages) "
+            f"to fit ~{self.budget:,} tokens"
+        )
+        if self.retrieved_turns:
+            numbers = ", ".join(str(turn) for turn in self.retrieved_turns)
+            label = "turn" if len(self.retrieved_turns) == 1 else "turns"
+            text += f"; brought back relevant {label} {numbers}"
+        return text
+
+
+def _is_turn_start(message: Any) -> bool:
+    return message.get("role") == "user"
+
+
+def _first_turn_end(messages: list[Any]) -> int:
+    """Return the index after the first turn."""
+    for index in range(1, len(messages)):
+        if _is_turn_start(messages[index]):
+            return index
+    return len(messages)
+
+
+def _turn_span(messages: list[Any], index: int, start: int, stop: int) -> range:
+    """Return the turn holding messages[index], clipped to [start, stop)."""
+    first = index
+    while first > start and not _is_turn_start(messages[first]):
+        first -= 1
+    end = index + 1
+    while end < stop and not _is_turn_start(messages[end]):
+        end += 1
+    return range(first, end)
+
+
+def fit_context(
+    messages: list[Any],
+    *,
+    budget: int,
+    strategy: str,
+    estimator: TokenEstimator,
+    system_prompt: Optional[str] = None,
+    relevant: Sequence[int] = (),
+    retrieve_turns: int = 0,
+) -> ContextFit:
+    """Leave out the oldest turns that do not fit the budget.
+
+    Args:
+        messages: User/assistant messages about to be sent, oldest first,
+            ending with the new user message
+        budget: Input tokens the request may use, system prompt included
+        strategy: ``"tail"`` or ``"first_and_tail"``
+        estimator: Token estimator of the provider the request goes to
+        system_prompt: System prompt sent with the messages
+        relevant: Positions in messages, most relevant first
+        retrieve_turns: Most left-out turns to bring back from ``relevant``
+    """
+    used = count_text_tokens(system_prompt, estimator) if system_prompt else 0
+
+    # The newest turn is sent even when it alone exceeds the budget.
+    tail_start = len(messages)
+    while tail_start > 0:
+        tail_start -= 1
+        used += count_message_tokens(messages[tail_start], estimator)
+        if _is_turn_start(messages[tail_start]):
+            break
+
+    head_end = 0
+    if strategy == "first_and_tail" and tail_start > 0:
+        first_end = min(_first_turn_end(messages), tail_start)
+        first_tokens = sum(
+            count_message_tokens(message, estimator) for message in messages[:first_end]
+        )
+        if used + first_tokens <= budget:
+            used += first_tokens
+            head_end = first_end
+
+    # Take older turns while the whole turn still fits.
+    turn_tokens = 0
+    index = tail_start
+    while index > head_end:
+        index -= 1
+        turn_tokens += count_message_tokens(messages[index], estimator)
+        if _is_turn_start(messages[index]) or index == head_end:
+            if used + turn_tokens > budget:
+                break
+            used += turn_tokens
+            turn_tokens = 0
+            tail_start = index
+
+    if tail_start == head_end:
+        return ContextFit(list(messages), used, budget, range(0), 0)
+
+    first_dropped_turn = (
+        sum(1 for message in messages[:head_end] if _is_turn_start(message)) + 1
+        if head_end
+        else 1
+    )
+    dropped_turn_count = max(
+        1, sum(1 for message in messages[head_end:tail_start] if _is_turn_start(message))
+    )
+
+    retrieved: list[range] = []
+    for index in relevant:
+        if len(retrieved) >= retrieve_turns:
+            break
+        if not head_end <= index < tail_start:
+            continue
+        span = _turn_span(messages, index, head_end, tail_start)
+        if span in retrieved:
+            continue
+        span_tokens = sum(count_message_tokens(messages[i], estimator) for i in span)
+        if used + span_tokens <= budget:
+            used += span_tokens
+            retrieved.append(span)
+    retrieved.sort(key=lambda span: span.start)
+
+    kept = list(messages[:head_end])
+    for span in retrieved:
+        kept.extend(messages[span.start:span.stop])
+    kept.extend(messages[tail_start:])
+    return ContextFit(
+        messages=kept,
+        tokens=used,
+        budget=budget,
+        dropped_turns=range(first_dropped_turn, first_dropped_turn + dropped_turn_count),
+        dropped_messages=tail_start - head_end - sum(len(span) for span in retrieved),
+        retrieved_turns=tuple(
+            sum(1 for message in messages[:span.start] if _is_turn_start(message)) + 1
+            for span in retrieved
+        ),
+    )
@@ -0,0 +1,34 @@
+"""Crash-safe file writes."""
+
+from __future__ import annotations
+
+import os
+import secrets
+from pathlib import Path
+
+
+def write_bytes_atomic(path: str | Path, data: bytes) -> None:
+    """Replace a file's contents atomically.
+
+    Data goes to a temporary file in the same directory, is flushed to disk,
+    and then renamed over the target, so readers (and a crash mid-write) see
+    either the old or the new contents, never a truncated file. An existing
+    file's permission bits are preserved.
+    """
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
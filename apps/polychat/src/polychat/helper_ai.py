@@ -41,6 +41,7 @@ async def invoke_helper_ai(
     from .ai.limits import resolve_request_limits
 
     from .costs import estimate_cost, format_cost_usd
+    from .tokens import estimate_tokens
     from .logging_utils import (
         extract_http_error_context,
         log_event,
@@ -99,6 +100,7 @@ async def invoke_helper_ai(
         helper_ai,
         helper=True,
         search=False,
+        model=helper_model,
     )
     max_output_tokens = resolved_limits.get("max_output_tokens")
     log_event(
@@ -109,6 +111,7 @@ async def invoke_helper_ai(
         model=helper_model,
         message_count=len(messages),
         input_chars=estimate_message_chars(messages),
+        input_tokens_est=estimate_tokens(messages, helper_ai, system_prompt).tokens,
         has_system_prompt=bool(system_prompt),
         max_output_tokens=max_output_tokens,
     )
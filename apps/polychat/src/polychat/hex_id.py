@@ -1,14 +1,20 @@
 """Hex ID generation for message references.
 
 This module provides functions to generate unique hex IDs for messages
-in a chat session. Hex IDs are temporary (not saved to history) and
-change on each app run.
+in a chat session. Hex IDs are never saved to history. Random IDs change on
+each app run; with ``chat_storage.stable_hex_ids`` they are derived from
+each message's timestamp, role, and content instead (``derive_hex_id``), so
+the same message gets the same ID across runs.
 """
 
+import hashlib
+import json
 import random
-from typing import Any, Set
+from typing import Any, Sequence, Set
 
-from .constants import HEX_ID_MAX_ATTEMPTS, HEX_ID_MIN_DIGITS
+from .chat_message import Message
+from .chat_window import iter_loaded_messages
+from .constants import HEX_ID_MAX_ATTEMPTS, HEX_ID_MIN_DIGITS, STABLE_HEX_ID_MIN_DIGITS
 
 
 def generate_hex_id(existing_ids: Set[str], min_digits: int = HEX_ID_MIN_DIGITS) -> str:
@@ -44,6 +50,56 @@ def generate_hex_id(existing_ids: Set[str], min_digits: int = HEX_ID_MIN_DIGITS)
         digits += 1
 
 
+def _content_text(message: Any) -> str:
+    if isinstance(message, Message):
+        text = message.content_text
+        if text is not None:
+            return text
+    content = message.get("content")
+    if isinstance(content, list) and all(isinstance(line, str) for line in content):
+        return "\n".join(content)
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, ensure_ascii=False, sort_keys=True)
+
+
+def message_digest(message: Any) -> str:
+    """Return the hex digest a stable hex ID is taken from."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in (message.get("timestamp"), message.get("role"), _content_text(message)):
+        hasher.update(str(part or "").encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def derive_hex_id(
+    message: Any,
+    existing_ids: Set[str],
+    min_digits: int = STABLE_HEX_ID_MIN_DIGITS,
+) -> str:
+    """Derive a hex ID from a message's timestamp, role, and content.
+
+    Args:
+        message: Message to identify
+        existing_ids: Set of already used hex IDs (will be modified)
+        min_digits: Minimum number of hex digits
+
+    Returns:
+        The shortest prefix (at least min_digits long) of the message digest
+        that is not in use yet. A collision only lengthens the ID of the
+        message that is assigned second; messages with identical timestamp,
+        role, and content fall back to digests of the digest.
+    """
+    digest = message_digest(message)
+    while True:
+        for digits in range(min_digits, len(digest) + 1):
+            candidate = digest[:digits]
+            if candidate not in existing_ids:
+                existing_ids.add(candidate)
+                return candidate
+        digest = hashlib.blake2b(digest.encode("ascii"), digest_size=16).hexdigest()
+
+
 def is_hex_id(value: str) -> bool:
     """Check if a string looks like a hex ID.
 
@@ -91,17 +147,23 @@ def assign_hex_ids(
     return hex_map
 
 
-def build_hex_map(messages: list[dict[str, Any]]) -> dict[int, str]:
-    """Build index->hex_id map from message objects."""
+def build_hex_map(messages: Sequence[dict[str, Any]]) -> dict[int, str]:
+    """Build index->hex_id map from loaded message objects.
+
+    Messages of a lazily loaded chat that are not paged in yet have no hex ID,
+    so they are skipped without loading them.
+    """
     hex_map: dict[int, str] = {}
-    for index, message in enumerate(messages):
+    for index, message in iter_loaded_messages(messages):
         hid = message.get("hex_id")
         if isinstance(hid, str):
             hex_map[index] = hid
     return hex_map
 
 
-def get_message_index(hex_id: str, source: list[dict[str, Any]] | dict[int, str]) -> int | None:
+def get_message_index(
+    hex_id: str, source: Sequence[dict[str, Any]] | dict[int, str]
+) -> int | None:
     """Get message index from hex ID.
 
     Args:
@@ -111,14 +173,14 @@ def get_message_index(hex_id: str, source: list[dict[str, Any]] | dict[int, str]
     Returns:
         Message index, or None if not found
     """
-    hex_map = build_hex_map(source) if isinstance(source, list) else source
+    hex_map = source if isinstance(source, dict) else build_hex_map(source)
     for index, hid in hex_map.items():
         if hid == hex_id:
             return index
     return None
 
 
-def get_hex_id(index: int, source: list[dict[str, Any]] | dict[int, str]) -> str | None:
+def get_hex_id(index: int, source: Sequence[dict[str, Any]] | dict[int, str]) -> str | None:
     """Get hex ID from message index.
 
     Args:
@@ -128,5 +190,5 @@ def get_hex_id(index: int, source: list[dict[str, Any]] | dict[int, str]) -> str
     Returns:
         Hex ID, or None if not found
     """
-    hex_map = build_hex_map(source) if isinstance(source, list) else source
+    hex_map = source if isinstance(source, dict) else build_hex_map(source)
     return hex_map.get(index)
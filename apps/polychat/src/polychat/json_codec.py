@@ -0,0 +1,171 @@
+"""JSON codec used for PolyChat persistence.
+
+Chats, profiles, and key files are written in one canonical format: 2-space
+indent, ``ensure_ascii=False``, insertion key order (stdlib ``json.dumps``
+output). ``get_codec()`` returns the fastest available backend that produces
+that format byte for byte:
+
+- ``orjson`` when installed. Values it would format differently from the
+  stdlib (floats outside ``[1e-4, 1e16)``, non-string keys, huge integers,
+  types other than dict/list/str/int/float/bool/None) make that one call fall
+  back to the stdlib encoder.
+- ``json`` (stdlib) otherwise.
+
+Parsing errors are always ``json.JSONDecodeError`` (orjson's error type
+subclasses it), so existing error handling keeps working.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """Standard-library JSON codec (reference implementation of the format)."""
+
+    name = "json"
+
+    def loads(self, data: str | bytes) -> Any:
+        """Parse a JSON document."""
+        return json.loads(data)
+
+    def dumps_pretty(self, obj: Any) -> str:
+        """Encode in the canonical on-disk format."""
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def dumps_pretty_bytes(self, obj: Any) -> bytes:
+        """Encode in the canonical on-disk format as UTF-8 bytes."""
+        return self.dumps_pretty(obj).encode("utf-8")
+
+    def dumps_compact(self, obj: Any) -> str:
+        """Encode on one line without whitespace (JSONL records)."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+_INT64_MIN = -(2**63)
+_UINT64_MAX = 2**64 - 1
+
+
+def _float_matches_stdlib(value: float) -> bool:
+    """Whether orjson formats this float exactly like ``repr``."""
+    if not math.isfinite(value):
+        return False
+    magnitude = abs(value)
+    return magnitude == 0.0 or 1e-4 <= magnitude < 1e16
+
+
+def _orjson_compatible(obj: Any) -> bool:
+    """Whether orjson output for obj is byte-identical to the stdlib's."""
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type is str or value_type is bool or value is None:
+            continue
+        if value_type is dict:
+            for key in value:
+                if type(key) is not str:
+                    return False
+            stack.extend(value.values())
+        elif value_type is list:
+            stack.extend(value)
+        elif value_type is int:
+            if not _INT64_MIN <= value <= _UINT64_MAX:
+                return False
+        elif value_type is float:
+            if not _float_matches_stdlib(value):
+                return False
+        else:
+            return False
+    return True
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson-backed codec with per-call stdlib fallback."""
+
+    name = "orjson"
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The stdlib accepts a few inputs orjson rejects (NaN, lone
+            # surrogate escapes); it raises its own error for real problems.
+            return json.loads(data)
+
+    def _orjson_pretty(self, obj: Any) -> Optional[bytes]:
+        if not _orjson_compatible(obj):
+            return None
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps_pretty(self, obj: Any) -> str:
+        encoded = self._orjson_pretty(obj)
+        if encoded is None:
+            return super().dumps_pretty(obj)
+        return encoded.decode("utf-8")
+
+    def dumps_pretty_bytes(self, obj: Any) -> bytes:
+        encoded = self._orjson_pretty(obj)
+        if encoded is None:
+            return super().dumps_pretty(obj).encode("utf-8")
+        return encoded
+
+    def dumps_compact(self, obj: Any) -> str:
+        if _orjson_compatible(obj):
+            try:
+                return orjson.dumps(obj).decode("utf-8")
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps_compact(obj)
+
+
+STDLIB_CODEC = JsonCodec()
+
+_codec: Optional[JsonCodec] = None
+
+
+def available_codecs() -> dict[str, JsonCodec]:
+    """Return installed codecs by name, fastest last."""
+    codecs: dict[str, JsonCodec] = {STDLIB_CODEC.name: STDLIB_CODEC}
+    if orjson is not None:
+        codecs[OrjsonCodec.name] = OrjsonCodec()
+    return codecs
+
+
+def get_codec() -> JsonCodec:
+    """Return the active codec (fastest available unless overridden)."""
+    global _codec
+    if _codec is None:
+        _codec = list(available_codecs().values())[-1]
+    return _codec
+
+
+def set_codec(name: Optional[str]) -> JsonCodec:
+    """Select a codec by name, or None to go back to automatic selection.
+
+    Raises:
+        ValueError: If the named codec is not installed
+    """
+    global _codec
+    if name is None:
+        _codec = None
+        return get_codec()
+
+    codecs = available_codecs()
+    if name not in codecs:
+        raise ValueError(
+            f"JSON codec '{name}' is not available. "
+            f"Available: {', '.join(codecs)}"
+        )
+    _codec = codecs[name]
+    return _codec
@@ -3,6 +3,8 @@
 import json
 from pathlib import Path
 
+from ..json_codec import get_codec
+
 
 def load_from_json(file_path: str, key_name: str) -> str:
     """Load API key from JSON file.
@@ -37,7 +39,7 @@ def load_from_json(file_path: str, key_name: str) -> str:
 
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = get_codec().loads(f.read())
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in {file_path}: {e}")
 
@@ -5,13 +5,18 @@ transitions, decoupling this logic from the REPL loop. The orchestrator processe
 command responses (signals) and user messages, returning actions for the REPL to execute.
 """
 
+from collections.abc import MutableSequence
 from datetime import datetime, timezone
 from typing import Optional
 
 from .session_manager import SessionManager
 from . import chat
+from .attachments import expand_attachments_async
+from .ai.limits import DEFAULT_CONTEXT_STRATEGY, resolve_context_limits
+from .context_budget import fit_context
 from .logging_utils import log_event
 from .text_formatting import text_to_lines
+from .tokens import get_estimator
 from .commands.types import CommandResult, CommandSignal
 from .orchestrator_types import (
     ActionMode,
@@ -150,9 +155,10 @@ class ChatOrchestrator:
                 chat_path=current_chat_path,
                 chat_data=current_chat_data,
             )
+        await self.manager.flush_chat_saves()
 
         # Load new chat
-        new_chat_data = chat.load_chat(new_chat_path)
+        new_chat_data = chat.load_chat(new_chat_path, self.manager.storage_options)
 
         # Update session manager (updates metadata with system_prompt)
         self.manager.switch_chat(new_chat_path, new_chat_data)
@@ -191,9 +197,10 @@ class ChatOrchestrator:
                 chat_path=current_chat_path,
                 chat_data=current_chat_data,
             )
+        await self.manager.flush_chat_saves()
 
-        # Load selected chat
-        new_chat_data = chat.load_chat(new_chat_path)
+        # Load selected chat (from memory when recently open, else off the loop)
+        new_chat_data = await self.manager.load_chat(new_chat_path)
 
         # Update session manager
         self.manager.switch_chat(new_chat_path, new_chat_data)
@@ -224,6 +231,7 @@ class ChatOrchestrator:
                 chat_path=current_chat_path,
                 chat_data=current_chat_data,
             )
+        await self.manager.flush_chat_saves()
 
         # Clear chat in session manager
         self.manager.close_chat()
@@ -335,6 +343,7 @@ class ChatOrchestrator:
             replaced_user_message,
             replaced_assistant_message,
         ]
+        self.manager.reindex_message_hex_ids(replace_start)
 
         # Save chat and exit retry mode
         if current_chat_path:
@@ -364,7 +373,7 @@ class ChatOrchestrator:
 
         return ContinueAction()
 
-    def _build_send_action(
+    async def _build_send_action(
         self,
         *,
         messages: list[dict],
@@ -376,6 +385,13 @@ class ChatOrchestrator:
         chat_data: Optional[dict] = None,
     ) -> OrchestratorAction:
         """Build a send action with optional execution metadata."""
+        full_messages = messages
+        messages = self._apply_message_summaries(messages, mode)
+        # Fit the budget to the text actually sent, /attach content included.
+        messages = await expand_attachments_async(
+            messages, self.manager.profile.get("chats_dir")
+        )
+        messages, context_notice = self._fit_context_budget(messages, mode, full_messages)
         return SendAction(
             messages=messages,
             mode=mode,
@@ -384,7 +400,70 @@ class ChatOrchestrator:
             assistant_hex_id=assistant_hex_id,
             chat_path=chat_path,
             chat_data=chat_data,
+            context_notice=context_notice,
+        )
+
+    def _apply_message_summaries(self, messages: list[dict], mode: ActionMode) -> list[dict]:
+        """Send older messages as their Smart Context summaries, if enabled."""
+        messages, summarized = self.manager.apply_message_summaries(messages)
+        if summarized:
+            log_event(
+                "context_summarized",
+                mode=mode,
+                chat_file=self.manager.chat_path,
+                summarized_messages=summarized,
+            )
+        return messages
+
+    def _fit_context_budget(
+        self, messages: list[dict], mode: ActionMode, full_messages: list[dict]
+    ) -> tuple[list[dict], Optional[str]]:
+        """Leave out old turns beyond the configured context budget, if any.
+
+        ``full_messages`` are the same messages before Smart Context summaries;
+        relevant left-out turns are ranked on their full text.
+        """
+        limits = resolve_context_limits(
+            self.manager.profile, self.manager.current_ai, self.manager.current_model
+        )
+        budget = limits.get("max_context_tokens")
+        if budget is None:
+            return messages, None
+
+        def _fit(relevant: list[int], retrieve_turns: int):
+            return fit_context(
+                messages,
+                budget=budget,
+                strategy=limits.get("context_strategy", DEFAULT_CONTEXT_STRATEGY),
+                estimator=get_estimator(self.manager.current_ai),
+                system_prompt=self.manager.system_prompt,
+                relevant=relevant,
+                retrieve_turns=retrieve_turns,
+            )
+
+        fit = _fit([], 0)
+        if not fit.dropped_messages:
+            return messages, None
+
+        # Rank only when turns are left out; an unbudgeted chat is never indexed.
+        retrieve_turns = limits.get("retrieval_turns")
+        if retrieve_turns:
+            relevant = self.manager.rank_relevant_messages(full_messages)
+            if relevant:
+                fit = _fit(relevant, retrieve_turns)
+
+        log_event(
+            "context_trimmed",
+            mode=mode,
+            chat_file=self.manager.chat_path,
+            budget=fit.budget,
+            input_tokens_est=fit.tokens,
+            dropped_messages=fit.dropped_messages,
+            first_dropped_turn=fit.dropped_turns.start,
+            last_dropped_turn=fit.dropped_turns.stop - 1,
+            retrieved_turns=list(fit.retrieved_turns),
         )
+        return fit.messages, f"[{fit.describe_dropped()}]"
 
     # ===================================================================
     # User Message Handling
@@ -443,7 +522,7 @@ class ChatOrchestrator:
         secret_context = chat.get_messages_for_ai(chat_data)
         temp_messages = secret_context + [{"role": "user", "content": user_input}]
 
-        return self._build_send_action(
+        return await self._build_send_action(
             messages=temp_messages,
             mode="secret",
         )
@@ -468,7 +547,7 @@ class ChatOrchestrator:
         # Prepare temporary messages
         temp_messages = retry_context + [{"role": "user", "content": user_input}]
 
-        return self._build_send_action(
+        return await self._build_send_action(
             messages=temp_messages,
             mode="retry",
             retry_user_input=user_input,
@@ -479,15 +558,19 @@ class ChatOrchestrator:
         self, user_input: str, chat_data: dict, chat_path: str
     ) -> OrchestratorAction:
         """Handle normal message."""
-        # Add user message to chat
-        chat.add_user_message(chat_data, user_input)
+        # Add user message to chat (with any attachments staged by /attach)
+        chat.add_user_message(
+            chat_data,
+            user_input,
+            attachments=self.manager.take_pending_attachments(),
+        )
         new_msg_index = len(chat_data["messages"]) - 1
         self.manager.assign_message_hex_id(new_msg_index)
 
         # Get messages for AI
         messages = chat.get_messages_for_ai(chat_data)
 
-        return self._build_send_action(
+        return await self._build_send_action(
             messages=messages,
             mode="normal",
             chat_path=chat_path,
@@ -542,19 +625,24 @@ class ChatOrchestrator:
                 citations=citations,
             )
             if chat_data.get("messages"):
-                if assistant_hex_id:
-                    chat_data["messages"][-1]["hex_id"] = assistant_hex_id
-                else:
-                    new_msg_index = len(chat_data["messages"]) - 1
-                    self.manager.assign_message_hex_id(new_msg_index)
+                new_msg_index = len(chat_data["messages"]) - 1
+                self.manager.assign_message_hex_id(new_msg_index, assistant_hex_id or None)
             await self.manager.save_current_chat(
                 chat_path=chat_path,
                 chat_data=chat_data,
             )
+            self.manager.start_message_summaries(auto=True)
             return ContinueAction()
 
         return ContinueAction()
 
+    def _pop_unanswered_user_message(self, chat_data: dict) -> None:
+        """Remove the trailing user message and re-stage its attachments."""
+        popped = self.manager.pop_message(-1, chat_data)
+        if popped is not None:
+            for reference in popped.get("attachments") or []:
+                self.manager.stage_attachment(reference)
+
     async def rollback_pre_send_failure(
         self,
         *,
@@ -571,12 +659,12 @@ class ChatOrchestrator:
             return False
 
         messages = chat_data.get("messages")
-        if not isinstance(messages, list) or not messages:
+        if not isinstance(messages, MutableSequence) or not messages:
             return False
         if messages[-1].get("role") != "user":
             return False
 
-        self.manager.pop_message(-1, chat_data)
+        self._pop_unanswered_user_message(chat_data)
         await self.manager.save_current_chat(
             chat_path=chat_path,
             chat_data=chat_data,
@@ -609,7 +697,7 @@ class ChatOrchestrator:
                 self.manager.release_hex_id(assistant_hex_id)
             # Remove the user message that was added
             if chat_data["messages"] and chat_data["messages"][-1]["role"] == "user":
-                self.manager.pop_message(-1, chat_data)
+                self._pop_unanswered_user_message(chat_data)
 
             # Add error message
             sanitized_error = sanitize_error_message(str(error))
@@ -651,7 +739,7 @@ class ChatOrchestrator:
                 self.manager.release_hex_id(assistant_hex_id)
             # Remove the user message that was added
             if chat_data["messages"] and chat_data["messages"][-1]["role"] == "user":
-                self.manager.pop_message(-1, chat_data)
+                self._pop_unanswered_user_message(chat_data)
             await self.manager.save_current_chat(
                 chat_path=chat_path,
                 chat_data=chat_data,
@@ -45,6 +45,7 @@ class SendAction:
     assistant_hex_id: str | None = None
     chat_path: str | None = None
     chat_data: dict[str, Any] | None = None
+    context_notice: str | None = None
     kind: Literal["send"] = "send"
 
 
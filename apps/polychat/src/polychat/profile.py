@@ -4,10 +4,10 @@ This module handles loading, validating, and creating user profiles.
 Path mapping is handled by the path_utils module.
 """
 
-import json
 from pathlib import Path
 from typing import Any
 
+from .ai.limits import CONTEXT_STRATEGIES
 from .constants import (
     APP_NAME,
     BUILTIN_PROMPT_SYSTEM_DEFAULT,
@@ -17,6 +17,7 @@ from .constants import (
     DEFAULT_CHATS_DIR,
     DEFAULT_LOGS_DIR,
 )
+from .json_codec import get_codec
 from .path_utils import map_path
 from .timeouts import DEFAULT_PROFILE_TIMEOUT_SEC
 
@@ -24,6 +25,9 @@ from .timeouts import DEFAULT_PROFILE_TIMEOUT_SEC
 _AI_LIMIT_KEYS = {
     "max_output_tokens",
     "search_max_output_tokens",
+    "max_context_tokens",
+    "context_strategy",
+    "retrieval_turns",
 }
 
 
@@ -37,12 +41,84 @@ def _validate_limit_block(block: dict[str, Any], *, context: str) -> None:
             )
         if value is None:
             continue
+        if key == "context_strategy":
+            if value not in CONTEXT_STRATEGIES:
+                raise ValueError(
+                    f"ai_limits.context_strategy in {context} must be one of: "
+                    f"{', '.join(CONTEXT_STRATEGIES)}"
+                )
+            continue
         if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
             raise ValueError(
                 f"ai_limits.{key} in {context} must be a positive integer or null"
             )
 
 
+_CHAT_STORAGE_KEYS: dict[str, type] = {
+    "journal": bool,
+    "index": bool,
+    "lazy_window": int,
+    "write_behind": bool,
+    "stable_hex_ids": bool,
+    "segments": int,
+    "shard_dirs": bool,
+    "prefetch": int,
+}
+
+
+def _validate_chat_storage_block(block: dict[str, Any]) -> None:
+    """Validate the optional chat_storage block."""
+    for key, value in block.items():
+        expected_type = _CHAT_STORAGE_KEYS.get(key)
+        if expected_type is None:
+            raise ValueError(
+                f"Unknown chat_storage key '{key}'. "
+                f"Allowed: {', '.join(sorted(_CHAT_STORAGE_KEYS))}"
+            )
+        if value is None:
+            continue
+        if key == "segments" and value == "month":
+            # Besides a segment size, segments accepts one segment per month.
+            continue
+        if expected_type is bool and not isinstance(value, bool):
+            raise ValueError(f"chat_storage.{key} must be true, false, or null")
+        if expected_type is int and (
+            not isinstance(value, int) or isinstance(value, bool) or value <= 0
+        ):
+            if key == "segments":
+                raise ValueError(
+                    'chat_storage.segments must be a positive integer, "month", or null'
+                )
+            raise ValueError(f"chat_storage.{key} must be a positive integer or null")
+
+
+_SMART_CONTEXT_KEYS: dict[str, type] = {
+    "recent_messages": int,
+    "min_chars": int,
+    "concurrency": int,
+    "auto": bool,
+}
+
+
+def _validate_smart_context_block(block: dict[str, Any]) -> None:
+    """Validate the optional smart_context block."""
+    for key, value in block.items():
+        expected_type = _SMART_CONTEXT_KEYS.get(key)
+        if expected_type is None:
+            raise ValueError(
+                f"Unknown smart_context key '{key}'. "
+                f"Allowed: {', '.join(sorted(_SMART_CONTEXT_KEYS))}"
+            )
+        if value is None:
+            continue
+        if expected_type is bool and not isinstance(value, bool):
+            raise ValueError(f"smart_context.{key} must be true, false, or null")
+        if expected_type is int and (
+            not isinstance(value, int) or isinstance(value, bool) or value <= 0
+        ):
+            raise ValueError(f"smart_context.{key} must be a positive integer or null")
+
+
 def map_system_prompt_path(system_prompt_path: str | None) -> str | None:
     """Map system prompt path to absolute path for file reading.
 
@@ -86,7 +162,7 @@ def load_profile(path: str) -> dict[str, Any]:
 
     # Load JSON
     with open(profile_path, "r", encoding="utf-8") as f:
-        profile = json.load(f)
+        profile = get_codec().loads(f.read())
 
     # Validate required fields
     validate_profile(profile)
@@ -100,7 +176,14 @@ def load_profile(path: str) -> dict[str, Any]:
     profile["logs_dir"] = map_path(profile["logs_dir"])
 
     # Map all prompt paths
-    for prompt_key in ["system_prompt", "title_prompt", "summary_prompt", "safety_prompt"]:
+    for prompt_key in [
+        "system_prompt",
+        "title_prompt",
+        "summary_prompt",
+        "safety_prompt",
+        "message_summary_prompt",
+        "compact_prompt",
+    ]:
         if prompt_key in profile and isinstance(profile[prompt_key], str):
             profile[prompt_key] = map_path(profile[prompt_key])
 
@@ -195,6 +278,29 @@ def validate_profile(profile: dict[str, Any]) -> None:
                     context=f"ai_limits.providers.{provider_name}",
                 )
 
+        model_limits = ai_limits.get("models")
+        if model_limits is not None:
+            if not isinstance(model_limits, dict):
+                raise ValueError("'ai_limits.models' must be a dictionary")
+            for model_name, block in model_limits.items():
+                if not isinstance(block, dict):
+                    raise ValueError(f"'ai_limits.models.{model_name}' must be a dictionary")
+                _validate_limit_block(block, context=f"ai_limits.models.{model_name}")
+
+    # Validate optional chat_storage structure
+    chat_storage = profile.get("chat_storage")
+    if chat_storage is not None:
+        if not isinstance(chat_storage, dict):
+            raise ValueError("'chat_storage' must be a dictionary when provided")
+        _validate_chat_storage_block(chat_storage)
+
+    # Validate optional smart_context structure
+    smart_context = profile.get("smart_context")
+    if smart_context is not None:
+        if not isinstance(smart_context, dict):
+            raise ValueError("'smart_context' must be a dictionary when provided")
+        _validate_smart_context_block(smart_context)
+
     # Validate each api_key configuration
     for provider, key_config in profile.get("api_keys", {}).items():
         if not isinstance(key_config, dict):
@@ -308,6 +414,7 @@ def create_profile(path: str) -> tuple[dict[str, Any], list[str]]:
             "default": {
                 "max_output_tokens": None,
                 "search_max_output_tokens": None,
+                "max_context_tokens": None,
             },
             "providers": {
                 "claude": {
@@ -324,7 +431,7 @@ def create_profile(path: str) -> tuple[dict[str, Any], list[str]]:
 
     # Save profile
     with open(profile_path, "w", encoding="utf-8") as f:
-        json.dump(profile, f, indent=2, ensure_ascii=False)
+        f.write(get_codec().dumps_pretty(profile))
 
     # Add success and next steps messages
     messages.extend([
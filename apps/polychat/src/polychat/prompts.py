@@ -1,9 +1,13 @@
 """Centralized AI prompt templates."""
 
 from __future__ import annotations
+import re
 from pathlib import Path
 from typing import Optional
 
+_MESSAGE_SUMMARY_PLACEHOLDER = re.compile(r"\{(ROLE|PREVIOUS|CURRENT|NEXT)\}")
+_COMPACT_PLACEHOLDER = re.compile(r"\{(SUMMARY|CONTEXT)\}")
+
 
 def _load_prompt_from_path(prompt_path: Optional[str], prompt_type: str = "prompt") -> str:
     """Load prompt content from a file path.
@@ -72,3 +76,51 @@ def build_safety_check_prompt(content_to_check: str, prompt_path: Optional[str])
     """
     template = _load_prompt_from_path(prompt_path, prompt_type="safety")
     return template.replace("{CONTEXT}", content_to_check)
+
+
+def build_message_summary_prompt(
+    role: str,
+    previous_text: str,
+    current_text: str,
+    next_text: str,
+    prompt_path: Optional[str],
+) -> str:
+    """Build helper prompt for a Smart Context message summary.
+
+    Args:
+        role: Role of the message being summarized
+        previous_text: Message before it (empty when there is none)
+        current_text: Message to summarize
+        next_text: Message after it (empty when there is none)
+        prompt_path: Path to message summary prompt template (already mapped)
+
+    Returns:
+        Complete prompt with the messages substituted
+    """
+    template = _load_prompt_from_path(prompt_path, prompt_type="message_summary")
+    values = {
+        "ROLE": role,
+        "PREVIOUS": previous_text or "(none)",
+        "CURRENT": current_text,
+        "NEXT": next_text or "(none)",
+    }
+    # One pass, so placeholders quoted inside the messages stay as written.
+    return _MESSAGE_SUMMARY_PLACEHOLDER.sub(lambda match: values[match.group(1)], template)
+
+
+def build_compact_prompt(
+    previous_summary: Optional[str], context_text: str, prompt_path: Optional[str]
+) -> str:
+    """Build helper prompt that folds messages into a /compact checkpoint.
+
+    Args:
+        previous_summary: Current checkpoint summary (None for the first one)
+        context_text: Messages to fold in
+        prompt_path: Path to compact prompt template (already mapped)
+
+    Returns:
+        Complete prompt with summary and context substituted
+    """
+    template = _load_prompt_from_path(prompt_path, prompt_type="compact")
+    values = {"SUMMARY": previous_summary or "(none)", "CONTEXT": context_text}
+    return _COMPACT_PLACEHOLDER.sub(lambda match: values[match.group(1)], template)
@@ -90,6 +90,7 @@ async def repl_loop(
 
     cmd_handler = CommandHandler(manager, interaction=ThreadedConsoleInteraction())
     orchestrator = ChatOrchestrator(manager)
+    manager.prefetch_recent_chats()
     chat_metadata = manager.chat.get("metadata", {}) if isinstance(manager.chat, dict) else {}
     log_event(
         "session_start",
@@ -210,6 +211,9 @@ async def repl_loop(
             print()
             return
 
+        if action.context_notice:
+            print(f"\n{action.context_notice}")
+
         # Determine display prefix.
         if action.mode == "retry" and action.assistant_hex_id:
             prefix = f"\n{manager.current_ai.capitalize()} ({action.assistant_hex_id}): "
@@ -452,3 +456,13 @@ async def repl_loop(
             )
             print("\nGoodbye!")
             break
+
+    manager.cancel_chat_prefetch()
+    manager.stop_message_summaries()
+
+    # Write-behind saves must land before the session ends.
+    try:
+        await manager.flush_chat_saves()
+    except Exception as e:
+        logging.error("Failed to write pending chat saves on exit: %s", e, exc_info=True)
+        print(f"Error: could not save chat: {e}")
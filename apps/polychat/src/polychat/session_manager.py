@@ -4,14 +4,37 @@ This module provides a SessionManager class that wraps SessionState and provides
 a clean interface for session management.
 """
 
-import json
+import asyncio
 import math
-from typing import Any, Optional
-
-from .app_state import SessionState, initialize_message_hex_ids, assign_new_message_hex_id
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, Iterable, Optional
+
+from .app_state import (
+    SessionState,
+    assign_new_message_hex_id,
+    initialize_message_hex_ids,
+    uses_stable_hex_ids,
+)
 from . import hex_id
 from . import profile
+from .chat_cache import ChatCache
+from .chat_retrieval import MessageIndex
+from .chat_window import iter_loaded_messages, loaded_start
+from .chat_saver import ChatSaver
+from .chat_storage import ChatStorageOptions, resolve_storage_options
+from .json_codec import get_codec
+from .smart_context import (
+    SmartContextOptions,
+    SummaryJob,
+    Summarizer,
+    SummaryStore,
+    pending_jobs,
+    resolve_smart_context_options,
+    substitute_summaries,
+    summaries_path,
+)
 from .timeouts import DEFAULT_PROFILE_TIMEOUT_SEC
+from .tokens import message_text
 
 
 class SessionManager:
@@ -96,6 +119,10 @@ class SessionManager:
             system_prompt_path=system_prompt_path,
             input_mode=input_mode,
         )
+        self._chat_saver = ChatSaver(self._write_chat)
+        self._chat_cache = ChatCache()
+        self._summarizer: Optional[Summarizer] = None
+        self._retrieval_index = MessageIndex()
 
         # Initialize hex IDs if chat is loaded
         if chat and "messages" in chat:
@@ -151,6 +178,16 @@ class SessionManager:
         """Current chat data."""
         return self._state.chat
 
+    @property
+    def storage_options(self) -> ChatStorageOptions:
+        """Chat persistence options resolved from profile."""
+        return resolve_storage_options(self._state.profile)
+
+    @property
+    def smart_context_options(self) -> Optional[SmartContextOptions]:
+        """Smart Context options resolved from profile (None when off)."""
+        return resolve_smart_context_options(self._state.profile)
+
     @property
     def system_prompt(self) -> Optional[str]:
         """System prompt text."""
@@ -176,6 +213,9 @@ class SessionManager:
 
     @chat_path.setter
     def chat_path(self, value: Optional[str]) -> None:
+        if value != self._state.chat_path:
+            # Summaries are appended to the sidecar of the old path.
+            self.stop_message_summaries()
         self._state.chat_path = value
 
     @property
@@ -234,6 +274,21 @@ class SessionManager:
     def search_mode(self, value: bool) -> None:
         self._state.search_mode = bool(value)
 
+    @property
+    def pending_attachments(self) -> list[dict[str, Any]]:
+        """Attachment references staged for the next user message."""
+        return self._state.pending_attachments
+
+    def stage_attachment(self, reference: dict[str, Any]) -> None:
+        """Stage an attachment reference for the next user message."""
+        self._state.pending_attachments.append(reference)
+
+    def take_pending_attachments(self) -> list[dict[str, Any]]:
+        """Return and clear staged attachment references."""
+        staged = list(self._state.pending_attachments)
+        self._state.pending_attachments.clear()
+        return staged
+
     @property
     def message_hex_ids(self) -> dict[int, str]:
         """Message hex IDs (index → hex_id)."""
@@ -310,6 +365,13 @@ class SessionManager:
             chat_path: Path to the new chat file
             chat_data: Chat data dictionary
         """
+        from .chat import release_chat
+
+        if self._state.chat_path != chat_path:
+            self.stop_message_summaries()
+            self._cache_current_chat()
+            release_chat(self._state.chat_path)
+
         # Update chat data
         self._state.chat = chat_data
         self._state.chat_path = chat_path
@@ -333,11 +395,230 @@ class SessionManager:
 
     def close_chat(self) -> None:
         """Close current chat and clear related state."""
+        from .chat import release_chat
+
+        self.stop_message_summaries()
+        self._cache_current_chat()
+        release_chat(self._state.chat_path)
         self._state.chat = {}
         self._state.chat_path = None
         self._state.hex_id_set.clear()
+        self._state.hex_index.clear()
         self._clear_chat_scoped_state()
 
+    def _cache_current_chat(self) -> None:
+        """Keep the chat being switched away from for instant reopening."""
+        path = self._state.chat_path
+        data = self._state.chat
+        if path and isinstance(data, dict) and "messages" in data:
+            self._chat_cache.put(path, data, self.storage_options.lazy_window)
+
+    async def load_chat(self, chat_path: str) -> dict[str, Any]:
+        """Load a chat for opening without blocking the event loop.
+
+        Recently closed and prefetched chats come from memory when their
+        file is unchanged (see ``chat_cache``); others are parsed in a
+        worker thread. Saves of the chat then update its search index rows
+        incrementally when the index is current for the file.
+        """
+        from .chat_search import track_loaded_chat
+
+        data = await self._chat_cache.load(chat_path, self.storage_options)
+        await asyncio.to_thread(
+            track_loaded_chat, self._state.profile.get("chats_dir"), chat_path, data
+        )
+        return data
+
+    async def preload_chat(self, chat_path: str) -> None:
+        """Read a chat ahead of opening it, validating the file.
+
+        Raises:
+            ValueError: If the chat file is invalid
+        """
+        await self._chat_cache.preload(chat_path, self.storage_options.lazy_window)
+
+    def prefetch_recent_chats(self) -> None:
+        """Load the most recently updated chats in the background.
+
+        Does nothing unless ``chat_storage.prefetch`` is set. Must be called
+        from a running event loop.
+        """
+        count = self.storage_options.prefetch
+        chats_dir = self._state.profile.get("chats_dir")
+        if not count or not chats_dir:
+            return
+
+        from .chat_manager import list_chats
+
+        current = self._state.chat_path
+
+        def _recent_paths() -> list[str]:
+            paths = [entry["path"] for entry in list_chats(chats_dir)]
+            return [path for path in paths if path != current][:count]
+
+        self._chat_cache.prefetch(_recent_paths, self.storage_options.lazy_window)
+
+    def cancel_chat_prefetch(self) -> None:
+        """Stop a background prefetch started by ``prefetch_recent_chats``."""
+        self._chat_cache.cancel_prefetch()
+
+    # ===================================================================
+    # Smart Context
+    # ===================================================================
+
+    @property
+    def message_summarizer(self) -> Optional[Summarizer]:
+        """Summarizer of the current chat; None when Smart Context is off."""
+        options = self.smart_context_options
+        path = self._state.chat_path
+        if options is None or not path:
+            return None
+        summarizer = self._summarizer
+        if summarizer is None or summarizer.store.path != summaries_path(path):
+            self.stop_message_summaries()
+            summarizer = Summarizer(
+                SummaryStore(path),
+                self._summarize_message,
+                concurrency=options.concurrency,
+                chat_path=path,
+            )
+            self._summarizer = summarizer
+        return summarizer
+
+    def apply_message_summaries(self, messages: list[Any]) -> tuple[list[Any], int]:
+        """Send older messages as their Smart Context summaries.
+
+        Returns:
+            Messages to send and how many of them are summaries
+        """
+        options = self.smart_context_options
+        summarizer = self.message_summarizer
+        if options is None or summarizer is None:
+            return messages, 0
+        return substitute_summaries(messages, summarizer.store, options)
+
+    def summarizable_messages(
+        self, *, loaded_only: bool = False
+    ) -> tuple[list[Any], int]:
+        """AI-visible messages of the current chat, for Smart Context.
+
+        Args:
+            loaded_only: Leave out messages a lazy window has not paged in
+
+        Returns:
+            The messages and the index of the first one that may be summarized;
+            the ``/compact`` checkpoint exchange before it is only context
+        """
+        from .chat_compact import checkpoint_messages, get_checkpoint
+
+        chat = self._state.chat
+        checkpoint = get_checkpoint(chat)
+        through = checkpoint["through"] if checkpoint is not None else 0
+        first = max(through, loaded_start(chat["messages"])) if loaded_only else through
+        messages = [
+            message
+            for message in chat["messages"][first:]
+            if message["role"] in ("user", "assistant")
+        ]
+        if checkpoint is None or first > through:
+            return messages, 0
+        exchange = checkpoint_messages(checkpoint)
+        return exchange + messages, len(exchange)
+
+    def pending_message_summaries(self, *, resume: bool = False) -> list[SummaryJob]:
+        """Older messages of the current chat that still need a summary.
+
+        Args:
+            resume: Only check loaded messages, from the first one the
+                previous check queued (see ``Summarizer.resume_from``)
+        """
+        options = self.smart_context_options
+        summarizer = self.message_summarizer
+        if options is None or summarizer is None or "messages" not in self._state.chat:
+            return []
+        messages, start = self.summarizable_messages(loaded_only=resume)
+        if resume and summarizer.resume_from is not None:
+            for index in range(len(messages) - 1, start - 1, -1):
+                if messages[index] is summarizer.resume_from:
+                    start = index
+                    break
+
+        jobs = pending_jobs(messages, summarizer.store, options, start=start)
+        older_end = len(messages) - options.recent_messages
+        if jobs:
+            summarizer.resume_from = messages[jobs[0].index]
+        elif start <= older_end < len(messages):
+            summarizer.resume_from = messages[older_end]
+        return jobs
+
+    def start_message_summaries(self, *, auto: bool = False) -> int:
+        """Summarize older messages of the current chat in the background.
+
+        Args:
+            auto: Called after a response; does nothing unless
+                ``smart_context.auto`` is on
+
+        Returns:
+            Number of messages queued (0 when nothing started)
+        """
+        options = self.smart_context_options
+        summarizer = self.message_summarizer
+        if options is None or summarizer is None or summarizer.running:
+            return 0
+        if auto and not options.auto:
+            return 0
+        jobs = self.pending_message_summaries(resume=auto)
+        if not summarizer.start(jobs, model=self.helper_model):
+            return 0
+        return len(jobs)
+
+    def stop_message_summaries(self) -> None:
+        """Stop background summarizing; finished summaries are kept."""
+        if self._summarizer is not None:
+            self._summarizer.stop()
+
+    async def _summarize_message(self, job: SummaryJob) -> str:
+        from . import helper_ai
+        from .constants import BUILTIN_PROMPT_MESSAGE_SUMMARY
+        from .path_utils import map_path
+        from .prompts import build_message_summary_prompt
+
+        prompt_path = self._state.profile.get("message_summary_prompt") or map_path(
+            BUILTIN_PROMPT_MESSAGE_SUMMARY
+        )
+        prompt = build_message_summary_prompt(
+            job.role, job.previous_text, job.text, job.next_text, prompt_path
+        )
+        return await helper_ai.invoke_helper_ai(
+            self.helper_ai,
+            self.helper_model,
+            self._state.profile,
+            [{"role": "user", "content": prompt}],
+            None,
+            task="message_summary",
+            session=self,
+        )
+
+    # ===================================================================
+    # Context retrieval
+    # ===================================================================
+
+    def rank_relevant_messages(self, messages: list[Any]) -> list[int]:
+        """Rank earlier messages by relevance to the last one (BM25).
+
+        Args:
+            messages: Messages about to be sent, ending with the new user message
+
+        Returns:
+            Positions in messages, most relevant first
+        """
+        if not messages:
+            return []
+        self._retrieval_index.sync(messages)
+        return self._retrieval_index.rank(
+            message_text(messages[-1]), before=len(messages) - 1
+        )
+
     def _clear_chat_scoped_state(self) -> None:
         """Clear state that shouldn't leak across chat boundaries."""
         # Clear retry mode
@@ -355,6 +636,12 @@ class SessionManager:
         # Clear search mode
         self._state.search_mode = False
 
+        # Drop attachments staged for this chat
+        self._state.pending_attachments.clear()
+
+        # Forget the retrieval index of this chat
+        self._retrieval_index.clear()
+
     def clear_chat_scoped_state(self) -> None:
         """Public wrapper to clear retry/secret state."""
         self._clear_chat_scoped_state()
@@ -411,7 +698,8 @@ class SessionManager:
             chat_data: Optional explicit chat data override.
 
         Returns:
-            True when a save was performed, False when skipped.
+            True when a save was performed (or, with ``write_behind``,
+            scheduled), False when skipped.
         """
         path = chat_path if chat_path is not None else self._state.chat_path
         data = chat_data if chat_data is not None else self._state.chat
@@ -419,11 +707,28 @@ class SessionManager:
         if not path or not isinstance(data, dict):
             return False
 
-        from . import chat as chat_module
+        if self.storage_options.write_behind:
+            self._chat_saver.request(path, data)
+            return True
 
-        await chat_module.save_chat(path, data)
+        await self._write_chat(path, data)
         return True
 
+    async def flush_chat_saves(self, chat_path: Optional[str] = None) -> None:
+        """Write any chat saves still pending from write-behind mode.
+
+        Args:
+            chat_path: Flush only this chat; None flushes every chat.
+        """
+        await self._chat_saver.flush(chat_path)
+
+    async def _write_chat(self, path: str, data: dict[str, Any]) -> None:
+        from . import chat as chat_module
+        from .chat_search import index_saved_chat
+
+        await chat_module.save_chat(path, data, self.storage_options)
+        await index_saved_chat(self._state.profile.get("chats_dir"), path, data)
+
     @staticmethod
     def load_system_prompt(
         profile_data: dict[str, Any],
@@ -451,7 +756,7 @@ class SessionManager:
             if profile_path:
                 try:
                     with open(profile_path, "r", encoding="utf-8") as f:
-                        original_profile = json.load(f)
+                        original_profile = get_codec().loads(f.read())
                     raw_path = original_profile.get("system_prompt")
                     if isinstance(raw_path, str):
                         system_prompt_path = raw_path
@@ -598,44 +903,158 @@ class SessionManager:
     # Hex ID Management
     # ===================================================================
 
-    def assign_message_hex_id(self, message_index: int) -> str:
+    def _current_messages(self) -> Any:
+        return self._state.chat.get("messages", []) if isinstance(self._state.chat, dict) else []
+
+    def assign_message_hex_id(
+        self, message_index: int, reserved_hex_id: Optional[str] = None
+    ) -> str:
         """Assign hex ID to a newly added message.
 
         Args:
             message_index: Index of the message in chat["messages"]
+            reserved_hex_id: Hex ID from ``reserve_hex_id`` to use instead of
+                generating a new one
 
         Returns:
-            The generated hex ID
+            The assigned hex ID
         """
-        return assign_new_message_hex_id(self._state, message_index)
+        return assign_new_message_hex_id(self._state, message_index, reserved_hex_id)
 
     def get_message_hex_id(self, message_index: int) -> Optional[str]:
         """Get hex ID for a message.
 
+        With stable hex IDs, a loaded message without one is given its
+        derived ID here, so IDs are only computed for messages that are shown
+        or referenced.
+
         Args:
             message_index: Index of the message
 
         Returns:
             Hex ID or None if not assigned
         """
-        messages = self._state.chat.get("messages", []) if isinstance(self._state.chat, dict) else []
+        messages = self._current_messages()
         if message_index < 0 or message_index >= len(messages):
             return None
-        hid = messages[message_index].get("hex_id")
+        message = messages[message_index]
+        hid = message.get("hex_id")
+        if hid is None and uses_stable_hex_ids(self._state):
+            hid = self._derive_hex_id(message_index, message)
         return hid if isinstance(hid, str) else None
 
+    def _derive_hex_id(self, message_index: int, message: Any) -> str:
+        hid = hex_id.derive_hex_id(message, self._state.hex_id_set)
+        message["hex_id"] = hid
+        self._state.hex_index[hid] = message_index
+        return hid
+
+    def get_message_index(self, message_hex_id: str) -> Optional[int]:
+        """Get the index of the message with a hex ID.
+
+        Lookups go through the session's hex index, checked against the
+        message it points at. If messages were changed without going through
+        the manager and the check fails (or the ID is unknown), the index is
+        rebuilt once from the loaded messages; with stable hex IDs, that is
+        also when loaded messages not shown yet get their derived IDs.
+
+        Args:
+            message_hex_id: Hex ID to look up
+
+        Returns:
+            Message index, or None if no loaded message has that hex ID
+        """
+        messages = self._current_messages()
+        index = self._state.hex_index.get(message_hex_id)
+        if index is not None and self._has_hex_id_at(messages, index, message_hex_id):
+            return index
+        self.reindex_message_hex_ids()
+        return self._state.hex_index.get(message_hex_id)
+
+    @staticmethod
+    def _has_hex_id_at(messages: Any, index: int, message_hex_id: str) -> bool:
+        if index < loaded_start(messages) or index >= len(messages):
+            return False
+        return messages[index].get("hex_id") == message_hex_id
+
+    def reindex_message_hex_ids(self, start: int = 0) -> None:
+        """Re-record hex IDs of loaded messages from ``start`` on.
+
+        Call after replacing or reordering messages directly in
+        chat["messages"]; entries for indices before ``start`` are kept.
+        """
+        hex_index = self._state.hex_index
+        if start <= 0:
+            hex_index.clear()
+        else:
+            for hid in [hid for hid, index in hex_index.items() if index >= start]:
+                del hex_index[hid]
+        unassigned = []
+        for index, message in iter_loaded_messages(self._current_messages()):
+            if index < start:
+                continue
+            hid = message.get("hex_id")
+            if isinstance(hid, str):
+                hex_index[hid] = index
+            else:
+                unassigned.append((index, message))
+        # Derive after recording existing IDs so those keep their digits.
+        if unassigned and uses_stable_hex_ids(self._state):
+            for index, message in unassigned:
+                self._derive_hex_id(index, message)
+
+    def _forget_hex_id(self, message: Any) -> None:
+        hex_to_remove = message.pop("hex_id", None)
+        if isinstance(hex_to_remove, str):
+            self._state.hex_id_set.discard(hex_to_remove)
+            self._state.hex_index.pop(hex_to_remove, None)
+
     def remove_message_hex_id(self, message_index: int) -> None:
         """Remove hex ID for a message.
 
         Args:
             message_index: Index of the message
         """
-        messages = self._state.chat.get("messages", []) if isinstance(self._state.chat, dict) else []
+        messages = self._current_messages()
         if message_index < 0 or message_index >= len(messages):
             return
-        hex_to_remove = messages[message_index].pop("hex_id", None)
-        if isinstance(hex_to_remove, str):
-            self._state.hex_id_set.discard(hex_to_remove)
+        self._forget_hex_id(messages[message_index])
+
+    def delete_messages(self, message_indices: Iterable[int]) -> int:
+        """Delete messages from the current chat in a single pass.
+
+        The messages from the first deleted one on are rebuilt once, and the
+        hex index is remapped for the messages that move.
+
+        Args:
+            message_indices: Indices of messages to delete (any order)
+
+        Returns:
+            Number of messages deleted
+
+        Raises:
+            IndexError: If an index is out of range
+        """
+        messages = self._current_messages()
+        doomed = set(message_indices)
+        if not doomed:
+            return 0
+        first = min(doomed)
+        if first < 0 or max(doomed) >= len(messages):
+            raise IndexError("Message index out of range")
+
+        hex_index = self._state.hex_index
+        kept: list[Any] = []
+        for index, message in enumerate(messages[first:], first):
+            if index in doomed:
+                self._forget_hex_id(message)
+                continue
+            hid = message.get("hex_id")
+            if isinstance(hid, str):
+                hex_index[hid] = first + len(kept)
+            kept.append(message)
+        messages[first:] = kept
+        return len(doomed)
 
     def pop_message(
         self,
@@ -656,15 +1075,17 @@ class SessionManager:
             return None
 
         messages = target_chat.get("messages")
-        if not isinstance(messages, list) or not messages:
+        if not isinstance(messages, MutableSequence) or not messages:
             return None
 
+        position = message_index if message_index >= 0 else len(messages) + message_index
         popped = messages.pop(message_index)
-        if isinstance(popped, dict):
-            hex_to_remove = popped.pop("hex_id", None)
-            if isinstance(hex_to_remove, str):
-                self._state.hex_id_set.discard(hex_to_remove)
-        return popped if isinstance(popped, dict) else None
+        if not isinstance(popped, MutableMapping):
+            return None
+        self._forget_hex_id(popped)
+        if target_chat is self._state.chat and position < len(messages):
+            self.reindex_message_hex_ids(position)
+        return popped
 
     # ===================================================================
     # Provider Caching
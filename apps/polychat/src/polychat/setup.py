@@ -4,7 +4,6 @@ Interactive wizard that configures PolyChat with API keys and creates
 profile and key files in ~/.polychat/.
 """
 
-import json
 from pathlib import Path
 from typing import Optional
 
@@ -17,6 +16,7 @@ from .constants import (
     BUILTIN_PROMPT_SAFETY,
     USER_DATA_DIR,
 )
+from .json_codec import get_codec
 from .timeouts import DEFAULT_PROFILE_TIMEOUT_SEC
 
 # Fixed paths for setup wizard
@@ -118,11 +118,11 @@ def run_setup_wizard() -> Optional[str]:
 
     # Write api-keys.json
     with open(api_keys_path, "w", encoding="utf-8") as f:
-        json.dump(api_keys, f, indent=2, ensure_ascii=False)
+        f.write(get_codec().dumps_pretty(api_keys))
 
     # Write profile.json
     with open(profile_path, "w", encoding="utf-8") as f:
-        json.dump(profile, f, indent=2, ensure_ascii=False)
+        f.write(get_codec().dumps_pretty(profile))
 
     print()
     print(f"Profile:  {profile_path}")
@@ -0,0 +1,388 @@
+"""Smart Context: per-message summaries that stand in for old turns.
+
+Implements the summary layer designed in ``docs/architecture/smart-context.md``.
+With the optional ``smart_context`` profile block set:
+
+{
+  "smart_context": {
+    "recent_messages": 20,
+    "min_chars": 600,
+    "concurrency": 4,
+    "auto": true
+  }
+}
+
+the helper AI writes a context-aware summary of each older message: it sees
+the previous and next message too, so the conversation still reads naturally
+when the summary replaces the original. When a request is built, messages
+older than the newest ``recent_messages`` are sent as their summary instead
+of their full text (and without attachments), before any ``ai_limits``
+context budget is applied. The chat itself is never changed.
+
+Summaries live in ``<chat>.json.summaries``, one JSON record per line::
+
+    {"key": ..., "summary": ..., "summary_model": ..., "summary_at": ..., "version": 1}
+
+``key`` hashes the message's role and text, so a summary follows its
+message through edits elsewhere in the chat, and an edited message simply
+has no summary until it is summarized again. Records are appended as each
+summary arrives, which makes summarizing resumable: an interrupted run (or a
+restart) skips every message that already has one. Records written for
+another ``SMART_CONTEXT_SUMMARY_VERSION`` are ignored, so changing the
+prompt regenerates summaries lazily.
+
+Summarizing runs in the background with at most ``concurrency`` helper AI
+requests in flight. With ``auto`` (the default) a run starts after each
+response whenever messages are waiting. That check only looks at messages
+already in memory, from the first one the previous run queued, so it never
+pages in a lazily loaded chat or re-walks turns summarized long ago;
+``/smart`` shows progress and starts, stops, or clears summaries by hand over
+the whole chat. The exchange standing in for a ``/compact`` checkpoint is
+never summarized. Messages shorter than ``min_chars`` are always sent in full.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional
+
+from .constants import (
+    CHAT_SUMMARIES_SUFFIX,
+    SMART_CONTEXT_CONCURRENCY,
+    SMART_CONTEXT_MIN_CHARS,
+    SMART_CONTEXT_NEIGHBOR_CHARS,
+    SMART_CONTEXT_RECENT_MESSAGES,
+    SMART_CONTEXT_SUMMARY_VERSION,
+)
+from .json_codec import get_codec
+from .logging_utils import log_event, sanitize_error_message
+from .text_formatting import text_to_lines, truncate_text
+from .tokens import message_text
+
+
+@dataclass(slots=True, frozen=True)
+class SmartContextOptions:
+    """Resolved ``smart_context`` profile options."""
+
+    recent_messages: int = SMART_CONTEXT_RECENT_MESSAGES
+    min_chars: int = SMART_CONTEXT_MIN_CHARS
+    concurrency: int = SMART_CONTEXT_CONCURRENCY
+    auto: bool = True
+
+
+def resolve_smart_context_options(
+    profile: Mapping[str, Any] | None,
+) -> Optional[SmartContextOptions]:
+    """Resolve Smart Context options; None when the profile does not enable it."""
+    if not isinstance(profile, Mapping):
+        return None
+    block = profile.get("smart_context")
+    if not isinstance(block, Mapping):
+        return None
+
+    def _positive(key: str, default: int) -> int:
+        value = block.get(key)
+        if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+            return value
+        return default
+
+    return SmartContextOptions(
+        recent_messages=_positive("recent_messages", SMART_CONTEXT_RECENT_MESSAGES),
+        min_chars=_positive("min_chars", SMART_CONTEXT_MIN_CHARS),
+        concurrency=_positive("concurrency", SMART_CONTEXT_CONCURRENCY),
+        auto=block.get("auto") is not False,
+    )
+
+
+def summaries_path(chat_path: str) -> str:
+    """Return the summaries sidecar of a chat file."""
+    return chat_path + CHAT_SUMMARIES_SUFFIX
+
+
+class SummaryStore:
+    """Summaries of one chat's messages, backed by its append-only sidecar."""
+
+    def __init__(self, chat_path: str):
+        self.path = summaries_path(chat_path)
+        self._summaries: dict[str, str] = {}
+        # (role, text) -> key; texts of loaded messages are reused across
+        # requests, so their hashes are computed once.
+        self._keys: dict[tuple[str, str], str] = {}
+        self._needs_newline = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._summaries
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        codec = get_codec()
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = codec.loads(line)
+            except ValueError:
+                # A record cut short by a crash; its message is summarized again.
+                logging.warning("Ignoring truncated summary record in %s", self.path)
+                continue
+            if (
+                isinstance(record, dict)
+                and record.get("version") == SMART_CONTEXT_SUMMARY_VERSION
+                and isinstance(record.get("key"), str)
+                and isinstance(record.get("summary"), str)
+            ):
+                self._summaries[record["key"]] = record["summary"]
+        self._needs_newline = bool(data) and not data.endswith("\n")
+
+    def key(self, message: Any) -> str:
+        """Return the summary key of a message."""
+        role = message.get("role", "")
+        text = message_text(message)
+        cache_key = (role, text)
+        key = self._keys.get(cache_key)
+        if key is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(role.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(text.encode("utf-8"))
+            key = digest.hexdigest()
+            self._keys[cache_key] = key
+        return key
+
+    def get(self, message: Any) -> Optional[str]:
+        """Return the stored summary of a message, if any."""
+        return self._summaries.get(self.key(message))
+
+    def add(self, key: str, summary: str, model: str) -> None:
+        """Store a summary and append it to the sidecar."""
+        record = {
+            "key": key,
+            "summary": summary,
+            "summary_model": model,
+            "summary_at": datetime.now(timezone.utc).isoformat(),
+            "version": SMART_CONTEXT_SUMMARY_VERSION,
+        }
+        line = get_codec().dumps_compact(record) + "\n"
+        if self._needs_newline:
+            line = "\n" + line
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self._needs_newline = False
+        self._summaries[key] = summary
+
+    def clear(self) -> int:
+        """Delete every summary; return how many there were."""
+        count = len(self._summaries)
+        self._summaries.clear()
+        self._needs_newline = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        return count
+
+
+@dataclass(slots=True, frozen=True)
+class SummaryJob:
+    """One message to summarize, with its neighbors."""
+
+    key: str
+    role: str
+    text: str
+    previous_text: str
+    next_text: str
+    # Position of the message in the list the job was taken from.
+    index: int = 0
+
+
+def _neighbor_text(messages: list[Any], index: int) -> str:
+    if 0 <= index < len(messages):
+        return truncate_text(message_text(messages[index]), SMART_CONTEXT_NEIGHBOR_CHARS)
+    return ""
+
+
+def _older_indices(
+    messages: list[Any], options: SmartContextOptions, start: int = 0
+) -> range:
+    return range(start, max(start, len(messages) - options.recent_messages))
+
+
+def pending_jobs(
+    messages: list[Any],
+    store: SummaryStore,
+    options: SmartContextOptions,
+    *,
+    start: int = 0,
+) -> list[SummaryJob]:
+    """Return older messages that still need a summary, oldest first.
+
+    Args:
+        messages: User/assistant messages of the chat
+        store: Summaries of the chat
+        options: Smart Context options
+        start: Index of the first message to check; the ones before it
+            only serve as neighbor text
+    """
+    jobs = []
+    for index in _older_indices(messages, options, start):
+        message = messages[index]
+        text = message_text(message)
+        if len(text) < options.min_chars:
+            continue
+        key = store.key(message)
+        if key in store:
+            continue
+        jobs.append(
+            SummaryJob(
+                key=key,
+                role=message.get("role", ""),
+                text=text,
+                previous_text=_neighbor_text(messages, index - 1),
+                next_text=_neighbor_text(messages, index + 1),
+                index=index,
+            )
+        )
+    return jobs
+
+
+def count_summarizable(
+    messages: list[Any], options: SmartContextOptions, *, start: int = 0
+) -> int:
+    """Return how many older messages from ``start`` are long enough to summarize."""
+    return sum(
+        1
+        for index in _older_indices(messages, options, start)
+        if len(message_text(messages[index])) >= options.min_chars
+    )
+
+
+def substitute_summaries(
+    messages: list[Any], store: SummaryStore, options: SmartContextOptions
+) -> tuple[list[Any], int]:
+    """Replace older messages by their summaries where one exists.
+
+    Returns:
+        Messages to send and how many of them are summaries
+    """
+    older = _older_indices(messages, options)
+    if not older:
+        return messages, 0
+
+    result = list(messages)
+    replaced = 0
+    for index in older:
+        message = messages[index]
+        summary = store.get(message)
+        # A summary that is not shorter saves nothing.
+        if summary is None or len(summary) >= len(message_text(message)):
+            continue
+        result[index] = {"role": message.get("role"), "content": text_to_lines(summary)}
+        replaced += 1
+    return result, replaced
+
+
+class Summarizer:
+    """Background summarizing of one chat's messages."""
+
+    def __init__(
+        self,
+        store: SummaryStore,
+        summarize: Callable[[SummaryJob], Awaitable[str]],
+        *,
+        concurrency: int,
+        chat_path: Optional[str] = None,
+    ):
+        self.store = store
+        self._summarize = summarize
+        self._model = ""
+        self._concurrency = concurrency
+        self._chat_path = chat_path
+        self._task: Optional[asyncio.Task] = None
+        self.done = 0
+        self.remaining = 0
+        self.error: Optional[str] = None
+        # Message the next automatic check starts from; every older one
+        # already had a summary or was too short when it was last checked.
+        self.resume_from: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, jobs: list[SummaryJob], *, model: str) -> bool:
+        """Start summarizing jobs in the background; False if nothing started.
+
+        Must be called from a running event loop.
+
+        Args:
+            jobs: Messages to summarize (see ``pending_jobs``)
+            model: Helper model recorded with each summary
+        """
+        if self.running or not jobs:
+            return False
+        self._model = model
+        self.done = 0
+        self.remaining = len(jobs)
+        self.error = None
+        self._task = asyncio.create_task(self._run(jobs))
+        return True
+
+    async def wait(self) -> None:
+        """Wait for the current run to finish."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stop(self) -> None:
+        """Cancel the current run; finished summaries are kept."""
+        if self.running:
+            self._task.cancel()
+
+    async def _run(self, jobs: list[SummaryJob]) -> None:
+        pending: Iterator[SummaryJob] = iter(jobs)
+
+        async def _worker() -> None:
+            # Workers share one iterator, so each job is taken exactly once.
+            for job in pending:
+                if self.error is not None:
+                    return
+                if job.key in self.store:
+                    self.remaining -= 1
+                    continue
+                try:
+                    summary = (await self._summarize(job)).strip()
+                except Exception as e:
+                    # Stop the run; the next one resumes after the last summary.
+                    self.error = sanitize_error_message(str(e))
+                    return
+                self.remaining -= 1
+                if summary:
+                    self.store.add(job.key, summary, self._model)
+                    self.done += 1
+
+        workers = min(self._concurrency, len(jobs))
+        try:
+            await asyncio.gather(*(_worker() for _ in range(workers)))
+        finally:
+            log_event(
+                "smart_context_summaries",
+                level=logging.WARNING if self.error else logging.INFO,
+                chat_file=self._chat_path,
+                model=self._model,
+                summarized=self.done,
+                remaining=self.remaining,
+                error=self.error,
+            )
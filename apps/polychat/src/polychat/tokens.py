@@ -0,0 +1,196 @@
+"""Local input-token estimates.
+
+Providers only report token usage after a request, so PolyChat estimates
+what it is about to send with a per-provider estimator:
+
+- OpenAI models are counted exactly with the optional ``tiktoken`` package
+  when it is installed (and its encoding can be loaded).
+- Every other provider, and OpenAI without ``tiktoken``, uses a heuristic
+  calibrated to that provider's tokenizer: ASCII text at a characters-per-
+  token ratio, other characters (CJK, emoji, ...) at a per-character rate.
+
+Each message costs its text's tokens plus ``TOKEN_MESSAGE_OVERHEAD`` for role
+and turn framing. Text counts are cached per estimator, keyed by the text
+itself: Python caches a string's hash on the string, and a loaded message's
+packed text (``Message.content_text``) is the same object on every request,
+so re-counting a long chat only tokenizes messages added since the last
+count.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterable, Optional, Protocol
+
+from .chat_message import Message
+from .constants import TOKEN_CACHE_MAX_ENTRIES, TOKEN_MESSAGE_OVERHEAD
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class TokenEstimator(Protocol):
+    """Counts the tokens of a text for one tokenizer."""
+
+    name: str
+    exact: bool
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        ...
+
+
+@dataclass(slots=True, frozen=True)
+class TokenEstimate:
+    """Estimated input tokens of a request."""
+
+    tokens: int
+    exact: bool
+    estimator: str
+
+    def format(self) -> str:
+        """Format for display (``~`` marks a heuristic estimate)."""
+        return f"{'' if self.exact else '~'}{self.tokens:,}"
+
+
+class HeuristicEstimator:
+    """Character-based estimate calibrated to one provider's tokenizer."""
+
+    exact = False
+
+    def __init__(self, name: str, chars_per_token: float, tokens_per_other_char: float):
+        self.name = name
+        self._chars_per_token = chars_per_token
+        self._tokens_per_other_char = tokens_per_other_char
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if text.isascii():
+            return math.ceil(len(text) / self._chars_per_token)
+        other = sum(1 for char in text if ord(char) > 0x7F)
+        ascii_count = len(text) - other
+        return math.ceil(
+            ascii_count / self._chars_per_token + other * self._tokens_per_other_char
+        )
+
+
+class TiktokenEstimator:
+    """Exact counts from a local ``tiktoken`` encoding."""
+
+    exact = True
+
+    def __init__(self, encoding: Any):
+        self.name = f"tiktoken:{encoding.name}"
+        self._encoding = encoding
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+# (ASCII characters per token, tokens per other character), measured on
+# mixed English prose and code.
+_HEURISTICS: dict[str, tuple[float, float]] = {
+    "openai": (4.0, 0.7),
+    "claude": (3.5, 1.0),
+    "gemini": (4.0, 0.8),
+    "grok": (4.0, 0.8),
+    "perplexity": (4.0, 0.9),
+    "mistral": (3.7, 0.9),
+    "deepseek": (3.3, 0.6),
+}
+_DEFAULT_HEURISTIC = (3.5, 1.0)
+
+# Current OpenAI chat models all use this encoding.
+_OPENAI_ENCODING = "o200k_base"
+
+_estimators: dict[str, TokenEstimator] = {}
+_text_counts: dict[str, dict[str, int]] = {}
+
+
+def _load_tiktoken() -> Optional[TokenEstimator]:
+    if tiktoken is None:
+        return None
+    try:
+        return TiktokenEstimator(tiktoken.get_encoding(_OPENAI_ENCODING))
+    except Exception as e:
+        # The encoding file is downloaded on first use; offline that fails.
+        logging.debug("tiktoken encoding unavailable, using heuristic: %s", e)
+        return None
+
+
+def get_estimator(provider: Optional[str]) -> TokenEstimator:
+    """Return the token estimator for a provider."""
+    key = provider or ""
+    estimator = _estimators.get(key)
+    if estimator is None:
+        if provider == "openai":
+            estimator = _load_tiktoken()
+        if estimator is None:
+            chars_per_token, tokens_per_other_char = _HEURISTICS.get(
+                key, _DEFAULT_HEURISTIC
+            )
+            estimator = HeuristicEstimator(
+                f"heuristic:{provider or 'default'}", chars_per_token, tokens_per_other_char
+            )
+        _estimators[key] = estimator
+    return estimator
+
+
+def message_text(message: Any) -> str:
+    """Return a message's content as one string."""
+    if isinstance(message, Message):
+        text = message.content_text
+        if text is not None:
+            return text
+    content = message.get("content", "") if hasattr(message, "get") else ""
+    if isinstance(content, list):
+        return "\n".join(str(part) for part in content)
+    return str(content)
+
+
+def count_text_tokens(text: str, estimator: TokenEstimator) -> int:
+    """Return the tokens of text, from the cache when it was counted before."""
+    counts = _text_counts.setdefault(estimator.name, {})
+    tokens = counts.get(text)
+    if tokens is None:
+        tokens = estimator.count(text)
+        if len(counts) >= TOKEN_CACHE_MAX_ENTRIES:
+            for stale in list(islice(counts, len(counts) // 2)):
+                del counts[stale]
+        counts[text] = tokens
+    return tokens
+
+
+def count_message_tokens(message: Any, estimator: TokenEstimator) -> int:
+    """Return the input tokens one message costs."""
+    return count_text_tokens(message_text(message), estimator) + TOKEN_MESSAGE_OVERHEAD
+
+
+def estimate_tokens(
+    messages: Iterable[Any],
+    provider: Optional[str],
+    system_prompt: Optional[str] = None,
+) -> TokenEstimate:
+    """Estimate the input tokens of a request.
+
+    Args:
+        messages: Messages about to be sent
+        provider: Provider the request goes to (selects the estimator)
+        system_prompt: System prompt sent with the messages
+    """
+    estimator = get_estimator(provider)
+    total = sum(count_message_tokens(message, estimator) for message in messages)
+    if system_prompt:
+        total += count_text_tokens(system_prompt, estimator)
+    return TokenEstimate(tokens=total, exact=estimator.exact, estimator=estimator.name)
+
+
+def clear_token_cache() -> None:
+    """Forget every cached count."""
+    _text_counts.clear()
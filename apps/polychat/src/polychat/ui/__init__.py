@@ -1,9 +1,10 @@
 """UI-related functions for PolyChat."""
 
-from .chat_ui import format_chat_info, prompt_chat_selection
+from .chat_ui import ChatFilter, format_chat_info, prompt_chat_selection
 from .interaction import ThreadedConsoleInteraction, UserInteractionPort
 
 __all__ = [
+    "ChatFilter",
     "format_chat_info",
     "prompt_chat_selection",
     "ThreadedConsoleInteraction",
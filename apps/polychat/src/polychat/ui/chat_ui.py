@@ -1,8 +1,9 @@
 """Chat UI presentation and interaction functions."""
 
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
-from ..chat_manager import list_chats
+from ..chat_manager import iter_chat_batches, sort_chats
+from ..constants import CHAT_PICKER_PAGE_SIZE
 from ..text_formatting import format_chat_list_item, make_borderline
 
 
@@ -11,6 +12,89 @@ def format_chat_info(chat: dict[str, Any], index: int) -> str:
     return format_chat_list_item(chat, index)
 
 
+class ChatFilter:
+    """Type-to-filter narrowing over a list of chat records.
+
+    Each chat's filename and title are lowercased once when it is added.
+    A query matches chats containing every one of its words. Results are
+    kept for each query on the way from the empty one to the current one,
+    so typing another character only re-checks the previous matches and
+    deleting one goes back to an earlier result without checking anything.
+    """
+
+    def __init__(self) -> None:
+        self.chats: list[dict[str, Any]] = []
+        self._keys: list[str] = []
+        # (query, words, matching indices), each query extending the one before.
+        self._steps: list[tuple[str, list[str], list[int]]] = [("", [], [])]
+
+    def add(self, chats: Iterable[dict[str, Any]]) -> None:
+        """Append chats, adding them to the matches of the queries they match."""
+        for chat in chats:
+            key = f"{chat.get('filename') or ''}\n{chat.get('title') or ''}".lower()
+            index = len(self.chats)
+            self.chats.append(chat)
+            self._keys.append(key)
+            for _query, terms, matches in self._steps:
+                if not all(term in key for term in terms):
+                    break
+                matches.append(index)
+
+    @property
+    def query(self) -> str:
+        """Current filter text."""
+        return self._steps[-1][0]
+
+    def set_query(self, query: str) -> list[dict[str, Any]]:
+        """Filter by query and return the matching chats in list order."""
+        query = query.lower()
+        steps = self._steps
+        while len(steps) > 1 and not query.startswith(steps[-1][0]):
+            steps.pop()
+        previous_query, previous_terms, candidates = steps[-1]
+        if query != previous_query:
+            terms = query.split()
+            # Previous matches already contain the words typed before.
+            pending = [term for term in terms if term not in previous_terms]
+            keys = self._keys
+            if not pending:
+                matches = list(candidates)
+            elif len(pending) == 1:
+                term = pending[0]
+                matches = [i for i in candidates if term in keys[i]]
+            else:
+                matches = [i for i in candidates if all(term in keys[i] for term in pending)]
+            steps.append((query, terms, matches))
+        return self.matches
+
+    @property
+    def matches(self) -> list[dict[str, Any]]:
+        """Chats matching the current query, in list order."""
+        chats = self.chats
+        return [chats[i] for i in self._steps[-1][2]]
+
+
+def _print_page(view: list[dict[str, Any]], page: int, query: str) -> None:
+    """Print one page of chats, numbered by their position in ``view``."""
+    first = page * CHAT_PICKER_PAGE_SIZE
+    print(make_borderline())
+    for index, chat in enumerate(view[first:first + CHAT_PICKER_PAGE_SIZE], first + 1):
+        print(format_chat_info(chat, index))
+    print(make_borderline())
+    _print_page_footer(view, page, query)
+
+
+def _print_page_footer(view: list[dict[str, Any]], page: int, query: str) -> None:
+    pages = max(1, -(-len(view) // CHAT_PICKER_PAGE_SIZE))
+    matching = f" matching \"{query}\"" if query else ""
+    hints = ["type words to filter"]
+    if pages > 1:
+        hints.append("> / < to page")
+    if query:
+        hints.append("/ to clear the filter")
+    print(f"Page {page + 1} of {pages}, {len(view)} chats{matching} ({', '.join(hints)})")
+
+
 def prompt_chat_selection(
     chats_dir: str,
     action: str = "open",
@@ -18,8 +102,16 @@ def prompt_chat_selection(
 ) -> Optional[str]:
     """Interactively prompt user to select a chat from a list.
 
-    Shows numbered list of chats. User selects by number only.
-    For direct path input, use the command with an argument instead.
+    Shows a numbered page of chats. A number selects that chat; any other
+    text narrows the list to chats whose filename or title contains every
+    word typed (see ``ChatFilter``); ``>`` and ``<`` page through the list
+    and ``/`` clears the filter. For direct path input, use the command
+    with an argument instead.
+
+    The first page is printed as chats are read: unchanged ones (from the
+    chat catalog) first, then ones that changed since the last listing. Once
+    all are read the list is sorted in ``list_chats`` order, most recently
+    updated first, and the first page is printed again if that renumbered it.
 
     Args:
         chats_dir: Absolute path to chats directory
@@ -29,20 +121,33 @@ def prompt_chat_selection(
     Returns:
         Absolute path to selected chat, or None if cancelled
     """
-    chats = list_chats(chats_dir)
+    chats: list[dict[str, Any]] = []
+    for batch in iter_chat_batches(chats_dir):
+        if batch and not chats:
+            print(f"\nAvailable chats in: {chats_dir}")
+            print(make_borderline())
+        for chat in batch:
+            chats.append(chat)
+            if len(chats) <= CHAT_PICKER_PAGE_SIZE:
+                print(format_chat_info(chat, len(chats)), flush=True)
 
     if not chats:
         print(f"No chat files found in: {chats_dir}")
         return None
 
-    # Display list
-    print(f"\nAvailable chats in: {chats_dir}")
-    print(make_borderline())
-
-    for i, chat in enumerate(chats, 1):
-        print(format_chat_info(chat, i))
-
+    # Changed chats stream in last, so the rows printed so far may be out of order.
+    shown = chats[:CHAT_PICKER_PAGE_SIZE]
+    sort_chats(chats)
+    chat_filter = ChatFilter()
+    chat_filter.add(chats)
+    view = chat_filter.matches
+    page = 0
     print(make_borderline())
+    if all(a is b for a, b in zip(shown, view)):
+        _print_page_footer(view, page, "")
+    else:
+        print("Sorted by last update:")
+        _print_page(view, page, "")
 
     # Prompt for selection
     if allow_cancel:
@@ -60,17 +165,24 @@ def prompt_chat_selection(
                 print("Selection required.")
                 continue
 
-        # Only accept numbers
-        try:
+        if selection.isdigit():
             index = int(selection)
-            if 1 <= index <= len(chats):
-                return chats[index - 1]["path"]
+            if 1 <= index <= len(view):
+                return view[index - 1]["path"]
+            if view:
+                print(f"Invalid number. Choose 1-{len(view)}")
             else:
-                print(f"Invalid number. Choose 1-{len(chats)}")
-                continue
-        except ValueError:
-            if allow_cancel:
-                print(f"Please enter a number (1-{len(chats)}) or press Enter to cancel")
-            else:
-                print(f"Please enter a number (1-{len(chats)})")
+                print("No chats match. Type / to clear the filter")
             continue
+
+        if selection in (">", "<"):
+            last_page = max(0, (len(view) - 1) // CHAT_PICKER_PAGE_SIZE)
+            step = 1 if selection == ">" else -1
+            if not 0 <= page + step <= last_page:
+                print("No more pages.")
+                continue
+            page += step
+        else:
+            view = chat_filter.set_query("" if selection == "/" else selection)
+            page = 0
+        _print_page(view, page, chat_filter.query)
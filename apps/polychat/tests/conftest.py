@@ -3,6 +3,7 @@
 import pytest
 import tempfile
 import json
+import os
 from pathlib import Path
 
 
@@ -91,6 +92,67 @@ def sample_chat():
     }
 
 
+@pytest.fixture
+def write_chat():
+    """Return a helper that writes a chat file directly and returns its data.
+
+    Each line becomes one message (a list of lines is kept as its content,
+    and a dict is written as the message itself); roles cycle through
+    ``roles``. Metadata keywords override the defaults, and ``mtime`` sets the
+    file's modification time.
+    """
+
+    def _write(path, lines=("hello",), *, roles=("user",), mtime=None, **metadata):
+        data = {
+            "metadata": {
+                "title": None,
+                "summary": None,
+                "system_prompt": None,
+                "created_at": "2026-01-01T00:00:00+00:00",
+                "updated_at": "2026-01-01T00:00:00+00:00",
+                **metadata,
+            },
+            "messages": [
+                line
+                if isinstance(line, dict)
+                else {
+                    "timestamp": "2026-01-01T00:00:00+00:00",
+                    "role": roles[index % len(roles)],
+                    "content": line if isinstance(line, list) else [line],
+                }
+                for index, line in enumerate(lines)
+            ],
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return data
+
+    return _write
+
+
+@pytest.fixture
+def create_chat():
+    """Return an async helper that saves a chat of question/answer turns.
+
+    The chat goes through ``load_chat``/``save_chat`` with the given storage
+    options, so it is written in that layout. Returns the chat data.
+    """
+    from polychat.chat import add_assistant_message, add_user_message, load_chat, save_chat
+
+    async def _create(path, turns=1, options=None):
+        data = load_chat(str(path), options)
+        for index in range(turns):
+            add_user_message(data, f"question {index}")
+            add_assistant_message(data, f"answer {index}", "claude-haiku-4-5")
+        await save_chat(str(path), data, options)
+        return data
+
+    return _create
+
+
 @pytest.fixture
 def mock_api_key(monkeypatch):
     """Mock API key environment variable."""
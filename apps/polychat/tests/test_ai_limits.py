@@ -1,6 +1,7 @@
 """Tests for centralized AI limit resolution."""
 
 from polychat.ai.limits import (
+    resolve_context_limits,
     resolve_profile_limits,
     resolve_request_limits,
     select_max_output_tokens,
@@ -93,3 +94,52 @@ def test_resolve_request_limits_applies_helper_overrides():
     )
 
     assert limits["max_output_tokens"] == 250
+
+
+def test_model_block_overrides_provider_block():
+    profile = {
+        "ai_limits": {
+            "providers": {"claude": {"max_output_tokens": 800}},
+            "models": {"claude-opus-4-6": {"max_output_tokens": 2000}},
+            "helper": {"max_output_tokens": 300},
+        }
+    }
+
+    assert resolve_profile_limits(profile, "claude")["max_output_tokens"] == 800
+    assert (
+        resolve_profile_limits(profile, "claude", model="claude-opus-4-6")["max_output_tokens"]
+        == 2000
+    )
+    assert (
+        resolve_profile_limits(profile, "claude", helper=True, model="claude-opus-4-6")[
+            "max_output_tokens"
+        ]
+        == 300
+    )
+
+
+def test_resolve_context_limits():
+    profile = {
+        "ai_limits": {
+            "default": {
+                "max_context_tokens": 32000,
+                "context_strategy": "first_and_tail",
+                "retrieval_turns": 2,
+            },
+            "providers": {"gemini": {"max_context_tokens": None}},
+            "models": {"claude-haiku-4-5": {"max_context_tokens": 8000}},
+            "helper": {"max_context_tokens": 1000},
+        }
+    }
+
+    assert resolve_context_limits(profile, "claude", "claude-haiku-4-5") == {
+        "max_context_tokens": 8000,
+        "context_strategy": "first_and_tail",
+        "retrieval_turns": 2,
+    }
+    assert resolve_context_limits(profile, "gemini")["max_context_tokens"] is None
+    assert resolve_context_limits({}, "claude") == {
+        "max_context_tokens": None,
+        "context_strategy": "tail",
+        "retrieval_turns": None,
+    }
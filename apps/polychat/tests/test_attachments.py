@@ -0,0 +1,163 @@
+"""Tests for the content-addressed attachment store and /attach."""
+
+import threading
+
+import pytest
+
+from polychat import attachments
+from polychat.ai_runtime import send_message_to_ai
+from polychat.attachments import (
+    blob_path,
+    expand_attachments,
+    expand_attachments_async,
+    store_attachment,
+)
+from polychat.chat import load_chat
+from polychat.commands import CommandHandler
+from polychat.orchestrator import ChatOrchestrator
+from polychat.orchestrator_types import SendAction
+
+
+def test_store_attachment_dedupes_by_content(tmp_path):
+    chats_dir = tmp_path / "chats"
+    first = tmp_path / "a.md"
+    second = tmp_path / "b.md"
+    first.write_text("same text ✓\n", encoding="utf-8")
+    second.write_text("same text ✓\n", encoding="utf-8")
+
+    ref_a = store_attachment(chats_dir, first)
+    ref_b = store_attachment(chats_dir, second)
+
+    assert ref_a["sha256"] == ref_b["sha256"]
+    assert (ref_a["name"], ref_b["name"]) == ("a.md", "b.md")
+    assert ref_a["size"] == len("same text ✓\n".encode("utf-8"))
+    assert blob_path(chats_dir, ref_a["sha256"]).read_text(encoding="utf-8") == "same text ✓\n"
+    assert [p.name for p in (chats_dir / ".attachments").rglob("*") if p.is_file()] == [
+        ref_a["sha256"]
+    ]
+
+
+def test_store_attachment_rejects_binary_and_large_files(tmp_path, monkeypatch):
+    chats_dir = tmp_path / "chats"
+    binary = tmp_path / "image.png"
+    binary.write_bytes(b"\x89PNG\r\n\x1a\n\xff\xfe")
+
+    with pytest.raises(ValueError, match="UTF-8"):
+        store_attachment(chats_dir, binary)
+
+    monkeypatch.setattr(attachments, "ATTACHMENT_MAX_BYTES", 4)
+    large = tmp_path / "large.txt"
+    large.write_text("12345", encoding="utf-8")
+    with pytest.raises(ValueError, match="too large"):
+        store_attachment(chats_dir, large)
+
+    with pytest.raises(FileNotFoundError):
+        store_attachment(chats_dir, tmp_path / "missing.txt")
+    assert list((chats_dir / ".attachments").rglob("*.tmp")) == []
+
+
+def test_expand_attachments_inlines_text_without_touching_chat(tmp_path):
+    source = tmp_path / "notes.md"
+    source.write_text("line 1\nline 2", encoding="utf-8")
+    reference = store_attachment(tmp_path, source)
+    plain = {"role": "assistant", "content": ["ok"]}
+    message = {"role": "user", "content": ["Review this"], "attachments": [reference]}
+    missing = {
+        "role": "user",
+        "content": [],
+        "attachments": [{"name": "gone.txt", "sha256": "0" * 64, "size": 1}],
+    }
+
+    expanded = expand_attachments([plain, message, missing], tmp_path)
+
+    assert expanded[0] is plain
+    assert expanded[1] == {
+        "role": "user",
+        "content": [
+            "Review this",
+            "",
+            "[Attachment: notes.md]",
+            "line 1",
+            "line 2",
+            "[End of attachment: notes.md]",
+        ],
+    }
+    assert expanded[2]["content"] == ["[Attachment unavailable: gone.txt]"]
+    assert message["content"] == ["Review this"]
+
+
+async def test_expand_attachments_async_reads_blobs_off_the_event_loop(tmp_path, monkeypatch):
+    source = tmp_path / "notes.md"
+    source.write_text("attached text", encoding="utf-8")
+    reference = store_attachment(tmp_path, source)
+    plain = [{"role": "user", "content": ["hi"]}]
+    reader_threads = []
+    read_attachment = attachments.read_attachment
+
+    def _read(chats_dir, ref):
+        reader_threads.append(threading.current_thread())
+        return read_attachment(chats_dir, ref)
+
+    monkeypatch.setattr(attachments, "read_attachment", _read)
+
+    assert await expand_attachments_async(plain, tmp_path) == plain
+    assert reader_threads == []
+
+    expanded = await expand_attachments_async(
+        [{"role": "user", "content": ["hi"], "attachments": [reference]}], tmp_path
+    )
+
+    assert "attached text" in expanded[0]["content"]
+    assert reader_threads and reader_threads[0] is not threading.main_thread()
+
+
+async def test_send_message_to_ai_expands_references(tmp_path):
+    source = tmp_path / "notes.md"
+    source.write_text("attached text", encoding="utf-8")
+    reference = store_attachment(tmp_path, source)
+    sent = {}
+
+    class FakeProvider:
+        def send_message(self, **kwargs):
+            sent.update(kwargs)
+            return iter(())
+
+    await send_message_to_ai(
+        FakeProvider(),
+        [{"role": "user", "content": ["hi"], "attachments": [reference]}],
+        "claude-haiku-4-5",
+        profile={"chats_dir": str(tmp_path)},
+    )
+
+    assert "attached text" in sent["messages"][0]["content"]
+    assert "attachments" not in sent["messages"][0]
+
+
+async def test_attach_command_stages_reference_for_next_message(mock_session_manager, tmp_path):
+    chat_path = str(tmp_path / "chat.json")
+    chat_data = load_chat(chat_path)
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    mock_session_manager.switch_chat(chat_path, chat_data)
+    source = tmp_path / "notes.md"
+    source.write_text("attached text", encoding="utf-8")
+    handler = CommandHandler(mock_session_manager)
+    orchestrator = ChatOrchestrator(mock_session_manager)
+
+    assert await handler.execute_command("/attach") == "No attachments staged"
+    result = await handler.execute_command(f"/attach {source}")
+    assert result.startswith("Attached notes.md")
+
+    action = await orchestrator.handle_user_message("Review this", chat_path, chat_data)
+
+    assert isinstance(action, SendAction)
+    assert mock_session_manager.pending_attachments == []
+    user_message = chat_data["messages"][-1]
+    assert user_message["content"] == ["Review this"]
+    assert user_message["attachments"][0]["name"] == "notes.md"
+
+    # A failed send puts the attachment back for the next try.
+    await orchestrator.rollback_pre_send_failure(
+        chat_path=chat_path, chat_data=chat_data, mode="normal"
+    )
+    assert [ref["name"] for ref in mock_session_manager.pending_attachments] == ["notes.md"]
+    assert await handler.execute_command("/attach --") == "Cleared 1 staged attachment(s)"
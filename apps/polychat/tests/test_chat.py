@@ -336,6 +336,51 @@ async def test_save_chat_does_not_persist_hex_id(tmp_path):
     assert chat_data["messages"][0]["hex_id"] == "a3f"
 
 
+@pytest.mark.asyncio
+async def test_save_chat_encodes_off_event_loop(tmp_path, monkeypatch):
+    """Encoding runs in a worker thread, not on the event loop thread."""
+    import threading
+    from polychat import json_codec
+
+    loop_thread = threading.get_ident()
+    encode_threads = []
+    codec = json_codec.get_codec()
+    original = codec.dumps_pretty_bytes
+
+    def _recording_dumps(obj):
+        encode_threads.append(threading.get_ident())
+        return original(obj)
+
+    monkeypatch.setattr(codec, "dumps_pretty_bytes", _recording_dumps)
+    chat_data = load_chat(str(tmp_path / "new.json"))
+    add_user_message(chat_data, "Hello")
+
+    await save_chat(str(tmp_path / "new.json"), chat_data)
+
+    assert encode_threads and loop_thread not in encode_threads
+
+
+@pytest.mark.asyncio
+async def test_save_chat_is_atomic_on_failure(tmp_path, monkeypatch):
+    """A failed write leaves the previous chat file intact and no temp files."""
+    chat_path = tmp_path / "atomic.json"
+    chat_data = load_chat(str(chat_path))
+    add_user_message(chat_data, "Original")
+    await save_chat(str(chat_path), chat_data)
+    original = chat_path.read_bytes()
+
+    def _crash(_src, _dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("polychat.file_io.os.replace", _crash)
+    add_user_message(chat_data, "Lost")
+    with pytest.raises(OSError, match="disk full"):
+        await save_chat(str(chat_path), chat_data)
+
+    assert chat_path.read_bytes() == original
+    assert [p.name for p in tmp_path.iterdir()] == ["atomic.json"]
+
+
 def test_add_user_message(sample_chat):
     """Test adding user message."""
     add_user_message(sample_chat, "New message")
@@ -0,0 +1,145 @@
+"""Tests for compressed chat archives."""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from polychat import chat_archive
+from polychat.chat import add_user_message, load_chat, save_chat
+from polychat.chat_manager import (
+    archive_chat,
+    archive_stale_chats,
+    list_chats,
+    rename_chat,
+)
+from polychat.chat_storage import ChatStorageOptions
+from polychat.commands import CommandHandler
+
+STALE = "2020-01-01T00:00:00+00:00"
+LINES = [[f"message {index}", "ünïcode"] for index in range(3)]
+
+
+def test_archive_chat_round_trips(tmp_path, write_chat):
+    chat_file = tmp_path / "old.json"
+    data = write_chat(chat_file, LINES, updated_at=STALE)
+    os.utime(chat_file, (1_600_000_000, 1_600_000_000))
+
+    result = archive_chat(str(chat_file), "gz")
+
+    archived = tmp_path / "old.json.gz"
+    assert result["archive_path"] == str(archived)
+    assert not chat_file.exists()
+    assert archived.stat().st_mtime == 1_600_000_000
+    assert json.loads(gzip.decompress(archived.read_bytes())) == data
+    assert load_chat(str(archived)) == data
+    assert load_chat(str(archived), ChatStorageOptions(lazy_window=1))["messages"] == data["messages"]
+
+    [listed] = list_chats(str(tmp_path))
+    assert listed["filename"] == "old.json.gz"
+    assert listed["message_count"] == 3
+
+
+async def test_saving_archived_chat_recompresses_without_index(tmp_path, write_chat):
+    archived = tmp_path / "old.json.gz"
+    write_chat(tmp_path / "old.json", LINES, updated_at=STALE)
+    archive_chat(str(tmp_path / "old.json"), "gz")
+
+    data = load_chat(str(archived))
+    add_user_message(data, "new message")
+    await save_chat(str(archived), data, ChatStorageOptions(index=True))
+
+    saved = json.loads(gzip.decompress(archived.read_bytes()))
+    assert saved["messages"][-1]["content"] == ["new message"]
+    assert not (tmp_path / "old.json.gz.idx").exists()
+    assert not (tmp_path / "old.json").exists()
+
+
+def test_corrupt_archive_is_invalid_chat(tmp_path):
+    archived = tmp_path / "broken.json.gz"
+    archived.write_bytes(gzip.compress(b'{"metadata": {}, "messages": [')[:-8])
+
+    with pytest.raises(ValueError):
+        load_chat(str(archived))
+    assert list_chats(str(tmp_path)) == []
+
+
+def test_archive_chat_refuses_existing_archive(tmp_path, write_chat):
+    write_chat(tmp_path / "chat.json", LINES, updated_at=STALE)
+    (tmp_path / "chat.json.gz").write_bytes(b"")
+
+    with pytest.raises(FileExistsError):
+        archive_chat(str(tmp_path / "chat.json"), "gz")
+    with pytest.raises(ValueError, match="already archived"):
+        archive_chat(str(tmp_path / "chat.json.gz"), "gz")
+
+
+def test_rename_keeps_archive_suffix(tmp_path, write_chat):
+    write_chat(tmp_path / "chat.json", LINES, title="chat", updated_at=STALE)
+    archive_chat(str(tmp_path / "chat.json"), "gz")
+
+    new_path = rename_chat(str(tmp_path / "chat.json.gz"), "renamed", str(tmp_path))
+
+    assert new_path == str((tmp_path / "renamed.json.gz").resolve())
+    assert load_chat(new_path)["metadata"]["title"] == "chat"
+
+
+def test_archive_stale_chats_skips_recent_and_excluded(tmp_path, write_chat):
+    write_chat(tmp_path / "old.json", LINES, updated_at=STALE)
+    write_chat(tmp_path / "open.json", LINES, updated_at=STALE)
+    write_chat(tmp_path / "recent.json", LINES, updated_at="2999-01-01T00:00:00+00:00")
+    write_chat(tmp_path / "no-date.json", LINES, updated_at=None)
+
+    archived, failed = archive_stale_chats(
+        str(tmp_path), 30, "gz", exclude=[str(tmp_path / "open.json")]
+    )
+
+    assert failed == []
+    assert sorted(os.path.basename(r["archive_path"]) for r in archived) == ["old.json.gz"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        ".polychat-catalog",
+        "no-date.json",
+        "old.json.gz",
+        "open.json",
+        "recent.json",
+    ]
+
+
+def test_zstd_archive_round_trips(tmp_path, write_chat):
+    pytest.importorskip("zstandard")
+    chat_file = tmp_path / "old.json"
+    data = write_chat(chat_file, LINES, updated_at=STALE)
+
+    archive_chat(str(chat_file), "zst")
+
+    assert load_chat(str(tmp_path / "old.json.zst")) == data
+
+
+def test_unavailable_format_is_rejected(tmp_path, monkeypatch, write_chat):
+    monkeypatch.setattr(chat_archive, "zstandard", None)
+    write_chat(tmp_path / "old.json", LINES, updated_at=STALE)
+
+    with pytest.raises(ValueError, match="not available"):
+        archive_stale_chats(str(tmp_path), 30, "zst")
+
+
+async def test_archive_command_and_open_by_name(
+    mock_session_manager, tmp_path, write_chat
+):
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    mock_session_manager.chat_path = None
+    write_chat(tmp_path / "old.json", LINES, updated_at=STALE)
+    handler = CommandHandler(mock_session_manager)
+
+    assert await handler.execute_command("/archive nope") == "Usage: /archive [days] [gz|zst]"
+    result = await handler.execute_command("/archive 30 gz")
+
+    assert result.startswith("Archived 1 chat(s) not updated in 30 days")
+    assert "old.json.gz" in result
+    assert handler._resolve_chat_path_arg("old", str(tmp_path)) == str(
+        (tmp_path / "old.json.gz").resolve()
+    )
+    assert await handler.execute_command("/archive 30 gz") == (
+        "No chats older than 30 days to archive"
+    )
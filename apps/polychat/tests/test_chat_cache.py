@@ -0,0 +1,155 @@
+"""Tests for the in-memory chat cache and async chat loading."""
+
+import asyncio
+import os
+
+import pytest
+
+from polychat import chat, chat_journal
+from polychat.chat import add_user_message, load_chat, save_chat
+from polychat.chat_cache import ChatCache
+from polychat.chat_storage import ChatStorageOptions, resolve_storage_options
+from polychat.session_manager import SessionManager
+
+
+def _count_loads(monkeypatch):
+    loaded = []
+    original = chat.load_chat
+
+    def _load(path, options=None):
+        loaded.append(os.path.basename(path))
+        return original(path, options)
+
+    monkeypatch.setattr(chat, "load_chat", _load)
+    return loaded
+
+
+def _manager(tmp_path, **storage):
+    return SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+            "chat_storage": storage,
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+    )
+
+
+@pytest.mark.asyncio
+async def test_switching_back_reuses_chat_without_parsing(
+    tmp_path, monkeypatch, create_chat
+):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    await create_chat(first)
+    await create_chat(second)
+    manager = _manager(tmp_path)
+    loaded = _count_loads(monkeypatch)
+
+    first_data = await manager.load_chat(str(first))
+    manager.switch_chat(str(first), first_data)
+    second_data = await manager.load_chat(str(second))
+    manager.switch_chat(str(second), second_data)
+
+    assert await manager.load_chat(str(first)) is first_data
+    assert loaded == ["first.json", "second.json"]
+
+
+@pytest.mark.asyncio
+async def test_changed_file_is_read_again(tmp_path, monkeypatch, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path)
+    cache = ChatCache()
+    cache.put(str(path), load_chat(str(path)), None)
+
+    data = load_chat(str(path))
+    add_user_message(data, "written elsewhere")
+    await save_chat(str(path), data)
+    loaded = _count_loads(monkeypatch)
+
+    reloaded = await cache.load(str(path), ChatStorageOptions())
+    assert loaded == ["chat.json"]
+    assert len(reloaded["messages"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_reopened_chat_is_tracked_again(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    options = ChatStorageOptions(journal=True)
+    await create_chat(path)
+    cache = ChatCache()
+    cache.put(str(path), load_chat(str(path)), None)
+
+    data = await cache.load(str(path), options)
+
+    assert chat_journal.get_state(str(path), data) is not None
+    assert str(path) not in cache
+    chat.release_chat(str(path))
+
+
+@pytest.mark.asyncio
+async def test_preload_validates_and_keeps_chat(tmp_path, monkeypatch, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path)
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    cache = ChatCache()
+
+    with pytest.raises(ValueError):
+        await cache.preload(str(broken), None)
+
+    await cache.preload(str(path), None)
+    loaded = _count_loads(monkeypatch)
+    await cache.load(str(path), ChatStorageOptions())
+    assert loaded == []
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(tmp_path, create_chat):
+    cache = ChatCache(max_chats=2)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.json"
+        await create_chat(path)
+        cache.put(str(path), load_chat(str(path)), None)
+        paths.append(str(path))
+
+    assert paths[0] not in cache
+    assert paths[1] in cache and paths[2] in cache
+
+
+@pytest.mark.asyncio
+async def test_prefetch_loads_most_recent_chats(tmp_path, create_chat):
+    for name in ("old", "middle", "new"):
+        await create_chat(tmp_path / f"{name}.json")
+    manager = _manager(tmp_path, prefetch=2)
+
+    manager.prefetch_recent_chats()
+    await manager._chat_cache._prefetch_task
+
+    cache = manager._chat_cache
+    assert str(tmp_path / "new.json") in cache
+    assert str(tmp_path / "middle.json") in cache
+    assert str(tmp_path / "old.json") not in cache
+
+
+@pytest.mark.asyncio
+async def test_load_waits_for_prefetch_of_same_chat(tmp_path, monkeypatch, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path)
+    loaded = _count_loads(monkeypatch)
+    cache = ChatCache()
+
+    cache.prefetch(lambda: [str(path)], None)
+    await asyncio.sleep(0.05)
+    await cache.load(str(path), ChatStorageOptions())
+
+    assert loaded == ["chat.json"]
+
+
+def test_resolve_prefetch_option():
+    assert resolve_storage_options({"chat_storage": {"prefetch": 3}}).prefetch == 3
+    assert resolve_storage_options({"chat_storage": {"prefetch": 0}}).prefetch is None
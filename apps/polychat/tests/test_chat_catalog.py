@@ -0,0 +1,200 @@
+"""Tests for the persistent chat listing catalog."""
+
+import os
+
+import pytest
+
+from polychat import chat_manager
+from polychat.chat_catalog import catalog_path, load_catalog
+from polychat.chat_manager import iter_chat_batches, list_chats
+from polychat.ui.chat_ui import prompt_chat_selection
+
+OLD_MTIME = 1_600_000_000
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record which chat files list_chats actually reads."""
+    read_names = []
+    original = chat_manager._read_chat_for_listing
+
+    def recording_reader(file_path):
+        read_names.append(file_path.name)
+        return original(file_path)
+
+    monkeypatch.setattr(chat_manager, "_read_chat_for_listing", recording_reader)
+    return read_names
+
+
+def test_only_changed_files_are_reread(tmp_path, reads, write_chat):
+    write_chat(tmp_path / "a.json", title="A", mtime=OLD_MTIME)
+    write_chat(
+        tmp_path / "b.json",
+        ["message"] * 2,
+        title="B",
+        updated_at="2026-01-02T00:00:00+00:00",
+        mtime=OLD_MTIME,
+    )
+    write_chat(tmp_path / "c.json", title="C", mtime=OLD_MTIME)
+
+    first = list_chats(str(tmp_path))
+    assert sorted(reads) == ["a.json", "b.json", "c.json"]
+
+    reads.clear()
+    assert list_chats(str(tmp_path)) == first
+    assert reads == []
+
+    write_chat(
+        tmp_path / "a.json",
+        ["message"] * 3,
+        title="A renamed",
+        updated_at="2026-01-03T00:00:00+00:00",
+        mtime=OLD_MTIME + 10,
+    )
+    (tmp_path / "c.json").unlink()
+    listed = list_chats(str(tmp_path))
+
+    assert reads == ["a.json"]
+    assert [(chat["title"], chat["message_count"]) for chat in listed] == [
+        ("A renamed", 3),
+        ("B", 2),
+    ]
+    assert sorted(load_catalog(tmp_path)) == ["a.json", "b.json"]
+
+
+def test_invalid_files_are_remembered_until_they_change(tmp_path, reads, write_chat):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    os.utime(broken, (OLD_MTIME, OLD_MTIME))
+
+    assert list_chats(str(tmp_path)) == []
+    assert list_chats(str(tmp_path)) == []
+    assert reads == ["broken.json"]
+
+    write_chat(broken, title="Fixed", mtime=OLD_MTIME + 10)
+    assert [chat["title"] for chat in list_chats(str(tmp_path))] == ["Fixed"]
+
+
+def test_recently_modified_files_are_not_trusted(tmp_path, reads, write_chat):
+    chat_file = tmp_path / "fresh.json"
+    write_chat(chat_file, title="Fresh", mtime=OLD_MTIME)
+    os.utime(chat_file)
+
+    list_chats(str(tmp_path))
+    list_chats(str(tmp_path))
+
+    assert reads == ["fresh.json", "fresh.json"]
+
+
+def test_pending_journal_invalidates_entry(tmp_path, reads, write_chat):
+    chat_file = tmp_path / "chat.json"
+    write_chat(chat_file, title="Chat", mtime=OLD_MTIME)
+    list_chats(str(tmp_path))
+
+    journal = tmp_path / "chat.json.journal"
+    journal.write_text("", encoding="utf-8")
+    os.utime(journal, (OLD_MTIME, OLD_MTIME))
+    list_chats(str(tmp_path))
+
+    assert reads == ["chat.json", "chat.json"]
+
+
+def test_corrupt_catalog_falls_back_to_rescan(tmp_path, reads, write_chat):
+    write_chat(tmp_path / "a.json", title="A", mtime=OLD_MTIME)
+    catalog_path(tmp_path).write_bytes(b"\xff garbage")
+
+    assert [chat["title"] for chat in list_chats(str(tmp_path))] == ["A"]
+    assert reads == ["a.json"]
+    assert "a.json" in load_catalog(tmp_path)
+
+
+def test_changed_chats_stream_in_after_unchanged_ones(tmp_path, reads, write_chat):
+    write_chat(tmp_path / "a.json", title="A", mtime=OLD_MTIME)
+    write_chat(
+        tmp_path / "b.json",
+        ["message"] * 2,
+        title="B",
+        updated_at="2026-01-02T00:00:00+00:00",
+        mtime=OLD_MTIME,
+    )
+    list_chats(str(tmp_path))
+    write_chat(
+        tmp_path / "c.json",
+        ["message"] * 3,
+        title="C",
+        updated_at="2026-01-03T00:00:00+00:00",
+        mtime=OLD_MTIME,
+    )
+    write_chat(
+        tmp_path / "d.json",
+        ["message"] * 4,
+        title="D",
+        updated_at="2026-01-04T00:00:00+00:00",
+        mtime=OLD_MTIME,
+    )
+    reads.clear()
+
+    batches = [
+        [chat["filename"] for chat in batch] for batch in iter_chat_batches(str(tmp_path))
+    ]
+
+    assert batches[0] == ["b.json", "a.json"]
+    assert sorted(batches[1:]) == [["c.json"], ["d.json"]]
+    assert sorted(reads) == ["c.json", "d.json"]
+
+
+def test_picker_numbers_chats_in_display_order(
+    tmp_path, monkeypatch, capsys, write_chat
+):
+    write_chat(tmp_path / "a.json", title="A", mtime=OLD_MTIME)
+    write_chat(
+        tmp_path / "b.json",
+        ["message"] * 2,
+        title="B",
+        updated_at="2026-01-02T00:00:00+00:00",
+        mtime=OLD_MTIME,
+    )
+    list_chats(str(tmp_path))
+    monkeypatch.setattr("builtins.input", lambda _prompt: "1")
+
+    selected = prompt_chat_selection(str(tmp_path))
+
+    output = capsys.readouterr().out
+    assert output.index("[1] b.json") < output.index("[2] a.json")
+    assert "Sorted by last update:" not in output
+    assert selected == str(tmp_path / "b.json")
+
+
+def test_picker_lists_changed_chats_in_list_chats_order(
+    tmp_path, monkeypatch, capsys, write_chat
+):
+    for name, day in (("a", "01"), ("b", "02"), ("c", "03")):
+        write_chat(
+            tmp_path / f"{name}.json",
+            title=name.upper(),
+            updated_at=f"2026-08-{day}T00:00:00+00:00",
+            mtime=OLD_MTIME,
+        )
+    list_chats(str(tmp_path))
+    # Changed since the catalog was written, so it streams in last.
+    write_chat(
+        tmp_path / "new.json",
+        title="New",
+        updated_at="2026-09-02T00:00:00+00:00",
+        mtime=OLD_MTIME + 10,
+    )
+    monkeypatch.setattr("builtins.input", lambda _prompt: "1")
+
+    selected = prompt_chat_selection(str(tmp_path))
+
+    output = capsys.readouterr().out
+    streamed, _, sorted_page = output.partition("Sorted by last update:")
+    # Rows are shown as they are read, then renumbered once all are in.
+    assert "[1] c.json" in streamed and "[4] new.json" in streamed
+    expected = [chat["filename"] for chat in list_chats(str(tmp_path))]
+    assert expected == ["new.json", "c.json", "b.json", "a.json"]
+    positions = [
+        sorted_page.index(f"[{n}] {name}") for n, name in enumerate(expected, 1)
+    ]
+    assert positions == sorted(positions)
+    assert selected == str(tmp_path / "new.json")
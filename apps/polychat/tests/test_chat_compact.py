@@ -0,0 +1,185 @@
+"""Tests for /compact summary checkpoints."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from polychat.chat import (
+    get_messages_for_ai,
+    get_retry_context_for_last_interaction,
+    load_chat,
+)
+from polychat.chat_compact import (
+    CHECKPOINT_ACK,
+    compact_boundary,
+    get_checkpoint,
+    plan_chunks,
+    set_checkpoint,
+)
+from polychat.commands import CommandHandler
+from polychat.session_manager import SessionManager
+
+
+def _chat(turns):
+    messages = []
+    for index in range(turns):
+        messages.append(
+            {"timestamp": f"t{index}q", "role": "user", "content": [f"question {index}"]}
+        )
+        messages.append(
+            {"timestamp": f"t{index}a", "role": "assistant", "content": [f"answer {index}"]}
+        )
+    return {
+        "metadata": {
+            "title": None,
+            "summary": None,
+            "system_prompt": None,
+            "created_at": None,
+            "updated_at": None,
+        },
+        "messages": messages,
+    }
+
+
+def _handler(tmp_path, chat_data):
+    manager = SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat=chat_data,
+        chat_path=str(tmp_path / "chat.json"),
+    )
+    return CommandHandler(manager)
+
+
+def _contents(messages):
+    return [message["content"][-1] for message in messages]
+
+
+def test_boundary_keeps_newest_turns():
+    messages = _chat(5)["messages"]
+    messages.append({"role": "error", "content": ["boom"]})
+
+    assert compact_boundary(messages, 2) == 6
+    assert compact_boundary(messages, 0) == 11
+    assert compact_boundary(messages, 9) == 0
+
+
+def test_chunks_split_by_size_and_skip_errors():
+    messages = [{"role": "user", "content": ["x" * 40]} for _ in range(5)]
+    messages.insert(2, {"role": "error", "content": ["e" * 1000]})
+
+    assert plan_chunks(messages, 0, 6, 100) == [range(0, 3), range(3, 5), range(5, 6)]
+    assert plan_chunks(messages, 1, 3, 10) == [range(1, 3)]
+
+
+def test_messages_for_ai_send_checkpoint_then_tail():
+    data = _chat(4)
+    set_checkpoint(data, "they discussed 0 to 2", 6, "helper-model")
+
+    messages = get_messages_for_ai(data)
+
+    assert [message["role"] for message in messages] == ["user", "assistant"] * 2
+    assert messages[0]["content"][-1] == "they discussed 0 to 2"
+    assert _contents(messages[1:]) == [CHECKPOINT_ACK, "question 3", "answer 3"]
+    assert len(data["messages"]) == 8
+
+
+def test_checkpoint_ignored_after_covered_messages_change():
+    data = _chat(4)
+    set_checkpoint(data, "summary", 6, "helper-model")
+    del data["messages"][1]
+
+    assert get_checkpoint(data) is None
+    assert len(get_messages_for_ai(data)) == 7
+
+
+def test_retry_keeps_checkpoint_covering_last_turn():
+    data = _chat(3)
+    set_checkpoint(data, "summary of everything", 6, "helper-model")
+
+    context = get_retry_context_for_last_interaction(data)
+    assert context == get_messages_for_ai(data)
+    assert _contents(context) == ["summary of everything", CHECKPOINT_ACK]
+
+    data["messages"] += [
+        {"timestamp": "t3q", "role": "user", "content": ["question 3"]},
+        {"role": "error", "content": ["boom"]},
+    ]
+    assert _contents(get_retry_context_for_last_interaction(data)) == [
+        "summary of everything",
+        CHECKPOINT_ACK,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_compact_then_extend_incrementally(tmp_path):
+    data = _chat(6)
+    handler = _handler(tmp_path, data)
+    prompts = []
+
+    async def _helper(*args, **kwargs):
+        prompts.append(args[3][0]["content"])
+        return f"summary {len(prompts)}"
+
+    with patch("polychat.commands.invoke_helper_ai", new=AsyncMock(side_effect=_helper)):
+        result = await handler.execute_command("/compact keep 4")
+        assert result == (
+            "Compacted 4 message(s); the checkpoint now covers messages 1-4 "
+            "and the last 4 turn(s) are sent in full"
+        )
+        assert await handler.execute_command("/compact keep 4") == (
+            "Nothing to compact (keeping the last 4 turn(s) in full)"
+        )
+        await handler.execute_command("/compact keep 1")
+
+    assert "question 1" in prompts[0] and "(none)" in prompts[0]
+    # The second run only reads messages after the first checkpoint.
+    assert "question 1" not in prompts[1]
+    assert "question 2" in prompts[1] and "summary 1" in prompts[1]
+    assert data["metadata"]["checkpoint"]["through"] == 10
+    assert _contents(get_messages_for_ai(data)) == [
+        "summary 2",
+        CHECKPOINT_ACK,
+        "question 5",
+        "answer 5",
+    ]
+
+    saved = load_chat(str(tmp_path / "chat.json"))
+    assert saved["metadata"]["checkpoint"]["summary"] == "summary 2"
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_keeps_earlier_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr("polychat.commands.metadata.COMPACT_CHUNK_CHARS", 30)
+    data = _chat(4)
+    handler = _handler(tmp_path, data)
+    helper = AsyncMock(side_effect=["first part", RuntimeError("helper down")])
+
+    with patch("polychat.commands.invoke_helper_ai", new=helper):
+        result = await handler.execute_command("/compact keep 1")
+
+    assert result == "Error compacting chat (3 message(s) were folded in): helper down"
+    assert data["metadata"]["checkpoint"]["through"] == 3
+
+
+@pytest.mark.asyncio
+async def test_compact_clear_and_usage(tmp_path):
+    data = _chat(3)
+    set_checkpoint(data, "summary", 2, "helper-model")
+    handler = _handler(tmp_path, data)
+
+    assert await handler.execute_command("/compact last") == (
+        "Usage: /compact [keep <n>] or /compact --"
+    )
+    assert await handler.execute_command("/compact --") == (
+        "Checkpoint removed; the full history is sent again"
+    )
+    assert "checkpoint" not in data["metadata"]
+    assert await handler.execute_command("/compact --") == "No checkpoint to remove"
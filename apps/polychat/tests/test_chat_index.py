@@ -0,0 +1,147 @@
+"""Tests for the chat byte-offset index sidecar."""
+
+import json
+
+import pytest
+
+from polychat import chat_index, chat_journal
+from polychat.chat import (
+    add_user_message,
+    compact_chat_journal,
+    load_chat,
+    save_chat,
+)
+from polychat.chat_manager import list_chats
+from polychat.chat_storage import ChatStorageOptions
+
+
+INDEXED = ChatStorageOptions(index=True)
+
+
+def _chat_data(message_count=6):
+    return {
+        "metadata": {
+            "title": "Ünïcode ✓",
+            "summary": None,
+            "system_prompt": None,
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "updated_at": None,
+        },
+        "messages": [
+            {
+                "timestamp": "2026-01-01T00:00:00+00:00",
+                "role": "user" if index % 2 == 0 else "assistant",
+                "content": [f"message {index}", "", "日本語 \"quoted\""],
+                "citations": [{"title": "t", "url": "https://example.com"}],
+            }
+            for index in range(message_count)
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        _chat_data(),
+        _chat_data(message_count=0),
+        {"metadata": {}, "messages": [{"content": []}]},
+        {},
+    ],
+)
+def test_dump_indexed_matches_json_dumps(data):
+    payload, metadata_span, message_spans = chat_index.dump_indexed(data)
+
+    assert payload == json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    if "metadata" in data:
+        offset, length = metadata_span
+        assert json.loads(payload[offset : offset + length]) == data["metadata"]
+    for (offset, length), message in zip(message_spans, data.get("messages", [])):
+        assert json.loads(payload[offset : offset + length]) == message
+
+
+@pytest.mark.asyncio
+async def test_save_writes_index_that_serves_seeks(tmp_path):
+    path = tmp_path / "chat.json"
+    data = _chat_data()
+
+    await save_chat(str(path), data, INDEXED)
+
+    index = chat_index.load_index(path)
+    assert index is not None
+    assert index.message_count == 6
+    assert chat_index.read_metadata(path, index) == data["metadata"]
+    assert chat_index.read_messages(path, index, 4, 6) == data["messages"][4:]
+
+
+def test_scan_spans_handles_non_canonical_layout(tmp_path):
+    path = tmp_path / "chat.json"
+    data = _chat_data()
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    index = chat_index.build_index(path)
+
+    assert chat_index.read_metadata(path, index) == data["metadata"]
+    assert chat_index.read_messages(path, index, 0, 6) == data["messages"]
+
+
+@pytest.mark.asyncio
+async def test_stale_index_is_ignored_and_rebuilt_by_listing(tmp_path):
+    path = tmp_path / "chat.json"
+    await save_chat(str(path), _chat_data(), INDEXED)
+
+    # Edited outside PolyChat: the index no longer matches.
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["messages"] = data["messages"][:3]
+    data["metadata"]["title"] = "Edited"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert chat_index.load_index(path) is None
+
+    listed = list_chats(str(tmp_path))
+
+    assert listed[0]["title"] == "Edited"
+    assert listed[0]["message_count"] == 3
+    assert chat_index.load_index(path) is not None
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_reads_through_index(tmp_path, monkeypatch):
+    path = tmp_path / "chat.json"
+    await save_chat(str(path), _chat_data(), INDEXED)
+
+    def _no_full_parse(_path):
+        raise AssertionError("full chat parse")
+
+    monkeypatch.setattr("polychat.chat._read_chat_file", _no_full_parse)
+    data = load_chat(str(path), ChatStorageOptions(index=True, lazy_window=2))
+
+    assert data["messages"].loaded_start == 4
+    assert data["messages"][-1]["content"][0] == "message 5"
+    assert data["messages"][0]["content"][0] == "message 0"
+
+
+@pytest.mark.asyncio
+async def test_compaction_refreshes_index(tmp_path):
+    path = tmp_path / "chat.json"
+    options = ChatStorageOptions(journal=True, index=True)
+    await save_chat(str(path), _chat_data(), options)
+
+    data = load_chat(str(path), options)
+    add_user_message(data, "journaled")
+    await save_chat(str(path), data, options)
+    assert chat_journal.journal_path(path).exists()
+
+    assert compact_chat_journal(str(path)) is True
+
+    index = chat_index.load_index(path)
+    assert index is not None and index.message_count == 7
+    assert chat_index.read_messages(path, index, 6, 7)[0]["content"] == ["journaled"]
+
+
+@pytest.mark.asyncio
+async def test_save_without_index_option_removes_index(tmp_path):
+    path = tmp_path / "chat.json"
+    await save_chat(str(path), _chat_data(), INDEXED)
+
+    await save_chat(str(path), load_chat(str(path)))
+
+    assert not chat_index.index_path(path).exists()
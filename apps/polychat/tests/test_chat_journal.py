@@ -0,0 +1,251 @@
+"""Tests for append-only chat journal mode."""
+
+import json
+
+import pytest
+
+from polychat import chat_journal
+from polychat.chat import (
+    add_assistant_message,
+    add_user_message,
+    compact_chat_journal,
+    delete_message_and_following,
+    load_chat,
+    save_chat,
+    update_metadata,
+)
+from polychat.chat_catalog import catalog_path
+from polychat.chat_manager import delete_chat, list_chats, rename_chat
+from polychat.chat_storage import ChatStorageOptions, resolve_storage_options
+from polychat.profile import validate_profile
+
+
+JOURNAL = ChatStorageOptions(journal=True)
+
+
+def _journal_ops(path):
+    lines = chat_journal.journal_path(path).read_text(encoding="utf-8").splitlines()
+    return [json.loads(line)["op"] for line in lines]
+
+
+@pytest.mark.asyncio
+async def test_journal_save_appends_without_rewriting_snapshot(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+    snapshot = path.read_text(encoding="utf-8")
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "new question")
+    await save_chat(str(path), data, JOURNAL)
+
+    assert path.read_text(encoding="utf-8") == snapshot
+    assert _journal_ops(path) == ["base", "metadata", "append"]
+
+    reloaded = load_chat(str(path))
+    assert len(reloaded["messages"]) == 9
+    assert reloaded["messages"][-1]["content"] == ["new question"]
+    assert reloaded["metadata"]["updated_at"] == data["metadata"]["updated_at"]
+
+
+@pytest.mark.asyncio
+async def test_journal_records_rewind_and_purge(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    delete_message_and_following(data, 6)
+    await save_chat(str(path), data, JOURNAL)
+
+    del data["messages"][1]
+    del data["messages"][2]
+    await save_chat(str(path), data, JOURNAL)
+
+    assert _journal_ops(path) == ["base", "metadata", "truncate", "metadata", "purge"]
+    reloaded = load_chat(str(path))
+    assert [m["content"][0] for m in reloaded["messages"]] == [
+        "question 0",
+        "question 1",
+        "question 2",
+        "answer 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_journal_records_replaced_messages_and_metadata(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    data["messages"][0]["summary"] = "short"
+    update_metadata(data, title="Renamed")
+    await save_chat(str(path), data, JOURNAL)
+
+    assert _journal_ops(path) == ["base", "metadata", "replace"]
+    reloaded = load_chat(str(path))
+    assert reloaded["messages"][0]["summary"] == "short"
+    assert reloaded["metadata"]["title"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_journal_does_not_persist_hex_id(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    for message in data["messages"]:
+        message["hex_id"] = "abc"
+    add_user_message(data, "new question")
+    data["messages"][-1]["hex_id"] = "def"
+    await save_chat(str(path), data, JOURNAL)
+
+    # Runtime hex IDs are not changes worth journaling.
+    assert _journal_ops(path) == ["base", "metadata", "append"]
+    assert "hex_id" not in chat_journal.journal_path(path).read_text(encoding="utf-8")
+
+
+@pytest.mark.asyncio
+async def test_compaction_matches_full_save_output(tmp_path, create_chat):
+    journaled = tmp_path / "journaled.json"
+    rewritten = tmp_path / "rewritten.json"
+    await create_chat(journaled, turns=4)
+
+    data = load_chat(str(journaled), JOURNAL)
+    add_user_message(data, "line one\nline two")
+    add_assistant_message(data, "ünïcode ✓", "claude-haiku-4-5")
+    await save_chat(str(journaled), data, JOURNAL)
+
+    assert compact_chat_journal(str(journaled)) is True
+    assert not chat_journal.journal_path(journaled).exists()
+
+    await save_chat(str(rewritten), load_chat(str(journaled)))
+    expected = rewritten.read_text(encoding="utf-8")
+    # save_chat refreshes updated_at; compare everything else byte-for-byte.
+    expected_data = json.loads(expected)
+    expected_data["metadata"]["updated_at"] = data["metadata"]["updated_at"]
+    assert journaled.read_text(encoding="utf-8") == json.dumps(
+        expected_data, indent=2, ensure_ascii=False
+    )
+    assert compact_chat_journal(str(journaled)) is False
+
+
+@pytest.mark.asyncio
+async def test_threshold_triggers_background_compaction(
+    tmp_path, monkeypatch, create_chat
+):
+    monkeypatch.setattr("polychat.chat.CHAT_JOURNAL_COMPACT_THRESHOLD", 3)
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "one")
+    add_user_message(data, "two")
+    await save_chat(str(path), data, JOURNAL)
+
+    state = chat_journal.get_state(path, data)
+    assert state is not None and state.compaction is not None
+    await state.compaction
+
+    assert not chat_journal.journal_path(path).exists()
+    assert len(json.loads(path.read_text(encoding="utf-8"))["messages"]) == 10
+
+    # Journaling continues against the compacted snapshot.
+    add_user_message(data, "three")
+    await save_chat(str(path), data, JOURNAL)
+    assert len(load_chat(str(path))["messages"]) == 11
+
+
+@pytest.mark.asyncio
+async def test_full_save_removes_journal(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "journaled")
+    await save_chat(str(path), data, JOURNAL)
+    assert chat_journal.journal_path(path).exists()
+
+    await save_chat(str(path), data)
+
+    assert not chat_journal.journal_path(path).exists()
+    assert len(load_chat(str(path))["messages"]) == 9
+
+
+@pytest.mark.asyncio
+async def test_stale_journal_is_discarded(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "journaled")
+    await save_chat(str(path), data, JOURNAL)
+
+    # Snapshot replaced behind the journal's back (e.g. git checkout).
+    path.write_text(
+        json.dumps(
+            {"metadata": {}, "messages": [dict(m) for m in data["messages"][:2]]},
+            default=str,
+        ),
+        encoding="utf-8",
+    )
+
+    reloaded = load_chat(str(path))
+    assert len(reloaded["messages"]) == 2
+    assert not chat_journal.journal_path(path).exists()
+
+
+@pytest.mark.asyncio
+async def test_truncated_trailing_record_is_ignored(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "kept")
+    await save_chat(str(path), data, JOURNAL)
+    with open(chat_journal.journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"op":"append","message":{"role"')
+
+    reloaded = load_chat(str(path))
+    assert reloaded["messages"][-1]["content"] == ["kept"]
+
+
+@pytest.mark.asyncio
+async def test_chat_manager_handles_journal_sidecar(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=4)
+
+    data = load_chat(str(path), JOURNAL)
+    add_user_message(data, "journaled")
+    await save_chat(str(path), data, JOURNAL)
+
+    listed = list_chats(str(tmp_path))
+    assert len(listed) == 1
+    assert listed[0]["message_count"] == 9
+
+    new_path = rename_chat(str(path), "renamed", str(tmp_path))
+    assert chat_journal.journal_path(new_path).exists()
+    assert not chat_journal.journal_path(path).exists()
+    assert len(load_chat(new_path)["messages"]) == 9
+
+    delete_chat(new_path)
+    assert list(tmp_path.iterdir()) == [catalog_path(tmp_path)]
+
+
+def test_resolve_storage_options_defaults():
+    assert resolve_storage_options({}).journal is False
+    assert resolve_storage_options({"chat_storage": {"journal": True}}).journal is True
+
+
+def test_validate_profile_chat_storage_block():
+    base = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "~/chats",
+        "logs_dir": "~/logs",
+        "api_keys": {},
+    }
+    validate_profile({**base, "chat_storage": {"journal": True}})
+
+    with pytest.raises(ValueError, match="Unknown chat_storage key"):
+        validate_profile({**base, "chat_storage": {"jornal": True}})
+    with pytest.raises(ValueError, match="chat_storage.journal"):
+        validate_profile({**base, "chat_storage": {"journal": "yes"}})
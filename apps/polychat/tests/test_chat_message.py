@@ -0,0 +1,107 @@
+"""Tests for the compact in-memory message type."""
+
+import json
+
+import pytest
+
+from polychat.chat import add_user_message, load_chat, save_chat
+from polychat.chat_journal import persistable_message
+from polychat.chat_message import Message
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        [],
+        [""],
+        ["", ""],
+        ["one"],
+        ["first", "", "third", ""],
+        ["embedded\nnewline", "next", "\n"],
+        ["ünïcode ✓", "日本語", "😀"],
+    ],
+)
+def test_content_round_trips_exactly(content):
+    message = Message({"role": "user", "content": content})
+
+    assert message["content"] == content
+    assert message.content_text == "\n".join(content)
+    assert message.to_dict() == {"role": "user", "content": content}
+
+
+def test_behaves_like_the_dict_it_replaces():
+    fields = {"timestamp": "t", "role": "assistant", "model": "m", "content": ["a", "b"]}
+    message = Message(fields)
+
+    assert message == fields
+    assert fields == message
+    assert list(message) == list(fields)
+    assert message.get("citations") is None
+    assert "model" in message and "hex_id" not in message
+
+    message["hex_id"] = "a3f"
+    message["content"] = ["c"]
+    assert list(message) == ["timestamp", "role", "model", "content", "hex_id"]
+    assert message.pop("hex_id") == "a3f"
+    del message["model"]
+    assert message == {"timestamp": "t", "role": "assistant", "content": ["c"]}
+    with pytest.raises(KeyError):
+        message["missing"]
+
+
+def test_returned_content_is_a_copy():
+    message = Message({"content": ["a"]})
+
+    message["content"].append("b")
+
+    assert message["content"] == ["a"]
+
+
+def test_unpackable_content_is_kept_as_is():
+    message = Message({"content": "raw text"})
+
+    assert message["content"] == "raw text"
+    assert message.content_text is None
+
+
+def test_same_keys_share_one_key_tuple():
+    first = Message({"role": "user", "content": ["a"]})
+    second = Message({"role": "user", "content": ["b"]})
+
+    assert first._keys is second._keys
+
+
+def test_copy_is_independent():
+    message = Message({"role": "user", "content": ["a"]})
+    clone = message.copy()
+
+    clone["content"] = ["b"]
+    clone["hex_id"] = "abc"
+
+    assert message == {"role": "user", "content": ["a"]}
+
+
+def test_persistable_message_drops_runtime_keys():
+    message = Message({"role": "user", "content": ["a"], "hex_id": "abc"})
+
+    persisted = persistable_message(message)
+
+    assert type(persisted) is dict
+    assert json.dumps(persisted) == '{"role": "user", "content": ["a"]}'
+
+
+async def test_loaded_messages_are_compact_and_save_unchanged(tmp_path):
+    path = tmp_path / "chat.json"
+    data = load_chat(str(path))
+    add_user_message(data, "hello\n\nworld")
+    await save_chat(str(path), data)
+    original = path.read_bytes()
+
+    reloaded = load_chat(str(path))
+    assert all(isinstance(message, Message) for message in reloaded["messages"])
+    assert reloaded["messages"][0]["content"] == ["hello", "", "world"]
+
+    reloaded["metadata"]["updated_at"] = data["metadata"]["updated_at"]
+    await save_chat(str(path), reloaded)
+    rewritten = json.loads(path.read_text(encoding="utf-8"))
+    assert rewritten["messages"] == json.loads(original)["messages"]
@@ -0,0 +1,117 @@
+"""Tests for the paginated, filterable chat picker."""
+
+import json
+
+from polychat.constants import CHAT_PICKER_PAGE_SIZE
+from polychat.ui.chat_ui import ChatFilter, prompt_chat_selection
+
+
+def _chat(index, title=None):
+    return {
+        "filename": f"chat-{index:05d}.json",
+        "path": f"/chats/chat-{index:05d}.json",
+        "title": title if title is not None else f"Topic {index % 97} notes",
+    }
+
+
+def test_filter_matches_every_word_in_filename_or_title():
+    chat_filter = ChatFilter()
+    chat_filter.add([
+        _chat(1, "Kyoto trip plan"),
+        _chat(2, "Parser refactor"),
+        _chat(3, "Trip budget"),
+    ])
+
+    assert [c["title"] for c in chat_filter.set_query("TRIP")] == ["Kyoto trip plan", "Trip budget"]
+    assert [c["title"] for c in chat_filter.set_query("trip kyo")] == ["Kyoto trip plan"]
+    assert [c["title"] for c in chat_filter.set_query("00002")] == ["Parser refactor"]
+    assert len(chat_filter.set_query("")) == 3
+
+
+def test_filter_narrows_and_widens_consistently():
+    chat_filter = ChatFilter()
+    chat_filter.add(_chat(i) for i in range(1000))
+
+    chat_filter.set_query("topic 1")
+    narrowed = chat_filter.set_query("topic 12")
+    chat_filter.add([_chat(5000, "Topic 12 late arrival")])
+
+    assert [c["title"] for c in chat_filter.matches] == [
+        c["title"] for c in narrowed
+    ] + ["Topic 12 late arrival"]
+    fresh = ChatFilter()
+    fresh.add(chat_filter.chats)
+    assert chat_filter.set_query("topic 2") == fresh.set_query("topic 2")
+
+
+class _CountingKey(str):
+    checks = 0
+
+    def __contains__(self, term):
+        _CountingKey.checks += 1
+        return super().__contains__(term)
+
+
+def test_filter_rechecks_only_previous_matches():
+    chat_filter = ChatFilter()
+    chat_filter.add(_chat(i) for i in range(970))
+    chat_filter._keys = [_CountingKey(key) for key in chat_filter._keys]
+
+    def checks(query):
+        _CountingKey.checks = 0
+        chat_filter.set_query(query)
+        return _CountingKey.checks
+
+    assert checks("topic") == 970
+    assert checks("topic 4") == 970
+    previous = len(chat_filter.matches)
+    assert checks("topic 42") == previous
+    # Deleting a character goes back to the kept result.
+    assert checks("topic 4") == 0
+    assert checks("topic 42") == previous
+    # Another space adds no word, so nothing needs checking.
+    assert checks("topic 42 ") == 0
+
+
+def test_picker_pages_filters_and_selects(tmp_path, monkeypatch, capsys):
+    for index in range(CHAT_PICKER_PAGE_SIZE + 5):
+        title = "Needle chat" if index == 3 else f"Chat {index}"
+        data = {"metadata": {"title": title}, "messages": []}
+        (tmp_path / f"c{index:02d}.json").write_text(json.dumps(data), encoding="utf-8")
+    answers = iter([">", ">", "<", "needle", str(CHAT_PICKER_PAGE_SIZE + 1), "1"])
+    monkeypatch.setattr("builtins.input", lambda _prompt: next(answers))
+
+    selected = prompt_chat_selection(str(tmp_path))
+
+    output = capsys.readouterr().out
+    assert f"[{CHAT_PICKER_PAGE_SIZE}] " in output
+    assert f"Page 1 of 2, {CHAT_PICKER_PAGE_SIZE + 5} chats" in output
+    assert f"[{CHAT_PICKER_PAGE_SIZE + 5}] " in output
+    assert "No more pages." in output
+    assert 'Page 1 of 1, 1 chats matching "needle"' in output
+    assert "Invalid number. Choose 1-1" in output
+    assert selected == str(tmp_path / "c03.json")
+
+
+def test_picker_numbers_filtered_chats_in_list_chats_order(
+    tmp_path, monkeypatch, capsys, write_chat
+):
+    for name, updated_at in (
+        ("a.json", "2026-01-01T00:00:00+00:00"),
+        ("b.json", "2026-03-01T00:00:00+00:00"),
+        ("c.json", "2026-02-01T00:00:00+00:00"),
+        ("d.json", "2026-04-01T00:00:00+00:00"),
+    ):
+        write_chat(tmp_path / name, title=f"Needle {name[0]}", updated_at=updated_at)
+    write_chat(
+        tmp_path / "e.json", title="Other", updated_at="2026-05-01T00:00:00+00:00"
+    )
+    answers = iter(["needle", "2"])
+    monkeypatch.setattr("builtins.input", lambda _prompt: next(answers))
+
+    selected = prompt_chat_selection(str(tmp_path))
+
+    filtered = capsys.readouterr().out.split('"needle"')[0]
+    positions = [filtered.rindex(f"Needle {letter}") for letter in "dbca"]
+    assert positions == sorted(positions)
+    assert selected == str(tmp_path / "b.json")
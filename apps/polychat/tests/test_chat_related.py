@@ -0,0 +1,99 @@
+"""Tests for related-chat discovery."""
+
+import pytest
+
+from polychat import chat_related
+from polychat.chat import load_chat
+from polychat.chat_related import rank_related, refresh_vectors, term_vector
+from polychat.commands import CommandHandler
+
+OLD_MTIME = 1_600_000_000
+
+TOPICS = {
+    "garden.json": ("Tomato garden", ["watering tomato plants", "compost soil for tomato seedlings"]),
+    "soil.json": ("Soil", ["compost and soil ph for vegetable seedlings"]),
+    "rust.json": ("Rust lifetimes", ["borrow checker lifetimes in rust", "rust compiler errors"]),
+}
+
+
+@pytest.fixture
+def chats_dir(tmp_path, write_chat):
+    for name, (title, lines) in TOPICS.items():
+        write_chat(tmp_path / name, lines, title=title, mtime=OLD_MTIME)
+    return tmp_path
+
+
+def test_term_vector_is_bounded_and_deterministic(monkeypatch):
+    monkeypatch.setattr(chat_related, "CHAT_RELATED_MAX_TERMS", 3)
+
+    buckets, counts = term_vector(["a bb bb cc cc cc dd dd dd dd ee"])
+
+    assert buckets == sorted(buckets)
+    assert sorted(counts, reverse=True) == [4, 3, 2]
+    assert (buckets, counts) == term_vector(["dd cc ee dd bb cc dd dd bb cc"])
+
+
+def test_related_chats_rank_by_topic(chats_dir):
+    vectors = refresh_vectors(str(chats_dir))
+
+    related = rank_related(vectors, vectors["garden.json"], 5, exclude="garden.json")
+
+    assert [name for name, _score in related] == ["soil.json"]
+    assert 0 < related[0][1] <= 1
+    assert [name for name, _ in rank_related(vectors, term_vector(["rust borrow"]), 5)] == [
+        "rust.json"
+    ]
+
+
+def test_vectors_are_cached_until_a_chat_changes(chats_dir, monkeypatch, write_chat):
+    refresh_vectors(str(chats_dir))
+    reads = []
+    original = chat_related._read_vector
+
+    def recording_read(path):
+        reads.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(chat_related, "_read_vector", recording_read)
+
+    refresh_vectors(str(chats_dir))
+    assert reads == []
+
+    write_chat(chats_dir / "rust.json", ["tomato"], title="Rust", mtime=OLD_MTIME + 10)
+    vectors = refresh_vectors(str(chats_dir))
+    assert reads == ["rust.json"]
+    assert vectors["rust.json"] == term_vector(["Rust", "tomato"])
+
+
+def test_numpy_scoring_matches_python(chats_dir):
+    pytest.importorskip("numpy")
+    vectors = refresh_vectors(str(chats_dir))
+    names = list(vectors)
+    query = term_vector(["compost tomato rust"])
+
+    expected = sorted(chat_related._rank_python(names, list(vectors.values()), query))
+    actual = sorted(chat_related._rank_numpy(names, list(vectors.values()), query))
+
+    assert [name for name, _ in actual] == [name for name, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+async def test_related_command(mock_session_manager, chats_dir):
+    mock_session_manager.profile["chats_dir"] = str(chats_dir)
+    mock_session_manager.close_chat()
+    handler = CommandHandler(mock_session_manager)
+
+    assert await handler.execute_command("/related") == (
+        "No chat is open. Use /related <words> to search by topic"
+    )
+    lines = (await handler.execute_command("/related borrow checker")).splitlines()
+    assert lines[0] == "Related to: borrow checker"
+    assert lines[1].startswith("  rust.json (") and lines[1].endswith(") - Rust lifetimes")
+    assert len(lines) == 2
+
+    chat_path = str(chats_dir / "garden.json")
+    mock_session_manager.switch_chat(chat_path, load_chat(chat_path))
+    result = await handler.execute_command("/related")
+    assert result.splitlines()[0] == "Related to: garden.json"
+    assert result.splitlines()[1].startswith("  soil.json (")
+    assert "garden.json (" not in result
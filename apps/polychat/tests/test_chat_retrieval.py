@@ -0,0 +1,164 @@
+"""Tests for BM25 retrieval of relevant older turns."""
+
+import pytest
+
+from polychat.chat_retrieval import MessageIndex
+from polychat.context_budget import fit_context
+from polychat.constants import TOKEN_MESSAGE_OVERHEAD
+from polychat.orchestrator import ChatOrchestrator
+from polychat.orchestrator_types import SendAction
+from polychat.session_manager import SessionManager
+
+
+class _WordEstimator:
+    name = "words"
+    exact = True
+
+    def count(self, text):
+        return len(text.split())
+
+
+# Each message below costs 10 tokens: 6 words plus the framing overhead.
+WORDS = 10 - TOKEN_MESSAGE_OVERHEAD
+
+
+def _message(role, text):
+    return {"role": role, "content": [text]}
+
+
+def _padded(role, label, topic="w"):
+    return _message(role, f"{label} " + f"{topic} " * (WORDS - 1))
+
+
+def _first_words(messages):
+    return [message["content"][0].split()[0] for message in messages]
+
+
+def test_rank_prefers_rare_matching_terms():
+    index = MessageIndex()
+    index.sync(
+        [
+            _message("user", "how do I configure the parser"),
+            _message("assistant", "the parser reads the grammar file"),
+            _message("user", "what about the cache"),
+            _message("assistant", "the cache is an lru keyed by path"),
+            _message("user", "where is the grammar file for the parser"),
+        ]
+    )
+
+    ranked = index.rank("where is the grammar file for the parser", before=4)
+
+    assert ranked[0] == 1
+    assert ranked.index(0) < ranked.index(2)
+    assert 4 not in ranked
+    assert index.rank("nothing matches here", before=4) == []
+
+
+def test_sync_indexes_only_new_messages_and_rebuilds_on_edits():
+    index = MessageIndex()
+    messages = [_message("user", f"message {n} alpha") for n in range(4)]
+
+    assert index.sync(messages) == 4
+    messages.append(_message("user", "message 4 beta"))
+    assert index.sync(messages) == 1
+    assert index.rank("beta", before=5) == [4]
+
+    # A retry replaces the last message; only that position is re-indexed.
+    messages[-1] = _message("user", "message 4 gamma")
+    assert index.sync(messages) == 1
+    assert index.rank("beta", before=5) == []
+    messages.append(_message("user", "delta"))
+    assert index.sync(messages) == 1
+
+    # A purge shifts the messages after it; those are re-indexed.
+    del messages[2]
+    assert index.sync(messages) == 3
+    assert index.rank("gamma", before=5) == [3]
+
+    # A changed first message rebuilds the index.
+    del messages[0]
+    assert index.sync(messages) == 4
+    assert index.rank("gamma", before=4) == [2]
+    assert len(index) == 4
+
+
+def test_fit_brings_back_relevant_turns_that_fit():
+    messages = [
+        _padded("user", "q0", "parser"),
+        _padded("assistant", "a0", "parser"),
+        _padded("user", "q1"),
+        _padded("assistant", "a1"),
+        _padded("user", "q2", "parser"),
+        _padded("assistant", "a2", "parser"),
+        _padded("user", "q3"),
+        _message("assistant", "a3 " + "w " * (8 * WORDS)),
+        _padded("user", "new", "parser"),
+    ]
+
+    fit = fit_context(
+        messages,
+        budget=55,
+        strategy="tail",
+        estimator=_WordEstimator(),
+        # Turn 4 is too large to bring back; position 0 is in an already kept turn.
+        relevant=[7, 4, 1, 0, 2],
+        retrieve_turns=2,
+    )
+
+    assert _first_words(fit.messages) == ["q0", "a0", "q2", "a2", "new"]
+    assert fit.tokens == 50
+    assert fit.retrieved_turns == (1, 3)
+    assert fit.dropped_messages == 4
+    assert fit.describe_dropped() == (
+        "Context: left out turns 1-4 (4 messages) to fit ~55 tokens; "
+        "brought back relevant turns 1, 3"
+    )
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_sends_relevant_older_turn(tmp_path):
+    manager = SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+            "ai_limits": {
+                "models": {
+                    "claude-haiku-4-5": {"max_context_tokens": 60, "retrieval_turns": 1}
+                }
+            },
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat={"metadata": {}, "messages": []},
+        chat_path=str(tmp_path / "chat.json"),
+    )
+    answers = {
+        "parser grammar": "notes on parser grammar",
+        "cache": "notes on cache",
+        "logging": "notes on logging " + "detail " * 40,
+        "themes": "notes on themes",
+    }
+    for topic, answer in answers.items():
+        manager.chat["messages"].append(_message("user", f"tell me about {topic}"))
+        manager.chat["messages"].append(_message("assistant", answer))
+    orchestrator = ChatOrchestrator(manager)
+
+    action = await orchestrator.handle_user_message(
+        "back to the grammar", manager.chat_path, manager.chat
+    )
+
+    assert isinstance(action, SendAction)
+    assert [message["content"][0] for message in action.messages] == [
+        "tell me about parser grammar",
+        "notes on parser grammar",
+        "tell me about themes",
+        "notes on themes",
+        "back to the grammar",
+    ]
+    assert action.context_notice == (
+        "[Context: left out turns 1-3 (4 messages) to fit ~60 tokens; "
+        "brought back relevant turn 1]"
+    )
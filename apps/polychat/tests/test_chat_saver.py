@@ -0,0 +1,135 @@
+"""Tests for the write-behind chat saver."""
+
+import asyncio
+import json
+
+import pytest
+
+from polychat.chat import load_chat
+from polychat.chat_saver import ChatSaver
+from polychat.orchestrator import ChatOrchestrator
+from polychat.session_manager import SessionManager
+
+
+class RecordingSave:
+    def __init__(self, fail_times=0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    async def __call__(self, path, data):
+        await asyncio.sleep(0)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise OSError("disk full")
+        self.calls.append((path, json.loads(json.dumps(data))))
+
+
+async def test_burst_of_requests_is_one_write():
+    save = RecordingSave()
+    saver = ChatSaver(save, debounce=60)
+    chat = {"messages": []}
+
+    for index in range(5):
+        chat["messages"].append(index)
+        saver.request("a.json", chat)
+
+    assert save.calls == []
+    assert saver.is_dirty("a.json")
+
+    await saver.flush()
+
+    assert save.calls == [("a.json", {"messages": [0, 1, 2, 3, 4]})]
+    assert not saver.is_dirty()
+    await saver.flush()
+    assert len(save.calls) == 1
+
+
+async def test_debounce_writes_without_flush():
+    save = RecordingSave()
+    saver = ChatSaver(save, debounce=0.01)
+
+    saver.request("a.json", {"n": 1})
+    saver.request("b.json", {"n": 2})
+    await asyncio.sleep(0.1)
+
+    assert sorted(save.calls) == [("a.json", {"n": 1}), ("b.json", {"n": 2})]
+    assert not saver.is_dirty()
+
+
+async def test_flush_waits_for_write_in_progress():
+    started = asyncio.Event()
+    release = asyncio.Event()
+    written = []
+
+    async def slow_save(path, data):
+        started.set()
+        await release.wait()
+        written.append(path)
+
+    saver = ChatSaver(slow_save, debounce=0)
+    saver.request("a.json", {})
+    await started.wait()
+
+    flush = asyncio.ensure_future(saver.flush())
+    await asyncio.sleep(0.01)
+    assert not flush.done()
+
+    release.set()
+    await flush
+    assert written == ["a.json"]
+
+
+async def test_failed_write_stays_dirty_and_raises_on_flush():
+    save = RecordingSave(fail_times=1)
+    saver = ChatSaver(save, debounce=60)
+    saver.request("a.json", {"n": 1})
+
+    with pytest.raises(OSError, match="disk full"):
+        await saver.flush()
+    assert saver.is_dirty("a.json")
+
+    await saver.flush()
+    assert save.calls == [("a.json", {"n": 1})]
+
+
+async def test_session_manager_write_behind_coalesces_until_flush(tmp_path):
+    chat_path = str(tmp_path / "chat.json")
+    chat_data = load_chat(chat_path)
+    manager = SessionManager(
+        profile={"chat_storage": {"write_behind": True}},
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat=chat_data,
+        chat_path=chat_path,
+    )
+
+    chat_data["messages"].append({"role": "user", "content": ["hi"]})
+    assert await manager.save_current_chat() is True
+    chat_data["messages"].append({"role": "assistant", "content": ["hello"]})
+    assert await manager.save_current_chat() is True
+    assert not (tmp_path / "chat.json").exists()
+
+    await manager.flush_chat_saves()
+
+    saved = load_chat(chat_path)
+    assert [m["content"] for m in saved["messages"]] == [["hi"], ["hello"]]
+
+
+async def test_switching_chats_flushes_pending_save(tmp_path):
+    old_path = str(tmp_path / "old.json")
+    new_path = str(tmp_path / "new.json")
+    old_chat = load_chat(old_path)
+    manager = SessionManager(
+        profile={"chat_storage": {"write_behind": True}},
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat=old_chat,
+        chat_path=old_path,
+    )
+    old_chat["messages"].append({"role": "user", "content": ["draft"]})
+    await manager.save_current_chat()
+
+    orchestrator = ChatOrchestrator(manager)
+    await orchestrator._handle_open_chat(new_path, old_path, old_chat)
+
+    assert load_chat(old_path)["messages"][0]["content"] == ["draft"]
@@ -0,0 +1,153 @@
+"""Tests for the full-text search index and /find."""
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from polychat import chat_search
+from polychat.chat import add_assistant_message, add_user_message, load_chat
+from polychat.chat_search import index_path, search, sync_index
+from polychat.commands import CommandHandler
+
+ROLES = ("user", "assistant")
+
+
+def _entry_ids(chats_dir, chat):
+    with closing(sqlite3.connect(index_path(chats_dir))) as conn:
+        return [
+            row[0]
+            for row in conn.execute(
+                "SELECT id FROM entries WHERE chat = ? AND position IS NOT NULL ORDER BY position",
+                (chat,),
+            )
+        ]
+
+
+@pytest.fixture(autouse=True)
+def _forget_indexed_chats():
+    yield
+    chat_search._indexed.clear()
+
+
+def test_sync_indexes_messages_titles_and_summaries(tmp_path, write_chat):
+    write_chat(
+        tmp_path / "trip.json",
+        ["Plan the temples", "Visit Fushimi Inari"],
+        roles=ROLES,
+        title="Kyoto itinerary",
+    )
+    write_chat(
+        tmp_path / "code.json",
+        ["rename the parser"],
+        title="Refactor",
+        summary="Parser cleanup",
+    )
+
+    assert sync_index(str(tmp_path)) == 2
+    assert sync_index(str(tmp_path)) == 0
+
+    [hit] = search(str(tmp_path), "fushimi", 10)
+    assert (hit.chat, hit.title, hit.position, hit.role) == (
+        "trip.json", "Kyoto itinerary", 1, "assistant"
+    )
+    assert sorted((hit.chat, hit.role) for hit in search(str(tmp_path), "parser", 10)) == [
+        ("code.json", "summary"),
+        ("code.json", "user"),
+    ]
+    assert [hit.role for hit in search(str(tmp_path), "kyoto", 10)] == ["title"]
+    assert search(str(tmp_path), 'temples "unbalanced', 10) == []
+
+
+def test_sync_follows_edits_and_deletions(tmp_path, write_chat):
+    write_chat(tmp_path / "a.json", ["alpha"], title="A")
+    write_chat(tmp_path / "b.json", ["beta"], title="B")
+    sync_index(str(tmp_path))
+
+    write_chat(tmp_path / "a.json", ["gamma"], title="A")
+    (tmp_path / "b.json").unlink()
+    sync_index(str(tmp_path))
+
+    assert search(str(tmp_path), "alpha", 10) == []
+    assert search(str(tmp_path), "beta", 10) == []
+    assert [hit.chat for hit in search(str(tmp_path), "gamma", 10)] == ["a.json"]
+
+
+async def test_saves_update_only_changed_rows(mock_session_manager, tmp_path):
+    chat_path = str(tmp_path / "chat.json")
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    chat_data = load_chat(chat_path)
+    mock_session_manager.switch_chat(chat_path, chat_data)
+    add_user_message(chat_data, "first question about sqlite")
+    add_assistant_message(chat_data, "first answer", "claude-haiku-4-5")
+    await mock_session_manager.save_current_chat()
+    before = _entry_ids(tmp_path, "chat.json")
+
+    add_user_message(chat_data, "follow-up about fts5")
+    await mock_session_manager.save_current_chat()
+
+    after = _entry_ids(tmp_path, "chat.json")
+    assert after[:2] == before
+    assert [hit.position for hit in search(str(tmp_path), "fts5", 10)] == [2]
+    # Saved by this session, so a sync has nothing to re-read.
+    assert sync_index(str(tmp_path)) == 0
+
+    chat_data["messages"].pop(0)
+    await mock_session_manager.save_current_chat()
+    assert search(str(tmp_path), "sqlite", 10) == []
+    assert [hit.position for hit in search(str(tmp_path), "fts5", 10)] == [1]
+
+
+@pytest.mark.parametrize("chat_storage", [{}, {"lazy_window": 2}])
+async def test_first_save_after_opening_rewrites_only_new_rows(
+    mock_session_manager, tmp_path, write_chat, monkeypatch, chat_storage
+):
+    chat_path = str(tmp_path / "chat.json")
+    write_chat(chat_path, [f"question {n} about sqlite" for n in range(6)], roles=ROLES)
+    sync_index(str(tmp_path))
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    mock_session_manager.profile["chat_storage"] = chat_storage
+    rewrites = []
+    replace_rows = chat_search._replace_rows
+
+    def record_rewrite(conn, chat, stamp, metadata, start, rows):
+        rewrites.append((start, [position for position, _role, _text in rows]))
+        replace_rows(conn, chat, stamp, metadata, start, rows)
+
+    monkeypatch.setattr(chat_search, "_replace_rows", record_rewrite)
+
+    chat_data = await mock_session_manager.load_chat(chat_path)
+    mock_session_manager.switch_chat(chat_path, chat_data)
+    add_user_message(chat_data, "follow-up about fts5")
+    await mock_session_manager.save_current_chat()
+
+    assert rewrites == [(6, [6])]
+    assert [hit.position for hit in search(str(tmp_path), "fts5", 10)] == [6]
+    assert len(search(str(tmp_path), "sqlite", 10)) == 6
+
+
+async def test_find_command_shows_hex_ids_for_open_chat(
+    mock_session_manager, tmp_path, write_chat
+):
+    write_chat(
+        tmp_path / "other.json",
+        ["unrelated", "needle in another chat"],
+        roles=ROLES,
+        title="Other",
+    )
+    chat_path = str(tmp_path / "open.json")
+    write_chat(tmp_path / "open.json", ["needle here"], title="Open")
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    mock_session_manager.switch_chat(chat_path, load_chat(chat_path))
+    hex_id = mock_session_manager.get_message_hex_id(0)
+    handler = CommandHandler(mock_session_manager)
+
+    assert await handler.execute_command("/find") == "Usage: /find <words>"
+    result = await handler.execute_command("/find needle")
+
+    assert result.splitlines()[0] == "Matches for: needle"
+    assert f"  open.json [{hex_id}] user: needle here" in result
+    assert "  other.json #2 assistant: needle in another chat" in result
+    assert await handler.execute_command("/find nothing-like-this") == (
+        "No matches for: nothing-like-this"
+    )
@@ -0,0 +1,232 @@
+"""Tests for the segmented chat layout."""
+
+import json
+
+import pytest
+
+from polychat import chat_segments
+from polychat.chat import (
+    add_assistant_message,
+    add_user_message,
+    delete_message_and_following,
+    load_chat,
+    release_chat,
+    save_chat,
+)
+from polychat.chat_manager import archive_chat, delete_chat, list_chats, rename_chat
+from polychat.chat_storage import ChatStorageOptions, resolve_storage_options
+from polychat.chat_window import WindowedMessages
+from polychat.profile import validate_profile
+
+
+SEGMENTED = ChatStorageOptions(segments=4)
+SEGMENTED_LAZY = ChatStorageOptions(segments=4, lazy_window=3)
+
+
+def _manifest(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _record_writes(monkeypatch):
+    written = []
+    original = chat_segments.write_bytes_atomic
+
+    def _write(path, data):
+        written.append(path.name)
+        original(path, data)
+
+    monkeypatch.setattr(chat_segments, "write_bytes_atomic", _write)
+    return written
+
+
+@pytest.mark.asyncio
+async def test_segmented_save_writes_manifest_and_segments(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    data = await create_chat(path, turns=5, options=SEGMENTED)
+
+    manifest = _manifest(path)
+    assert "messages" not in manifest
+    assert manifest["layout"] == 4
+    assert manifest["segments"] == [
+        {"file": "000000.json", "count": 4},
+        {"file": "000001.json", "count": 4},
+        {"file": "000002.json", "count": 2},
+    ]
+    assert sorted(p.name for p in chat_segments.segments_dir(path).iterdir()) == [
+        "000000.json",
+        "000001.json",
+        "000002.json",
+    ]
+
+    reloaded = load_chat(str(path))
+    assert reloaded["metadata"]["updated_at"] == data["metadata"]["updated_at"]
+    assert [m["content"] for m in reloaded["messages"]] == [
+        m["content"] for m in data["messages"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_append_rewrites_only_tail_segment(tmp_path, monkeypatch, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=5, options=SEGMENTED)
+    release_chat(str(path))
+
+    data = load_chat(str(path), SEGMENTED)
+    written = _record_writes(monkeypatch)
+    add_user_message(data, "new question")
+    await save_chat(str(path), data, SEGMENTED)
+
+    assert written == ["000002.json", "chat.json"]
+    assert _manifest(path)["segments"][-1] == {"file": "000002.json", "count": 3}
+
+    written.clear()
+    add_assistant_message(data, "new answer", "claude-haiku-4-5")
+    add_user_message(data, "next question")
+    await save_chat(str(path), data, SEGMENTED)
+
+    assert written == ["000002.json", "000003.json", "chat.json"]
+    assert len(load_chat(str(path))["messages"]) == 13
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_reads_only_tail_segments(tmp_path, monkeypatch, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=5, options=SEGMENTED)
+    release_chat(str(path))
+
+    read = []
+    original = chat_segments.read_segment
+
+    def _read(chat_path, entry):
+        read.append(entry["file"])
+        return original(chat_path, entry)
+
+    monkeypatch.setattr(chat_segments, "read_segment", _read)
+    data = load_chat(str(path), SEGMENTED_LAZY)
+
+    assert read == ["000001.json", "000002.json"]
+    messages = data["messages"]
+    assert isinstance(messages, WindowedMessages)
+    assert messages.loaded_start == 4
+    assert len(messages) == 10
+
+    written = _record_writes(monkeypatch)
+    add_user_message(data, "new question")
+    await save_chat(str(path), data, SEGMENTED_LAZY)
+
+    assert written == ["000002.json", "chat.json"]
+    assert not messages.is_materialized
+    assert read == ["000001.json", "000002.json"]
+
+    assert messages[0]["content"] == ["question 0"]
+    assert read[-1] == "000000.json"
+
+
+@pytest.mark.asyncio
+async def test_rewind_rewrites_changed_segments_and_drops_orphans(
+    tmp_path, monkeypatch, create_chat
+):
+    path = tmp_path / "chat.json"
+    data = await create_chat(path, turns=5, options=SEGMENTED)
+
+    written = _record_writes(monkeypatch)
+    delete_message_and_following(data, 6)
+    await save_chat(str(path), data, SEGMENTED)
+
+    assert written == ["000001.json", "chat.json"]
+    assert [p.name for p in sorted(chat_segments.segments_dir(path).iterdir())] == [
+        "000000.json",
+        "000001.json",
+    ]
+    reloaded = load_chat(str(path))
+    assert [m["content"][0] for m in reloaded["messages"]] == [
+        "question 0",
+        "answer 0",
+        "question 1",
+        "answer 1",
+        "question 2",
+        "answer 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_monthly_layout_groups_messages_by_timestamp_month(tmp_path):
+    path = tmp_path / "chat.json"
+    options = ChatStorageOptions(segments="month")
+    data = load_chat(str(path), options)
+    for timestamp in (
+        "2026-08-31T23:00:00+00:00",
+        "2026-09-01T00:00:00+00:00",
+        "2026-09-15T00:00:00+00:00",
+        "2026-10-01T00:00:00+00:00",
+    ):
+        add_user_message(data, timestamp)
+        data["messages"][-1]["timestamp"] = timestamp
+    await save_chat(str(path), data, options)
+
+    assert _manifest(path)["segments"] == [
+        {"file": "2026-08.json", "count": 1},
+        {"file": "2026-09.json", "count": 2},
+        {"file": "2026-10.json", "count": 1},
+    ]
+    assert len(load_chat(str(path))["messages"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_full_save_folds_segments_back(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=5, options=SEGMENTED)
+
+    data = load_chat(str(path))
+    await save_chat(str(path), data)
+
+    assert not chat_segments.segments_dir(path).exists()
+    assert len(_manifest(path)["messages"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_chat_manager_handles_segment_directory(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=5, options=SEGMENTED)
+
+    (listed,) = list_chats(str(tmp_path))
+    assert listed["message_count"] == 10
+
+    new_path = rename_chat(str(path), "renamed", str(tmp_path))
+    assert chat_segments.segments_dir(new_path).is_dir()
+    assert not chat_segments.segments_dir(path).exists()
+    assert len(load_chat(new_path)["messages"]) == 10
+
+    delete_chat(new_path)
+    assert not chat_segments.segments_dir(new_path).exists()
+
+
+@pytest.mark.asyncio
+async def test_archive_folds_segments_into_archive(tmp_path, create_chat):
+    path = tmp_path / "chat.json"
+    await create_chat(path, turns=5, options=SEGMENTED)
+
+    result = archive_chat(str(path), "gz")
+
+    assert not chat_segments.segments_dir(path).exists()
+    assert len(load_chat(result["archive_path"])["messages"]) == 10
+
+
+def test_resolve_and_validate_segments_option():
+    assert resolve_storage_options({"chat_storage": {"segments": 500}}).segments == 500
+    assert resolve_storage_options({"chat_storage": {"segments": "month"}}).segments == "month"
+    assert resolve_storage_options({"chat_storage": {"segments": "week"}}).segments is None
+
+    base = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "~/chats",
+        "logs_dir": "~/logs",
+        "api_keys": {},
+    }
+    validate_profile({**base, "chat_storage": {"segments": "month"}})
+    validate_profile({**base, "chat_storage": {"segments": 500}})
+    with pytest.raises(ValueError, match="chat_storage.segments"):
+        validate_profile({**base, "chat_storage": {"segments": "week"}})
+    with pytest.raises(ValueError, match="chat_storage.segments"):
+        validate_profile({**base, "chat_storage": {"segments": 0}})
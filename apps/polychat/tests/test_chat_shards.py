@@ -0,0 +1,147 @@
+"""Tests for month-sharded chat directories."""
+
+import json
+from datetime import datetime
+
+from polychat import chat_shards
+from polychat.chat import load_chat
+from polychat.chat_manager import (
+    find_sharded_chat,
+    generate_chat_filename,
+    list_chats,
+    migrate_chats_to_shards,
+    rename_chat,
+)
+
+CREATED_AT = "2026-03-15T12:00:00+00:00"
+
+
+def _local_shard(created_at):
+    when = datetime.fromisoformat(created_at).astimezone()
+    return f"{when.year:04d}/{when.month:02d}"
+
+
+def test_generate_chat_filename_in_current_shard(tmp_path):
+    path = generate_chat_filename(str(tmp_path), "project", sharded=True)
+
+    now = datetime.now()
+    assert path == str(tmp_path / f"{now.year:04d}" / f"{now.month:02d}" / "project.json")
+
+
+def test_list_and_resolve_sharded_chats(tmp_path, write_chat):
+    write_chat(tmp_path / "flat.json")
+    write_chat(tmp_path / "2026" / "03" / "sharded.json", title="Sharded")
+    write_chat(tmp_path / "notes" / "ignored.json")
+
+    chats = {chat["filename"]: chat for chat in list_chats(str(tmp_path))}
+
+    assert set(chats) == {"flat.json", "2026/03/sharded.json"}
+    assert chats["2026/03/sharded.json"]["title"] == "Sharded"
+    assert chats["2026/03/sharded.json"]["path"] == str(tmp_path / "2026" / "03" / "sharded.json")
+    assert find_sharded_chat(str(tmp_path), "sharded.json") == tmp_path / "2026" / "03" / "sharded.json"
+    assert find_sharded_chat(str(tmp_path), "missing.json") is None
+
+
+def test_rename_keeps_chat_in_its_shard(tmp_path, write_chat):
+    old_path = tmp_path / "2026" / "03" / "old.json"
+    write_chat(old_path)
+
+    new_path = rename_chat(str(old_path), "new", str(tmp_path))
+
+    assert new_path == str((tmp_path / "2026" / "03" / "new.json").resolve())
+
+
+def test_migration_moves_chats_and_sidecars_by_created_at(tmp_path, write_chat):
+    write_chat(tmp_path / "a.json", created_at=CREATED_AT, title="Chat")
+    (tmp_path / "a.json.journal").write_text("", encoding="utf-8")
+    write_chat(tmp_path / "open.json")
+    shard = _local_shard(CREATED_AT)
+    write_chat(tmp_path / shard / "a.json")
+
+    moved, failed = migrate_chats_to_shards(str(tmp_path), exclude=[str(tmp_path / "open.json")])
+
+    assert failed == []
+    assert moved == [(str(tmp_path / "a.json"), str(tmp_path / shard / "a_1.json"))]
+    assert (tmp_path / shard / "a_1.json.journal").exists()
+    assert not (tmp_path / "a.json").exists()
+    assert (tmp_path / "open.json").exists()
+    assert not chat_shards.progress_path(tmp_path).exists()
+    assert load_chat(str(tmp_path / shard / "a_1.json"))["metadata"]["title"] == "Chat"
+
+
+def test_migration_resumes_interrupted_plan(tmp_path, write_chat):
+    write_chat(tmp_path / "2026" / "03" / "done.json")
+    write_chat(tmp_path / "2026" / "03" / "half.json")
+    (tmp_path / "half.json.journal").write_text("", encoding="utf-8")
+    write_chat(tmp_path / "todo.json")
+    write_chat(tmp_path / "new.json")
+    chat_shards.progress_path(tmp_path).write_text(
+        "\n".join(json.dumps(record) for record in [
+            {"op": "move", "src": "done.json", "dst": "2026/03/done.json"},
+            {"op": "move", "src": "half.json", "dst": "2026/03/half.json"},
+            {"op": "move", "src": "todo.json", "dst": "2026/03/todo.json"},
+            {"op": "planned"},
+            {"op": "done", "src": "done.json"},
+        ]) + "\n",
+        encoding="utf-8",
+    )
+
+    moved, failed = migrate_chats_to_shards(str(tmp_path))
+
+    assert failed == []
+    assert sorted(new for _old, new in moved) == [
+        str(tmp_path / "2026" / "03" / "half.json"),
+        str(tmp_path / "2026" / "03" / "todo.json"),
+    ]
+    assert (tmp_path / "2026" / "03" / "half.json.journal").exists()
+    # Chats added after the plan wait for the next migration.
+    assert (tmp_path / "new.json").exists()
+    assert not chat_shards.progress_path(tmp_path).exists()
+
+
+def test_resumed_migration_leaves_open_chat_pending(tmp_path, write_chat):
+    write_chat(tmp_path / "open.json")
+    write_chat(tmp_path / "todo.json")
+    chat_shards.progress_path(tmp_path).write_text(
+        "\n".join(json.dumps(record) for record in [
+            {"op": "move", "src": "open.json", "dst": "2026/03/open.json"},
+            {"op": "move", "src": "todo.json", "dst": "2026/03/todo.json"},
+            {"op": "planned"},
+        ]) + "\n",
+        encoding="utf-8",
+    )
+
+    moved, failed = migrate_chats_to_shards(
+        str(tmp_path), exclude=[str(tmp_path / "open.json")]
+    )
+
+    assert failed == []
+    assert moved == [
+        (str(tmp_path / "todo.json"), str(tmp_path / "2026" / "03" / "todo.json"))
+    ]
+    assert (tmp_path / "open.json").exists()
+    assert chat_shards.read_pending_moves(tmp_path) == [
+        ("open.json", "2026/03/open.json")
+    ]
+
+    # Once the chat is closed, the next migration finishes the plan.
+    moved, failed = migrate_chats_to_shards(str(tmp_path))
+    assert moved == [
+        (str(tmp_path / "open.json"), str(tmp_path / "2026" / "03" / "open.json"))
+    ]
+    assert not chat_shards.progress_path(tmp_path).exists()
+
+
+def test_incomplete_plan_is_discarded(tmp_path, write_chat):
+    write_chat(tmp_path / "a.json", created_at=CREATED_AT)
+    chat_shards.progress_path(tmp_path).write_text(
+        json.dumps({"op": "move", "src": "a.json", "dst": "1999/01/a.json"}) + "\n",
+        encoding="utf-8",
+    )
+
+    moved, failed = migrate_chats_to_shards(str(tmp_path))
+
+    assert failed == []
+    assert moved == [
+        (str(tmp_path / "a.json"), str(tmp_path / _local_shard(CREATED_AT) / "a.json"))
+    ]
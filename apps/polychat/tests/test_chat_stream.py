@@ -0,0 +1,143 @@
+"""Tests for the incremental chat file reader."""
+
+import json
+
+import pytest
+
+from polychat import chat_stream
+from polychat.chat import load_chat
+from polychat.chat_storage import ChatStorageOptions
+from polychat.chat_stream import (
+    MessageStream,
+    iter_chat_items,
+    read_chat_metadata,
+    read_chat_summary,
+    scan_chat_summary,
+)
+from polychat.chat_window import WindowedMessages
+
+
+def _chat_data(message_count=12):
+    return {
+        "metadata": {"title": "Ünïcode ✓", "created_at": None, "count": 12345},
+        "messages": [
+            {
+                "role": "user" if index % 2 == 0 else "assistant",
+                "content": [f"message {index}", "x" * (index * 37), "日本語 \"quoted\""],
+                "tokens": 1000 + index,
+                "flag": index % 3 == 0,
+                "extra": None,
+            }
+            for index in range(message_count)
+        ],
+        "trailing": [1.5, 2, "three"],
+    }
+
+
+def _collect(path, chunk_size):
+    result = {}
+    for key, value in iter_chat_items(path, chunk_size=chunk_size):
+        result[key] = list(value) if isinstance(value, MessageStream) else value
+    return result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_stream_matches_json_load(tmp_path, chunk_size, indent):
+    path = tmp_path / "chat.json"
+    data = _chat_data()
+    path.write_text(json.dumps(data, indent=indent, ensure_ascii=False), encoding="utf-8")
+
+    assert _collect(path, chunk_size) == data
+
+
+def test_abandoned_message_stream_is_skipped(tmp_path):
+    path = tmp_path / "chat.json"
+    path.write_text(json.dumps(_chat_data()), encoding="utf-8")
+
+    seen = {}
+    for key, value in iter_chat_items(path, chunk_size=16):
+        if isinstance(value, MessageStream):
+            seen[key] = next(value)
+        else:
+            seen[key] = value
+
+    assert seen["messages"]["content"][0] == "message 0"
+    assert seen["trailing"] == [1.5, 2, "three"]
+
+
+def test_read_chat_metadata_stops_before_messages(tmp_path):
+    path = tmp_path / "chat.json"
+    path.write_text('{"metadata": {"title": "T"}, "messages": [ not json', encoding="utf-8")
+
+    assert read_chat_metadata(path) == {"title": "T"}
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        read_chat_summary(path)
+
+
+def test_read_chat_summary_counts_messages(tmp_path):
+    path = tmp_path / "chat.json"
+    path.write_text(json.dumps(_chat_data()), encoding="utf-8")
+
+    metadata, message_count = read_chat_summary(path)
+
+    assert metadata["title"] == "Ünïcode ✓"
+    assert message_count == 12
+
+
+@pytest.mark.parametrize("message_count", [0, 1, 12])
+def test_scan_chat_summary_counts_without_decoding_messages(tmp_path, monkeypatch, message_count):
+    data = _chat_data(message_count)
+    del data["trailing"]
+    for message in data["messages"]:
+        message["citations"] = [{"url": "https://example.com", "title": "{nested}\n    {"}]
+    path = tmp_path / "chat.json"
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def full_parse(_path):
+        raise AssertionError("fast path expected")
+
+    monkeypatch.setattr(chat_stream, "read_chat_summary", full_parse)
+
+    assert scan_chat_summary(path) == (data["metadata"], message_count)
+
+
+@pytest.mark.parametrize(
+    "dump",
+    [
+        lambda data: json.dumps(data),
+        lambda data: json.dumps(data, indent=2),
+        lambda data: json.dumps({k: v for k, v in data.items() if k != "trailing"}, indent=4),
+        lambda data: json.dumps({k: v for k, v in data.items() if k != "trailing"}, indent=2) + "\n",
+    ],
+)
+def test_scan_chat_summary_falls_back_for_other_layouts(tmp_path, dump):
+    path = tmp_path / "chat.json"
+    path.write_text(dump(_chat_data()), encoding="utf-8")
+
+    assert scan_chat_summary(path) == read_chat_summary(path)
+    assert scan_chat_summary(path, prefix_size=16) == read_chat_summary(path)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["{ invalid json }", '{"metadata": {}} extra', '{"metadata": {}, "messages": [{}', ""],
+)
+def test_stream_rejects_invalid_documents(tmp_path, text):
+    path = tmp_path / "chat.json"
+    path.write_text(text, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        _collect(path, chunk_size=4)
+
+
+def test_lazy_load_streams_window_and_pages_in_older(tmp_path):
+    path = tmp_path / "chat.json"
+    path.write_text(json.dumps(_chat_data()), encoding="utf-8")
+
+    lazy = load_chat(str(path), ChatStorageOptions(lazy_window=3))
+    messages = lazy["messages"]
+
+    assert isinstance(messages, WindowedMessages)
+    assert messages.loaded_start == 9
+    assert list(messages) == load_chat(str(path))["messages"]
@@ -0,0 +1,202 @@
+"""Tests for lazy, windowed chat loading."""
+
+import json
+
+import pytest
+
+from polychat import chat_journal
+from polychat.app_state import SessionState, initialize_message_hex_ids
+from polychat.chat import (
+    add_user_message,
+    delete_message_and_following,
+    get_messages_for_ai,
+    load_chat,
+    save_chat,
+)
+from polychat.chat_storage import ChatStorageOptions, resolve_storage_options
+from polychat.chat_window import WindowedMessages, iter_loaded_messages
+from polychat.hex_id import build_hex_map, get_message_index
+from polychat.profile import validate_profile
+
+
+LAZY = ChatStorageOptions(lazy_window=4)
+LAZY_JOURNAL = ChatStorageOptions(journal=True, lazy_window=4)
+
+
+def _stored_messages(count=10):
+    # Stored as plain strings, which loading normalizes into lines.
+    return [
+        {
+            "timestamp": "2026-01-01T00:00:00+00:00",
+            "role": "user" if index % 2 == 0 else "assistant",
+            "content": f"message {index}",
+        }
+        for index in range(count)
+    ]
+
+
+def _contents(messages):
+    return [message["content"][0] for message in messages]
+
+
+def test_window_serves_tail_without_loading_older():
+    calls = []
+
+    def load_older():
+        calls.append(True)
+        return [{"content": ["0"]}, {"content": ["1"]}]
+
+    messages = WindowedMessages([{"content": ["2"]}, {"content": ["3"]}], 2, load_older)
+
+    assert len(messages) == 4
+    assert messages[-1]["content"] == ["3"]
+    assert messages[2:] == [{"content": ["2"]}, {"content": ["3"]}]
+    messages.append({"content": ["4"]})
+    del messages[4:]
+    assert [index for index, _ in iter_loaded_messages(messages)] == [2, 3]
+    assert calls == []
+
+    assert messages[0]["content"] == ["0"]
+    assert calls == [True]
+    assert messages.is_materialized
+    assert _contents(messages) == ["0", "1", "2", "3"]
+
+
+def test_window_materializes_for_older_mutation():
+    messages = WindowedMessages([{"content": ["2"]}], 2, lambda: [{"content": ["0"]}, {"content": ["1"]}])
+
+    del messages[0]
+
+    assert _contents(messages) == ["1", "2"]
+    assert messages.older_edits == 1
+
+
+def test_lazy_load_normalizes_only_window(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+
+    data = load_chat(str(path), LAZY)
+    messages = data["messages"]
+
+    assert isinstance(messages, WindowedMessages)
+    assert len(messages) == 10
+    assert messages.loaded_start == 6
+    assert messages[-1]["content"] == ["message 9"]
+
+    assert _contents(get_messages_for_ai(data)) == [f"message {i}" for i in range(10)]
+    assert messages.is_materialized
+
+
+def test_short_chat_loads_as_plain_list(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages(3))
+
+    assert isinstance(load_chat(str(path), LAZY)["messages"], list)
+
+
+def test_hex_ids_cover_loaded_messages_and_paged_in_messages(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+    data = load_chat(str(path), LAZY)
+    session = SessionState(
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        helper_ai="claude",
+        helper_model="claude-haiku-4-5",
+        profile={},
+        chat=data,
+    )
+
+    initialize_message_hex_ids(session)
+
+    hex_map = build_hex_map(data["messages"])
+    assert sorted(hex_map) == [6, 7, 8, 9]
+    assert get_message_index(hex_map[7], data["messages"]) == 7
+    assert not data["messages"].is_materialized
+
+    data["messages"].materialize()
+
+    assert sorted(build_hex_map(data["messages"])) == list(range(10))
+    assert len(session.hex_id_set) == 10
+
+
+@pytest.mark.asyncio
+async def test_lazy_save_writes_every_message(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+
+    data = load_chat(str(path), LAZY)
+    delete_message_and_following(data, 8)
+    add_user_message(data, "new")
+    await save_chat(str(path), data, LAZY)
+
+    assert isinstance(data["messages"], WindowedMessages)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert _contents(saved["messages"]) == [f"message {i}" for i in range(8)] + ["new"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_save_skips_unchanged_chat(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+    before = path.read_bytes()
+
+    data = load_chat(str(path), LAZY)
+    await save_chat(str(path), data, LAZY)
+
+    assert not data["messages"].is_materialized
+    assert path.read_bytes() == before
+
+    add_user_message(data, "new")
+    await save_chat(str(path), data, LAZY)
+    await save_chat(str(path), data, LAZY)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert _contents(saved["messages"])[-2:] == ["message 9", "new"]
+    assert saved["metadata"] == data["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_journal_uses_absolute_indices(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+
+    data = load_chat(str(path), LAZY_JOURNAL)
+    del data["messages"][7]
+    add_user_message(data, "new")
+    await save_chat(str(path), data, LAZY_JOURNAL)
+
+    assert not data["messages"].is_materialized
+    assert _contents(load_chat(str(path))["messages"]) == (
+        [f"message {i}" for i in range(10) if i != 7] + ["new"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_lazy_journal_rewrites_snapshot_after_older_edit(tmp_path, write_chat):
+    path = tmp_path / "chat.json"
+    write_chat(path, _stored_messages())
+
+    data = load_chat(str(path), LAZY_JOURNAL)
+    del data["messages"][1]
+    await save_chat(str(path), data, LAZY_JOURNAL)
+
+    assert not chat_journal.journal_path(path).exists()
+    assert len(json.loads(path.read_text(encoding="utf-8"))["messages"]) == 9
+
+
+def test_lazy_window_option_and_validation():
+    base = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "~/chats",
+        "logs_dir": "~/logs",
+        "api_keys": {},
+    }
+    validate_profile({**base, "chat_storage": {"lazy_window": 200}})
+    assert resolve_storage_options({"chat_storage": {"lazy_window": 200}}).lazy_window == 200
+    assert resolve_storage_options({}).lazy_window is None
+
+    with pytest.raises(ValueError, match="chat_storage.lazy_window"):
+        validate_profile({**base, "chat_storage": {"lazy_window": 0}})
+    with pytest.raises(ValueError, match="chat_storage.lazy_window"):
+        validate_profile({**base, "chat_storage": {"lazy_window": True}})
@@ -27,7 +27,7 @@ async def test_new_chat_no_open_prompts_and_opens_on_default_yes(mock_session_ma
     with pytest.MonkeyPatch.context() as mp:
         mp.setattr(
             "polychat.commands.chat_files.generate_chat_filename",
-            lambda _chats_dir, _name: "/test/chats/new-chat.json",
+            lambda _chats_dir, _name, **_kwargs: "/test/chats/new-chat.json",
         )
         result = await command_handler.new_chat("")
 
@@ -45,7 +45,7 @@ async def test_new_chat_no_open_can_create_without_switch(mock_session_manager):
     with pytest.MonkeyPatch.context() as mp:
         mp.setattr(
             "polychat.commands.chat_files.generate_chat_filename",
-            lambda _chats_dir, _name: "/test/chats/new-chat.json",
+            lambda _chats_dir, _name, **_kwargs: "/test/chats/new-chat.json",
         )
         mp.setattr(
             "polychat.commands.chat_files.load_chat",
@@ -70,7 +70,7 @@ async def test_new_chat_with_open_chat_skips_prompt(mock_session_manager):
     with pytest.MonkeyPatch.context() as mp:
         mp.setattr(
             "polychat.commands.chat_files.generate_chat_filename",
-            lambda _chats_dir, _name: "/test/chats/new-chat.json",
+            lambda _chats_dir, _name, **_kwargs: "/test/chats/new-chat.json",
         )
         result = await command_handler.new_chat("")
 
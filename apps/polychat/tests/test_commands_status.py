@@ -2,6 +2,8 @@
 
 import pytest
 
+from polychat.attachments import store_attachment
+
 
 @pytest.mark.asyncio
 async def test_show_status_all_fields_align_values(command_handler, mock_session_manager):
@@ -20,6 +22,7 @@ async def test_show_status_all_fields_align_values(command_handler, mock_session
         "Title:",
         "Summary:",
         "Messages:",
+        "Context:",
         "Updated:",
         "Assistant:",
         "Helper:",
@@ -34,7 +37,7 @@ async def test_show_status_all_fields_align_values(command_handler, mock_session
     field_lines = [line for line in result.splitlines() if any(line.startswith(prefix) for prefix in field_prefixes)]
 
     # Should have all fields
-    assert len(field_lines) >= 18
+    assert len(field_lines) >= 19
 
     value_starts = []
     for line in field_lines:
@@ -59,3 +62,25 @@ async def test_show_status_system_prompt_none_has_readable_spacing(command_handl
     assert "System:    none" in result
 
 
+
+
+@pytest.mark.asyncio
+async def test_show_status_context_counts_attachment_text(
+    command_handler, mock_session_manager, tmp_path
+):
+    """The context estimate should include attachments inlined at send time."""
+    source = tmp_path / "notes.md"
+    source.write_text("attached text " * 500, encoding="utf-8")
+    mock_session_manager.profile["chats_dir"] = str(tmp_path)
+    message = {"role": "user", "content": ["hi"]}
+    mock_session_manager.chat["messages"] = [message]
+    plain = await command_handler.show_status("")
+
+    message["attachments"] = [store_attachment(tmp_path, source)]
+    attached = await command_handler.show_status("")
+
+    def context_tokens(status):
+        line = next(line for line in status.splitlines() if line.startswith("Context:"))
+        return int(line.split()[1].lstrip("~").replace(",", ""))
+
+    assert context_tokens(attached) > context_tokens(plain) + 500
@@ -0,0 +1,161 @@
+"""Tests for fitting chat history into a token budget."""
+
+import pytest
+
+from polychat.attachments import store_attachment
+from polychat.context_budget import fit_context
+from polychat.constants import TOKEN_MESSAGE_OVERHEAD
+from polychat.orchestrator import ChatOrchestrator
+from polychat.orchestrator_types import SendAction
+from polychat.session_manager import SessionManager
+
+
+class _WordEstimator:
+    name = "words"
+    exact = True
+
+    def count(self, text):
+        return len(text.split())
+
+
+# Each message below costs 10 tokens: 6 words plus the framing overhead.
+WORDS = 10 - TOKEN_MESSAGE_OVERHEAD
+
+
+def _turns(count):
+    messages = []
+    for index in range(count):
+        messages.append({"role": "user", "content": [f"q{index} " + "w " * (WORDS - 1)]})
+        messages.append({"role": "assistant", "content": [f"a{index} " + "w " * (WORDS - 1)]})
+    messages.append({"role": "user", "content": ["new " + "w " * (WORDS - 1)]})
+    return messages
+
+
+def _first_words(messages):
+    return [message["content"][0].split()[0] for message in messages]
+
+
+def test_everything_fits_within_budget():
+    messages = _turns(3)
+
+    fit = fit_context(messages, budget=1000, strategy="tail", estimator=_WordEstimator())
+
+    assert fit.messages == messages
+    assert fit.tokens == 70
+    assert fit.dropped_messages == 0
+    assert not fit.dropped_turns
+
+
+def test_tail_keeps_newest_whole_turns():
+    fit = fit_context(_turns(5), budget=55, strategy="tail", estimator=_WordEstimator())
+
+    assert _first_words(fit.messages) == ["q3", "a3", "q4", "a4", "new"]
+    assert fit.tokens == 50
+    assert fit.dropped_turns == range(1, 4)
+    assert fit.dropped_messages == 6
+    assert fit.describe_dropped() == (
+        "Context: left out turns 1-3 (6 messages) to fit ~55 tokens"
+    )
+
+
+def test_first_and_tail_keeps_first_turn():
+    fit = fit_context(
+        _turns(5), budget=55, strategy="first_and_tail", estimator=_WordEstimator()
+    )
+
+    assert _first_words(fit.messages) == ["q0", "a0", "q4", "a4", "new"]
+    assert fit.dropped_turns == range(2, 5)
+
+
+def test_system_prompt_counts_against_budget():
+    fit = fit_context(
+        _turns(2),
+        budget=45,
+        strategy="tail",
+        estimator=_WordEstimator(),
+        system_prompt=" ".join(["s"] * 10),
+    )
+
+    assert _first_words(fit.messages) == ["q1", "a1", "new"]
+    assert fit.tokens == 40
+
+
+def test_newest_turn_is_kept_even_over_budget():
+    fit = fit_context(_turns(2), budget=5, strategy="first_and_tail", estimator=_WordEstimator())
+
+    assert _first_words(fit.messages) == ["new"]
+    assert fit.dropped_turns == range(1, 3)
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_trims_context_and_reports_dropped_turns(tmp_path):
+    manager = SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+            "ai_limits": {"models": {"claude-haiku-4-5": {"max_context_tokens": 40}}},
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat={"metadata": {}, "messages": []},
+        chat_path=str(tmp_path / "chat.json"),
+    )
+    for index in range(4):
+        manager.chat["messages"].append({"role": "user", "content": [f"question {index}"]})
+        manager.chat["messages"].append({"role": "assistant", "content": [f"answer {index}"]})
+    orchestrator = ChatOrchestrator(manager)
+
+    action = await orchestrator.handle_user_message(
+        "next question", manager.chat_path, manager.chat
+    )
+
+    assert isinstance(action, SendAction)
+    assert [message["content"] for message in action.messages] == [
+        ["question 2"],
+        ["answer 2"],
+        ["question 3"],
+        ["answer 3"],
+        ["next question"],
+    ]
+    assert action.context_notice == (
+        "[Context: left out turns 1-2 (4 messages) to fit ~40 tokens]"
+    )
+    assert len(manager.chat["messages"]) == 9
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_counts_attachment_text_against_budget(tmp_path):
+    manager = SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+            "ai_limits": {"models": {"claude-haiku-4-5": {"max_context_tokens": 40}}},
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat={"metadata": {}, "messages": []},
+        chat_path=str(tmp_path / "chat.json"),
+    )
+    source = tmp_path / "notes.md"
+    source.write_text("attached text " * 100, encoding="utf-8")
+    for index in range(2):
+        manager.chat["messages"].append({"role": "user", "content": [f"question {index}"]})
+        manager.chat["messages"].append({"role": "assistant", "content": [f"answer {index}"]})
+    manager.chat["messages"][2]["attachments"] = [store_attachment(tmp_path, source)]
+    orchestrator = ChatOrchestrator(manager)
+
+    action = await orchestrator.handle_user_message(
+        "next question", manager.chat_path, manager.chat
+    )
+
+    assert isinstance(action, SendAction)
+    assert [message["content"] for message in action.messages] == [["next question"]]
+    assert action.context_notice == (
+        "[Context: left out turns 1-2 (4 messages) to fit ~40 tokens]"
+    )
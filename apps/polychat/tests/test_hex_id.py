@@ -1,7 +1,10 @@
 """Tests for hex_id module."""
 
 import pytest
+from polychat.chat_message import Message
+from polychat.profile import validate_profile
 from polychat.hex_id import (
+    derive_hex_id,
     generate_hex_id,
     is_hex_id,
     assign_hex_ids,
@@ -127,5 +130,46 @@ def test_hex_id_workflow():
     assert get_hex_id(5, hex_map) == new_hex
 
 
+
+def test_derive_hex_id_is_deterministic():
+    """Derived IDs depend only on timestamp, role, and content."""
+    message = {"timestamp": "2026-02-02T10:00:00+00:00", "role": "user", "content": ["Hi", "there"]}
+
+    first = derive_hex_id(message, set())
+
+    assert len(first) == 4
+    assert derive_hex_id(Message(message), set()) == first
+    assert derive_hex_id({**message, "content": ["Hi"]}, set()) != first
+
+
+def test_derive_hex_id_extends_on_collision():
+    """A taken prefix makes the next message's ID longer, never reused."""
+    message = {"timestamp": "t", "role": "user", "content": ["same"]}
+    existing = set()
+
+    first = derive_hex_id(message, existing)
+    second = derive_hex_id(message, existing)
+    existing.add(derive_hex_id({"timestamp": "u", "role": "user", "content": []}, set()))
+
+    assert second.startswith(first) and len(second) == 5
+    assert existing >= {first, second}
+    assert len({derive_hex_id(message, existing) for _ in range(40)}) == 40
+
+
+def test_validate_profile_accepts_stable_hex_ids():
+    """chat_storage.stable_hex_ids is a known boolean option."""
+    base = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "~/chats",
+        "logs_dir": "~/logs",
+        "api_keys": {},
+    }
+    validate_profile({**base, "chat_storage": {"stable_hex_ids": True}})
+
+    with pytest.raises(ValueError, match="chat_storage.stable_hex_ids"):
+        validate_profile({**base, "chat_storage": {"stable_hex_ids": "yes"}})
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,100 @@
+"""Conformance tests for the persistence JSON codec.
+
+Every available backend must produce byte-identical output to the stdlib
+encoder so switching backends never churns chat files in git.
+"""
+
+import json
+
+import pytest
+
+from polychat import chat_index, json_codec
+from polychat.json_codec import available_codecs, get_codec, set_codec
+
+
+CODECS = list(available_codecs().values())
+
+
+def _sample_chat(message_count=50):
+    return {
+        "metadata": {
+            "title": "Ünïcode ✓ 日本語",
+            "summary": None,
+            "system_prompt": "@/prompts/system/default.txt",
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "updated_at": None,
+        },
+        "messages": [
+            {
+                "timestamp": "2026-01-01T00:00:00+00:00",
+                "role": "user" if index % 2 == 0 else "assistant",
+                "model": "claude-haiku-4-5",
+                "content": [f"line {index}", "", "tab\there \"quoted\" \\ back/slash", "😀"],
+                "citations": [{"title": "t", "url": "https://example.com/?q=1&r=2"}],
+                "details": {"status": 429, "retry": True, "empty": {}, "list": []},
+            }
+            for index in range(message_count)
+        ],
+    }
+
+
+EDGE_VALUES = [
+    _sample_chat(),
+    {},
+    [],
+    {"empty": {}, "nested": [[], {}, [{}]]},
+    "\x00\x01\x1f\x7f   é 😀",
+    [0.1, 100.0, -0.0, 0.30000000000000004, 1.5e-4, 9.999e15],
+    [1e-05, 1e16, 1e300, 5e-324, float("nan"), float("inf"), float("-inf")],
+    [0, -1, 2**63 - 1, -(2**63), 2**64 - 1, 2**64, -(2**63) - 1, 10**40],
+    {1: "int key", "2": "str key"},
+    {"tuple": (1, 2)},
+    [True, False, None],
+]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("value", EDGE_VALUES)
+def test_pretty_output_is_byte_identical_to_stdlib(codec, value):
+    expected = json.dumps(value, indent=2, ensure_ascii=False)
+
+    assert codec.dumps_pretty(value) == expected
+    assert codec.dumps_pretty_bytes(value) == expected.encode("utf-8")
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("value", EDGE_VALUES)
+def test_compact_output_is_byte_identical_to_stdlib(codec, value):
+    assert codec.dumps_compact(value) == json.dumps(
+        value, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_indexed_chat_dump_is_byte_identical(codec, monkeypatch):
+    monkeypatch.setattr(json_codec, "_codec", codec)
+    data = _sample_chat()
+
+    payload, _metadata_span, _message_spans = chat_index.dump_indexed(data)
+
+    assert payload == json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_loads_round_trip_and_errors(codec):
+    data = _sample_chat(message_count=3)
+
+    assert codec.loads(json.dumps(data)) == data
+    assert codec.loads(json.dumps(data).encode("utf-8")) == data
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{ invalid json }")
+
+
+def test_set_codec_selects_and_resets(monkeypatch):
+    monkeypatch.setattr(json_codec, "_codec", None)
+
+    assert set_codec("json") is json_codec.STDLIB_CODEC
+    assert get_codec() is json_codec.STDLIB_CODEC
+    assert set_codec(None).name == CODECS[-1].name
+    with pytest.raises(ValueError, match="not available"):
+        set_codec("nope")
@@ -117,7 +117,9 @@ class TestNewChatSignal:
                 assert mock_save.await_count == 2
 
             # Should load new chat
-            mock_chat.load_chat.assert_called_once_with("/test/new-chat.json")
+            mock_chat.load_chat.assert_called_once_with(
+                "/test/new-chat.json", orchestrator.manager.storage_options
+            )
 
             # Should return continue action with new chat
             assert isinstance(action, ContinueAction)
@@ -141,7 +143,9 @@ class TestNewChatSignal:
                 mock_save.assert_called_once()
 
             # Should load new chat
-            mock_chat.load_chat.assert_called_once_with("/test/new-chat.json")
+            mock_chat.load_chat.assert_called_once_with(
+                "/test/new-chat.json", orchestrator.manager.storage_options
+            )
 
             assert isinstance(action, ContinueAction)
             assert action.chat_path == "/test/new-chat.json"
@@ -153,8 +157,12 @@ class TestOpenChatSignal:
     @pytest.mark.asyncio
     async def test_open_chat_signal(self, orchestrator, sample_chat_data):
         """Test opening existing chat."""
-        with patch("polychat.orchestrator.chat") as mock_chat:
-            mock_chat.load_chat = MagicMock(return_value={"messages": [{"role": "user", "content": "Test"}]})
+        with patch.object(
+            orchestrator.manager,
+            "load_chat",
+            new_callable=AsyncMock,
+            return_value={"messages": [{"role": "user", "content": "Test"}]},
+        ) as mock_load:
             with patch.object(orchestrator.manager, "save_current_chat", new_callable=AsyncMock) as mock_save:
                 action = await orchestrator.handle_command_response(
                     CommandSignal(kind="open_chat", chat_path="/test/existing-chat.json"),
@@ -166,7 +174,7 @@ class TestOpenChatSignal:
                 mock_save.assert_called_once()
 
             # Should load selected chat
-            mock_chat.load_chat.assert_called_once_with("/test/existing-chat.json")
+            mock_load.assert_awaited_once_with("/test/existing-chat.json")
 
             # Should return continue action
             assert isinstance(action, ContinueAction)
@@ -767,6 +767,31 @@ def test_validate_profile_rejects_unknown_ai_limit_key():
         validate_profile(profile)
 
 
+def test_validate_profile_accepts_context_budget_and_model_blocks():
+    profile = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "~/chats",
+        "logs_dir": "~/logs",
+        "api_keys": {},
+        "ai_limits": {
+            "default": {"max_context_tokens": 32000, "context_strategy": "first_and_tail"},
+            "models": {"claude-haiku-4-5": {"max_context_tokens": 16000}},
+        },
+    }
+
+    validate_profile(profile)
+
+    profile["ai_limits"]["default"]["context_strategy"] = "middle"
+    with pytest.raises(ValueError, match="context_strategy"):
+        validate_profile(profile)
+
+    profile["ai_limits"]["default"]["context_strategy"] = "tail"
+    profile["ai_limits"]["models"] = {"claude-haiku-4-5": 16000}
+    with pytest.raises(ValueError, match="'ai_limits.models.claude-haiku-4-5' must be a dictionary"):
+        validate_profile(profile)
+
+
 def test_create_profile_template_uses_file_prompts_and_mixed_api_key_examples(tmp_path):
     """Generated template should be directly useful and avoid companion API-key files."""
     profile_path = tmp_path / "polychat-profile.json"
@@ -119,6 +119,26 @@ class TestSystemPromptLoading:
         assert prompt_path == str(prompt_file)
         assert warning is None
 
+    def test_load_system_prompt_keeps_raw_home_relative_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        prompt_file = tmp_path / "raw" / "path.txt"
+        prompt_file.parent.mkdir()
+        prompt_file.write_text("Home prompt", encoding="utf-8")
+        profile_file = tmp_path / "profile.json"
+        profile_file.write_text(
+            json.dumps({"system_prompt": "~/raw/path.txt"}), encoding="utf-8"
+        )
+        profile_data = {"system_prompt": str(prompt_file)}
+
+        prompt, prompt_path, warning = SessionManager.load_system_prompt(
+            profile_data,
+            str(profile_file),
+        )
+
+        assert prompt == "Home prompt"
+        assert prompt_path == "~/raw/path.txt"
+        assert warning is None
+
 
 class TestPropertyAccess:
     """Test property-based access (preferred interface)."""
@@ -616,6 +636,104 @@ class TestHexIdManagement:
         assert popped is not None
         assert manager.hex_id_set == set()
 
+    def test_pop_message_handles_compact_messages(self):
+        """Loaded chats hold chat_message.Message objects, not dicts."""
+        from polychat.chat_message import Message
+
+        manager = SessionManager(
+            profile={},
+            current_ai="claude",
+            current_model="claude-haiku-4-5",
+            chat={"messages": [Message({"role": "user", "content": ["Hello"]})]},
+        )
+        popped_hex = manager.get_message_hex_id(0)
+
+        popped = manager.pop_message()
+
+        assert popped == {"role": "user", "content": ["Hello"]}
+        assert popped_hex not in manager.hex_id_set
+
+
+    def test_message_index_lookup_uses_hex_index(self, monkeypatch):
+        """Hex ID lookups should not scan messages."""
+        from polychat import hex_id as hex_id_module
+
+        manager = SessionManager(
+            profile={},
+            current_ai="claude",
+            current_model="claude-haiku-4-5",
+            chat={"messages": [{"role": "user", "content": str(i)} for i in range(50)]},
+        )
+        manager.chat["messages"].append({"role": "assistant", "content": "Hi"})
+        appended_hex = manager.assign_message_hex_id(50)
+        monkeypatch.setattr(
+            hex_id_module, "build_hex_map", lambda _messages: pytest.fail("scanned messages")
+        )
+
+        assert manager.get_message_index(appended_hex) == 50
+        assert manager.get_message_index(manager.get_message_hex_id(7)) == 7
+
+    def test_delete_messages_remaps_hex_index(self):
+        """Deleting several messages should keep hex lookups aligned."""
+        manager = SessionManager(
+            profile={},
+            current_ai="claude",
+            current_model="claude-haiku-4-5",
+            chat={"messages": [{"role": "user", "content": str(i)} for i in range(6)]},
+        )
+        hex_ids = [manager.get_message_hex_id(i) for i in range(6)]
+
+        assert manager.delete_messages([4, 1, 2]) == 3
+
+        assert [m["content"] for m in manager.chat["messages"]] == ["0", "3", "5"]
+        assert [manager.get_message_index(h) for h in hex_ids] == [0, None, None, 1, None, 2]
+        assert manager.hex_id_set == {hex_ids[0], hex_ids[3], hex_ids[5]}
+
+    def test_message_index_recovers_from_direct_edits(self):
+        """Messages changed behind the manager's back are re-indexed on lookup."""
+        manager = SessionManager(
+            profile={},
+            current_ai="claude",
+            current_model="claude-haiku-4-5",
+            chat={"messages": [{"role": "user", "content": str(i)} for i in range(3)]},
+        )
+        last_hex = manager.get_message_hex_id(2)
+        del manager.chat["messages"][0]
+        manager.chat["messages"][0]["hex_id"] = "f00"
+
+        assert manager.get_message_index(last_hex) == 1
+        assert manager.get_message_index("f00") == 0
+        assert manager.get_message_index("fff") is None
+
+
+    def test_stable_hex_ids_are_assigned_lazily(self):
+        """With stable_hex_ids, IDs are derived on first use and repeat across loads."""
+        def make_manager():
+            return SessionManager(
+                profile={"chat_storage": {"stable_hex_ids": True}},
+                current_ai="claude",
+                current_model="claude-haiku-4-5",
+                chat={
+                    "messages": [
+                        {"timestamp": f"t{i}", "role": "user", "content": [str(i)]}
+                        for i in range(5)
+                    ]
+                },
+            )
+
+        manager = make_manager()
+        assert manager.hex_id_set == set()
+        assert "hex_id" not in manager.chat["messages"][3]
+
+        third = manager.get_message_hex_id(3)
+        assert manager.chat["messages"][3]["hex_id"] == third
+        assert manager.hex_id_set == {third}
+
+        # A fresh session finds the same ID without it having been shown.
+        other = make_manager()
+        assert other.get_message_index(third) == 3
+        assert other.get_message_hex_id(1) == manager.get_message_hex_id(1)
+
 
 class TestProviderCaching:
     """Test provider instance caching."""
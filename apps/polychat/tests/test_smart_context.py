@@ -0,0 +1,295 @@
+"""Tests for Smart Context message summaries."""
+
+import asyncio
+
+import pytest
+
+from polychat import helper_ai
+from polychat.chat_compact import set_checkpoint
+from polychat.chat_manager import archive_chat, rename_chat
+from polychat.chat_window import WindowedMessages
+from polychat.commands import CommandHandler
+from polychat.orchestrator import ChatOrchestrator
+from polychat.orchestrator_types import SendAction
+from polychat.profile import validate_profile
+from polychat.session_manager import SessionManager
+from polychat.smart_context import (
+    SmartContextOptions,
+    Summarizer,
+    SummaryStore,
+    pending_jobs,
+    resolve_smart_context_options,
+    substitute_summaries,
+    summaries_path,
+)
+
+OPTIONS = SmartContextOptions(recent_messages=2, min_chars=10, concurrency=2)
+
+
+def _messages(count):
+    roles = ("user", "assistant")
+    return [
+        {"role": roles[index % 2], "content": [f"message {index} " + "text " * 5]}
+        for index in range(count)
+    ]
+
+
+def _manager(tmp_path, **smart_context):
+    return SessionManager(
+        profile={
+            "default_ai": "claude",
+            "models": {"claude": "claude-haiku-4-5"},
+            "chats_dir": str(tmp_path),
+            "logs_dir": str(tmp_path),
+            "api_keys": {},
+            "smart_context": {"recent_messages": 2, "min_chars": 10, **smart_context},
+        },
+        current_ai="claude",
+        current_model="claude-haiku-4-5",
+        chat={"metadata": {"created_at": None}, "messages": _messages(5)},
+        chat_path=str(tmp_path / "chat.json"),
+    )
+
+
+def _fake_helper(monkeypatch, calls=None):
+    async def _invoke(helper, model, profile, messages, system_prompt=None, task="", session=None):
+        prompt = messages[0]["content"]
+        if calls is not None:
+            calls.append(prompt)
+        return "short"
+
+    monkeypatch.setattr(helper_ai, "invoke_helper_ai", _invoke)
+
+
+def test_resolve_options():
+    assert resolve_smart_context_options({}) is None
+    options = resolve_smart_context_options({"smart_context": {"recent_messages": 5, "auto": False}})
+    assert options.recent_messages == 5
+    assert options.concurrency == 4
+    assert not options.auto
+
+
+def test_validate_profile_rejects_bad_smart_context():
+    profile = {
+        "default_ai": "claude",
+        "models": {"claude": "claude-haiku-4-5"},
+        "chats_dir": "/tmp",
+        "logs_dir": "/tmp",
+        "api_keys": {},
+        "smart_context": {"recent_messages": 0},
+    }
+    with pytest.raises(ValueError, match="positive integer"):
+        validate_profile(profile)
+    profile["smart_context"] = {"window": 3}
+    with pytest.raises(ValueError, match="Unknown smart_context key"):
+        validate_profile(profile)
+
+
+def test_store_survives_reload_and_truncated_record(tmp_path):
+    chat_path = str(tmp_path / "chat.json")
+    store = SummaryStore(chat_path)
+    message = {"role": "user", "content": ["a long question"]}
+    store.add(store.key(message), "q", "helper-model")
+    with open(summaries_path(chat_path), "a", encoding="utf-8") as f:
+        f.write('{"key": "cut sh')
+
+    reloaded = SummaryStore(chat_path)
+    assert reloaded.get(message) == "q"
+    other = {"role": "assistant", "content": ["a long question"]}
+    assert reloaded.get(other) is None
+
+    reloaded.add(reloaded.key(other), "a", "helper-model")
+    assert len(SummaryStore(chat_path)) == 2
+
+
+def test_substitute_keeps_recent_messages_in_full(tmp_path):
+    messages = _messages(5)
+    store = SummaryStore(str(tmp_path / "chat.json"))
+    for message in messages:
+        store.add(store.key(message), "short", "helper-model")
+
+    sent, replaced = substitute_summaries(messages, store, OPTIONS)
+
+    assert replaced == 3
+    assert [message["content"] for message in sent[:3]] == [["short"]] * 3
+    assert sent[3:] == messages[3:]
+    assert [message["role"] for message in sent] == [m["role"] for m in messages]
+
+
+@pytest.mark.asyncio
+async def test_summarizer_is_bounded_and_resumable(tmp_path):
+    messages = _messages(8)
+    store = SummaryStore(str(tmp_path / "chat.json"))
+    in_flight = peak = 0
+
+    async def _summarize(job):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if "message 3" in job.text:
+            raise RuntimeError("helper down")
+        return f"summary of {job.text.split()[1]}"
+
+    summarizer = Summarizer(store, _summarize, concurrency=2)
+    assert summarizer.start(pending_jobs(messages, store, OPTIONS), model="helper-model")
+    await summarizer.wait()
+
+    assert peak == 2
+    assert summarizer.error == "helper down"
+    done = len(store)
+    assert 0 < done < 6
+
+    # A new run only asks for what is still missing.
+    async def _recover(job):
+        return f"summary of {job.text.split()[1]}"
+
+    resumed = Summarizer(SummaryStore(str(tmp_path / "chat.json")), _recover, concurrency=2)
+    jobs = pending_jobs(messages, resumed.store, OPTIONS)
+    assert len(jobs) == 6 - done
+    resumed.start(jobs, model="helper-model")
+    await resumed.wait()
+    assert resumed.error is None
+    assert pending_jobs(messages, resumed.store, OPTIONS) == []
+
+
+@pytest.mark.asyncio
+async def test_prompt_includes_neighbors(tmp_path, monkeypatch):
+    calls = []
+    _fake_helper(monkeypatch, calls)
+    manager = _manager(tmp_path)
+
+    assert manager.start_message_summaries() == 3
+    await manager.message_summarizer.wait()
+
+    assert len(calls) == 3
+    first = calls[0]
+    assert "(none)" in first and "message 0" in first and "message 1" in first
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_sends_summaries_and_summarizes_after_response(
+    tmp_path, monkeypatch
+):
+    _fake_helper(monkeypatch)
+    manager = _manager(tmp_path)
+    orchestrator = ChatOrchestrator(manager)
+
+    await orchestrator.handle_ai_response(
+        "reply " * 5, manager.chat_path, manager.chat, "normal"
+    )
+    await manager.message_summarizer.wait()
+    action = await orchestrator.handle_user_message(
+        "next question", manager.chat_path, manager.chat
+    )
+
+    assert isinstance(action, SendAction)
+    contents = [message["content"] for message in action.messages]
+    # Message 4 only left the recent window with the new question.
+    chat_messages = manager.chat["messages"]
+    assert contents[:4] == [["short"]] * 4
+    assert contents[4:] == [
+        chat_messages[4]["content"],
+        chat_messages[5]["content"],
+        ["next question"],
+    ]
+    assert len(manager.chat["messages"]) == 7
+
+
+@pytest.mark.asyncio
+async def test_auto_off_waits_for_command(tmp_path, monkeypatch):
+    _fake_helper(monkeypatch)
+    manager = _manager(tmp_path, auto=False)
+    handler = CommandHandler(manager)
+
+    assert manager.start_message_summaries(auto=True) == 0
+    assert await handler.execute_command("/smart") == (
+        "Smart Context: 0 of 3 older messages summarized\n"
+        "Sent in full: newest 2 messages"
+    )
+    assert await handler.execute_command("/smart run") == (
+        "Summarizing 3 message(s) in the background"
+    )
+    await manager.message_summarizer.wait()
+    assert (await handler.execute_command("/smart")).startswith(
+        "Smart Context: 3 of 3 older messages summarized"
+    )
+    assert await handler.execute_command("/smart clear") == "Cleared 3 message summaries"
+    assert not (tmp_path / "chat.json.summaries").exists()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_exchange_is_never_summarized(tmp_path, monkeypatch):
+    _fake_helper(monkeypatch)
+    manager = _manager(tmp_path)
+    set_checkpoint(manager.chat, "what was said " * 10, 2, "helper-model")
+
+    assert [job.text for job in manager.pending_message_summaries()] == [
+        manager.chat["messages"][2]["content"][0]
+    ]
+    assert manager.start_message_summaries() == 1
+    await manager.message_summarizer.wait()
+    assert (await CommandHandler(manager).execute_command("/smart")).startswith(
+        "Smart Context: 1 of 1 older messages summarized"
+    )
+
+
+@pytest.mark.asyncio
+async def test_auto_check_keeps_lazy_window_and_resumes(tmp_path, monkeypatch):
+    _fake_helper(monkeypatch)
+    manager = _manager(tmp_path)
+    messages = _messages(8)
+    paged_in = []
+
+    def _load_older():
+        paged_in.append(True)
+        return messages[:3]
+
+    window = WindowedMessages(messages[3:], 3, _load_older)
+    manager.chat["messages"] = window
+
+    # Only loaded messages older than the recent ones: 3, 4 and 5.
+    assert manager.start_message_summaries(auto=True) == 3
+    await manager.message_summarizer.wait()
+
+    window.extend(_messages(10)[8:])
+    assert manager.start_message_summaries(auto=True) == 2
+    await manager.message_summarizer.wait()
+
+    # Checks resume from the first message the previous one queued (6), so
+    # this edit to an earlier message goes unnoticed.
+    window[3]["content"] = ["message 3 edited " + "text " * 5]
+    window.extend(_messages(12)[10:])
+    jobs = manager.pending_message_summaries(resume=True)
+    assert [job.text.split()[1] for job in jobs] == ["8", "9"]
+    assert not paged_in
+
+    # A full check pages in the older messages and finds the edit.
+    assert manager.start_message_summaries() == 6
+    await manager.message_summarizer.wait()
+    assert paged_in
+
+
+@pytest.mark.asyncio
+async def test_smart_command_when_off(tmp_path):
+    manager = _manager(tmp_path)
+    del manager.profile["smart_context"]
+
+    assert await CommandHandler(manager).execute_command("/smart") == (
+        'Smart Context is off (add a "smart_context" block to your profile)'
+    )
+
+
+def test_summaries_follow_rename_and_archive(tmp_path):
+    chat_file = tmp_path / "old.json"
+    chat_file.write_text('{"metadata": {}, "messages": []}', encoding="utf-8")
+    (tmp_path / "old.json.summaries").write_text("", encoding="utf-8")
+
+    new_path = rename_chat(str(chat_file), "new.json", str(tmp_path))
+    assert (tmp_path / "new.json.summaries").exists()
+
+    result = archive_chat(new_path, "gz")
+    assert (tmp_path / "new.json.gz.summaries").exists()
+    assert not (tmp_path / "new.json.summaries").exists()
+    assert result["archive_path"].endswith("new.json.gz")
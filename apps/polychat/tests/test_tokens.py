@@ -0,0 +1,113 @@
+"""Tests for local token estimates."""
+
+import pytest
+
+from polychat import tokens
+from polychat.chat_message import Message
+from polychat.constants import TOKEN_MESSAGE_OVERHEAD
+from polychat.tokens import (
+    HeuristicEstimator,
+    count_message_tokens,
+    estimate_tokens,
+    get_estimator,
+    message_text,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    tokens.clear_token_cache()
+    yield
+    tokens.clear_token_cache()
+
+
+class _CountingEstimator:
+    name = "counting"
+    exact = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+def test_heuristic_counts_ascii_and_other_characters():
+    estimator = HeuristicEstimator("test", chars_per_token=4.0, tokens_per_other_char=1.0)
+
+    assert estimator.count("") == 0
+    assert estimator.count("abcdefgh") == 2
+    assert estimator.count("abcd" + "日本語") == 4
+
+
+def test_message_text_handles_packed_and_plain_content():
+    packed = Message({"role": "user", "content": ["one", "two"]})
+
+    assert message_text(packed) == "one\ntwo"
+    assert message_text({"role": "user", "content": ["one", "two"]}) == "one\ntwo"
+    assert message_text({"role": "user", "content": "plain"}) == "plain"
+
+
+def test_counts_are_cached_by_text():
+    estimator = _CountingEstimator()
+    messages = [Message({"role": "user", "content": [f"message {i}"]}) for i in range(3)]
+
+    first = sum(count_message_tokens(message, estimator) for message in messages)
+    messages.append(Message({"role": "assistant", "content": ["a reply"]}))
+    second = sum(count_message_tokens(message, estimator) for message in messages)
+
+    assert estimator.calls == 4
+    assert first == 3 * (2 + TOKEN_MESSAGE_OVERHEAD)
+    assert second == first + 2 + TOKEN_MESSAGE_OVERHEAD
+
+    # Same text in a different message object still hits the cache.
+    count_message_tokens({"role": "user", "content": ["message 0"]}, estimator)
+    assert estimator.calls == 4
+
+
+def test_estimate_tokens_includes_system_prompt_and_marks_heuristics(monkeypatch):
+    monkeypatch.setattr(tokens, "tiktoken", None)
+    monkeypatch.setattr(tokens, "_estimators", {})
+    messages = [{"role": "user", "content": ["x" * 35]}]
+
+    estimate = estimate_tokens(messages, "claude", system_prompt="y" * 7)
+
+    assert estimate.tokens == 10 + TOKEN_MESSAGE_OVERHEAD + 2
+    assert not estimate.exact
+    assert estimate.estimator == "heuristic:claude"
+    assert estimate.format() == f"~{estimate.tokens:,}"
+
+
+def test_openai_uses_tiktoken_when_available(monkeypatch):
+    class _Encoding:
+        name = "o200k_base"
+
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    class _Tiktoken:
+        @staticmethod
+        def get_encoding(name):
+            return _Encoding()
+
+    monkeypatch.setattr(tokens, "tiktoken", _Tiktoken)
+    monkeypatch.setattr(tokens, "_estimators", {})
+
+    estimator = get_estimator("openai")
+    assert estimator.exact
+    assert estimator.name == "tiktoken:o200k_base"
+    assert estimator.count("three word text") == 3
+    assert not get_estimator("gemini").exact
+
+
+def test_missing_tiktoken_encoding_falls_back_to_heuristic(monkeypatch):
+    class _Tiktoken:
+        @staticmethod
+        def get_encoding(name):
+            raise OSError("offline")
+
+    monkeypatch.setattr(tokens, "tiktoken", _Tiktoken)
+    monkeypatch.setattr(tokens, "_estimators", {})
+
+    assert get_estimator("openai").name == "heuristic:openai"